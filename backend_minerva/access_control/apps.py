@@ -5,3 +5,6 @@ class AccessControlConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'access_control'
     verbose_name = 'Controle de Acesso'
+
+    def ready(self):
+        import access_control.signals
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_closure(apps, schema_editor):
+    # Modelos históricos não têm OrganizationalUnitClosure.sync(); o fecho sai só do `path`
+    from access_control.models import closure_rows
+
+    unit_model = apps.get_model("access_control", "OrganizationalUnit")
+    closure_model = apps.get_model("access_control", "OrganizationalUnitClosure")
+    closure_model.objects.bulk_create([
+        closure_model(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=depth)
+        for pk, path in unit_model.objects.exclude(path="").values_list("pk", "path")
+        for ancestor_id, descendant_id, depth in closure_rows(pk, path)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('access_control', '0002_sync_legacy_org_data'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrganizationalUnitClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField(verbose_name='Profundidade')),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='access_control.organizationalunit', verbose_name='Ancestral')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='access_control.organizationalunit', verbose_name='Descendente')),
+            ],
+            options={
+                'verbose_name': 'Fecho da Árvore Organizacional',
+                'verbose_name_plural': 'Fecho da Árvore Organizacional',
+                'indexes': [models.Index(fields=['descendant'], name='orgunit_closure_desc_idx')],
+                'unique_together': {('ancestor', 'descendant')},
+            },
+        ),
+        migrations.RunPython(backfill_closure, migrations.RunPython.noop),
+    ]
@@ -9,6 +9,12 @@ from django.utils import timezone
 PATH_STEP_WIDTH = 6  # zero-padded segment width, supports up to 999,999 siblings per level
 
 
+def closure_rows(unit_id: int, path: str) -> list[tuple[int, int, int]]:
+    """Linhas (ancestral, descendente, profundidade) da unidade, derivadas do `path` (inclui ela mesma)."""
+    ancestor_ids = [int(segment) for segment in path.split("/") if segment] or [unit_id]
+    return [(ancestor_id, unit_id, len(ancestor_ids) - 1 - index) for index, ancestor_id in enumerate(ancestor_ids)]
+
+
 class OrganizationalUnit(models.Model):
     """Nó de uma árvore organizacional de N níveis (Presidência -> Diretoria -> Gerência -> ...).
 
@@ -79,11 +85,14 @@ class OrganizationalUnit(models.Model):
             old_path = self.path
             self.path = new_path
             super().save(update_fields=["path"])
+            moved = [self]
             if not is_new and old_path:
                 # Unidade movida na árvore: repropaga o path para toda a subárvore existente.
                 for descendant in OrganizationalUnit.objects.filter(path__startswith=old_path).exclude(pk=self.pk):
                     descendant.path = new_path + descendant.path[len(old_path):]
                     descendant.save(update_fields=["path"])
+                    moved.append(descendant)
+            OrganizationalUnitClosure.sync(moved)
 
     def get_descendant_ids(self, include_self: bool = True) -> list[int]:
         if not self.path:
@@ -95,6 +104,47 @@ class OrganizationalUnit(models.Model):
         return ids
 
 
+class OrganizationalUnitClosure(models.Model):
+    """Fecho transitivo da árvore: uma linha por par (ancestral, descendente), incluindo (u, u).
+
+    Derivado do `path` e mantido em OrganizationalUnit.save(); "subárvores das
+    unidades do usuário" vira um único join indexado por `ancestor`, em vez de um
+    `path__startswith` por vínculo (ver access_control/services/access_scope.py).
+    """
+
+    ancestor = models.ForeignKey(
+        OrganizationalUnit, on_delete=models.CASCADE, related_name="descendant_links", verbose_name="Ancestral",
+    )
+    descendant = models.ForeignKey(
+        OrganizationalUnit, on_delete=models.CASCADE, related_name="ancestor_links", verbose_name="Descendente",
+    )
+    depth = models.PositiveIntegerField("Profundidade")
+
+    class Meta:
+        verbose_name = "Fecho da Árvore Organizacional"
+        verbose_name_plural = "Fecho da Árvore Organizacional"
+        unique_together = [("ancestor", "descendant")]
+        indexes = [
+            models.Index(fields=["descendant"], name="orgunit_closure_desc_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
+    @classmethod
+    def sync(cls, units) -> None:
+        """Regrava as linhas das unidades informadas (criadas ou movidas) a partir do `path`."""
+        units = [unit for unit in units if unit.path]
+        if not units:
+            return
+        cls.objects.filter(descendant_id__in=[unit.pk for unit in units]).delete()
+        cls.objects.bulk_create([
+            cls(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=depth)
+            for unit in units
+            for ancestor_id, descendant_id, depth in closure_rows(unit.pk, unit.path)
+        ])
+
+
 class Action(models.Model):
     """Catálogo de ações que um Cargo pode autorizar (Criar, Editar, Aprovar, ...)."""
 
@@ -0,0 +1,120 @@
+"""Escopo de acesso materializado por usuário.
+
+Tudo que define o que um usuário enxerga é resolvido uma vez e guardado no cache
+do Django (Redis em produção) até alguma escrita relevante invalidar:
+
+    full_access      superuser ou vínculo ativo com cargo PRESIDENTE
+    unit_ids         unidades dos vínculos ativos + subárvores, por um único join
+                     em OrganizationalUnitClosure (em vez de um `path__startswith`
+                     por vínculo)
+    employee_scope   escopo legado sobre funcionários, ex: ('direction', 3) — um
+                     filtro de igualdade indexado (employee.utils.access_control)
+    group_names      grupos Django do usuário
+    membership_unit_ids / role_ids / action_codes
+                     vínculos ativos, cargos e ações permitidas, usados pelo
+                     PermissionService para compartilhamentos e `can()`
+
+Invalidação (access_control/signals.py): vínculos, grupos, o próprio usuário e o
+funcionário dele invalidam só aquele usuário; movimentação de unidades, cargos e
+grupos renomeados invalidam todos (nova versão global). A chave é apagada na hora
+e de novo no commit, para que nenhuma leitura concorrente regrave o escopo antigo.
+
+Uso:
+    scope = get_access_scope(request.user)
+    queryset.filter(unit_id__in=scope.unit_ids)
+"""
+from dataclasses import dataclass
+from typing import FrozenSet, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.caching import bump_namespace, make_key
+
+CACHE_NAMESPACE = "access_scope"
+
+PRESIDENT_ROLE_CODE = "PRESIDENTE"
+
+
+@dataclass(frozen=True)
+class AccessScope:
+    user_id: Optional[int]
+    full_access: bool = False
+    unit_ids: FrozenSet[int] = frozenset()
+    employee_scope: Tuple[str, Optional[int]] = ("none", None)
+    group_names: Tuple[str, ...] = ()
+    membership_unit_ids: FrozenSet[int] = frozenset()
+    role_ids: FrozenSet[int] = frozenset()
+    action_codes: FrozenSet[str] = frozenset()
+
+
+def _ttl() -> int:
+    return getattr(settings, "ACCESS_SCOPE_CACHE_TTL", 3600)
+
+
+def _key(user_id: int) -> str:
+    return make_key(CACHE_NAMESPACE, "user", user_id)
+
+
+def build_access_scope(user) -> AccessScope:
+    """Resolve o escopo direto do banco (sem cache)."""
+    from employee.utils.access_control import resolve_employee_scope
+    from ..models import Membership, OrganizationalUnitClosure, Role
+
+    memberships = list(
+        Membership.objects.filter(user=user, is_active=True).values_list(
+            "organizational_unit_id", "role_id", "role__code"
+        )
+    )
+    membership_unit_ids = frozenset(unit_id for unit_id, _, _ in memberships)
+    role_ids = frozenset(role_id for _, role_id, _ in memberships)
+    full_access = user.is_superuser or any(code == PRESIDENT_ROLE_CODE for _, _, code in memberships)
+
+    unit_ids: FrozenSet[int] = frozenset()
+    action_codes: FrozenSet[str] = frozenset()
+    if memberships and not full_access:
+        unit_ids = frozenset(
+            OrganizationalUnitClosure.objects.filter(
+                ancestor_id__in=membership_unit_ids
+            ).values_list("descendant_id", flat=True)
+        )
+        action_codes = frozenset(
+            Role.actions.through.objects.filter(role_id__in=role_ids).values_list("action__code", flat=True)
+        )
+
+    group_names = tuple(user.groups.values_list("name", flat=True))
+    return AccessScope(
+        user_id=user.pk,
+        full_access=full_access,
+        unit_ids=unit_ids,
+        employee_scope=resolve_employee_scope(user, group_names),
+        group_names=group_names,
+        membership_unit_ids=membership_unit_ids,
+        role_ids=role_ids,
+        action_codes=action_codes,
+    )
+
+
+def get_access_scope(user) -> AccessScope:
+    if not getattr(user, "is_authenticated", False) or user.pk is None:
+        return AccessScope(user_id=None)
+
+    key = _key(user.pk)
+    scope = cache.get(key)
+    if scope is None:
+        scope = build_access_scope(user)
+        cache.set(key, scope, _ttl())
+    return scope
+
+
+def invalidate_access_scope(*user_ids: Optional[int]) -> None:
+    keys = [_key(user_id) for user_id in user_ids if user_id is not None]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_all_access_scopes() -> None:
+    bump_namespace(CACHE_NAMESPACE, immediate=True)
@@ -1,11 +1,22 @@
+from collections import defaultdict
+from typing import Iterable
+
 from django.contrib.contenttypes.models import ContentType
 from django.db.models import Q, QuerySet
 from django.utils import timezone
 
-from ..models import AccessGrant, Membership, OrganizationalUnit, Role
+from ..models import AccessGrant, OrganizationalUnit
+from .access_scope import AccessScope, get_access_scope
+
+_CONTEXT_ATTR = "_access_scope_context"
 
 
-PRESIDENT_ROLE_CODE = "PRESIDENTE"
+def _resolve_attr(obj, path: str):
+    for part in path.split("__"):
+        if obj is None:
+            return None
+        obj = getattr(obj, part)
+    return obj
 
 
 class PermissionService:
@@ -15,15 +26,34 @@ class PermissionService:
     aqui: 1) superuser/Presidente -> acesso total; 2) hierarquia organizacional;
     3) compartilhamento por unidade; 4) compartilhamento por cargo;
     5) compartilhamento por usuário; 6) negar.
+
+    Vínculos, cargos, ações e unidades acessíveis vêm do escopo de acesso em cache
+    (access_scope) e ficam memorizados no próprio objeto do usuário durante a
+    requisição — como o `_perm_cache` do ModelBackend do Django. Depois disso cada
+    verificação custa no máximo a consulta de compartilhamentos.
     """
 
+    @staticmethod
+    def context(user) -> AccessScope:
+        """Contexto de autorização do usuário, carregado uma vez por objeto de usuário."""
+        if not getattr(user, "is_authenticated", False):
+            return get_access_scope(user)
+        scope = getattr(user, _CONTEXT_ATTR, None)
+        if scope is None:
+            scope = get_access_scope(user)
+            setattr(user, _CONTEXT_ATTR, scope)
+        return scope
+
+    @staticmethod
+    def reset(user) -> None:
+        """Descarta o contexto memorizado (ex: após alterar vínculos do usuário)."""
+        user.__dict__.pop(_CONTEXT_ATTR, None)
+
     @staticmethod
     def is_president(user) -> bool:
         if getattr(user, "is_superuser", False):
             return True
-        return Membership.objects.filter(
-            user=user, is_active=True, role__code=PRESIDENT_ROLE_CODE,
-        ).exists()
+        return PermissionService.context(user).full_access
 
     @staticmethod
     def accessible_unit_ids(user) -> set[int]:
@@ -34,24 +64,24 @@ class PermissionService:
         if PermissionService.is_president(user):
             return set(OrganizationalUnit.objects.values_list("id", flat=True))
 
-        unit_ids: set[int] = set()
-        memberships = Membership.objects.filter(user=user, is_active=True).select_related(
-            "organizational_unit"
-        )
-        for membership in memberships:
-            unit_ids.update(membership.organizational_unit.get_descendant_ids(include_self=True))
-        return unit_ids
+        return set(PermissionService.context(user).unit_ids)
 
     @staticmethod
-    def _active_grants_for_resource(resource) -> QuerySet:
+    def _active_grants() -> QuerySet:
         today = timezone.now().date()
+        return AccessGrant.objects.filter(is_active=True, start_date__lte=today, end_date__gte=today)
+
+    @staticmethod
+    def _active_grants_for_resource(resource) -> QuerySet:
         content_type = ContentType.objects.get_for_model(resource.__class__)
-        return AccessGrant.objects.filter(
-            content_type=content_type,
-            object_id=resource.pk,
-            is_active=True,
-            start_date__lte=today,
-            end_date__gte=today,
+        return PermissionService._active_grants().filter(content_type=content_type, object_id=resource.pk)
+
+    @staticmethod
+    def _grant_target_filter(user, scope: AccessScope) -> Q:
+        return (
+            Q(target_user=user)
+            | Q(target_role_id__in=scope.role_ids)
+            | Q(target_organizational_unit_id__in=scope.membership_unit_ids)
         )
 
     @staticmethod
@@ -60,32 +90,63 @@ class PermissionService:
         if not getattr(user, "is_authenticated", False):
             return False
 
+        scope = PermissionService.context(user)
+
         # 1. Presidente / superuser sempre tem acesso total.
-        if PermissionService.is_president(user):
+        if user.is_superuser or scope.full_access:
             return True
 
         # 2. Hierarquia: a unidade dona do recurso está entre as unidades acessíveis?
-        if resource_unit_id is not None and resource_unit_id in PermissionService.accessible_unit_ids(user):
+        if resource_unit_id is not None and resource_unit_id in scope.unit_ids:
             return True
 
         # 3, 4, 5. Compartilhamento vigente por unidade, por cargo ou por usuário.
-        grants = PermissionService._active_grants_for_resource(resource)
-        user_unit_ids = set(
-            Membership.objects.filter(user=user, is_active=True).values_list("organizational_unit_id", flat=True)
-        )
-        user_role_ids = set(
-            Membership.objects.filter(user=user, is_active=True).values_list("role_id", flat=True)
-        )
-        has_grant = grants.filter(
-            Q(target_user=user)
-            | Q(target_role_id__in=user_role_ids)
-            | Q(target_organizational_unit_id__in=user_unit_ids)
+        # 6. Negar por padrão.
+        return PermissionService._active_grants_for_resource(resource).filter(
+            PermissionService._grant_target_filter(user, scope)
         ).exists()
-        if has_grant:
-            return True
 
-        # 6. Negar por padrão.
-        return False
+    @staticmethod
+    def has_access_to_many(user, resources: Iterable, unit_field: str | None = None) -> dict:
+        """Versão em lote de `has_access_to`: `{recurso: bool}` para todos os recursos.
+
+        `unit_field` é o atributo (ou caminho com "__", ex: "management__organizational_unit_id")
+        que leva de cada recurso ao id da OrganizationalUnit dona. Os compartilhamentos
+        de todos os recursos que a hierarquia não resolve saem de uma única consulta.
+        """
+        resources = list(resources)
+        if not getattr(user, "is_authenticated", False):
+            return {resource: False for resource in resources}
+
+        scope = PermissionService.context(user)
+        if user.is_superuser or scope.full_access:
+            return {resource: True for resource in resources}
+
+        result = {}
+        pending: dict[int, set] = defaultdict(set)
+        for resource in resources:
+            unit_id = _resolve_attr(resource, unit_field) if unit_field else None
+            result[resource] = unit_id is not None and unit_id in scope.unit_ids
+            if not result[resource]:
+                content_type = ContentType.objects.get_for_model(resource.__class__)
+                pending[content_type.pk].add(resource.pk)
+
+        if pending:
+            resource_filter = Q()
+            for content_type_id, object_ids in pending.items():
+                resource_filter |= Q(content_type_id=content_type_id, object_id__in=object_ids)
+            granted = set(
+                PermissionService._active_grants()
+                .filter(resource_filter)
+                .filter(PermissionService._grant_target_filter(user, scope))
+                .values_list("content_type_id", "object_id")
+            )
+            for resource in resources:
+                if not result[resource]:
+                    content_type = ContentType.objects.get_for_model(resource.__class__)
+                    result[resource] = (content_type.pk, resource.pk) in granted
+
+        return result
 
     @staticmethod
     def can(user, action: str, resource, resource_unit_id: int | None = None) -> bool:
@@ -94,9 +155,7 @@ class PermissionService:
             return False
         if PermissionService.is_president(user):
             return True
-        return Membership.objects.filter(
-            user=user, is_active=True, role__actions__code=action,
-        ).exists()
+        return action in PermissionService.context(user).action_codes
 
     @staticmethod
     def filter_queryset(user, queryset: QuerySet, unit_field: str) -> QuerySet:
@@ -107,7 +166,7 @@ class PermissionService:
         """
         if PermissionService.is_president(user):
             return queryset
-        unit_ids = PermissionService.accessible_unit_ids(user)
+        unit_ids = PermissionService.context(user).unit_ids
         if not unit_ids:
             return queryset.none()
         return queryset.filter(**{f"{unit_field}__in": unit_ids})
@@ -0,0 +1,66 @@
+"""
+Invalidação do escopo de acesso em cache (ver access_control/services/access_scope.py)
+
+Escritas que afetam um único usuário apagam só a chave dele; mudanças na árvore de
+unidades, nos cargos (inclusive nas ações de cada cargo) ou nos grupos invalidam o
+escopo de todos.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from employee.models import Employee
+
+from .models import Action, Membership, OrganizationalUnit, Role
+from .services import PermissionService
+from .services.access_scope import invalidate_access_scope, invalidate_all_access_scopes
+
+User = get_user_model()
+
+
+@receiver([post_save, post_delete], sender=Membership)
+def membership_changed(sender, instance, **kwargs):
+    invalidate_access_scope(instance.user_id)
+    # Descarta também o contexto memorizado no objeto de usuário da requisição
+    if Membership.user.is_cached(instance):
+        PermissionService.reset(instance.user)
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    invalidate_access_scope(instance.pk)
+    PermissionService.reset(instance)
+
+
+@receiver([post_save, post_delete], sender=Employee)
+def employee_changed(sender, instance, **kwargs):
+    # A direção/gerência/coordenação do funcionário define o escopo do usuário dele
+    invalidate_access_scope(*User.objects.filter(employee=instance).values_list('pk', flat=True))
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, reverse, **kwargs):
+    if not kwargs['action'].startswith('post_'):
+        return
+    if reverse:
+        # group.user_set.add(...): vários usuários de uma vez
+        invalidate_all_access_scopes()
+    else:
+        invalidate_access_scope(instance.pk)
+        PermissionService.reset(instance)
+
+
+@receiver(m2m_changed, sender=Role.actions.through)
+def role_actions_changed(sender, **kwargs):
+    # PermissionService.can responde pelas action_codes do escopo em cache
+    if kwargs['action'].startswith('post_'):
+        invalidate_all_access_scopes()
+
+
+@receiver([post_save, post_delete], sender=OrganizationalUnit)
+@receiver([post_save, post_delete], sender=Role)
+@receiver([post_save, post_delete], sender=Action)
+@receiver([post_save, post_delete], sender=Group)
+def structure_changed(sender, instance, **kwargs):
+    invalidate_all_access_scopes()
@@ -0,0 +1,94 @@
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import TestCase
+
+from access_control.models import OrganizationalUnitClosure
+from access_control.services import PermissionService
+from access_control.services.access_scope import get_access_scope
+from employee.models import Employee
+from employee.utils.access_control import get_employee_scope
+from sector.models import Direction
+from .factories import make_membership, make_role, make_unit, make_user
+
+
+class ClosureTableTests(TestCase):
+    def test_rows_follow_unit_moves(self):
+        diretoria_a = make_unit("Diretoria A")
+        diretoria_b = make_unit("Diretoria B")
+        gerencia = make_unit("Gerencia", "GERENCIA", parent=diretoria_a)
+        coordenacao = make_unit("Coordenacao", "COORDENACAO", parent=gerencia)
+
+        ancestors = set(
+            OrganizationalUnitClosure.objects.filter(descendant=coordenacao).values_list("ancestor_id", "depth")
+        )
+        self.assertEqual(ancestors, {(coordenacao.pk, 0), (gerencia.pk, 1), (diretoria_a.pk, 2)})
+
+        gerencia.parent = diretoria_b
+        gerencia.save()
+
+        ancestors = set(
+            OrganizationalUnitClosure.objects.filter(descendant=coordenacao).values_list("ancestor_id", flat=True)
+        )
+        self.assertEqual(ancestors, {coordenacao.pk, gerencia.pk, diretoria_b.pk})
+
+
+class AccessScopeCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        self.role = make_role(name="Diretor", code="DIRETOR")
+        self.diretoria = make_unit("Diretoria", "DIRETORIA")
+        self.gerencia = make_unit("Gerencia", "GERENCIA", parent=self.diretoria)
+        self.outra = make_unit("Outra Diretoria")
+
+    def test_scope_is_resolved_once(self):
+        make_membership(self.user, self.diretoria, self.role)
+
+        scope = get_access_scope(self.user)
+        self.assertEqual(scope.unit_ids, {self.diretoria.pk, self.gerencia.pk})
+
+        with self.assertNumQueries(0):
+            PermissionService.accessible_unit_ids(self.user)
+            PermissionService.is_president(self.user)
+
+    def test_membership_change_invalidates(self):
+        self.assertEqual(get_access_scope(self.user).unit_ids, frozenset())
+
+        make_membership(self.user, self.diretoria, self.role)
+
+        self.assertIn(self.gerencia.pk, get_access_scope(self.user).unit_ids)
+
+    def test_unit_move_invalidates(self):
+        make_membership(self.user, self.diretoria, self.role)
+        self.assertIn(self.gerencia.pk, get_access_scope(self.user).unit_ids)
+
+        self.gerencia.parent = self.outra
+        self.gerencia.save()
+
+        self.assertNotIn(self.gerencia.pk, get_access_scope(self.user).unit_ids)
+
+    def test_filter_queryset_uses_closure(self):
+        from access_control.models import OrganizationalUnit
+
+        make_membership(self.user, self.diretoria, self.role)
+
+        visible = PermissionService.filter_queryset(self.user, OrganizationalUnit.objects.all(), "pk")
+
+        self.assertEqual(set(visible.values_list("pk", flat=True)), {self.diretoria.pk, self.gerencia.pk})
+
+    def test_group_and_employee_changes_invalidate_employee_scope(self):
+        direction = Direction.objects.create(name="Diretoria X")
+        employee = Employee.objects.create(
+            full_name="Diretor", email="diretor@minerva.local", cpf="00000000009", direction=direction,
+        )
+        self.user.employee = employee
+        self.user.save()
+        self.assertEqual(get_employee_scope(self.user), ("none", None))
+
+        self.user.groups.add(Group.objects.get_or_create(name="DIRETOR")[0])
+        self.assertEqual(get_employee_scope(self.user), ("direction", direction.pk))
+
+        other = Direction.objects.create(name="Diretoria Y")
+        employee.direction = other
+        employee.save()
+        self.assertEqual(get_employee_scope(self.user), ("direction", other.pk))
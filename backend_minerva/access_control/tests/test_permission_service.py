@@ -1,7 +1,7 @@
 from django.test import TestCase
 
 from access_control.services import PermissionService
-from .factories import make_grant, make_membership, make_role, make_unit, make_user
+from .factories import make_action, make_grant, make_membership, make_role, make_unit, make_user
 
 
 class SuperuserAndPresidentTests(TestCase):
@@ -170,3 +170,57 @@ class QuerysetScopingTests(TestCase):
         visible = PermissionService.filter_queryset(user, OrganizationalUnit.objects.all(), "pk")
 
         self.assertEqual(visible.count(), OrganizationalUnit.objects.count())
+
+
+class MemoizedContextTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.user = make_user()
+        self.role = make_role(name="Analista", code="ANALISTA_4", action_codes=["EDIT"])
+        self.diretoria = make_unit("Diretoria", "DIRETORIA")
+        self.gerencia = make_unit("Gerencia", "GERENCIA", parent=self.diretoria)
+        make_membership(self.user, self.diretoria, self.role)
+
+    def test_context_loaded_once_per_user_object(self):
+        PermissionService.can(self.user, "EDIT", self.gerencia, resource_unit_id=self.gerencia.pk)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(PermissionService.can(self.user, "EDIT", self.gerencia, resource_unit_id=self.gerencia.pk))
+            self.assertFalse(PermissionService.can(self.user, "DELETE", self.gerencia, resource_unit_id=self.gerencia.pk))
+            PermissionService.is_president(self.user)
+
+    def test_has_access_to_many_uses_one_grant_query(self):
+        outside = [make_unit(f"Externa {index}") for index in range(3)]
+        make_grant(outside[0], target_user=self.user)
+        make_grant(outside[1], target_role=self.role)
+        resources = [self.diretoria, self.gerencia] + outside
+        PermissionService.context(self.user)
+
+        with self.assertNumQueries(1):
+            result = PermissionService.has_access_to_many(self.user, resources, unit_field="pk")
+
+        self.assertEqual(
+            [result[resource] for resource in resources],
+            [True, True, True, True, False],
+        )
+
+    def test_role_action_changes_invalidate_cached_scope(self):
+        self.assertTrue(PermissionService.can(self.user, "EDIT", self.gerencia, resource_unit_id=self.gerencia.pk))
+
+        self.role.actions.remove(self.role.actions.get(code="EDIT"))
+        PermissionService.reset(self.user)  # nova requisição; o escopo em cache não pode sobreviver
+        self.assertFalse(PermissionService.can(self.user, "EDIT", self.gerencia, resource_unit_id=self.gerencia.pk))
+
+        self.role.actions.add(make_action("DELETE"))
+        PermissionService.reset(self.user)
+        self.assertTrue(PermissionService.can(self.user, "DELETE", self.gerencia, resource_unit_id=self.gerencia.pk))
+
+    def test_membership_change_resets_context(self):
+        other = make_unit("Outra")
+        self.assertFalse(PermissionService.has_access_to(self.user, other, resource_unit_id=other.pk))
+
+        make_membership(self.user, other, self.role)
+
+        self.assertTrue(PermissionService.has_access_to(self.user, other, resource_unit_id=other.pk))
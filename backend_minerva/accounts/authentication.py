@@ -0,0 +1,37 @@
+"""
+Autenticação JWT única por requisição.
+
+O APIAuthenticationMiddleware e o DRF usam a mesma classe: a primeira chamada
+valida o token, busca o usuário e checa a blacklist (em cache); o resultado fica
+na HttpRequest e as chamadas seguintes (DRF, `request.user`) o reaproveitam sem
+decodificar o token nem consultar o banco de novo.
+"""
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from .services.token_blacklist import is_jti_blacklisted
+
+_RESULT_ATTR = '_jwt_authentication'
+
+
+class TokenBlacklisted(InvalidToken):
+    default_detail = 'Este token foi invalidado. Faça login novamente.'
+    default_code = 'token_blacklisted'
+
+
+class BlacklistJWTAuthentication(JWTAuthentication):
+
+    def authenticate(self, request):
+        # DRF entrega um Request; o resultado fica na HttpRequest por baixo dele
+        http_request = getattr(request, '_request', request)
+        if hasattr(http_request, _RESULT_ATTR):
+            return getattr(http_request, _RESULT_ATTR)
+
+        result = super().authenticate(request)
+        if result is not None:
+            _user, token = result
+            if is_jti_blacklisted(token.get('jti'), token.get('exp')):
+                raise TokenBlacklisted()
+
+        setattr(http_request, _RESULT_ATTR, result)
+        return result
@@ -0,0 +1,71 @@
+"""
+Micro-benchmark do custo de conexão com o banco por requisição.
+
+Simula o ciclo de uma requisição do Django — request_started, uma consulta
+simples, request_finished (que fecha ou devolve a conexão conforme CONN_MAX_AGE /
+pool) — e compara:
+
+    sem persistência   CONN_MAX_AGE=0: conecta e desconecta a cada requisição
+    configuração atual DATABASES['default'] como está (persistente ou pool)
+
+A diferença é o custo de abrir conexão retirado do caminho da requisição.
+Uso: python manage.py benchmark_db_connections [--iterations 500] [--database default]
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = 'Mede o custo de conexão com o banco por requisição (sem persistência x configuração atual)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=500, help='Requisições simuladas por cenário')
+        parser.add_argument('--database', default='default', help='Alias do banco')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        if iterations <= 0:
+            raise CommandError('--iterations deve ser positivo')
+
+        connection = connections[options['database']]
+        settings_dict = connection.settings_dict
+        configured_max_age = settings_dict['CONN_MAX_AGE']
+        pooled = 'pool' in settings_dict.get('OPTIONS', {})
+
+        mode = 'pool psycopg' if pooled else f'CONN_MAX_AGE={configured_max_age}'
+        self.stdout.write(f'{connection.vendor} ({mode}), {iterations} requisições simuladas por cenário')
+
+        results = {}
+        if not pooled:
+            # Com pool o Django exige CONN_MAX_AGE=0; o cenário "sem persistência" não se aplica
+            settings_dict['CONN_MAX_AGE'] = 0
+            try:
+                results['sem persistência'] = self._measure(connection, iterations)
+            finally:
+                settings_dict['CONN_MAX_AGE'] = configured_max_age
+        results['configuração atual'] = self._measure(connection, iterations)
+
+        for name, (avg_ms, connects) in results.items():
+            self.stdout.write(f'  {name:<20} {avg_ms:8.3f} ms/requisição  ({connects} conexões obtidas)')
+        if len(results) == 2:
+            baseline, current = results['sem persistência'][0], results['configuração atual'][0]
+            self.stdout.write(self.style.SUCCESS(f'Economia por requisição: {baseline - current:.3f} ms'))
+
+    def _measure(self, connection, iterations):
+        connection.close()
+        connects = 0
+        started = time.perf_counter()
+        for _ in range(iterations):
+            request_started.send(sender=self.__class__)
+            if connection.connection is None:
+                connects += 1
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+            request_finished.send(sender=self.__class__)
+        elapsed = time.perf_counter() - started
+        connection.close()
+        return elapsed / iterations * 1000, connects
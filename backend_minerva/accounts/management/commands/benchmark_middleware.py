@@ -0,0 +1,93 @@
+"""
+Micro-benchmark do custo dos middlewares por requisição.
+
+Monta a cadeia de settings.MIDDLEWARE em volta de uma view vazia e mede, para
+cada cenário, o tempo médio por requisição descontado o custo de criar a
+requisição (RequestFactory) e chamar a view sozinha.
+
+Cenários: rota fora da API, rota pública da API, rota protegida sem token (401)
+e, com --email, rota protegida com JWT válido (inclui a busca do usuário).
+Uso: python manage.py benchmark_middleware [--iterations 5000] [--email user@x] [--project-only]
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.utils.module_loading import import_string
+
+PROJECT_MIDDLEWARE_PREFIXES = ('core.', 'accounts.')
+
+
+def _empty_view(request):
+    return HttpResponse(b'ok')
+
+
+def build_chain(middleware_paths):
+    handler = _empty_view
+    for path in reversed(middleware_paths):
+        handler = import_string(path)(handler)
+    return handler
+
+
+class Command(BaseCommand):
+    help = 'Mede o custo médio dos middlewares por requisição'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=5000, help='Requisições por cenário')
+        parser.add_argument('--email', help='Usuário para o cenário autenticado (JWT)')
+        parser.add_argument(
+            '--project-only',
+            action='store_true',
+            help='Medir só os middlewares do projeto (core/accounts), sem os do Django',
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        if iterations <= 0:
+            raise CommandError('--iterations deve ser positivo')
+
+        middleware = list(settings.MIDDLEWARE)
+        if options['project_only']:
+            middleware = [path for path in middleware if path.startswith(PROJECT_MIDDLEWARE_PREFIXES)]
+        chain = build_chain(middleware)
+        hosts = [host for host in settings.ALLOWED_HOSTS if host not in ('*', '') and not host.startswith('.')]
+        factory = RequestFactory(HTTP_HOST=hosts[0] if hosts else 'localhost')
+
+        scenarios = [
+            ('fora da API', '/health/', {}),
+            ('API pública', '/api/v1/accounts/login/', {}),
+            ('API sem token', '/api/v1/contract/', {}),
+        ]
+        if options.get('email'):
+            scenarios.append(('API com JWT', '/api/v1/contract/', self._auth_headers(options['email'])))
+
+        baseline = self._measure(_empty_view, factory, '/api/v1/contract/', {}, iterations)
+        self.stdout.write(
+            f'{len(middleware)} middlewares, {iterations} requisições por cenário '
+            f'(base RequestFactory + view: {baseline:.1f} µs)'
+        )
+        for name, path, headers in scenarios:
+            elapsed = self._measure(chain, factory, path, headers, iterations)
+            self.stdout.write(f'  {name:<16} {max(elapsed - baseline, 0):8.1f} µs/requisição')
+
+    def _auth_headers(self, email):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        from accounts.models import User
+
+        user = User.objects.filter(email=email).first()
+        if user is None:
+            raise CommandError(f'Usuário {email} não encontrado')
+        return {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'}
+
+    def _measure(self, handler, factory, path, headers, iterations):
+        # Aquecimento: imports tardios, regex e caches (blacklist, escopo)
+        for _ in range(min(iterations, 50)):
+            handler(factory.get(path, **headers))
+
+        started = time.perf_counter()
+        for _ in range(iterations):
+            handler(factory.get(path, **headers))
+        return (time.perf_counter() - started) / iterations * 1_000_000
@@ -0,0 +1,30 @@
+"""
+Recalcula o `search_document` dos modelos registrados em core.search.
+
+Necessário depois de escritas em massa que não disparam sinais (QuerySet.update,
+bulk_create, importações por SQL) ou ao mudar os campos registrados de um modelo.
+Uso: python manage.py rebuild_search_documents [--model employee.Employee ...]
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.search import rebuild_documents, registered_models
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os documentos de busca (core.search) dos modelos registrados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', default=[], help='app_label.Modelo (repetível); padrão: todos')
+
+    def handle(self, *args, **options):
+        registry = {model._meta.label_lower: (model, paths) for model, paths in registered_models().items()}
+        labels = [label.lower() for label in options['model']] or sorted(registry)
+        unknown = [label for label in labels if label not in registry]
+        if unknown:
+            raise CommandError(f"Modelos sem documento de busca: {', '.join(unknown)}")
+
+        for label in labels:
+            model, paths = registry[label]
+            changed = rebuild_documents(model, paths)
+            self.stdout.write(f'{label}: {changed} documentos atualizados')
+        self.stdout.write(self.style.SUCCESS('Documentos de busca atualizados'))
@@ -35,7 +35,11 @@ class HierarchicalQuerysetMixin:
         if user.is_superuser:
             return cls.objects.all()
 
-        if not user.groups.exists():
+        from access_control.services.access_scope import get_access_scope
+
+        # Grupos vêm do escopo de acesso em cache, sem consulta por requisição
+        group_names = get_access_scope(user).group_names
+        if not group_names:
             return cls.objects.none()
 
 
@@ -43,36 +47,44 @@ class HierarchicalQuerysetMixin:
             return cls.objects.none()
 
         employee = user.employee
-        accessible_objects = cls.objects.none()
+        scoped = []
 
 
-        for group in user.groups.all():
-            group_name = group.name.lower()
+        for group_name in group_names:
+            group_name = group_name.lower()
 
             if group_name == 'presidente':
 
-                accessible_objects |= cls.objects.all()
+                return cls.objects.all()
 
             elif group_name.startswith('diretor'):
 
                 if employee.direction:
-                    accessible_objects |= cls.get_objects_by_direction(employee.direction)
+                    scoped.append(cls.get_objects_by_direction(employee.direction))
 
             elif group_name.startswith('gerente'):
 
                 if employee.management:
-                    accessible_objects |= cls.get_objects_by_management(employee.management)
+                    scoped.append(cls.get_objects_by_management(employee.management))
 
             elif group_name.startswith('coordenador'):
 
                 if employee.coordination:
-                    accessible_objects |= cls.get_objects_by_coordination(employee.coordination)
+                    scoped.append(cls.get_objects_by_coordination(employee.coordination))
 
             elif group_name == 'funcionario':
 
-                accessible_objects |= cls.get_objects_by_user(user)
+                scoped.append(cls.get_objects_by_user(user))
+
+        if not scoped:
+            return cls.objects.none()
 
-        return accessible_objects.distinct()
+        # Cada escopo vira `pk IN (subconsulta)`: os JOINs ficam dentro das
+        # subconsultas, então o resultado não duplica linhas e dispensa DISTINCT
+        condition = Q()
+        for queryset in scoped:
+            condition |= Q(pk__in=queryset.values('pk'))
+        return cls.objects.filter(condition)
 
     @classmethod
     def get_objects_by_direction(cls, direction):
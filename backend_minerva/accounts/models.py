@@ -115,14 +115,10 @@ class BlacklistedToken(models.Model):
         try:
             from rest_framework_simplejwt.tokens import AccessToken
 
-            decoded_token = AccessToken(token, verify=False)
-            jti = decoded_token.get('jti')
-
-            if not jti:
+            from .services.token_blacklist import is_jti_blacklisted
 
-                return False
-
-            return cls.objects.filter(jti=jti).exists()
+            decoded_token = AccessToken(token, verify=False)
+            return is_jti_blacklisted(decoded_token.get('jti'), decoded_token.get('exp'))
         except Exception as e:
 
 
@@ -137,6 +133,8 @@ class BlacklistedToken(models.Model):
             decoded_token = AccessToken(token)
             jti = decoded_token.get('jti')
 
+            from .services.token_blacklist import blacklist_jti
+
             cls.objects.get_or_create(
                 jti=jti,
                 defaults={
@@ -145,6 +143,7 @@ class BlacklistedToken(models.Model):
                     'reason': reason
                 }
             )
+            blacklist_jti(jti, decoded_token.get('exp'))
             return True
         except Exception as e:
             logger.error(f"Erro ao adicionar token à blacklist: {e}")
@@ -0,0 +1,52 @@
+"""
+Consulta da blacklist de JWT (accounts.BlacklistedToken) servida pelo cache.
+
+Cada requisição autenticada checava a tabela `blacklisted_tokens`; agora o JTI é
+procurado no cache do Django (Redis compartilhado entre workers em produção):
+
+    jwt:blacklist:<jti> = True   token invalidado, guardado até o `exp` do token
+    jwt:blacklist:<jti> = False  token liberado, guardado JWT_BLACKLIST_CACHE_TTL segundos
+
+No logout, `blacklist_jti` grava True direto no cache — como o cache é
+compartilhado, todos os workers passam a recusar o token na próxima requisição,
+sem depender de expirar a entrada negativa (as chaves jwt:blacklist:* estão em
+L1_EXCLUDE e não passam pelo L1 de cada processo, ver core/cache_backends.py).
+Com um cache local por processo
+(LocMem), outros processos recusam o token em até JWT_BLACKLIST_CACHE_TTL segundos.
+"""
+import time
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+_KEY = "jwt:blacklist:{jti}"
+
+
+def _negative_ttl() -> int:
+    return getattr(settings, "JWT_BLACKLIST_CACHE_TTL", 60)
+
+
+def _positive_ttl(exp: Optional[int]) -> Optional[int]:
+    if exp is None:
+        return None
+    # Um token expirado é recusado pela validação; basta guardar até o exp
+    return max(int(exp - time.time()), 1)
+
+
+def is_jti_blacklisted(jti: Optional[str], exp: Optional[int] = None) -> bool:
+    if not jti:
+        return False
+
+    key = _KEY.format(jti=jti)
+    blacklisted = cache.get(key)
+    if blacklisted is None:
+        from accounts.models import BlacklistedToken
+
+        blacklisted = BlacklistedToken.objects.filter(jti=jti).exists()
+        cache.set(key, blacklisted, _positive_ttl(exp) if blacklisted else _negative_ttl())
+    return blacklisted
+
+
+def blacklist_jti(jti: str, exp: Optional[int] = None) -> None:
+    cache.set(_KEY.format(jti=jti), True, _positive_ttl(exp))
@@ -0,0 +1,61 @@
+"""
+Testes da autenticação JWT (accounts.authentication).
+
+Cobre:
+- Uma única autenticação por requisição (middleware + DRF), sem consulta à blacklist no banco
+- Token invalidado no logout é recusado pelo cache da blacklist
+- Rotas públicas compiladas no middleware
+"""
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import BlacklistedToken, User
+
+ME_URL = '/api/v1/accounts/me/'
+LOGOUT_URL = '/api/v1/accounts/logout/'
+
+
+class JWTAuthenticationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='user@minerva.local', password='testpass123')
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    def test_single_authentication_pass(self):
+        self.client.get(ME_URL, headers=self.headers)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(ME_URL, headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        user_fetches = [q for q in ctx.captured_queries if 'FROM "accounts_user"' in q['sql']]
+        self.assertEqual(len(user_fetches), 1)
+        self.assertFalse(any('blacklisted_tokens' in q['sql'] for q in ctx.captured_queries))
+
+    def test_logout_blacklists_token(self):
+        self.assertEqual(self.client.get(ME_URL, headers=self.headers).status_code, 200)
+
+        self.client.post(LOGOUT_URL, headers=self.headers)
+        self.assertTrue(BlacklistedToken.objects.filter(user=self.user).exists())
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(ME_URL, headers=self.headers)
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['error'], 'Token invalidado')
+        self.assertFalse(any('blacklisted_tokens' in q['sql'] for q in ctx.captured_queries))
+
+    def test_public_routes_skip_authentication(self):
+        from core.middleware import PUBLIC_PATH_PREFIXES, compile_prefixes
+
+        public = compile_prefixes(PUBLIC_PATH_PREFIXES)
+        self.assertTrue(public.match('/api/v1/accounts/token/refresh/'))
+        self.assertIsNone(public.match('/api/v1/accounts/me/'))
+
+        response = self.client.get(ME_URL)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['error'], 'Token de autenticação necessário')
@@ -64,10 +64,10 @@ class AliceConfigurationAdmin(admin.ModelAdmin):
 
 @admin.register(DocumentEmbedding)
 class DocumentEmbeddingAdmin(admin.ModelAdmin):
-    list_display = ['title', 'document_type', 'is_active', 'has_embedding', 'created_at']
-    list_filter = ['document_type', 'is_active', 'created_at']
+    list_display = ['title', 'document_type', 'is_active', 'has_embedding', 'embedding_model', 'created_at']
+    list_filter = ['document_type', 'is_active', 'embedding_model', 'created_at']
     search_fields = ['title', 'content']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['content_hash', 'embedding_model', 'created_at', 'updated_at']
 
     def has_embedding(self, obj):
         return bool(obj.embedding)
@@ -1,9 +1,14 @@
 """
 Comando Django para indexar documentos com embeddings para RAG.
-Uso: python manage.py index_embeddings
+A indexação é incremental: apenas documentos novos ou alterados são revetorizados.
+Uso: python manage.py index_embeddings [--batch-size 100] [--workers 4] [--checkpoint arquivo.json]
 """
+import os
+import time
+
 from django.core.management.base import BaseCommand
 from ai_assistant.services import EmbeddingService, SQLInterpreterService
+from ai_assistant.services.few_shot_manager import FewShotManager
 
 
 class Command(BaseCommand):
@@ -18,70 +23,107 @@ class Command(BaseCommand):
         parser.add_argument(
             '--clear',
             action='store_true',
-            help='Limpar embeddings existentes antes de indexar',
+            help='Remover embeddings existentes e revetorizar tudo do zero',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Textos por chamada de embedding (máx. 100)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Lotes de embedding enviados em paralelo',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            default=None,
+            help='Arquivo de checkpoint; se existir, a indexação é retomada a partir dele',
         )
 
     def handle(self, *args, **options):
-        embedding_service = EmbeddingService()
+        from ai_assistant.models import DocumentEmbedding
+
         sql_interpreter = SQLInterpreterService()
+        embedding_service = EmbeddingService(sql_interpreter.gemini_service)
 
         self.stdout.write('Iniciando indexação de embeddings...')
 
-        if options['clear']:
-            from ai_assistant.models import DocumentEmbedding
+        checkpoint = options['checkpoint']
+        resuming = bool(checkpoint) and os.path.exists(checkpoint)
+        if resuming:
+            self.stdout.write(f'  Retomando a partir do checkpoint {checkpoint}')
+
+        if options['clear'] and not resuming:
             count = DocumentEmbedding.objects.all().delete()[0]
             self.stdout.write(f'  Removidos {count} embeddings existentes')
 
-
-        self.stdout.write('Indexando schema do banco de dados...')
+        self.stdout.write('Coletando schema do banco de dados...')
         schema_info = sql_interpreter.get_database_schema()
-        schema_count = embedding_service.index_database_schema(schema_info)
-        self.stdout.write(self.style.SUCCESS(f'  {schema_count} documentos de schema indexados'))
+        documents = embedding_service.build_schema_documents(schema_info)
+        document_types = ['SCHEMA']
 
         if not options['schema_only']:
-
-            self.stdout.write('Indexando regras de negócio...')
-            business_rules = self._get_default_business_rules()
-            rules_count = 0
-            for rule in business_rules:
-                doc = embedding_service.add_business_rule(
-                    title=rule['title'],
-                    content=rule['content'],
-                    metadata=rule.get('metadata', {})
+            document_types += ['BUSINESS_RULE', 'FAQ', 'QUERY_EXAMPLE']
+            self.stdout.write('Coletando regras de negócio, FAQs e exemplos de consultas...')
+            documents += [
+                embedding_service.build_business_rule_document(
+                    rule['title'], rule['content'], rule.get('metadata', {})
                 )
-                if doc:
-                    rules_count += 1
-            self.stdout.write(self.style.SUCCESS(f'  {rules_count} regras de negócio indexadas'))
-
-
-            self.stdout.write('Indexando FAQs...')
-            faqs = self._get_default_faqs()
-            faq_count = 0
-            for faq in faqs:
-                doc = embedding_service.add_faq(
-                    question=faq['question'],
-                    answer=faq['answer'],
-                    metadata=faq.get('metadata', {})
+                for rule in self._get_default_business_rules()
+            ]
+            documents += [
+                embedding_service.build_faq_document(
+                    faq['question'], faq['answer'], faq.get('metadata', {})
                 )
-                if doc:
-                    faq_count += 1
-            self.stdout.write(self.style.SUCCESS(f'  {faq_count} FAQs indexadas'))
-
-
-            self.stdout.write('Indexando exemplos de consultas...')
-            examples = self._get_query_examples()
-            examples_count = 0
-            for example in examples:
-                doc = embedding_service.add_query_example(
-                    natural_language=example['question'],
-                    sql_query=example['sql'],
-                    explanation=example.get('explanation', '')
+                for faq in self._get_default_faqs()
+            ]
+            documents += [
+                embedding_service.build_query_example_document(
+                    example['question'], example['sql'], example.get('explanation', '')
                 )
-                if doc:
-                    examples_count += 1
-            self.stdout.write(self.style.SUCCESS(f'  {examples_count} exemplos de consultas indexados'))
-
-        self.stdout.write(self.style.SUCCESS('Indexação concluída!'))
+                for example in self._get_query_examples()
+            ]
+
+        started = time.monotonic()
+        result = embedding_service.sync_documents(
+            documents,
+            document_types=document_types,
+            batch_size=options['batch_size'],
+            max_workers=options['workers'],
+            checkpoint_path=checkpoint,
+        )
+        reembedded_examples = 0
+        if not options['schema_only']:
+            reembedded_examples = FewShotManager(sql_interpreter.gemini_service).reembed_stale_examples()
+        elapsed = time.monotonic() - started
+
+        labels = {
+            'SCHEMA': 'documentos de schema',
+            'BUSINESS_RULE': 'regras de negócio',
+            'FAQ': 'FAQs',
+            'QUERY_EXAMPLE': 'exemplos de consultas',
+        }
+        for doc_type, label in labels.items():
+            if doc_type in result.by_type:
+                self.stdout.write(self.style.SUCCESS(f'  {result.by_type[doc_type]} {label} vetorizados'))
+
+        self.stdout.write(f'  {result.summary()}')
+        if reembedded_examples:
+            self.stdout.write(f'  {reembedded_examples} exemplos few-shot revetorizados')
+        if result.skipped:
+            self.stdout.write(f'  {result.skipped} documentos ignorados (checkpoint ou conteúdo vazio)')
+        if result.failed:
+            self.stdout.write(self.style.WARNING(
+                f'  {result.failed} documentos falharam — execute novamente com --checkpoint para retomar'
+            ))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexação concluída! {result.created + result.updated} documentos vetorizados '
+            f'em {result.batches} lotes ({elapsed:.1f}s)'
+        ))
 
     def _get_default_business_rules(self):
         """Retorna regras de negócio padrão do sistema Minerva"""
@@ -60,7 +60,7 @@ class Command(BaseCommand):
                 'year': 'Ano de referência do orçamento',
                 'category': 'Categoria do orçamento (CAPEX - investimentos, OPEX - operacional)',
                 'total_amount': 'Valor total do orçamento em reais',
-                'available_amount': 'Valor ainda disponível para uso em reais',
+                'available_amount': 'Valor ainda disponível para uso em reais (negativo quando o comprometido excede o disponível)',
                 'status': 'Status do orçamento (ATIVO, INATIVO)'
             },
             'employee_employee': {
@@ -78,6 +78,8 @@ class Command(BaseCommand):
         }
 
         created_count = 0
+        updated_count = 0
+        unchanged_count = 0
 
         with connection.cursor() as cursor:
 
@@ -142,17 +144,30 @@ class Command(BaseCommand):
                         }
                     )
 
-                    if not created:
-
-                        schema_obj.data_type = col_type
-                        schema_obj.is_nullable = not not_null
-                        schema_obj.column_default = default_value
-                        schema_obj.sample_values = sample_values
-                        if business_meaning:
-                            schema_obj.business_meaning = business_meaning
-                        schema_obj.save()
-
-                    created_count += 1
+                    if created:
+                        created_count += 1
+                        continue
+
+                    changes = {
+                        'data_type': col_type,
+                        'is_nullable': not not_null,
+                        'column_default': default_value,
+                        'sample_values': sample_values,
+                    }
+                    if business_meaning:
+                        changes['business_meaning'] = business_meaning
+
+                    changed_fields = [
+                        name for name, value in changes.items()
+                        if getattr(schema_obj, name) != value
+                    ]
+                    if changed_fields:
+                        for name in changed_fields:
+                            setattr(schema_obj, name, changes[name])
+                        schema_obj.save(update_fields=changed_fields + ['updated_at'])
+                        updated_count += 1
+                    else:
+                        unchanged_count += 1
 
 
         from ai_assistant.models import AliceConfiguration
@@ -196,7 +211,8 @@ class Command(BaseCommand):
         self.stdout.write(
             self.style.SUCCESS(
                 f'Schema populado com sucesso! '
-                f'{created_count} registros de schema criados/atualizados. '
+                f'+{created_count} novos, ~{updated_count} alterados, '
+                f'={unchanged_count} inalterados. '
                 f'{config_count} configurações padrão criadas.'
             )
         )
\ No newline at end of file
@@ -0,0 +1,70 @@
+import hashlib
+import unicodedata
+
+from django.db import migrations, models
+
+
+EMBEDDING_MODEL = "models/text-embedding-004"
+
+
+def _hash(text):
+    return hashlib.sha256((text or "").strip().encode("utf-8")).hexdigest()
+
+
+def _normalize(text):
+    text = unicodedata.normalize("NFC", text or "")
+    return " ".join(text.split()).lower()
+
+
+def _backfill_hashes(apps, schema_editor):
+    """Preenche hash/modelo das linhas existentes para que o próximo índice não revetorize tudo."""
+    DocumentEmbedding = apps.get_model("ai_assistant", "DocumentEmbedding")
+    FewShotExample = apps.get_model("ai_assistant", "FewShotExample")
+
+    docs = []
+    for doc in DocumentEmbedding.objects.only("id", "content", "embedding").iterator():
+        doc.content_hash = _hash(doc.content)
+        doc.embedding_model = EMBEDDING_MODEL if doc.embedding is not None else ""
+        docs.append(doc)
+    DocumentEmbedding.objects.bulk_update(docs, ["content_hash", "embedding_model"], batch_size=500)
+
+    examples = []
+    for ex in FewShotExample.objects.only("id", "user_question", "embedding").iterator():
+        ex.content_hash = _hash(_normalize(ex.user_question))
+        ex.embedding_model = EMBEDDING_MODEL if ex.embedding is not None else ""
+        examples.append(ex)
+    FewShotExample.objects.bulk_update(examples, ["content_hash", "embedding_model"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai_assistant", "0005_rename_ai_assistan_session_fb_idx_ai_assistan_session_2cbcb7_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="documentembedding",
+            name="content_hash",
+            field=models.CharField(blank=True, db_index=True, max_length=64, verbose_name="Hash do Conteúdo"),
+        ),
+        migrations.AddField(
+            model_name="documentembedding",
+            name="embedding_model",
+            field=models.CharField(blank=True, max_length=100, verbose_name="Modelo de Embedding"),
+        ),
+        migrations.AddField(
+            model_name="fewshotexample",
+            name="content_hash",
+            field=models.CharField(blank=True, db_index=True, max_length=64, verbose_name="Hash da Pergunta"),
+        ),
+        migrations.AddField(
+            model_name="fewshotexample",
+            name="embedding_model",
+            field=models.CharField(blank=True, max_length=100, verbose_name="Modelo de Embedding"),
+        ),
+        migrations.RunPython(
+            code=_backfill_hashes,
+            reverse_code=migrations.RunPython.noop,
+        ),
+    ]
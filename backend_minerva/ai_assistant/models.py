@@ -11,6 +11,18 @@ except ImportError:
 
 User = get_user_model()
 
+# Tabelas que o SQL gerado pela Alice pode consultar (SQLValidator) e cujas
+# escritas invalidam o cache de respostas (ai_assistant/signals.py)
+ALICE_SAFE_TABLES = frozenset({
+    'accounts_user', 'budget_budget', 'budget_budgetmovement',
+    'budgetline_budgetline', 'budgetline_budgetlineversion',
+    'contract_contract', 'contract_contractinstallment',
+    'contract_contractamendment', 'employee_employee',
+    'sector_direction', 'sector_coordination', 'sector_management',
+    'center_management_center', 'center_requesting_center',
+    'aid_assistance', 'aid_assistanceemployee',
+})
+
 
 class ConversationSession(models.Model):
     """
@@ -185,6 +197,8 @@ class DocumentEmbedding(models.Model):
     else:
         embedding = models.JSONField(null=True, blank=True, verbose_name='Embedding (JSON fallback)')
 
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, verbose_name='Hash do Conteúdo')
+    embedding_model = models.CharField(max_length=100, blank=True, verbose_name='Modelo de Embedding')
     is_active = models.BooleanField(default=True, verbose_name='Ativo')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -228,6 +242,8 @@ class FewShotExample(models.Model):
     else:
         embedding = models.JSONField(null=True, blank=True, verbose_name='Embedding (JSON fallback)')
 
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, verbose_name='Hash da Pergunta')
+    embedding_model = models.CharField(max_length=100, blank=True, verbose_name='Modelo de Embedding')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -224,6 +224,25 @@ def build_scoped_tools(user=None):
 
 
 
+# Tabelas lidas por cada ferramenta, para invalidar o cache de respostas da Alice.
+# Ferramenta fora daqui (ex: notificações, tabela sem invalidação) deixa a resposta fora do cache.
+TOOL_TABLES = {
+    'get_expiring_contracts': ('contract_contract', 'employee_employee'),
+    'get_contracts_without_inspector': ('contract_contract', 'employee_employee'),
+    'get_contract_inspector': ('contract_contract', 'employee_employee'),
+    'count_active_contracts': ('contract_contract',),
+    'count_employees': ('employee_employee',),
+    'get_budget_summary': ('budget_budget',),
+}
+
+
+def tables_for_tools(tools_used) -> Optional[list]:
+    """Tabelas lidas pelas ferramentas usadas; None se alguma for desconhecida ou nenhuma rodou."""
+    if not tools_used or any(name not in TOOL_TABLES for name in tools_used):
+        return None
+    return sorted({table for name in tools_used for table in TOOL_TABLES[name]})
+
+
 GABY_SYSTEM_PROMPT = (
     "Você é Gaby, assistente virtual do Sistema Minerva. "
     "Responda de forma natural, amigável e profissional em português. "
@@ -259,7 +278,8 @@ class AliceAgentService:
         Executa o agente e retorna a resposta final.
 
         Returns:
-            {'success': bool, 'response': str, 'tools_used': List[str]}
+            {'success': bool, 'response': str, 'tools_used': List[str],
+             'tables': List[str] | None}  (tables: ver tables_for_tools)
         """
         try:
             from langchain_core.messages import HumanMessage
@@ -279,10 +299,12 @@ class AliceAgentService:
                     if tool_name:
                         tools_used.append(tool_name)
 
+            tools_used = list(set(tools_used))
             return {
                 'success': True,
                 'response': response,
-                'tools_used': list(set(tools_used)),
+                'tools_used': tools_used,
+                'tables': tables_for_tools(tools_used),
             }
         except Exception as exc:
             logger.error("AliceAgentService error: %s", exc)
@@ -290,4 +312,5 @@ class AliceAgentService:
                 'success': False,
                 'response': "Desculpe, não consegui processar sua pergunta. Pode reformulá-la? 😊",
                 'tools_used': [],
+                'tables': None,
             }
@@ -19,11 +19,18 @@ Cada agente especializado responde com:
     - source: str ("Banco de Dados", "Documentos", "Regras de Negócio", ...)
     - tools_used: List[str]
 """
+import asyncio
+import contextvars
 import logging
+import threading
 import time
-from typing import Any, Dict, List, Optional, TypedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypedDict, Union
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.db import close_old_connections
 from langchain_core.messages import HumanMessage, SystemMessage
 
 logger = logging.getLogger(__name__)
@@ -47,6 +54,8 @@ class AgentState(TypedDict, total=False):
     final_response: str
     error: Optional[str]
     start_time: float
+    on_event: Optional[Callable[[str, Dict[str, Any]], None]]  # progresso p/ SSE (stage/token)
+    tables_read: Optional[List[str]]  # tabelas que a resposta leu (cache); ausente = desconhecidas
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -83,6 +92,108 @@ def _get_llm(temperature: float = 0.3):
     )
 
 
+def _emit(state: AgentState, event: str, data: Dict[str, Any]) -> None:
+    on_event = state.get('on_event')
+    if on_event is not None:
+        on_event(event, data)
+
+
+def _answer_with_llm(llm, messages: List[Any], state: AgentState) -> str:
+    """
+    Resposta final do agente. Com on_event no estado, usa llm.stream e repassa
+    cada trecho como evento 'token'; sem ele, um llm.invoke comum.
+    """
+    if state.get('on_event') is None:
+        return llm.invoke(messages).content
+
+    parts = []
+    for chunk in llm.stream(messages):
+        if chunk.text:
+            parts.append(chunk.text)
+            _emit(state, 'token', {'text': chunk.text})
+    return ''.join(parts)
+
+
+async def _aanswer_with_llm(llm, messages: List[Any], state: AgentState) -> str:
+    """Versão async de _answer_with_llm (llm.ainvoke / llm.astream)."""
+    if state.get('on_event') is None:
+        return (await llm.ainvoke(messages)).content
+
+    parts = []
+    async for chunk in llm.astream(messages):
+        if chunk.text:
+            parts.append(chunk.text)
+            _emit(state, 'token', {'text': chunk.text})
+    return ''.join(parts)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Agent runner (sync / async)
+# ─────────────────────────────────────────────────────────────────────────────
+#
+# Os agentes baseados em LLM são divididos em duas etapas:
+#   prepare(state) → busca contexto (ORM, embeddings, reranker — bloqueante) e
+#                    devolve um _AgentCall, ou o dict de resposta final quando
+#                    não há o que perguntar ao LLM;
+#   chamada final ao LLM → invoke/stream no caminho síncrono, ainvoke/astream
+#                    no caminho async (graph.ainvoke), com prepare rodando em
+#                    sync_to_async para não bloquear o event loop.
+
+@dataclass
+class _AgentCall:
+    temperature: float
+    messages: List[Any]
+    confidence: float
+    source: str
+    tools_used: List[str]
+    tables: Optional[List[str]] = None
+
+    def result(self, response_text: str) -> Dict[str, Any]:
+        result = {
+            'agent_response': response_text,
+            'confidence': self.confidence,
+            'source': self.source,
+            'tools_used': self.tools_used,
+        }
+        if self.tables is not None:
+            result['tables_read'] = self.tables
+        return result
+
+
+AgentPrepare = Callable[[AgentState], Union[_AgentCall, Dict[str, Any]]]
+AsyncAgentPrepare = Callable[[AgentState], Awaitable[Union[_AgentCall, Dict[str, Any]]]]
+
+
+def _run_agent(state: AgentState, name: str, prepare: AgentPrepare, on_error: Dict[str, Any]) -> AgentState:
+    try:
+        call = prepare(state)
+        if not isinstance(call, _AgentCall):
+            return {**state, **call}
+        response_text = _answer_with_llm(_get_llm(temperature=call.temperature), call.messages, state)
+        return {**state, **call.result(response_text)}
+    except Exception as exc:
+        logger.error("%s error: %s", name, exc)
+        return {**state, **on_error}
+
+
+async def _arun_agent(
+    state: AgentState,
+    name: str,
+    prepare: AgentPrepare,
+    on_error: Dict[str, Any],
+    aprepare: Optional[AsyncAgentPrepare] = None,
+) -> AgentState:
+    try:
+        call = await aprepare(state) if aprepare else await sync_to_async(prepare)(state)
+        if not isinstance(call, _AgentCall):
+            return {**state, **call}
+        response_text = await _aanswer_with_llm(_get_llm(temperature=call.temperature), call.messages, state)
+        return {**state, **call.result(response_text)}
+    except Exception as exc:
+        logger.error("%s error: %s", name, exc)
+        return {**state, **on_error}
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Node: Classify
 # ─────────────────────────────────────────────────────────────────────────────
@@ -101,6 +212,20 @@ database | document | rules | system | reports | general
 
 Pergunta: {question}"""
 
+_VALID_AGENTS = {'database', 'document', 'rules', 'system', 'reports', 'general'}
+
+
+def _classified(state: AgentState, question: str, raw: str) -> AgentState:
+    raw = raw.strip().lower()
+    agent_type = raw if raw in _VALID_AGENTS else 'general'
+    logger.debug("AliceGraph: '%s' → agent_type=%s", question[:60], agent_type)
+    return _classified_as(state, agent_type)
+
+
+def _classified_as(state: AgentState, agent_type: str) -> AgentState:
+    _emit(state, 'stage', {'stage': 'classified', 'agent_type': agent_type})
+    return {**state, 'agent_type': agent_type, 'start_time': time.time()}
+
 
 def classify_node(state: AgentState) -> AgentState:
     """Classifica a pergunta e define qual agente usar."""
@@ -108,21 +233,34 @@ def classify_node(state: AgentState) -> AgentState:
     try:
         llm = _get_llm(temperature=0.0)
         response = llm.invoke([HumanMessage(content=_CLASSIFY_PROMPT.format(question=question))])
-        raw = response.content.strip().lower()
-        valid = {'database', 'document', 'rules', 'system', 'reports', 'general'}
-        agent_type = raw if raw in valid else 'general'
-        logger.debug("AliceGraph: '%s' → agent_type=%s", question[:60], agent_type)
+        return _classified(state, question, response.content)
     except Exception as exc:
         logger.warning("AliceGraph classify_node error: %s — fallback=database", exc)
-        agent_type = 'database'
+        return _classified_as(state, 'database')
 
-    return {**state, 'agent_type': agent_type, 'start_time': time.time()}
+
+async def aclassify_node(state: AgentState) -> AgentState:
+    question = state.get('resolved_question') or state.get('question', '')
+    try:
+        llm = _get_llm(temperature=0.0)
+        response = await llm.ainvoke([HumanMessage(content=_CLASSIFY_PROMPT.format(question=question))])
+        return _classified(state, question, response.content)
+    except Exception as exc:
+        logger.warning("AliceGraph classify_node error: %s — fallback=database", exc)
+        return _classified_as(state, 'database')
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Node: Database Agent
 # ─────────────────────────────────────────────────────────────────────────────
 
+def _with_tables(state: AgentState, tables: Optional[List[str]]) -> AgentState:
+    """Registra as tabelas lidas; None (desconhecidas) deixa a resposta fora do cache."""
+    if tables is None:
+        return state
+    return {**state, 'tables_read': sorted(set(tables))}
+
+
 def database_agent_node(state: AgentState) -> AgentState:
     """
     Usa as ferramentas ORM (alice_agent.py) para responder perguntas sobre
@@ -136,13 +274,13 @@ def database_agent_node(state: AgentState) -> AgentState:
         agent = AliceAgentService(user=user)
         result = agent.run(question)
         if result['success'] and result['response']:
-            return {
+            return _with_tables({
                 **state,
                 'agent_response': result['response'],
                 'confidence': 0.92,
                 'source': 'Banco de Dados',
                 'tools_used': result.get('tools_used', ['database_tools']),
-            }
+            }, result.get('tables'))
     except Exception as exc:
         logger.warning("database_agent_node AliceAgentService error: %s", exc)
 
@@ -152,15 +290,17 @@ def database_agent_node(state: AgentState) -> AgentState:
         from .sql_interpreter import SQLInterpreterService
         session = _get_or_create_temp_session(state.get('session_id'))
         svc = SQLInterpreterService()
-        result = svc.interpret_and_execute(question, session)
+        result = svc.interpret_and_execute(question, session, on_event=state.get('on_event'))
         if result['success']:
-            return {
+            # Tabelas do SQL que de fato rodou (mesma extração do SQLValidator)
+            tables = svc.sql_validator.validate(result['sql_query']).tables_found
+            return _with_tables({
                 **state,
                 'agent_response': result['humanized_response'],
                 'confidence': 0.85,
                 'source': 'Banco de Dados',
                 'tools_used': ['sql_interpreter'],
-            }
+            }, tables or None)
     except Exception as exc:
         logger.error("database_agent_node SQLInterpreter fallback error: %s", exc)
 
@@ -173,136 +313,144 @@ def database_agent_node(state: AgentState) -> AgentState:
     }
 
 
+async def adatabase_agent_node(state: AgentState) -> AgentState:
+    """Agente ReAct + SQLInterpreter são ORM/SQL síncronos: rodam fora do event loop."""
+    return await sync_to_async(database_agent_node)(state)
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Node: Document Agent (RAG)
 # ─────────────────────────────────────────────────────────────────────────────
 
-def document_agent_node(state: AgentState) -> AgentState:
-    """Busca em documentos indexados usando RAG híbrido (pgvector + full-text)."""
-    question = state.get('resolved_question') or state.get('question', '')
-    try:
-        from .gemini_service import GeminiService
-        from .hybrid_search import HybridSearchService
-        from .reranker import RerankerService
+# Índice dos documentos/regras consultados pelo RAG
+_DOCUMENTS_TABLE = 'ai_assistant_documentembedding'
 
-        gemini = GeminiService()
-        hybrid = HybridSearchService(gemini)
-        reranker = RerankerService(gemini)
+_DOCUMENT_ERROR = {
+    'agent_response': "Não consegui acessar os documentos agora. Tente novamente em instantes.",
+    'confidence': 0.20,
+    'source': 'Documentos',
+    'tools_used': [],
+}
 
-        query_embedding = gemini.get_embedding(question)
-        candidates = hybrid.search(question, query_embedding=query_embedding, limit=20, top_k=10)
-        top_docs = reranker.rerank(question, candidates, top_k=5)
-
-        if not top_docs:
-            return {
-                **state,
-                'agent_response': "Não encontrei documentos relevantes para sua pergunta. Pode dar mais detalhes?",
-                'confidence': 0.25,
-                'source': 'Documentos',
-                'tools_used': ['hybrid_search'],
-            }
 
-        # Confidence baseada no score médio dos top docs
-        avg_score = sum(d.get('rrf_score', 0) or d.get('vector_score', 0) for d in top_docs) / len(top_docs)
-        confidence = min(0.95, 0.50 + avg_score * 10)
+def _prepare_document_agent(state: AgentState) -> Union[_AgentCall, Dict[str, Any]]:
+    question = state.get('resolved_question') or state.get('question', '')
+    from .gemini_service import GeminiService
+    from .hybrid_search import HybridSearchService
+    from .reranker import RerankerService
 
-        context_texts = [f"[{d['document_type']}] {d['title']}:\n{d['content']}" for d in top_docs]
-        context_str = "\n\n---\n\n".join(context_texts)
+    gemini = GeminiService()
+    hybrid = HybridSearchService(gemini)
+    reranker = RerankerService(gemini)
 
-        llm = _get_llm(temperature=0.2)
-        system_msg = (
-            "Você é Gaby, assistente do Sistema Minerva. Responda em português de forma natural e profissional.\n"
-            "Use APENAS as informações do contexto abaixo. Se não souber, diga que não encontrou.\n\n"
-            f"CONTEXTO:\n{context_str}"
-        )
-        response = llm.invoke([
-            SystemMessage(content=system_msg),
-            HumanMessage(content=question),
-        ])
+    query_embedding = gemini.get_embedding(question)
+    candidates = hybrid.search(question, query_embedding=query_embedding, limit=20, top_k=10)
+    top_docs = reranker.rerank(question, candidates, top_k=5)
 
+    if not top_docs:
         return {
-            **state,
-            'agent_response': response.content,
-            'confidence': round(confidence, 2),
+            'agent_response': "Não encontrei documentos relevantes para sua pergunta. Pode dar mais detalhes?",
+            'confidence': 0.25,
             'source': 'Documentos',
-            'tools_used': ['hybrid_search', 'reranker'],
-        }
-    except Exception as exc:
-        logger.error("document_agent_node error: %s", exc)
-        return {
-            **state,
-            'agent_response': "Não consegui acessar os documentos agora. Tente novamente em instantes.",
-            'confidence': 0.20,
-            'source': 'Documentos',
-            'tools_used': [],
+            'tools_used': ['hybrid_search'],
         }
 
+    # Confidence baseada no score médio dos top docs
+    avg_score = sum(d.get('rrf_score', 0) or d.get('vector_score', 0) for d in top_docs) / len(top_docs)
+    confidence = min(0.95, 0.50 + avg_score * 10)
+
+    context_texts = [f"[{d['document_type']}] {d['title']}:\n{d['content']}" for d in top_docs]
+    context_str = "\n\n---\n\n".join(context_texts)
+
+    system_msg = (
+        "Você é Gaby, assistente do Sistema Minerva. Responda em português de forma natural e profissional.\n"
+        "Use APENAS as informações do contexto abaixo. Se não souber, diga que não encontrou.\n\n"
+        f"CONTEXTO:\n{context_str}"
+    )
+    return _AgentCall(
+        temperature=0.2,
+        messages=[SystemMessage(content=system_msg), HumanMessage(content=question)],
+        confidence=round(confidence, 2),
+        source='Documentos',
+        tools_used=['hybrid_search', 'reranker'],
+        tables=[_DOCUMENTS_TABLE],
+    )
+
+
+def document_agent_node(state: AgentState) -> AgentState:
+    """Busca em documentos indexados usando RAG híbrido (pgvector + full-text)."""
+    return _run_agent(state, 'document_agent_node', _prepare_document_agent, _DOCUMENT_ERROR)
+
+
+async def adocument_agent_node(state: AgentState) -> AgentState:
+    return await _arun_agent(state, 'document_agent_node', _prepare_document_agent, _DOCUMENT_ERROR)
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Node: Business Rules Agent
 # ─────────────────────────────────────────────────────────────────────────────
 
-def rules_agent_node(state: AgentState) -> AgentState:
-    """Responde com base nas regras de negócio definidas no sistema."""
-    question = state.get('resolved_question') or state.get('question', '')
-    try:
-        from .business_rules import BUSINESS_ONTOLOGY, get_relevant_business_rules
+_RULES_ERROR = {
+    'agent_response': "Não consegui acessar as regras de negócio. Tente novamente.",
+    'confidence': 0.20,
+    'source': 'Regras de Negócio',
+    'tools_used': [],
+}
 
-        # Busca regras relevantes
-        hints = get_relevant_business_rules(question)
 
-        # Busca também documentos BUSINESS_RULE no RAG
-        rag_context = []
-        try:
-            from .gemini_service import GeminiService
-            from .embedding_service import EmbeddingService
-            svc = EmbeddingService()
-            docs = svc.search_similar_documents(question, document_type='BUSINESS_RULE', limit=4, threshold=0.5)
-            rag_context = [d['content'] for d in docs]
-        except Exception:
-            pass
+def _prepare_rules_agent(state: AgentState) -> Union[_AgentCall, Dict[str, Any]]:
+    question = state.get('resolved_question') or state.get('question', '')
+    from .business_rules import BUSINESS_ONTOLOGY, get_relevant_business_rules
 
-        context = hints
-        if rag_context:
-            context += "\n\nRegras indexadas:\n" + "\n---\n".join(rag_context)
+    # Busca regras relevantes
+    hints = get_relevant_business_rules(question)
 
-        if not context.strip():
-            return {
-                **state,
-                'agent_response': "Não encontrei regras específicas sobre isso. Consulte o manual do sistema ou o suporte.",
-                'confidence': 0.35,
-                'source': 'Regras de Negócio',
-                'tools_used': ['business_rules'],
-            }
+    # Busca também documentos BUSINESS_RULE no RAG
+    rag_context = []
+    try:
+        from .gemini_service import GeminiService
+        from .embedding_service import EmbeddingService
+        svc = EmbeddingService()
+        docs = svc.search_similar_documents(question, document_type='BUSINESS_RULE', limit=4, threshold=0.5)
+        rag_context = [d['content'] for d in docs]
+    except Exception:
+        pass
 
-        llm = _get_llm(temperature=0.1)
-        system_msg = (
-            "Você é Gaby, especialista em regras de negócio do Sistema Minerva. "
-            "Responda em português de forma clara e objetiva.\n\n"
-            f"REGRAS DE NEGÓCIO RELEVANTES:\n{context}"
-        )
-        response = llm.invoke([
-            SystemMessage(content=system_msg),
-            HumanMessage(content=question),
-        ])
+    context = hints
+    if rag_context:
+        context += "\n\nRegras indexadas:\n" + "\n---\n".join(rag_context)
 
+    if not context.strip():
         return {
-            **state,
-            'agent_response': response.content,
-            'confidence': 0.88,
-            'source': 'Regras de Negócio',
-            'tools_used': ['business_rules', 'rag_business_rules'],
-        }
-    except Exception as exc:
-        logger.error("rules_agent_node error: %s", exc)
-        return {
-            **state,
-            'agent_response': "Não consegui acessar as regras de negócio. Tente novamente.",
-            'confidence': 0.20,
+            'agent_response': "Não encontrei regras específicas sobre isso. Consulte o manual do sistema ou o suporte.",
+            'confidence': 0.35,
             'source': 'Regras de Negócio',
-            'tools_used': [],
+            'tools_used': ['business_rules'],
         }
 
+    system_msg = (
+        "Você é Gaby, especialista em regras de negócio do Sistema Minerva. "
+        "Responda em português de forma clara e objetiva.\n\n"
+        f"REGRAS DE NEGÓCIO RELEVANTES:\n{context}"
+    )
+    return _AgentCall(
+        temperature=0.1,
+        messages=[SystemMessage(content=system_msg), HumanMessage(content=question)],
+        confidence=0.88,
+        source='Regras de Negócio',
+        tools_used=['business_rules', 'rag_business_rules'],
+        tables=[_DOCUMENTS_TABLE],
+    )
+
+
+def rules_agent_node(state: AgentState) -> AgentState:
+    """Responde com base nas regras de negócio definidas no sistema."""
+    return _run_agent(state, 'rules_agent_node', _prepare_rules_agent, _RULES_ERROR)
+
+
+async def arules_agent_node(state: AgentState) -> AgentState:
+    return await _arun_agent(state, 'rules_agent_node', _prepare_rules_agent, _RULES_ERROR)
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Node: System Agent
@@ -330,140 +478,278 @@ FUNCIONALIDADES:
 - Sistema de convites para novos usuários
 """
 
+_SYSTEM_ERROR = {
+    'agent_response': "Não consegui processar sua pergunta sobre o sistema.",
+    'confidence': 0.20,
+    'source': 'Sistema',
+    'tools_used': [],
+}
+
+
+def _prepare_system_agent(state: AgentState) -> _AgentCall:
+    question = state.get('resolved_question') or state.get('question', '')
+    system_msg = (
+        "Você é Gaby, assistente do Sistema Minerva. "
+        "Responda perguntas sobre como usar o sistema de forma clara e amigável.\n\n"
+        f"DOCUMENTAÇÃO DO SISTEMA:\n{_SYSTEM_KNOWLEDGE}"
+    )
+    return _AgentCall(
+        temperature=0.3,
+        messages=[SystemMessage(content=system_msg), HumanMessage(content=question)],
+        confidence=0.82,
+        source='Sistema',
+        tools_used=['system_knowledge'],
+        # _SYSTEM_KNOWLEDGE está no código: não lê tabela nenhuma, só expira pelo TTL
+        tables=[],
+    )
+
 
 def system_agent_node(state: AgentState) -> AgentState:
     """Responde perguntas sobre funcionalidades e uso do sistema."""
-    question = state.get('resolved_question') or state.get('question', '')
-    try:
-        llm = _get_llm(temperature=0.3)
-        system_msg = (
-            "Você é Gaby, assistente do Sistema Minerva. "
-            "Responda perguntas sobre como usar o sistema de forma clara e amigável.\n\n"
-            f"DOCUMENTAÇÃO DO SISTEMA:\n{_SYSTEM_KNOWLEDGE}"
-        )
-        response = llm.invoke([
-            SystemMessage(content=system_msg),
-            HumanMessage(content=question),
-        ])
-        return {
-            **state,
-            'agent_response': response.content,
-            'confidence': 0.82,
-            'source': 'Sistema',
-            'tools_used': ['system_knowledge'],
-        }
-    except Exception as exc:
-        logger.error("system_agent_node error: %s", exc)
-        return {
-            **state,
-            'agent_response': "Não consegui processar sua pergunta sobre o sistema.",
-            'confidence': 0.20,
-            'source': 'Sistema',
-            'tools_used': [],
-        }
+    return _run_agent(state, 'system_agent_node', _prepare_system_agent, _SYSTEM_ERROR)
+
+
+async def asystem_agent_node(state: AgentState) -> AgentState:
+    return await _arun_agent(state, 'system_agent_node', _prepare_system_agent, _SYSTEM_ERROR)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Node: Reports Agent
 # ─────────────────────────────────────────────────────────────────────────────
 
-def reports_agent_node(state: AgentState) -> AgentState:
-    """Combina dados do banco + documentos para gerar relatórios."""
-    question = state.get('resolved_question') or state.get('question', '')
+_REPORTS_ERROR = {
+    'agent_response': "Não consegui gerar o relatório agora. Tente novamente.",
+    'confidence': 0.20,
+    'source': 'Relatórios',
+    'tools_used': [],
+}
+
+
+# Fontes do relatório: (nome, rótulo no prompt, setting do timeout, padrão em segundos).
+# Cada fonte roda em paralelo com o seu próprio prazo; a que estourar fica de fora
+# e o relatório sai parcial em vez de esperar pela mais lenta.
+_REPORT_BRANCHES = (
+    ('database', 'Dados do sistema', 'ALICE_REPORT_DATABASE_TIMEOUT', 40.0),
+    ('document', 'Informações documentais', 'ALICE_REPORT_DOCUMENT_TIMEOUT', 25.0),
+)
+
+_report_executor: Optional[ThreadPoolExecutor] = None
+_report_executor_lock = threading.Lock()
+
+
+def _get_report_executor() -> ThreadPoolExecutor:
+    """Pool limitado compartilhado pelos relatórios do processo (caminhos síncrono e async)."""
+    global _report_executor
+    if _report_executor is None:
+        with _report_executor_lock:
+            if _report_executor is None:
+                _report_executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'ALICE_REPORT_MAX_WORKERS', 8),
+                    thread_name_prefix='alice-report',
+                )
+    return _report_executor
+
+
+def _report_branch_nodes() -> Dict[str, Callable[[AgentState], AgentState]]:
+    return {'database': database_agent_node, 'document': document_agent_node}
+
+
+def _report_branch_timeout(setting: str, default: float) -> float:
+    return float(getattr(settings, setting, default))
+
+
+def _run_report_branch(node: Callable[[AgentState], AgentState], state: AgentState) -> AgentState:
+    # Thread do pool fora do ciclo da requisição: descarta conexões vencidas
+    close_old_connections()
     try:
-        # Executa tanto o agente de banco quanto o de documentos
-        db_state = database_agent_node({**state})
-        doc_state = document_agent_node({**state})
-
-        combined = []
-        if db_state.get('agent_response'):
-            combined.append(f"Dados do sistema:\n{db_state['agent_response']}")
-        if doc_state.get('agent_response'):
-            combined.append(f"Informações documentais:\n{doc_state['agent_response']}")
-
-        if not combined:
-            return {
-                **state,
-                'agent_response': "Não consegui gerar o relatório. Dados insuficientes.",
-                'confidence': 0.30,
-                'source': 'Relatórios',
-                'tools_used': [],
-            }
+        return node(state)
+    finally:
+        close_old_connections()
+
+
+def _report_sources(state: AgentState) -> Dict[str, Optional[AgentState]]:
+    """Executa as fontes em paralelo no pool; fonte que falhou ou estourou o prazo → None."""
+    # Só o relatório consolidado é transmitido, não as respostas intermediárias
+    branch_state = {**state, 'on_event': None}
+    executor = _get_report_executor()
+    nodes = _report_branch_nodes()
+    started = time.monotonic()
+    futures = {
+        # Cada fonte herda uma cópia do contexto (memo de embeddings da requisição)
+        name: executor.submit(contextvars.copy_context().run, _run_report_branch, nodes[name], branch_state)
+        for name, _, _, _ in _REPORT_BRANCHES
+    }
 
-        llm = _get_llm(temperature=0.2)
-        context = "\n\n".join(combined)
-        prompt = (
-            f"Crie um relatório consolidado respondendo à pergunta do usuário.\n\n"
-            f"Pergunta: {question}\n\n"
-            f"Dados coletados:\n{context}\n\n"
-            "Apresente de forma organizada, clara e em português."
-        )
-        response = llm.invoke([HumanMessage(content=prompt)])
+    sources: Dict[str, Optional[AgentState]] = {}
+    for name, _, setting, default in _REPORT_BRANCHES:
+        remaining = _report_branch_timeout(setting, default) - (time.monotonic() - started)
+        try:
+            sources[name] = futures[name].result(timeout=max(remaining, 0))
+        except FuturesTimeout:
+            # A thread termina sozinha; o resultado é descartado
+            futures[name].cancel()
+            logger.warning("reports_agent_node: fonte '%s' excedeu o tempo limite", name)
+            sources[name] = None
+        except Exception as exc:
+            logger.error("reports_agent_node: fonte '%s' falhou: %s", name, exc)
+            sources[name] = None
+    return sources
 
-        avg_confidence = (db_state.get('confidence', 0.5) + doc_state.get('confidence', 0.5)) / 2
-        tools = db_state.get('tools_used', []) + doc_state.get('tools_used', [])
 
+async def _areport_sources(state: AgentState) -> Dict[str, Optional[AgentState]]:
+    """Mesmo pool do caminho síncrono, aguardado com asyncio.wait_for por fonte.
+
+    sync_to_async (thread_sensitive=True) levaria as duas fontes para a mesma
+    thread da requisição e o gather as executaria uma depois da outra.
+    """
+    branch_state = {**state, 'on_event': None}
+    loop = asyncio.get_running_loop()
+    executor = _get_report_executor()
+    nodes = _report_branch_nodes()
+    names = [name for name, _, _, _ in _REPORT_BRANCHES]
+    results = await asyncio.gather(
+        *(
+            asyncio.wait_for(
+                loop.run_in_executor(
+                    executor, contextvars.copy_context().run, _run_report_branch, nodes[name], branch_state
+                ),
+                _report_branch_timeout(setting, default),
+            )
+            for name, _, setting, default in _REPORT_BRANCHES
+        ),
+        return_exceptions=True,
+    )
+
+    sources: Dict[str, Optional[AgentState]] = {}
+    for name, result in zip(names, results):
+        if isinstance(result, asyncio.TimeoutError):
+            logger.warning("reports_agent_node: fonte '%s' excedeu o tempo limite", name)
+            result = None
+        elif isinstance(result, BaseException):
+            logger.error("reports_agent_node: fonte '%s' falhou: %s", name, result)
+            result = None
+        sources[name] = result
+    return sources
+
+
+def _reports_call(state: AgentState, sources: Dict[str, Optional[AgentState]]) -> Union[_AgentCall, Dict[str, Any]]:
+    question = state.get('resolved_question') or state.get('question', '')
+    missing = [name for name, source in sources.items() if source is None]
+    _emit(state, 'stage', {'stage': 'sources_ready', 'missing': missing})
+
+    combined = []
+    confidences = []
+    tools: List[str] = []
+    # Relatório parcial ou fonte com tabelas desconhecidas não vai para o cache
+    tables: Optional[set] = None if missing else set()
+    for name, label, _, _ in _REPORT_BRANCHES:
+        source = sources.get(name)
+        if source is None:
+            # Fonte ausente conta como confiança zero: o aviso de baixa confiança aparece
+            confidences.append(0.0)
+            continue
+        if source.get('agent_response'):
+            combined.append(f"{label}:\n{source['agent_response']}")
+        confidences.append(source.get('confidence', 0.5))
+        tools.extend(source.get('tools_used', []))
+        if tables is not None and source.get('tables_read') is not None:
+            tables.update(source['tables_read'])
+        else:
+            tables = None
+
+    if not combined:
         return {
-            **state,
-            'agent_response': response.content,
-            'confidence': round(avg_confidence, 2),
-            'source': 'Relatórios',
-            'tools_used': list(set(tools)),
-        }
-    except Exception as exc:
-        logger.error("reports_agent_node error: %s", exc)
-        return {
-            **state,
-            'agent_response': "Não consegui gerar o relatório agora. Tente novamente.",
-            'confidence': 0.20,
+            'agent_response': "Não consegui gerar o relatório. Dados insuficientes.",
+            'confidence': 0.30,
             'source': 'Relatórios',
             'tools_used': [],
         }
 
+    context = "\n\n".join(combined)
+    prompt = (
+        f"Crie um relatório consolidado respondendo à pergunta do usuário.\n\n"
+        f"Pergunta: {question}\n\n"
+        f"Dados coletados:\n{context}\n\n"
+    )
+    if missing:
+        labels = ", ".join(label for name, label, _, _ in _REPORT_BRANCHES if name in missing)
+        prompt += f"Atenção: não foi possível consultar ({labels}); informe que o relatório é parcial.\n\n"
+    prompt += "Apresente de forma organizada, clara e em português."
+
+    return _AgentCall(
+        temperature=0.2,
+        messages=[HumanMessage(content=prompt)],
+        confidence=round(sum(confidences) / len(confidences), 2),
+        source='Relatórios',
+        tools_used=list(set(tools)),
+        tables=sorted(tables) if tables is not None else None,
+    )
+
+
+def _prepare_reports_agent(state: AgentState) -> Union[_AgentCall, Dict[str, Any]]:
+    return _reports_call(state, _report_sources(state))
+
+
+async def _aprepare_reports_agent(state: AgentState) -> Union[_AgentCall, Dict[str, Any]]:
+    return _reports_call(state, await _areport_sources(state))
+
+
+def reports_agent_node(state: AgentState) -> AgentState:
+    """Combina dados do banco + documentos (consultados em paralelo) para gerar relatórios."""
+    return _run_agent(state, 'reports_agent_node', _prepare_reports_agent, _REPORTS_ERROR)
+
+
+async def areports_agent_node(state: AgentState) -> AgentState:
+    return await _arun_agent(
+        state, 'reports_agent_node', _prepare_reports_agent, _REPORTS_ERROR, aprepare=_aprepare_reports_agent
+    )
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Node: General Agent
 # ─────────────────────────────────────────────────────────────────────────────
 
+_GENERAL_ERROR = {
+    'agent_response': "Olá! 😊 Sou a Gaby, assistente do Sistema Minerva. Como posso ajudar?",
+    'confidence': 0.60,
+    'source': 'Conhecimento Geral',
+    'tools_used': [],
+}
+
+
+def _prepare_general_agent(state: AgentState) -> _AgentCall:
+    question = state.get('resolved_question') or state.get('question', '')
+    system_msg = (
+        "Você é Gaby, assistente virtual do Sistema Minerva. "
+        "Responda de forma amigável e profissional em português. "
+        "Se não souber algo específico do sistema, ofereça ajuda geral.\n\n"
+        "Capacidades: contratos, orçamentos, funcionários, documentos, regras de negócio."
+    )
+    chat_history = state.get('chat_history', [])
+    from langchain_core.messages import AIMessage
+    history_msgs = []
+    for msg in chat_history[-6:]:
+        if msg['role'] == 'user':
+            history_msgs.append(HumanMessage(content=msg['content']))
+        else:
+            history_msgs.append(AIMessage(content=msg['content']))
+
+    return _AgentCall(
+        temperature=0.5,
+        messages=[SystemMessage(content=system_msg)] + history_msgs + [HumanMessage(content=question)],
+        confidence=0.75,
+        source='Conhecimento Geral',
+        tools_used=['general_llm'],
+    )
+
+
 def general_agent_node(state: AgentState) -> AgentState:
     """Fallback para saudações e perguntas gerais."""
-    question = state.get('resolved_question') or state.get('question', '')
-    try:
-        llm = _get_llm(temperature=0.5)
-        system_msg = (
-            "Você é Gaby, assistente virtual do Sistema Minerva. "
-            "Responda de forma amigável e profissional em português. "
-            "Se não souber algo específico do sistema, ofereça ajuda geral.\n\n"
-            "Capacidades: contratos, orçamentos, funcionários, documentos, regras de negócio."
-        )
-        chat_history = state.get('chat_history', [])
-        from langchain_core.messages import AIMessage
-        history_msgs = []
-        for msg in chat_history[-6:]:
-            if msg['role'] == 'user':
-                history_msgs.append(HumanMessage(content=msg['content']))
-            else:
-                history_msgs.append(AIMessage(content=msg['content']))
-
-        all_msgs = [SystemMessage(content=system_msg)] + history_msgs + [HumanMessage(content=question)]
-        response = llm.invoke(all_msgs)
+    return _run_agent(state, 'general_agent_node', _prepare_general_agent, _GENERAL_ERROR)
 
-        return {
-            **state,
-            'agent_response': response.content,
-            'confidence': 0.75,
-            'source': 'Conhecimento Geral',
-            'tools_used': ['general_llm'],
-        }
-    except Exception as exc:
-        logger.error("general_agent_node error: %s", exc)
-        return {
-            **state,
-            'agent_response': "Olá! 😊 Sou a Gaby, assistente do Sistema Minerva. Como posso ajudar?",
-            'confidence': 0.60,
-            'source': 'Conhecimento Geral',
-            'tools_used': [],
-        }
+
+async def ageneral_agent_node(state: AgentState) -> AgentState:
+    return await _arun_agent(state, 'general_agent_node', _prepare_general_agent, _GENERAL_ERROR)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -508,18 +794,19 @@ def route_to_agent(state: AgentState) -> str:
 # ─────────────────────────────────────────────────────────────────────────────
 
 def _build_graph():
+    from langchain_core.runnables import RunnableLambda
     from langgraph.graph import StateGraph, END
 
     graph = StateGraph(AgentState)
 
-    # Nodes
-    graph.add_node("classify", classify_node)
-    graph.add_node("database", database_agent_node)
-    graph.add_node("document", document_agent_node)
-    graph.add_node("rules", rules_agent_node)
-    graph.add_node("system", system_agent_node)
-    graph.add_node("reports", reports_agent_node)
-    graph.add_node("general", general_agent_node)
+    # Nodes — cada um com a versão síncrona (graph.invoke) e async (graph.ainvoke)
+    graph.add_node("classify", RunnableLambda(classify_node, afunc=aclassify_node))
+    graph.add_node("database", RunnableLambda(database_agent_node, afunc=adatabase_agent_node))
+    graph.add_node("document", RunnableLambda(document_agent_node, afunc=adocument_agent_node))
+    graph.add_node("rules", RunnableLambda(rules_agent_node, afunc=arules_agent_node))
+    graph.add_node("system", RunnableLambda(system_agent_node, afunc=asystem_agent_node))
+    graph.add_node("reports", RunnableLambda(reports_agent_node, afunc=areports_agent_node))
+    graph.add_node("general", RunnableLambda(general_agent_node, afunc=ageneral_agent_node))
     graph.add_node("validate", validate_node)
 
     # Entry
@@ -562,6 +849,11 @@ def get_graph():
 # Public API
 # ─────────────────────────────────────────────────────────────────────────────
 
+# Agentes cujas respostas dependem só da pergunta, do escopo e dos dados lidos
+_CACHEABLE_AGENTS = {'database', 'reports', 'document', 'rules', 'system'}
+_CACHE_MIN_CONFIDENCE = 0.7
+
+
 class AliceGraphService:
     """
     Serviço principal do agente Alice usando LangGraph.
@@ -573,7 +865,13 @@ class AliceGraphService:
         from .memory_service import MemoryService
         self._memory = MemoryService()
 
-    def run(self, question: str, session_id: str = None, user=None) -> Dict[str, Any]:
+    def run(
+        self,
+        question: str,
+        session_id: str = None,
+        user=None,
+        on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
         """
         Executa o grafo completo e retorna resposta com metadados.
 
@@ -581,6 +879,7 @@ class AliceGraphService:
             question: Pergunta do usuário
             session_id: ID da sessão (opcional)
             user: Usuário Django autenticado (para controle de permissões)
+            on_event: Callback de progresso ('stage'/'token'), usado pelos endpoints SSE
 
         Returns:
             {
@@ -601,46 +900,171 @@ class AliceGraphService:
             if session_id:
                 chat_history = self._memory.get_history(session_id, limit=10)
 
-            initial_state: AgentState = {
-                'question': question,
-                'resolved_question': resolved_question,
-                'session_id': session_id or '',
-                'user': user,
-                'chat_history': chat_history,
-                'start_time': time.time(),
-            }
+            initial_state = self._initial_state(question, resolved_question, session_id, user, chat_history, on_event)
 
-            final_state = self._graph.invoke(initial_state)
+            # Um único memo de embeddings para todos os nós do grafo
+            # (reports → database + document repetem a mesma pergunta).
+            from .embedding_cache import embedding_scope
+            with embedding_scope() as embedding_stats:
+                cache_key = self._answer_cache_key(resolved_question, user)
+                result = self._cached_answer(cache_key, resolved_question, on_event)
+                if result is None:
+                    final_state = self._graph.invoke(initial_state)
+                    result = self._result_from_state(final_state)
+                    self._store_answer(cache_key, resolved_question, result, final_state.get('tables_read'))
+            logger.debug("AliceGraph embedding cache: %s", embedding_stats.as_dict())
 
             # Salva no Redis
             if session_id:
                 self._memory.save_message(session_id, 'user', question)
-                self._memory.save_message(session_id, 'assistant', final_state.get('final_response', ''))
-
-            return {
-                'success': True,
-                'response': final_state.get('final_response', ''),
-                'confidence': final_state.get('confidence', 0.5),
-                'source': final_state.get('source', 'Desconhecido'),
-                'agent_type': final_state.get('agent_type', 'general'),
-                'tools_used': final_state.get('tools_used', []),
-            }
+                self._memory.save_message(session_id, 'assistant', result['response'])
+
+            return result
 
         except Exception as exc:
-            logger.error("AliceGraphService.run error: %s", exc, exc_info=True)
-            try:
-                import sentry_sdk
-                sentry_sdk.capture_exception(exc)
-            except Exception:
-                pass
-            return {
-                'success': False,
-                'response': "Desculpe, não consegui processar sua pergunta agora. Pode tentar novamente? 😊",
-                'confidence': 0.0,
-                'source': 'Erro',
-                'agent_type': 'error',
-                'tools_used': [],
-            }
+            return self._error_result(exc)
+
+    async def arun(
+        self,
+        question: str,
+        session_id: str = None,
+        user=None,
+        on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Versão async de run (graph.ainvoke), usada pelas views async sob ASGI.
+        LLMs são chamados com ainvoke/astream; ORM, cache e embeddings rodam em
+        sync_to_async, então o event loop segue atendendo outras conversas.
+        Mesmos argumentos e retorno de run().
+        """
+        try:
+            resolved_question = await sync_to_async(self._resolve_anaphora)(question, session_id)
+
+            chat_history = []
+            if session_id:
+                chat_history = await self._memory.aget_history(session_id, limit=10)
+
+            initial_state = self._initial_state(question, resolved_question, session_id, user, chat_history, on_event)
+
+            from .embedding_cache import embedding_scope
+            with embedding_scope() as embedding_stats:
+                cache_key = await sync_to_async(self._answer_cache_key)(resolved_question, user)
+                result = await sync_to_async(self._cached_answer)(cache_key, resolved_question, on_event)
+                if result is None:
+                    final_state = await self._graph.ainvoke(initial_state)
+                    result = self._result_from_state(final_state)
+                    await sync_to_async(self._store_answer)(
+                        cache_key, resolved_question, result, final_state.get('tables_read')
+                    )
+            logger.debug("AliceGraph embedding cache: %s", embedding_stats.as_dict())
+
+            if session_id:
+                await self._memory.asave_message(session_id, 'user', question)
+                await self._memory.asave_message(session_id, 'assistant', result['response'])
+
+            return result
+
+        except Exception as exc:
+            return self._error_result(exc)
+
+    @staticmethod
+    def _initial_state(question, resolved_question, session_id, user, chat_history, on_event) -> AgentState:
+        return {
+            'question': question,
+            'resolved_question': resolved_question,
+            'session_id': session_id or '',
+            'user': user,
+            'chat_history': chat_history,
+            'start_time': time.time(),
+            'on_event': on_event,
+        }
+
+    @staticmethod
+    def _result_from_state(final_state: AgentState) -> Dict[str, Any]:
+        return {
+            'success': True,
+            'response': final_state.get('final_response', ''),
+            'confidence': final_state.get('confidence', 0.5),
+            'source': final_state.get('source', 'Desconhecido'),
+            'agent_type': final_state.get('agent_type', 'general'),
+            'tools_used': final_state.get('tools_used', []),
+        }
+
+    @staticmethod
+    def _error_result(exc: Exception) -> Dict[str, Any]:
+        logger.error("AliceGraphService.run error: %s", exc, exc_info=True)
+        try:
+            import sentry_sdk
+            sentry_sdk.capture_exception(exc)
+        except Exception:
+            pass
+        return {
+            'success': False,
+            'response': "Desculpe, não consegui processar sua pergunta agora. Pode tentar novamente? 😊",
+            'confidence': 0.0,
+            'source': 'Erro',
+            'agent_type': 'error',
+            'tools_used': [],
+        }
+
+    # ------------------------------------------------------------------
+    # Cache semântico de respostas
+    # ------------------------------------------------------------------
+    def _answer_cache_key(self, resolved_question: str, user) -> Optional[tuple]:
+        """(cache, escopo, embedding) da pergunta, ou None se o cache estiver indisponível."""
+        from .answer_cache import get_answer_cache, scope_key
+        answer_cache = get_answer_cache()
+        if answer_cache is None:
+            return None
+        try:
+            from .gemini_service import GeminiService
+            embedding = GeminiService().get_embedding(resolved_question)
+            return answer_cache, scope_key(user), embedding
+        except Exception as exc:
+            logger.warning("Cache de respostas indisponível: %s", exc)
+            return None
+
+    def _cached_answer(
+        self, cache_key: Optional[tuple], resolved_question: str, on_event=None
+    ) -> Optional[Dict[str, Any]]:
+        if cache_key is None:
+            return None
+        answer_cache, scope, embedding = cache_key
+        try:
+            hit = answer_cache.lookup('graph', scope, embedding, resolved_question)
+        except Exception as exc:
+            logger.warning("Falha ao consultar cache de respostas: %s", exc)
+            return None
+        if hit is None:
+            return None
+        logger.info("AliceGraph: resposta do cache (similaridade=%.3f)", hit.similarity)
+        if on_event is not None:
+            on_event('stage', {'stage': 'cache_hit'})
+        return {**hit.payload, 'cache_hit': True}
+
+    def _store_answer(
+        self,
+        cache_key: Optional[tuple],
+        resolved_question: str,
+        result: Dict[str, Any],
+        tables: Optional[List[str]],
+    ) -> None:
+        """Guarda respostas confiáveis, com as tabelas que os agentes de fato leram.
+
+        Sem saber quais tabelas a resposta lê (`tables` None) não há como invalidá-la:
+        ela não é guardada.
+        """
+        if cache_key is None or not result['response'] or tables is None:
+            return
+        agent_type = result['agent_type']
+        if agent_type not in _CACHEABLE_AGENTS or result['confidence'] < _CACHE_MIN_CONFIDENCE:
+            return
+
+        answer_cache, scope, embedding = cache_key
+        try:
+            answer_cache.store('graph', scope, resolved_question, embedding, payload=result, tables=tables)
+        except Exception as exc:
+            logger.warning("Falha ao gravar no cache de respostas: %s", exc)
 
     def _resolve_anaphora(self, question: str, session_id: Optional[str]) -> str:
         """Tenta resolver referências anafóricas usando histórico."""
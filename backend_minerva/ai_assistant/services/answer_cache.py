@@ -0,0 +1,211 @@
+"""
+Cache semântico de respostas da Alice.
+
+Perguntas repetidas ("quantos contratos ativos?", "qual o orçamento de 2024?")
+pagavam de novo classificação, embeddings, geração de SQL pelo LLM, execução e
+humanização. Este cache fica na frente de SQLInterpreterService.interpret_and_execute
+e AliceGraphService.run:
+
+  - casa perguntas pela similaridade de cosseno do embedding (>= limiar) desde
+    que os números e os trechos entre aspas sejam os mesmos — "contratos de 2023"
+    e "contratos de 2024" têm embeddings quase idênticos e respostas diferentes;
+  - é particionado pelo escopo de permissão (`PermissionScope.describe()`), então
+    um usuário nunca recebe resposta gerada no escopo de outro;
+  - cada entrada guarda SQL gerado, resposta e as tabelas tocadas, com TTL;
+  - uma escrita confirmada (commit) numa tabela tocada invalida as entradas
+    criadas antes dela (post_save/post_delete dos modelos de ALICE_SAFE_TABLES e
+    de DocumentEmbedding, ver ai_assistant/signals.py);
+  - as tabelas de cada entrada são as que a resposta de fato leu (SQL executado,
+    ferramentas do agente); resposta com tabelas desconhecidas não é guardada.
+
+As entradas vivem no cache do Django; com backend Redis são compartilhadas entre
+workers.
+
+Uso:
+    cache = get_answer_cache()
+    hit = cache.lookup('sql', scope_key, embedding, question)
+    if hit is None:
+        ...
+        cache.store('sql', scope_key, question, embedding, payload, tables=['contract_contract'])
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+_INDEX_KEY = "alice:answers:{namespace}:{scope}"
+_ENTRY_KEY = "alice:answer:{entry_id}"
+_TABLE_WRITE_KEY = "alice:answers:written:{table}"
+
+_LITERAL_RE = re.compile(r'"([^"]*)"|“([^”]*)”|\'([^\']*)\'|‘([^’]*)’|(\d+(?:[.,]\d+)*)')
+
+@dataclass
+class AnswerCacheHit:
+    question: str
+    similarity: float
+    payload: Dict[str, Any]
+    tables: List[str]
+
+
+def scope_key(user) -> str:
+    """Chave do escopo de permissão do usuário (hash de PermissionScope.describe())."""
+    from .permission_scope import PermissionScope
+    description = PermissionScope(user).describe()
+    return hashlib.sha1(description.encode('utf-8')).hexdigest()
+
+
+def question_literals(question: str) -> List[str]:
+    """Números e trechos entre aspas da pergunta, que a similaridade não distingue."""
+    literals = []
+    for match in _LITERAL_RE.finditer(question or ''):
+        text = next(group for group in match.groups() if group is not None)
+        literals.append(' '.join(text.casefold().split()))
+    return sorted(literals)
+
+
+def mark_tables_written(tables: Iterable[str]) -> None:
+    """Registra escrita nas tabelas; entradas anteriores que as tocam passam a ser ignoradas."""
+    now = time.time()
+    cache.set_many({_TABLE_WRITE_KEY.format(table=t): now for t in tables}, None)
+
+
+class SemanticAnswerCache:
+    """
+    Índice por (namespace, escopo) com os embeddings das perguntas; o payload de
+    cada entrada fica em chave própria, com TTL. Namespaces separam formatos de
+    resposta ('sql' → interpret_and_execute, 'graph' → AliceGraphService.run).
+    """
+
+    def __init__(self, ttl: int, threshold: float, max_entries: int):
+        self.ttl = ttl
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    def lookup(
+        self,
+        namespace: str,
+        scope: str,
+        embedding: Optional[List[float]],
+        question: Optional[str] = None,
+    ) -> Optional[AnswerCacheHit]:
+        """Entrada mais similar do escopo, se acima do limiar e ainda válida.
+
+        Com `question`, só valem entradas com os mesmos números e trechos entre aspas.
+        """
+        if not embedding:
+            return None
+        literals = question_literals(question) if question is not None else None
+
+        index = cache.get(_INDEX_KEY.format(namespace=namespace, scope=scope)) or []
+        if not index:
+            return None
+
+        matrix = np.asarray([item['embedding'] for item in index], dtype=np.float32)
+        query = np.asarray(embedding, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * float(np.linalg.norm(query))
+        if matrix.shape[1] != query.shape[0] or not norms.any():
+            return None
+        scores = (matrix @ query) / np.where(norms == 0, 1.0, norms)
+
+        for position in np.argsort(-scores):
+            similarity = float(scores[position])
+            if similarity < self.threshold:
+                break
+            item = index[position]
+            if not self._is_fresh(item):
+                continue
+            entry = cache.get(_ENTRY_KEY.format(entry_id=item['id']))
+            if entry is None:
+                continue
+            if literals is not None and question_literals(entry['question']) != literals:
+                continue
+            return AnswerCacheHit(
+                question=entry['question'],
+                similarity=similarity,
+                payload=entry['payload'],
+                tables=item['tables'],
+            )
+        return None
+
+    def store(
+        self,
+        namespace: str,
+        scope: str,
+        question: str,
+        embedding: Optional[List[float]],
+        payload: Dict[str, Any],
+        tables: Iterable[str],
+    ) -> None:
+        """Grava a resposta; uma entrada anterior da mesma pergunta é substituída."""
+        if not embedding:
+            return
+        entry_id = uuid.uuid4().hex
+        question_hash = hashlib.sha1(question.strip().lower().encode('utf-8')).hexdigest()
+        created_at = time.time()
+        tables = sorted(set(tables))
+        cache.set(
+            _ENTRY_KEY.format(entry_id=entry_id),
+            {'question': question, 'payload': payload},
+            self.ttl,
+        )
+
+        key = _INDEX_KEY.format(namespace=namespace, scope=scope)
+        with self._lock:
+            index = cache.get(key) or []
+            cutoff = created_at - self.ttl
+            index = [
+                item for item in index
+                if item['created_at'] > cutoff and item['question_hash'] != question_hash
+            ]
+            index.append({
+                'id': entry_id,
+                'question_hash': question_hash,
+                'embedding': [float(x) for x in embedding],
+                'tables': tables,
+                'created_at': created_at,
+            })
+            cache.set(key, index[-self.max_entries:], self.ttl)
+
+    # ------------------------------------------------------------------
+    # Invalidação
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _is_fresh(item: Dict[str, Any]) -> bool:
+        if not item['tables']:
+            return True
+        written = cache.get_many([_TABLE_WRITE_KEY.format(table=t) for t in item['tables']])
+        return all(ts < item['created_at'] for ts in written.values())
+
+
+_answer_cache: Optional[SemanticAnswerCache] = None
+_singleton_lock = threading.Lock()
+
+
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    """Singleton do cache; None quando ALICE_ANSWER_CACHE_ENABLED=False."""
+    global _answer_cache
+    if not getattr(settings, 'ALICE_ANSWER_CACHE_ENABLED', True):
+        return None
+    if _answer_cache is None:
+        with _singleton_lock:
+            if _answer_cache is None:
+                _answer_cache = SemanticAnswerCache(
+                    ttl=getattr(settings, 'ALICE_ANSWER_CACHE_TTL', 600),
+                    threshold=getattr(settings, 'ALICE_ANSWER_CACHE_THRESHOLD', 0.95),
+                    max_entries=getattr(settings, 'ALICE_ANSWER_CACHE_MAX_ENTRIES', 200),
+                )
+    return _answer_cache
@@ -0,0 +1,358 @@
+"""
+Indexação em lote de DocumentEmbedding.
+
+Substitui o caminho "um documento → uma chamada get_embedding → um INSERT" por:
+
+  1. agrupamento dos textos em lotes do tamanho aceito pelo provedor (100 no Gemini);
+  2. envio concorrente dos lotes com paralelismo limitado e backoff exponencial
+     quando o provedor sinaliza rate limit (429 / RESOURCE_EXHAUSTED);
+  3. gravação de cada lote com bulk_create em uma única transação;
+  4. aviso ao cache de respostas da Alice após o commit de cada lote (bulk_create,
+     bulk_update e UPDATE não disparam post_save);
+  5. checkpoint opcional em arquivo JSON, permitindo retomar uma indexação
+     interrompida sem revetorizar o que já foi gravado.
+
+`sync()` torna a indexação incremental: cada linha guarda o hash do conteúdo e o
+modelo de embedding usado, então apenas documentos novos ou alterados (ou
+vetorizados com outro modelo) voltam ao provedor; os que sumiram da fonte são
+desativados (is_active=False) em vez de apagados.
+
+Uso:
+    indexer = BulkEmbeddingIndexer(GeminiService(), checkpoint_path='/tmp/idx.json')
+    result = indexer.sync([
+        {'document_type': 'FAQ', 'title': '...', 'content': '...', 'metadata': {}},
+    ], document_types=['FAQ'])
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db import transaction
+
+from .answer_cache import mark_tables_written
+from .embedding_cache import get_embedding_cache
+from .vector_index import get_document_index
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_BATCH_SIZE = 100
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_BASE = 1.0
+
+
+@dataclass
+class BulkIndexResult:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deactivated: int = 0
+    skipped: int = 0
+    failed: int = 0
+    batches: int = 0
+    by_type: Dict[str, int] = field(default_factory=dict)
+
+    def summary(self) -> str:
+        return (
+            f"+{self.created} novos, ~{self.updated} alterados, "
+            f"={self.unchanged} inalterados, -{self.deactivated} desativados"
+        )
+
+
+def content_hash(text: str) -> str:
+    """Hash do conteúdo vetorizado; mudou o hash, o embedding precisa ser refeito."""
+    return hashlib.sha256((text or '').strip().encode('utf-8')).hexdigest()
+
+
+def document_key(doc: Dict[str, Any]) -> str:
+    """Identificador estável de um documento para o checkpoint."""
+    raw = f"{doc.get('document_type', '')}\x00{doc.get('title', '')}\x00{doc.get('content', '')}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _is_rate_limited(exc: Exception) -> bool:
+    name = type(exc).__name__
+    if name in {'ResourceExhausted', 'TooManyRequests', 'RateLimitError'}:
+        return True
+    message = str(exc).lower()
+    return '429' in message or 'resource_exhausted' in message or 'rate limit' in message
+
+
+class BulkEmbeddingIndexer:
+    """
+    Vetoriza e grava documentos em lote.
+    As chamadas ao provedor rodam em threads; a escrita no banco fica na thread
+    principal para não abrir uma conexão por worker.
+    """
+
+    def __init__(
+        self,
+        gemini_service,
+        batch_size: int = PROVIDER_BATCH_SIZE,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        checkpoint_path: Optional[str] = None,
+    ):
+        self.gemini = gemini_service
+        self.batch_size = max(1, min(batch_size, PROVIDER_BATCH_SIZE))
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.checkpoint_path = checkpoint_path
+        self._completed: Set[str] = self._load_checkpoint()
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    @property
+    def is_resuming(self) -> bool:
+        return bool(self._completed)
+
+    def sync(
+        self,
+        documents: List[Dict[str, Any]],
+        document_types: Optional[Iterable[str]] = None,
+    ) -> BulkIndexResult:
+        """
+        Sincroniza o índice com `documents`, identificados por (document_type, title).
+
+        - hash e modelo iguais → nenhuma chamada ao provedor (reativa se estava inativo);
+        - conteúdo alterado ou modelo diferente → revetoriza e atualiza a linha existente;
+        - documento novo → cria;
+        - linha ativa dos `document_types` ausente de `documents` → desativada.
+        """
+        from ..models import DocumentEmbedding
+
+        types = set(document_types or {doc['document_type'] for doc in documents})
+        model = self.gemini.EMBEDDING_MODEL
+
+        existing: Dict[Tuple[str, str], Any] = {}
+        duplicates = []
+        rows = (
+            DocumentEmbedding.objects
+            .filter(document_type__in=types)
+            .only('id', 'document_type', 'title', 'metadata', 'content_hash', 'embedding_model', 'is_active')
+            .order_by('id')
+        )
+        for row in rows:
+            identity = (row.document_type, row.title)
+            if identity in existing:
+                duplicates.append(row)
+            else:
+                existing[identity] = row
+
+        result = BulkIndexResult()
+        pending = []
+        touched = []
+        seen: Set[Tuple[str, str]] = set()
+        for doc in documents:
+            identity = (doc['document_type'], doc.get('title', '')[:255])
+            if identity in seen:
+                continue
+            seen.add(identity)
+
+            row = existing.get(identity)
+            if row is None:
+                pending.append(doc)
+                continue
+
+            metadata = doc.get('metadata') or {}
+            if row.content_hash == content_hash(doc['content']) and row.embedding_model == model:
+                if not row.is_active or row.metadata != metadata:
+                    row.is_active = True
+                    row.metadata = metadata
+                    touched.append(row)
+                result.unchanged += 1
+            else:
+                pending.append({**doc, 'id': row.id})
+
+        stale = [row for identity, row in existing.items() if identity not in seen and row.is_active]
+        stale += [row for row in duplicates if row.is_active]
+
+        with transaction.atomic():
+            if touched:
+                DocumentEmbedding.objects.bulk_update(touched, ['is_active', 'metadata'])
+            if stale:
+                result.deactivated = DocumentEmbedding.objects.filter(
+                    id__in=[row.id for row in stale]
+                ).update(is_active=False)
+        if touched or stale:
+            self._notify_written()
+
+        indexed = self.index(pending)
+        result.created = indexed.created
+        result.updated = indexed.updated
+        result.skipped = indexed.skipped
+        result.failed = indexed.failed
+        result.batches = indexed.batches
+        result.by_type = indexed.by_type
+
+        logger.info("BulkEmbeddingIndexer.sync: %s", result.summary())
+        return result
+
+    def index(self, documents: List[Dict[str, Any]]) -> BulkIndexResult:
+        """
+        Vetoriza e grava `documents`; ignora os já presentes no checkpoint.
+        Documentos com 'id' atualizam a linha existente em vez de criar outra.
+        """
+        result = BulkIndexResult()
+
+        pending = []
+        for doc in documents:
+            if document_key(doc) in self._completed:
+                result.skipped += 1
+            elif (doc.get('content') or '').strip():
+                pending.append(doc)
+            else:
+                result.skipped += 1
+
+        if not pending:
+            self._clear_checkpoint()
+            return result
+
+        batches = [
+            pending[i:i + self.batch_size]
+            for i in range(0, len(pending), self.batch_size)
+        ]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._embed_batch, batch): batch for batch in batches}
+            for future in as_completed(futures):
+                batch = futures[future]
+                result.batches += 1
+                try:
+                    embeddings = future.result()
+                except Exception as exc:
+                    logger.error("BulkEmbeddingIndexer: lote com %d documentos falhou — %s", len(batch), exc)
+                    result.failed += len(batch)
+                    continue
+                self._write_batch(batch, embeddings, result)
+
+        if not result.failed:
+            self._clear_checkpoint()
+
+        logger.info(
+            "BulkEmbeddingIndexer: %d criados, %d atualizados, %d ignorados, %d falhas em %d lotes",
+            result.created, result.updated, result.skipped, result.failed, result.batches,
+        )
+        return result
+
+    # ------------------------------------------------------------------
+    # Provedor
+    # ------------------------------------------------------------------
+    def _embed_batch(self, batch: List[Dict[str, Any]]) -> List[List[float]]:
+        texts = [doc['content'] for doc in batch]
+        return get_embedding_cache().get_or_compute_many(
+            texts, self.gemini.EMBEDDING_MODEL, self._embed_with_backoff
+        )
+
+    def _embed_with_backoff(self, texts: List[str]) -> List[List[float]]:
+        attempt = 0
+        while True:
+            try:
+                return self.gemini.embeddings_model.embed_documents(texts, batch_size=self.batch_size)
+            except Exception as exc:
+                attempt += 1
+                if not _is_rate_limited(exc) or attempt > self.max_retries:
+                    raise
+                delay = self.backoff_base * (2 ** (attempt - 1)) + random.uniform(0, self.backoff_base)
+                logger.warning(
+                    "BulkEmbeddingIndexer: rate limit (tentativa %d/%d), aguardando %.1fs",
+                    attempt, self.max_retries, delay,
+                )
+                time.sleep(delay)
+
+    # ------------------------------------------------------------------
+    # Banco
+    # ------------------------------------------------------------------
+    def _write_batch(
+        self,
+        batch: List[Dict[str, Any]],
+        embeddings: List[List[float]],
+        result: BulkIndexResult,
+    ) -> None:
+        from ..models import DocumentEmbedding
+
+        model = self.gemini.EMBEDDING_MODEL
+        new_objs = []
+        changed_objs = []
+        keys = []
+        for doc, embedding in zip(batch, embeddings):
+            if not embedding:
+                result.failed += 1
+                continue
+            obj = DocumentEmbedding(
+                id=doc.get('id'),
+                document_type=doc['document_type'],
+                title=doc.get('title', '')[:255],
+                content=doc['content'],
+                metadata=doc.get('metadata') or {},
+                embedding=embedding,
+                content_hash=content_hash(doc['content']),
+                embedding_model=model,
+                is_active=True,
+            )
+            (changed_objs if obj.id else new_objs).append(obj)
+            keys.append(document_key(doc))
+
+        if not new_objs and not changed_objs:
+            return
+
+        with transaction.atomic():
+            if new_objs:
+                DocumentEmbedding.objects.bulk_create(new_objs)
+            if changed_objs:
+                DocumentEmbedding.objects.bulk_update(changed_objs, [
+                    'title', 'content', 'metadata', 'embedding',
+                    'content_hash', 'embedding_model', 'is_active',
+                ])
+        self._notify_written()
+
+        result.created += len(new_objs)
+        result.updated += len(changed_objs)
+        for obj in new_objs + changed_objs:
+            result.by_type[obj.document_type] = result.by_type.get(obj.document_type, 0) + 1
+        self._completed.update(keys)
+        self._save_checkpoint()
+
+    def _notify_written(self) -> None:
+        """Escritas em lote não disparam os signals: invalida o índice e o cache de respostas."""
+        from ..models import DocumentEmbedding
+
+        get_document_index().invalidate()
+        transaction.on_commit(
+            lambda: mark_tables_written([DocumentEmbedding._meta.db_table]), robust=True
+        )
+
+    # ------------------------------------------------------------------
+    # Checkpoint
+    # ------------------------------------------------------------------
+    def _load_checkpoint(self) -> Set[str]:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return set()
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as fh:
+                return set(json.load(fh).get('completed', []))
+        except (OSError, ValueError) as exc:
+            logger.warning("BulkEmbeddingIndexer: checkpoint ilegível (%s) — ignorando", exc)
+            return set()
+
+    def _save_checkpoint(self) -> None:
+        if not self.checkpoint_path:
+            return
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump({'completed': sorted(self._completed)}, fh)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _clear_checkpoint(self) -> None:
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        self._completed = set()
@@ -0,0 +1,194 @@
+"""
+Streaming SSE (text/event-stream) para os endpoints de chat da Alice.
+
+O pipeline (SQLInterpreterService / AliceGraphService) roda numa thread e
+publica eventos pelo callback `on_event`; a resposta HTTP repassa cada um
+assim que chega:
+
+    event: start     → enviado imediatamente (primeiro byte em milissegundos)
+    event: stage     → {"stage": "classified" | "sql_generated" | "rows_ready" | ...}
+    event: token     → {"text": "..."} trechos da resposta gerada pelo LLM
+    event: done      → payload final, mesmo formato do endpoint síncrono
+
+A persistência (mensagens, sessão) acontece em `finish`, ao final do pipeline,
+mesmo que o cliente desconecte no meio do stream.
+
+Sob ASGI, `asse_response` faz o mesmo com uma coroutine (ex.: AliceGraphService.arun)
+no event loop, sem ocupar uma thread durante a geração.
+
+Uso:
+    return sse_response(
+        run=lambda on_event: interpreter.interpret_and_execute(msg, session, on_event=on_event),
+        finish=lambda result: persist(result),
+    )
+"""
+import asyncio
+import json
+import logging
+import queue
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+logger = logging.getLogger(__name__)
+
+EventCallback = Callable[[str, Dict[str, Any]], None]
+
+HEARTBEAT_SECONDS = 15.0
+
+_FINISHED = object()
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Permite que o DRF aceite `Accept: text/event-stream` (EventSource / fetch SSE)."""
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Erros de validação/autenticação chegam aqui antes do stream começar
+        return sse_event('error', data if isinstance(data, dict) else {'detail': data}).encode(self.charset)
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def stream_pipeline(
+    run: Callable[[EventCallback], Dict[str, Any]],
+    finish: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]],
+    heartbeat: float = HEARTBEAT_SECONDS,
+) -> Iterator[str]:
+    """
+    Executa `run(on_event)` numa thread e gera os eventos SSE.
+
+    Args:
+        run: Pipeline; recebe o callback de eventos e retorna o dict de resultado
+        finish: Persiste o resultado (None se o pipeline falhou) e retorna o payload de 'done'
+        heartbeat: Intervalo dos comentários keep-alive enquanto nada é publicado
+    """
+    events: queue.Queue = queue.Queue()
+    outcome: Dict[str, Any] = {}
+
+    def worker():
+        try:
+            outcome['result'] = run(lambda event, data: events.put((event, data)))
+        except Exception as exc:
+            logger.error(f"Erro no pipeline em streaming: {exc}", exc_info=True)
+        finally:
+            # Conexões abertas pela thread não são fechadas pelo ciclo da requisição
+            connections.close_all()
+            events.put(_FINISHED)
+
+    thread = threading.Thread(target=worker, name='alice-sse', daemon=True)
+    thread.start()
+
+    completed = False
+    try:
+        yield sse_event('start', {})
+        while True:
+            try:
+                item = events.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            if item is _FINISHED:
+                break
+            yield sse_event(*item)
+        completed = True
+    finally:
+        if not completed:
+            # Cliente desconectou: a conversa ainda precisa ser registrada
+            thread.join()
+            try:
+                finish(outcome.get('result'))
+            except Exception as exc:
+                logger.error(f"Erro ao persistir resposta após desconexão: {exc}")
+
+    yield sse_event('done', finish(outcome.get('result')))
+
+
+def sse_response(
+    run: Callable[[EventCallback], Dict[str, Any]],
+    finish: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]],
+) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(stream_pipeline(run, finish), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx: não bufferizar, senão os eventos só chegam no final
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def astream_pipeline(
+    run: Callable[[EventCallback], Awaitable[Dict[str, Any]]],
+    finish: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]],
+    heartbeat: float = HEARTBEAT_SECONDS,
+) -> AsyncIterator[str]:
+    """
+    Versão async de stream_pipeline: `run(on_event)` é uma coroutine executada
+    como task no event loop; `finish` (síncrono, pode usar o ORM) roda em sync_to_async.
+    """
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+
+    def on_event(event: str, data: Dict[str, Any]) -> None:
+        # Chamado no event loop (nós async) ou em threads (nós via sync_to_async)
+        loop.call_soon_threadsafe(events.put_nowait, (event, data))
+
+    async def worker():
+        try:
+            return await run(on_event)
+        except Exception as exc:
+            logger.error(f"Erro no pipeline em streaming: {exc}", exc_info=True)
+            return None
+        finally:
+            loop.call_soon_threadsafe(events.put_nowait, _FINISHED)
+
+    task = asyncio.ensure_future(worker())
+
+    completed = False
+    try:
+        yield sse_event('start', {})
+        while True:
+            try:
+                item = await asyncio.wait_for(events.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if item is _FINISHED:
+                break
+            yield sse_event(*item)
+        completed = True
+    finally:
+        if not completed:
+            # Cliente desconectou: a conversa ainda precisa ser registrada
+            _background_tasks.add(asyncio.ensure_future(_finish_after(task, finish)))
+
+    yield sse_event('done', await sync_to_async(finish)(task.result()))
+
+
+# Referências fortes para as tasks de persistência pós-desconexão
+_background_tasks: set = set()
+
+
+async def _finish_after(task: asyncio.Future, finish: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]]) -> None:
+    try:
+        await sync_to_async(finish)(await task)
+    except Exception as exc:
+        logger.error(f"Erro ao persistir resposta após desconexão: {exc}")
+    finally:
+        _background_tasks.discard(asyncio.current_task())
+
+
+def asse_response(
+    run: Callable[[EventCallback], Awaitable[Dict[str, Any]]],
+    finish: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]],
+) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(astream_pipeline(run, finish), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,97 @@
+"""
+Probes de capacidade do banco (pgvector, coluna content_tsv) com cache por processo.
+
+Os serviços da Alice são instanciados por requisição/nó do grafo; antes, cada
+instância consultava pg_extension/information_schema no construtor. O resultado
+não muda durante a vida do processo, então é calculado uma vez por alias de conexão.
+
+Só respostas definitivas ficam para sempre (banco não é Postgres, a consulta
+respondeu sim/não). Falha do probe ou da capacidade em uso (timeout, conexão
+caída, lock) vale como "indisponível" só por ALICE_CAPABILITY_RETRY_SECONDS;
+depois o probe roda de novo, em vez de desligar pgvector/tsvector até o restart.
+
+Uso:
+    if has_pgvector():
+        ...
+    reset_capabilities()  # testes / após CREATE EXTENSION
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+# (alias, capacidade) -> (disponível, expira_em); expira_em None = resposta definitiva
+_cache: Dict[Tuple[str, str], Tuple[bool, Optional[float]]] = {}
+_lock = threading.Lock()
+
+
+def _retry_after() -> float:
+    return time.monotonic() + getattr(settings, 'ALICE_CAPABILITY_RETRY_SECONDS', 30)
+
+
+def _cached(key: Tuple[str, str]) -> Optional[bool]:
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    available, expires_at = entry
+    if expires_at is not None and time.monotonic() >= expires_at:
+        return None
+    return available
+
+
+def _probe(alias: str, name: str, check: Callable) -> bool:
+    key = (alias, name)
+    available = _cached(key)
+    if available is not None:
+        return available
+    with _lock:
+        available = _cached(key)
+        if available is None:
+            connection = connections[alias]
+            if connection.vendor != 'postgresql':
+                _cache[key] = (False, None)
+            else:
+                try:
+                    with connection.cursor() as cursor:
+                        _cache[key] = (bool(check(cursor)), None)
+                except Exception as exc:
+                    logger.warning(f"Probe '{name}' falhou no banco '{alias}': {exc} — nova tentativa mais tarde")
+                    _cache[key] = (False, _retry_after())
+            available = _cache[key][0]
+    return available
+
+
+def has_pgvector(alias: str = DEFAULT_DB_ALIAS) -> bool:
+    """Extensão `vector` instalada no banco."""
+    def check(cursor):
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'vector'")
+        return cursor.fetchone() is not None
+    return _probe(alias, 'pgvector', check)
+
+
+def has_tsv_column(alias: str = DEFAULT_DB_ALIAS) -> bool:
+    """Coluna content_tsv (tsvector) presente em ai_assistant_documentembedding."""
+    def check(cursor):
+        cursor.execute("""
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'ai_assistant_documentembedding'
+              AND column_name = 'content_tsv'
+        """)
+        return cursor.fetchone() is not None
+    return _probe(alias, 'tsv_column', check)
+
+
+def mark_unavailable(name: str, alias: str = DEFAULT_DB_ALIAS) -> None:
+    """Registra que uma capacidade falhou em uso; o probe volta a rodar após o retry."""
+    with _lock:
+        _cache[(alias, name)] = (False, _retry_after())
+
+
+def reset_capabilities() -> None:
+    with _lock:
+        _cache.clear()
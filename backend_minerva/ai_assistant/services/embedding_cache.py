@@ -0,0 +1,277 @@
+"""
+Cache de embeddings para o pipeline da Alice.
+
+Três camadas, consultadas nesta ordem:
+
+  1. Memo da requisição → dict ativo dentro de `embedding_scope()`; garante que a
+     mesma pergunta seja vetorizada uma única vez por mensagem (busca híbrida,
+     few-shot, record_success/record_failure, agentes do LangGraph).
+  2. LRU/TTL do processo → compartilhado por todas as requisições do worker.
+  3. Redis (opcional)    → compartilhado entre workers gunicorn/Celery.
+
+A chave é derivada do texto normalizado + nome do modelo de embedding, de modo
+que trocar o modelo nunca reaproveita vetores antigos.
+
+Uso:
+    with embedding_scope() as stats:
+        vec = gemini.get_embedding("Quantos contratos ativos?")
+    stats.as_dict()  # {'memo_hits': 0, 'local_hits': 0, 'redis_hits': 0, 'misses': 1}
+"""
+import contextvars
+import hashlib
+import json
+import logging
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterator, List, Optional
+
+from cachetools import TTLCache
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_REDIS_PREFIX = "alice:embedding:"
+_REDIS_RETRY_SECONDS = 60
+
+
+@dataclass
+class EmbeddingCacheStats:
+    memo_hits: int = 0
+    local_hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memo_hits + self.local_hits + self.redis_hits
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+@dataclass
+class _RequestScope:
+    memo: Dict[str, List[float]]
+    stats: EmbeddingCacheStats
+
+
+_current_scope: contextvars.ContextVar[Optional[_RequestScope]] = contextvars.ContextVar(
+    'alice_embedding_scope', default=None
+)
+
+
+def normalize_text(text: str) -> str:
+    """Normaliza o texto para a chave: NFC, minúsculas e espaços colapsados."""
+    text = unicodedata.normalize('NFC', text or '')
+    return ' '.join(text.split()).lower()
+
+
+def make_key(text: str, model: str) -> str:
+    return hashlib.sha1(f"{model}\x00{normalize_text(text)}".encode('utf-8')).hexdigest()
+
+
+@contextmanager
+def embedding_scope() -> Iterator[EmbeddingCacheStats]:
+    """
+    Ativa o memo por requisição. Escopos aninhados reaproveitam o escopo externo,
+    então AliceGraphService.run e SQLInterpreterService podem ambos abrir um.
+    """
+    scope = _current_scope.get()
+    if scope is not None:
+        yield scope.stats
+        return
+
+    scope = _RequestScope(memo={}, stats=EmbeddingCacheStats())
+    token = _current_scope.set(scope)
+    try:
+        yield scope.stats
+    finally:
+        _current_scope.reset(token)
+
+
+def current_embedding_stats() -> Optional[EmbeddingCacheStats]:
+    scope = _current_scope.get()
+    return scope.stats if scope is not None else None
+
+
+class EmbeddingCache:
+    """
+    Cache de embeddings do processo (LRU + TTL) com camada Redis opcional.
+    Vetores vazios (falha do provedor) nunca são armazenados.
+    """
+
+    def __init__(self, maxsize: int, ttl: int, use_redis: bool = True):
+        self._local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._ttl = ttl
+        self._use_redis = use_redis
+        self._redis = None
+        self._redis_retry_at = 0.0
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    def get_or_compute(
+        self,
+        text: str,
+        model: str,
+        compute: Callable[[str], List[float]],
+    ) -> List[float]:
+        """Retorna o embedding do cache ou chama `compute(text)` e armazena o resultado."""
+        key = make_key(text, model)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        self._record('misses')
+        embedding = compute(text)
+        if embedding:
+            self._store(key, embedding)
+        return embedding
+
+    def get_or_compute_many(
+        self,
+        texts: List[str],
+        model: str,
+        compute_batch: Callable[[List[str]], List[List[float]]],
+    ) -> List[List[float]]:
+        """
+        Versão em lote: consulta o cache para cada texto e envia ao provedor
+        apenas os ausentes, em uma única chamada.
+        """
+        keys = [make_key(t, model) for t in texts]
+        results: List[Optional[List[float]]] = [self._lookup(k) for k in keys]
+
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            for _ in missing:
+                self._record('misses')
+            computed = compute_batch([texts[i] for i in missing]) or []
+            if len(computed) != len(missing):
+                logger.warning(
+                    "EmbeddingCache: provedor retornou %d vetores para %d textos",
+                    len(computed), len(missing),
+                )
+                computed = list(computed) + [[] for _ in range(len(missing) - len(computed))]
+            for i, embedding in zip(missing, computed):
+                results[i] = embedding
+                if embedding:
+                    self._store(keys[i], embedding)
+
+        return [r or [] for r in results]
+
+    def clear(self) -> None:
+        """Limpa apenas a camada local (o Redis expira por TTL)."""
+        with self._lock:
+            self._local.clear()
+
+    # ------------------------------------------------------------------
+    # Camadas
+    # ------------------------------------------------------------------
+    def _lookup(self, key: str) -> Optional[List[float]]:
+        scope = _current_scope.get()
+        if scope is not None and key in scope.memo:
+            scope.stats.memo_hits += 1
+            return scope.memo[key]
+
+        with self._lock:
+            embedding = self._local.get(key)
+        if embedding is not None:
+            self._remember(key, embedding)
+            self._record('local_hits')
+            return embedding
+
+        embedding = self._redis_get(key)
+        if embedding is not None:
+            with self._lock:
+                self._local[key] = embedding
+            self._remember(key, embedding)
+            self._record('redis_hits')
+            return embedding
+
+        return None
+
+    def _store(self, key: str, embedding: List[float]) -> None:
+        with self._lock:
+            self._local[key] = embedding
+        self._remember(key, embedding)
+        self._redis_set(key, embedding)
+
+    @staticmethod
+    def _remember(key: str, embedding: List[float]) -> None:
+        scope = _current_scope.get()
+        if scope is not None:
+            scope.memo[key] = embedding
+
+    @staticmethod
+    def _record(counter: str) -> None:
+        scope = _current_scope.get()
+        if scope is not None:
+            setattr(scope.stats, counter, getattr(scope.stats, counter) + 1)
+
+    # ------------------------------------------------------------------
+    # Redis
+    # ------------------------------------------------------------------
+    def _get_redis(self):
+        """Cliente Redis preguiçoso; após falha, só tenta de novo depois de _REDIS_RETRY_SECONDS."""
+        if not self._use_redis:
+            return None
+        if self._redis is not None:
+            return self._redis
+        if time.monotonic() < self._redis_retry_at:
+            return None
+        try:
+            import redis
+            url = getattr(settings, 'REDIS_URL', 'redis://localhost:6379/0')
+            client = redis.from_url(url, decode_responses=True, socket_connect_timeout=2)
+            client.ping()
+            self._redis = client
+        except Exception as exc:
+            logger.warning("EmbeddingCache: Redis indisponível — %s", exc)
+            self._redis_retry_at = time.monotonic() + _REDIS_RETRY_SECONDS
+        return self._redis
+
+    def _redis_get(self, key: str) -> Optional[List[float]]:
+        client = self._get_redis()
+        if client is None:
+            return None
+        try:
+            raw = client.get(f"{_REDIS_PREFIX}{key}")
+            return json.loads(raw) if raw else None
+        except Exception as exc:
+            logger.warning("EmbeddingCache._redis_get error: %s", exc)
+            self._redis = None
+            self._redis_retry_at = time.monotonic() + _REDIS_RETRY_SECONDS
+            return None
+
+    def _redis_set(self, key: str, embedding: List[float]) -> None:
+        client = self._get_redis()
+        if client is None:
+            return
+        try:
+            client.set(f"{_REDIS_PREFIX}{key}", json.dumps(embedding), ex=self._ttl)
+        except Exception as exc:
+            logger.warning("EmbeddingCache._redis_set error: %s", exc)
+            self._redis = None
+            self._redis_retry_at = time.monotonic() + _REDIS_RETRY_SECONDS
+
+
+# Lazy singleton
+_embedding_cache: Optional[EmbeddingCache] = None
+_singleton_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    global _embedding_cache
+    if _embedding_cache is None:
+        with _singleton_lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache(
+                    maxsize=getattr(settings, 'ALICE_EMBEDDING_CACHE_SIZE', 2048),
+                    ttl=getattr(settings, 'ALICE_EMBEDDING_CACHE_TTL', 86400),
+                    use_redis=getattr(settings, 'ALICE_EMBEDDING_CACHE_REDIS', True),
+                )
+    return _embedding_cache
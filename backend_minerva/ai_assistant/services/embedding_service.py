@@ -4,6 +4,7 @@ from django.db import connection
 from django.conf import settings
 
 from ..models import DocumentEmbedding, ConversationEmbedding, ConversationSession, ConversationMessage
+from .db_capabilities import has_pgvector
 from .gemini_service import GeminiService
 
 logger = logging.getLogger(__name__)
@@ -15,19 +16,9 @@ class EmbeddingService:
     Usa LangChain + Gemini para gerar embeddings e PostgreSQL + pgvector para armazenamento e busca.
     """
 
-    def __init__(self):
-        self.gemini_service = GeminiService()
-        self._pgvector_enabled = self._check_pgvector()
-
-    def _check_pgvector(self) -> bool:
-        """Verifica se pgvector está disponível no banco."""
-        try:
-            with connection.cursor() as cursor:
-                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'vector'")
-                return cursor.fetchone() is not None
-        except Exception as e:
-            logger.warning(f"pgvector não disponível: {str(e)}")
-            return False
+    def __init__(self, gemini_service: Optional[GeminiService] = None):
+        self.gemini_service = gemini_service or GeminiService()
+        self._pgvector_enabled = has_pgvector()
 
     def create_document_embedding(
         self,
@@ -56,12 +47,15 @@ class EmbeddingService:
                 logger.error("Falha ao gerar embedding para documento")
                 return None
 
+            from .bulk_indexer import content_hash
             doc = DocumentEmbedding.objects.create(
                 document_type=document_type,
                 title=title,
                 content=content,
                 metadata=metadata or {},
-                embedding=embedding
+                embedding=embedding,
+                content_hash=content_hash(content),
+                embedding_model=self.gemini_service.EMBEDDING_MODEL,
             )
 
             logger.info(f"Documento criado com embedding: {doc.id} - {title}")
@@ -237,44 +231,29 @@ class EmbeddingService:
         limit: int = 5,
         threshold: float = 0.7
     ) -> List[Dict[str, Any]]:
-        """Fallback para busca sem pgvector (usa similaridade de cosseno em Python)."""
-        import math
-
-        def cosine_similarity(a: List[float], b: List[float]) -> float:
-            if not a or not b or len(a) != len(b):
-                return 0.0
-            dot_product = sum(x * y for x, y in zip(a, b))
-            norm_a = math.sqrt(sum(x * x for x in a))
-            norm_b = math.sqrt(sum(x * x for x in b))
-            if norm_a == 0 or norm_b == 0:
-                return 0.0
-            return dot_product / (norm_a * norm_b)
+        """Fallback para busca sem pgvector (índice vetorial NumPy em memória)."""
+        from .vector_index import get_document_index
 
         try:
-            queryset = DocumentEmbedding.objects.filter(is_active=True)
-            if document_type:
-                queryset = queryset.filter(document_type=document_type)
-
-            results = []
-            for doc in queryset:
-                if doc.embedding:
-
-                    embedding = doc.embedding if isinstance(doc.embedding, list) else list(doc.embedding)
-                    similarity = cosine_similarity(query_embedding, embedding)
-
-                    if similarity >= threshold:
-                        results.append({
-                            'id': doc.id,
-                            'document_type': doc.document_type,
-                            'title': doc.title,
-                            'content': doc.content,
-                            'metadata': doc.metadata,
-                            'similarity': similarity
-                        })
-
+            hits = get_document_index().search(
+                query_embedding, k=limit, partition=document_type, min_score=threshold
+            )
+            if not hits:
+                return []
 
-            results.sort(key=lambda x: x['similarity'], reverse=True)
-            return results[:limit]
+            docs = DocumentEmbedding.objects.filter(is_active=True).in_bulk([doc_id for doc_id, _ in hits])
+            return [
+                {
+                    'id': doc.id,
+                    'document_type': doc.document_type,
+                    'title': doc.title,
+                    'content': doc.content,
+                    'metadata': doc.metadata,
+                    'similarity': similarity,
+                }
+                for doc_id, similarity in hits
+                if (doc := docs.get(doc_id)) is not None
+            ]
 
         except Exception as e:
             logger.error(f"Erro na busca fallback: {str(e)}")
@@ -391,58 +370,137 @@ class EmbeddingService:
 
         return context_docs
 
-    def index_database_schema(self, schema_info: str) -> int:
+    def bulk_index_documents(
+        self,
+        documents: List[Dict[str, Any]],
+        batch_size: int = 100,
+        max_workers: int = 4,
+        checkpoint_path: Optional[str] = None,
+    ):
         """
-        Indexa informações do schema do banco como documentos vetorizados.
+        Indexa vários documentos em lote (embeddings em batch + bulk_create).
 
         Args:
-            schema_info: String com informações do schema
+            documents: Lista de dicts {document_type, title, content, metadata}
+            batch_size: Textos por chamada ao provedor (máx. 100)
+            max_workers: Lotes enviados em paralelo
+            checkpoint_path: Arquivo JSON para retomar indexações interrompidas
 
         Returns:
-            Número de documentos criados
+            BulkIndexResult com contadores de criados/ignorados/falhas
         """
+        from .bulk_indexer import BulkEmbeddingIndexer
+        indexer = BulkEmbeddingIndexer(
+            self.gemini_service,
+            batch_size=batch_size,
+            max_workers=max_workers,
+            checkpoint_path=checkpoint_path,
+        )
+        return indexer.index(documents)
 
-        DocumentEmbedding.objects.filter(document_type='SCHEMA').delete()
+    def sync_documents(
+        self,
+        documents: List[Dict[str, Any]],
+        document_types: Optional[List[str]] = None,
+        batch_size: int = 100,
+        max_workers: int = 4,
+        checkpoint_path: Optional[str] = None,
+    ):
+        """
+        Indexação incremental: revetoriza apenas documentos novos ou alterados
+        (pelo hash do conteúdo e modelo de embedding) e desativa os removidos.
 
+        Args:
+            documents: Lista de dicts {document_type, title, content, metadata}
+            document_types: Tipos cuja fonte é `documents`; linhas desses tipos
+                ausentes da lista são desativadas
+            batch_size: Textos por chamada ao provedor (máx. 100)
+            max_workers: Lotes enviados em paralelo
+            checkpoint_path: Arquivo JSON para retomar indexações interrompidas
 
-        tables = schema_info.split('\n\n')
-        created = 0
+        Returns:
+            BulkIndexResult com contadores de novos/alterados/inalterados/desativados
+        """
+        from .bulk_indexer import BulkEmbeddingIndexer
+        indexer = BulkEmbeddingIndexer(
+            self.gemini_service,
+            batch_size=batch_size,
+            max_workers=max_workers,
+            checkpoint_path=checkpoint_path,
+        )
+        return indexer.sync(documents, document_types=document_types)
 
-        for table_info in tables:
+    @staticmethod
+    def build_schema_documents(schema_info: str) -> List[Dict[str, Any]]:
+        """Quebra o texto do schema em um documento por tabela."""
+        documents = []
+        for table_info in schema_info.split('\n\n'):
             if table_info.strip():
-
                 lines = table_info.strip().split('\n')
-                title = lines[0] if lines else 'Schema'
+                documents.append({
+                    'document_type': 'SCHEMA',
+                    'title': lines[0] if lines else 'Schema',
+                    'content': table_info.strip(),
+                    'metadata': {'source': 'database_schema'},
+                })
+        return documents
+
+    @staticmethod
+    def build_business_rule_document(title: str, content: str, metadata: Dict = None) -> Dict[str, Any]:
+        return {
+            'document_type': 'BUSINESS_RULE',
+            'title': title,
+            'content': content,
+            'metadata': metadata or {},
+        }
+
+    @staticmethod
+    def build_faq_document(question: str, answer: str, metadata: Dict = None) -> Dict[str, Any]:
+        return {
+            'document_type': 'FAQ',
+            'title': question,
+            'content': f"Pergunta: {question}\nResposta: {answer}",
+            'metadata': metadata or {},
+        }
+
+    @staticmethod
+    def build_query_example_document(
+        natural_language: str,
+        sql_query: str,
+        explanation: str = None
+    ) -> Dict[str, Any]:
+        content = f"Pergunta: {natural_language}\nSQL: {sql_query}"
+        if explanation:
+            content += f"\nExplicação: {explanation}"
+        return {
+            'document_type': 'QUERY_EXAMPLE',
+            'title': natural_language[:100],
+            'content': content,
+            'metadata': {'sql': sql_query},
+        }
 
-                doc = self.create_document_embedding(
-                    document_type='SCHEMA',
-                    title=title,
-                    content=table_info.strip(),
-                    metadata={'source': 'database_schema'}
-                )
-                if doc:
-                    created += 1
+    def index_database_schema(self, schema_info: str) -> int:
+        """
+        Indexa informações do schema do banco como documentos vetorizados.
+
+        Args:
+            schema_info: String com informações do schema
+
+        Returns:
+            Número de documentos criados ou revetorizados
+        """
+        result = self.sync_documents(self.build_schema_documents(schema_info), document_types=['SCHEMA'])
 
-        logger.info(f"Indexados {created} documentos de schema")
-        return created
+        logger.info(f"Schema indexado: {result.summary()}")
+        return result.created + result.updated
 
     def add_business_rule(self, title: str, content: str, metadata: Dict = None) -> Optional[DocumentEmbedding]:
         """Adiciona uma regra de negócio ao índice."""
-        return self.create_document_embedding(
-            document_type='BUSINESS_RULE',
-            title=title,
-            content=content,
-            metadata=metadata
-        )
+        return self.create_document_embedding(**self.build_business_rule_document(title, content, metadata))
 
     def add_faq(self, question: str, answer: str, metadata: Dict = None) -> Optional[DocumentEmbedding]:
         """Adiciona uma FAQ ao índice."""
-        return self.create_document_embedding(
-            document_type='FAQ',
-            title=question,
-            content=f"Pergunta: {question}\nResposta: {answer}",
-            metadata=metadata
-        )
+        return self.create_document_embedding(**self.build_faq_document(question, answer, metadata))
 
     def add_query_example(
         self,
@@ -451,13 +509,6 @@ class EmbeddingService:
         explanation: str = None
     ) -> Optional[DocumentEmbedding]:
         """Adiciona um exemplo de consulta ao índice."""
-        content = f"Pergunta: {natural_language}\nSQL: {sql_query}"
-        if explanation:
-            content += f"\nExplicação: {explanation}"
-
         return self.create_document_embedding(
-            document_type='QUERY_EXAMPLE',
-            title=natural_language[:100],
-            content=content,
-            metadata={'sql': sql_query}
+            **self.build_query_example_document(natural_language, sql_query, explanation)
         )
@@ -3,11 +3,15 @@ Gerencia exemplos few-shot para RAG de geração SQL.
 Usa o model FewShotExample para armazenar e recuperar exemplos vetorizados.
 """
 import logging
-import math
 from typing import Any, Dict, List, Optional
 
 from django.db import transaction
 
+from .bulk_indexer import PROVIDER_BATCH_SIZE, content_hash
+from .db_capabilities import has_pgvector
+from .embedding_cache import normalize_text
+from .vector_index import get_few_shot_index
+
 logger = logging.getLogger(__name__)
 
 try:
@@ -26,22 +30,14 @@ class FewShotManager:
     - get_relevant_examples: busca os N mais similares com pgvector
     - format_for_prompt: formata exemplos para inserção no prompt SQL
     - _deduplicate: não cria duplicatas (similaridade > 0.95)
+    - reembed_stale_examples: revetoriza exemplos gravados com outro modelo
     """
 
     DEDUP_THRESHOLD = 0.95
 
     def __init__(self, gemini_service):
         self.gemini = gemini_service
-        self._pgvector_enabled = self._check_pgvector_runtime()
-
-    def _check_pgvector_runtime(self) -> bool:
-        try:
-            from django.db import connection
-            with connection.cursor() as cursor:
-                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'vector'")
-                return cursor.fetchone() is not None
-        except Exception:
-            return False
+        self._pgvector_enabled = has_pgvector()
 
     def record_success(
         self,
@@ -55,8 +51,20 @@ class FewShotManager:
         """
         Salva ou atualiza um exemplo de sucesso.
         Não cria duplicatas quando similaridade > DEDUP_THRESHOLD.
+        A mesma pergunta (após normalização) atualiza o exemplo direto pelo hash,
+        sem gerar embedding nem fazer busca por similaridade.
         """
         try:
+            from ..models import FewShotExample
+
+            question_hash = question_content_hash(user_question)
+            exact = FewShotExample.objects.filter(
+                content_hash=question_hash,
+                embedding_model=self.gemini.EMBEDDING_MODEL,
+                is_active=True,
+            ).first()
+            if exact:
+                return self._update_success_stats(exact, result_count, execution_ms)
 
             embedding = self.gemini.get_embedding(user_question)
             if not embedding:
@@ -68,8 +76,6 @@ class FewShotManager:
             if existing:
                 return self._update_success_stats(existing, result_count, execution_ms)
 
-
-            from ..models import FewShotExample
             example = FewShotExample.objects.create(
                 user_question=user_question,
                 canonical_sql=canonical_sql,
@@ -81,6 +87,8 @@ class FewShotManager:
                 avg_execution_ms=float(execution_ms),
                 is_active=True,
                 embedding=embedding,
+                content_hash=question_hash,
+                embedding_model=self.gemini.EMBEDDING_MODEL,
             )
             logger.info(f"FewShotExample criado: id={example.id}")
             return example
@@ -104,6 +112,40 @@ class FewShotManager:
         except Exception as exc:
             logger.warning(f"Erro em record_failure: {exc}")
 
+    def reembed_stale_examples(self) -> int:
+        """
+        Revetoriza exemplos sem embedding, com hash desatualizado ou gerados por
+        outro modelo. Exemplos em dia não geram chamadas ao provedor; os demais
+        vão em lotes de PROVIDER_BATCH_SIZE pelo caminho em lote (com cache).
+        """
+        from ..models import FewShotExample
+
+        model = self.gemini.EMBEDDING_MODEL
+        pending = [
+            example
+            for example in FewShotExample.objects.only('id', 'user_question', 'content_hash', 'embedding_model')
+            if example.embedding_model != model or example.content_hash != question_content_hash(example.user_question)
+        ]
+
+        stale = []
+        for start in range(0, len(pending), PROVIDER_BATCH_SIZE):
+            batch = pending[start:start + PROVIDER_BATCH_SIZE]
+            embeddings = self.gemini.get_embeddings_batch([example.user_question for example in batch])
+            for example, embedding in zip(batch, embeddings):
+                if not embedding:
+                    logger.warning(f"FewShotManager: falha ao revetorizar exemplo id={example.id}")
+                    continue
+                example.embedding = embedding
+                example.content_hash = question_content_hash(example.user_question)
+                example.embedding_model = model
+                stale.append(example)
+
+        if stale:
+            FewShotExample.objects.bulk_update(stale, ['embedding', 'content_hash', 'embedding_model'])
+            get_few_shot_index().invalidate()
+        logger.info(f"FewShotManager: {len(stale)} exemplos revetorizados")
+        return len(stale)
+
     def get_relevant_examples(
         self,
         user_question: str,
@@ -194,19 +236,10 @@ class FewShotManager:
     ) -> Optional[Any]:
         try:
             from ..models import FewShotExample
-            best = None
-            best_sim = -1.0
-
-            for ex in FewShotExample.objects.filter(is_active=True).exclude(embedding=None):
-                stored = ex.embedding if isinstance(ex.embedding, list) else list(ex.embedding)
-                sim = _cosine_similarity(embedding, stored)
-                if sim > best_sim:
-                    best_sim = sim
-                    best = ex
-
-            if best and best_sim >= threshold:
-                return best
-            return None
+            hits = get_few_shot_index().search(embedding, k=1, min_score=threshold)
+            if not hits:
+                return None
+            return FewShotExample.objects.filter(id=hits[0][0], is_active=True).first()
         except Exception as exc:
             logger.warning(f"_find_similar_python erro: {exc}")
             return None
@@ -271,16 +304,17 @@ class FewShotManager:
     ) -> List[Dict[str, Any]]:
         try:
             from ..models import FewShotExample
-            results = []
 
-            queryset = FewShotExample.objects.filter(
+            candidate_ids = FewShotExample.objects.filter(
                 is_active=True, success_count__gte=min_success_count
-            ).exclude(embedding=None)
+            ).values_list('id', flat=True)
+            hits = get_few_shot_index().search(embedding, k=top_k, candidate_ids=candidate_ids)
+            if not hits:
+                return []
 
-            for ex in queryset:
-                stored = ex.embedding if isinstance(ex.embedding, list) else list(ex.embedding)
-                sim = _cosine_similarity(embedding, stored)
-                results.append({
+            examples = FewShotExample.objects.in_bulk([ex_id for ex_id, _ in hits])
+            return [
+                {
                     'id': ex.id,
                     'user_question': ex.user_question,
                     'canonical_sql': ex.canonical_sql,
@@ -291,21 +325,15 @@ class FewShotManager:
                     'avg_result_count': ex.avg_result_count,
                     'avg_execution_ms': ex.avg_execution_ms,
                     'similarity': sim,
-                })
-
-            results.sort(key=lambda x: x['similarity'], reverse=True)
-            return results[:top_k]
+                }
+                for ex_id, sim in hits
+                if (ex := examples.get(ex_id)) is not None
+            ]
         except Exception as exc:
             logger.error(f"_search_python_cosine erro: {exc}")
             return []
 
 
-def _cosine_similarity(a: List[float], b: List[float]) -> float:
-    if not a or not b or len(a) != len(b):
-        return 0.0
-    dot = sum(x * y for x, y in zip(a, b))
-    norm_a = math.sqrt(sum(x * x for x in a))
-    norm_b = math.sqrt(sum(x * x for x in b))
-    if norm_a == 0.0 or norm_b == 0.0:
-        return 0.0
-    return dot / (norm_a * norm_b)
+def question_content_hash(user_question: str) -> str:
+    """Hash da pergunta normalizada (caixa/espaços não geram exemplos distintos)."""
+    return content_hash(normalize_text(user_question))
@@ -1,6 +1,6 @@
 import json
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Iterator, Optional, List, Tuple
 
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
@@ -10,6 +10,8 @@ from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import JsonOutputParser
 
+from .embedding_cache import get_embedding_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -54,8 +56,11 @@ class GeminiService:
     """
     Serviço para integração com a API do Google Gemini usando LangChain.
     Suporta chat, embeddings e RAG com pgvector.
+    Embeddings passam pelo cache de embedding_cache (memo da requisição, LRU do processo e Redis).
     """
 
+    EMBEDDING_MODEL = "models/text-embedding-004"
+
     def __init__(self):
         self.api_key = getattr(settings, 'GEMINI_API_KEY', None)
         if not self.api_key:
@@ -68,7 +73,7 @@ class GeminiService:
         )
 
         self.embeddings_model = GoogleGenerativeAIEmbeddings(
-            model="models/text-embedding-004",
+            model=self.EMBEDDING_MODEL,
             google_api_key=self.api_key,
         )
 
@@ -82,6 +87,9 @@ class GeminiService:
         Returns:
             Lista de floats representando o embedding
         """
+        return get_embedding_cache().get_or_compute(text, self.EMBEDDING_MODEL, self._embed_query)
+
+    def _embed_query(self, text: str) -> List[float]:
         try:
             return self.embeddings_model.embed_query(text)
         except Exception as e:
@@ -98,6 +106,9 @@ class GeminiService:
         Returns:
             Lista de embeddings
         """
+        return get_embedding_cache().get_or_compute_many(texts, self.EMBEDDING_MODEL, self._embed_documents)
+
+    def _embed_documents(self, texts: List[str]) -> List[List[float]]:
         try:
             return self.embeddings_model.embed_documents(texts)
         except Exception as e:
@@ -376,6 +387,47 @@ Responda SEMPRE em JSON válido com esta estrutura:
         Returns:
             Dict com resposta humanizada
         """
+        system_instruction, prompt = self._humanized_prompt(query_result, original_question)
+
+        if context_documents:
+            return self.generate_response_with_context(
+                prompt=prompt,
+                context_documents=context_documents,
+                system_instruction=system_instruction
+            )
+
+        return self.generate_response(prompt, system_instruction)
+
+    def stream_humanized_response(
+        self,
+        query_result: Any,
+        original_question: str,
+        sql_query: str,
+        context_documents: List[str] = None
+    ) -> Iterator[str]:
+        """
+        Mesma resposta de generate_humanized_response, entregue em pedaços
+        conforme o modelo gera (usado pelos endpoints SSE).
+
+        Yields:
+            Trechos de texto da resposta
+        """
+        system_instruction, prompt = self._humanized_prompt(query_result, original_question)
+
+        if context_documents:
+            context_str = "\n\n---\n\n".join(context_documents)
+            system_instruction = (
+                f"{system_instruction}\n\nCONTEXTO RELEVANTE DO SISTEMA:\n{context_str}\n\n"
+                "Use o contexto acima para responder às perguntas quando relevante."
+            )
+
+        messages = [SystemMessage(content=system_instruction), HumanMessage(content=prompt)]
+        for chunk in self.chat_model.stream(messages):
+            if chunk.text:
+                yield chunk.text
+
+    def _humanized_prompt(self, query_result: Any, original_question: str) -> Tuple[str, str]:
+        """Instrução de sistema e prompt da humanização de resultados."""
         system_instruction = ALICE_PERSONALITY + """
 
         TAREFA ATUAL:
@@ -405,12 +457,4 @@ Responda SEMPRE em JSON válido com esta estrutura:
 
         Responda de forma natural e amigável, sem mencionar aspectos técnicos.
         """
-
-        if context_documents:
-            return self.generate_response_with_context(
-                prompt=prompt,
-                context_documents=context_documents,
-                system_instruction=system_instruction
-            )
-
-        return self.generate_response(prompt, system_instruction)
+        return system_instruction, prompt
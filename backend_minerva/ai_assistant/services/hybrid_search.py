@@ -1,12 +1,19 @@
 """
 Busca híbrida combinando busca vetorial (pgvector) com busca full-text (PostgreSQL tsvector).
 Usa Reciprocal Rank Fusion (RRF) para combinar os rankings.
+
+Com pgvector, o modo fundido (`_fused_search`) calcula os dois rankings, o score
+RRF e devolve as linhas completas em uma única consulta (CTE). Sem pgvector, ou se
+a consulta fundida falhar, cai no caminho em etapas: vetor → full-text → RRF em
+Python → busca dos documentos.
 """
 import logging
 from typing import Any, Dict, List, Optional, Tuple
 
 from django.db import connection
 
+from .db_capabilities import has_pgvector, has_tsv_column, mark_unavailable
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,30 +23,12 @@ class HybridSearchService:
     Trata graciosamente ausência de pgvector ou de content_tsv.
     """
 
+    RRF_K = 60
+
     def __init__(self, gemini_service):
         self.gemini_service = gemini_service
-        self._pgvector_available = self._check_pgvector()
-        self._tsv_column_available = self._check_tsv_column()
-
-    def _check_pgvector(self) -> bool:
-        try:
-            with connection.cursor() as cursor:
-                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'vector'")
-                return cursor.fetchone() is not None
-        except Exception:
-            return False
-
-    def _check_tsv_column(self) -> bool:
-        try:
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT 1 FROM information_schema.columns
-                    WHERE table_name = 'ai_assistant_documentembedding'
-                      AND column_name = 'content_tsv'
-                """)
-                return cursor.fetchone() is not None
-        except Exception:
-            return False
+        self._pgvector_available = has_pgvector()
+        self._tsv_column_available = has_tsv_column()
 
     def _vector_search(
         self,
@@ -47,11 +36,14 @@ class HybridSearchService:
         limit: int = 20,
     ) -> List[Tuple[int, float]]:
         """
-        Busca vetorial usando pgvector.
+        Busca vetorial usando pgvector (ou o índice NumPy em memória, sem a extensão).
         Retorna lista de (doc_id, cosine_similarity_score) ordenada por score DESC.
         """
-        if not self._pgvector_available or not query_embedding:
+        if not query_embedding:
             return []
+        if not self._pgvector_available:
+            from .vector_index import get_document_index
+            return get_document_index().search(query_embedding, k=limit)
 
         try:
             embedding_str = f"[{','.join(map(str, query_embedding))}]"
@@ -112,6 +104,7 @@ class HybridSearchService:
         except Exception as exc:
             logger.warning(f"Erro na busca tsvector: {exc} — tentando ILIKE")
             self._tsv_column_available = False
+            mark_unavailable('tsv_column')
             return self._fulltext_ilike(query_text, limit)
 
     def _fulltext_ilike(
@@ -167,12 +160,109 @@ class HybridSearchService:
 
         return scores
 
+    def _fused_search(
+        self,
+        query_text: str,
+        query_embedding: List[float],
+        limit: int,
+        top_k: int,
+    ) -> List[Dict[str, Any]]:
+        """
+        Vetor + full-text + RRF + corpo dos documentos em uma única ida ao banco.
+        Cada ranking é limitado numa subconsulta antes do ROW_NUMBER, para o
+        ORDER BY por distância continuar usando o índice HNSW.
+        """
+        params = {
+            'embedding': f"[{','.join(map(str, query_embedding))}]",
+            'limit': limit,
+            'rrf_k': self.RRF_K,
+            'top_k': top_k,
+        }
+
+        terms = [t.strip() for t in (query_text or '').split() if len(t.strip()) > 2]
+        if self._tsv_column_available and query_text and query_text.strip():
+            params['query_text'] = query_text
+            fulltext_cte = """
+                SELECT id, score, ROW_NUMBER() OVER (ORDER BY score DESC, id) AS rnk
+                FROM (
+                    SELECT id,
+                           ts_rank_cd(content_tsv, plainto_tsquery('portuguese', %(query_text)s)) AS score
+                    FROM ai_assistant_documentembedding
+                    WHERE is_active = true
+                      AND content_tsv @@ plainto_tsquery('portuguese', %(query_text)s)
+                    ORDER BY score DESC
+                    LIMIT %(limit)s
+                ) ranked
+            """
+        elif terms:
+            params['like'] = f"%{terms[0]}%"
+            fulltext_cte = """
+                SELECT id, 0.5 AS score, ROW_NUMBER() OVER (ORDER BY id) AS rnk
+                FROM (
+                    SELECT id
+                    FROM ai_assistant_documentembedding
+                    WHERE is_active = true
+                      AND content ILIKE %(like)s
+                    LIMIT %(limit)s
+                ) matched
+            """
+        else:
+            fulltext_cte = "SELECT NULL::bigint AS id, 0.0 AS score, 0 AS rnk WHERE false"
+
+        sql = f"""
+            WITH vector_hits AS (
+                SELECT id, 1 - distance AS score, ROW_NUMBER() OVER (ORDER BY distance, id) AS rnk
+                FROM (
+                    SELECT id, embedding <=> %(embedding)s::vector AS distance
+                    FROM ai_assistant_documentembedding
+                    WHERE is_active = true
+                      AND embedding IS NOT NULL
+                    ORDER BY embedding <=> %(embedding)s::vector
+                    LIMIT %(limit)s
+                ) nearest
+            ),
+            fulltext_hits AS ({fulltext_cte}),
+            fused AS (
+                SELECT COALESCE(v.id, f.id) AS id,
+                       COALESCE(1.0 / (%(rrf_k)s + v.rnk), 0)
+                         + COALESCE(1.0 / (%(rrf_k)s + f.rnk), 0) AS rrf_score,
+                       COALESCE(v.score, 0) AS vector_score,
+                       COALESCE(f.score, 0) AS fulltext_score
+                FROM vector_hits v
+                FULL OUTER JOIN fulltext_hits f ON f.id = v.id
+            )
+            SELECT d.id, d.content, d.document_type, d.title,
+                   fused.rrf_score, fused.vector_score, fused.fulltext_score
+            FROM fused
+            JOIN ai_assistant_documentembedding d ON d.id = fused.id
+            ORDER BY fused.rrf_score DESC, d.id
+            LIMIT %(top_k)s
+        """
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+
+        return [
+            {
+                'id': row[0],
+                'content': row[1] or '',
+                'document_type': row[2] or '',
+                'title': row[3] or '',
+                'rrf_score': float(row[4]),
+                'vector_score': float(row[5]),
+                'fulltext_score': float(row[6]),
+            }
+            for row in rows
+        ]
+
     def search(
         self,
         query_text: str,
         query_embedding: Optional[List[float]] = None,
         limit: int = 20,
         top_k: int = 10,
+        fused: bool = True,
     ) -> List[Dict[str, Any]]:
         """
         Busca híbrida: combina pgvector + full-text via RRF.
@@ -182,6 +272,7 @@ class HybridSearchService:
             query_embedding: Embedding pré-computado (se None, é gerado aqui)
             limit: Candidatos por método antes do RRF
             top_k: Resultados finais retornados
+            fused: Com pgvector, faz tudo em uma única consulta (RRF no SQL)
 
         Returns:
             Lista de dicts com {id, content, document_type, title,
@@ -191,6 +282,12 @@ class HybridSearchService:
             if query_embedding is None:
                 query_embedding = self.gemini_service.get_embedding(query_text)
 
+            if fused and self._pgvector_available and query_embedding:
+                try:
+                    return self._fused_search(query_text, query_embedding, limit, top_k)
+                except Exception as exc:
+                    logger.warning(f"Busca híbrida fundida falhou: {exc} — usando consultas separadas")
+
             vector_results = self._vector_search(query_embedding, limit=limit)
             fulltext_results = self._fulltext_search(query_text, limit=limit)
 
@@ -198,7 +295,7 @@ class HybridSearchService:
                 logger.warning("Busca híbrida: nenhum resultado de vetor nem full-text")
                 return []
 
-            rrf_scores = self._reciprocal_rank_fusion(vector_results, fulltext_results)
+            rrf_scores = self._reciprocal_rank_fusion(vector_results, fulltext_results, k=self.RRF_K)
 
             sorted_ids = sorted(rrf_scores.keys(), key=lambda d: rrf_scores[d]['rrf'], reverse=True)
             top_ids = sorted_ids[:top_k]
@@ -9,11 +9,16 @@ Uso:
     memory.save_message(session_id, "user", "Quantos contratos existem?")
     memory.save_message(session_id, "assistant", "Existem 42 contratos ativos.")
     history = memory.get_history(session_id, limit=10)
+
+Caminho async (ASGI): asave_message / aget_history usam redis.asyncio.
 """
+import asyncio
 import json
 import logging
+import weakref
 from typing import Dict, List, Optional
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
@@ -34,6 +39,26 @@ def _get_redis():
         return None
 
 
+# Conexões redis.asyncio pertencem ao event loop que as criou: um cliente por loop
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _get_async_redis():
+    """Retorna cliente redis.asyncio do event loop atual ou None se não disponível."""
+    try:
+        loop = asyncio.get_running_loop()
+        client = _async_clients.get(loop)
+        if client is None:
+            import redis.asyncio as aioredis
+            url = getattr(settings, 'REDIS_URL', 'redis://localhost:6379/0')
+            client = aioredis.from_url(url, decode_responses=True, socket_connect_timeout=2)
+            _async_clients[loop] = client
+        return client
+    except Exception as exc:
+        logger.warning("MemoryService: Redis async indisponível — %s", exc)
+        return None
+
+
 class MemoryService:
     """
     Gerencia memória conversacional em duas camadas:
@@ -67,6 +92,22 @@ class MemoryService:
         except Exception as exc:
             logger.warning("MemoryService.save_message Redis error: %s", exc)
 
+    async def asave_message(self, session_id: str, role: str, content: str) -> None:
+        """Versão async de save_message."""
+        client = self._async_redis()
+        if client is None:
+            return
+        try:
+            key = f"{_REDIS_PREFIX}{session_id}"
+            entry = json.dumps({"role": role, "content": content[:1000]}, ensure_ascii=False)
+            pipe = client.pipeline()
+            pipe.rpush(key, entry)
+            pipe.ltrim(key, -self._window, -1)
+            pipe.expire(key, self._ttl)
+            await pipe.execute()
+        except Exception as exc:
+            logger.warning("MemoryService.asave_message Redis error: %s", exc)
+
     # ------------------------------------------------------------------
     # Leitura
     # ------------------------------------------------------------------
@@ -88,23 +129,56 @@ class MemoryService:
             return self._get_from_db(session_id, limit)
         return []
 
+    async def aget_history(
+        self,
+        session_id: str,
+        limit: int = 10,
+        fallback_to_db: bool = True,
+    ) -> List[Dict[str, str]]:
+        """Versão async de get_history (fallback do PostgreSQL via sync_to_async)."""
+        history = await self._aget_from_redis(session_id, limit)
+        if history:
+            return history
+
+        if fallback_to_db:
+            return await sync_to_async(self._get_from_db)(session_id, limit)
+        return []
+
     def _get_from_redis(self, session_id: str, limit: int) -> List[Dict[str, str]]:
         if not self._redis:
             return []
         try:
             key = f"{_REDIS_PREFIX}{session_id}"
-            raw_messages = self._redis.lrange(key, -limit, -1)
-            result = []
-            for raw in raw_messages:
-                try:
-                    result.append(json.loads(raw))
-                except json.JSONDecodeError:
-                    pass
-            return result
+            return self._decode(self._redis.lrange(key, -limit, -1))
         except Exception as exc:
             logger.warning("MemoryService._get_from_redis error: %s", exc)
             return []
 
+    async def _aget_from_redis(self, session_id: str, limit: int) -> List[Dict[str, str]]:
+        client = self._async_redis()
+        if client is None:
+            return []
+        try:
+            key = f"{_REDIS_PREFIX}{session_id}"
+            return self._decode(await client.lrange(key, -limit, -1))
+        except Exception as exc:
+            logger.warning("MemoryService._aget_from_redis error: %s", exc)
+            return []
+
+    def _async_redis(self):
+        # Sem Redis na inicialização (ping falhou) → o caminho async também o ignora
+        return _get_async_redis() if self._redis else None
+
+    @staticmethod
+    def _decode(raw_messages) -> List[Dict[str, str]]:
+        result = []
+        for raw in raw_messages:
+            try:
+                result.append(json.loads(raw))
+            except json.JSONDecodeError:
+                pass
+        return result
+
     def _get_from_db(self, session_id: str, limit: int) -> List[Dict[str, str]]:
         try:
             from ..models import ConversationMessage, ConversationSession
@@ -0,0 +1,185 @@
+"""
+Contexto de schema pré-renderizado para o prompt SQL da Alice.
+
+O texto do schema (blocos por tabela + relacionamentos FK) é um artefato
+versionado: montado uma vez, guardado no cache do Django (compartilhado entre
+processos quando o backend é Redis) e na memória do processo. A cada uso só é
+lida a chave de versão; nenhuma consulta ao banco é feita enquanto a versão
+não mudar.
+
+Invalidação (`invalidate_schema_context()`): post_save/post_delete de
+DatabaseSchema e post_migrate (ver ai_assistant/signals.py).
+
+Fatias por tabela: `SchemaContext.select_tables(pergunta)` escolhe as tabelas
+citadas na pergunta (+ tabelas referenciadas por FK) para o prompt não levar o
+schema inteiro.
+
+Uso:
+    context = get_schema_context(builder)
+    prompt_schema = context.render(context.select_tables("Quantos contratos ativos?"))
+"""
+import logging
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+_VERSION_KEY = "alice:schema_context:version"
+_ARTIFACT_KEY = "alice:schema_context:v{version}"
+
+SCHEMA_HEADER = "ESQUEMA DO BANCO DE DADOS MINERVA:\n\n"
+
+# Radicais (sem acento) que indicam cada tabela numa pergunta em português
+TABLE_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    'contract_contract': ('contrat', 'protocolo', 'vigencia', 'vencimento', 'vencid', 'vence'),
+    'contract_contractinstallment': ('parcela', 'pagament'),
+    'contract_contractamendment': ('aditiv', 'reajuste'),
+    'budget_budget': ('orcament', 'capex', 'opex'),
+    'budget_budgetmovement': ('moviment', 'transferenc', 'remanejament'),
+    'budgetline_budgetline': ('linha orcamentaria', 'linhas orcamentarias', 'linha', 'empenh'),
+    'budgetline_budgetlineversion': ('versao', 'versoes'),
+    'employee_employee': ('funcionari', 'colaborador', 'servidor', 'fiscal', 'empregad'),
+    'accounts_user': ('usuari',),
+    'center_management_center': ('centro gestor', 'centros gestores', 'gestor'),
+    'center_requesting_center': ('solicitant',),
+    'aid_assistance': ('auxili', 'benefici'),
+    'aid_assistanceemployee': ('auxili', 'benefici'),
+    'sector_direction': ('direc', 'diretori', 'setor'),
+    'sector_coordination': ('coordenac',),
+    'sector_management': ('gerenc',),
+}
+
+# Referências de auditoria (created_by/updated_by) não puxam accounts_user para a fatia
+_FK_EXPANSION_EXCLUDED = {'accounts_user'}
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def tables_for_question(question: str) -> List[str]:
+    """Tabelas citadas na pergunta (por radical ou pelo nome da tabela)."""
+    folded = _fold(question)
+    return sorted(
+        table for table, keywords in TABLE_KEYWORDS.items()
+        if table in folded or any(k in folded for k in keywords)
+    )
+
+
+@dataclass
+class SchemaContext:
+    """Blocos do schema por tabela + arestas FK (from_table, from_col, to_table, to_col)."""
+    tables: Dict[str, str]
+    foreign_keys: List[Tuple[str, str, str, str]] = field(default_factory=list)
+
+    def select_tables(self, question: str) -> Optional[List[str]]:
+        """
+        Tabelas relevantes para a pergunta, incluindo as referenciadas por FK.
+        Retorna None (schema completo) quando nada é reconhecido.
+        """
+        folded = _fold(question)
+        selected = {table for table in tables_for_question(question) if table in self.tables}
+        selected |= {table for table in self.tables if table in folded}
+        if not selected:
+            return None
+
+        for from_table, _, to_table, _ in self.foreign_keys:
+            if from_table in selected and to_table in self.tables and to_table not in _FK_EXPANSION_EXCLUDED:
+                selected.add(to_table)
+        return sorted(selected)
+
+    def render(self, tables: Optional[Iterable[str]] = None) -> str:
+        names = sorted(self.tables) if tables is None else [t for t in tables if t in self.tables]
+        chosen = set(names)
+        text = SCHEMA_HEADER + ''.join(self.tables[name] for name in names)
+
+        fk_lines = [
+            f"  {from_table}.{from_col} → {to_table}.{to_col}"
+            for from_table, from_col, to_table, to_col in self.foreign_keys
+            if tables is None or (from_table in chosen and to_table in chosen)
+        ]
+        if fk_lines:
+            text += "\n".join(["\nRELACIONAMENTOS (FOREIGN KEYS):"] + fk_lines) + "\n"
+        return text
+
+
+class SchemaContextCache:
+    """Artefato versionado em dois níveis: memória do processo → cache do Django → builder."""
+
+    def __init__(self, ttl: int):
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._local: Optional[SchemaContext] = None
+        self._local_version: Optional[int] = None
+        self._local_loaded_at = 0.0
+
+    def get(self, builder: Callable[[], SchemaContext]) -> SchemaContext:
+        version = self._current_version()
+        if (
+            self._local is not None
+            and self._local_version == version
+            and time.monotonic() - self._local_loaded_at < self._ttl
+        ):
+            return self._local
+
+        with self._lock:
+            key = _ARTIFACT_KEY.format(version=version)
+            context = cache.get(key)
+            if context is None:
+                started = time.monotonic()
+                context = builder()
+                cache.set(key, context, self._ttl)
+                logger.info(
+                    f"SchemaContext v{version} montado: {len(context.tables)} tabelas, "
+                    f"{len(context.foreign_keys)} FKs em {(time.monotonic() - started) * 1000:.0f}ms"
+                )
+            self._local = context
+            self._local_version = version
+            self._local_loaded_at = time.monotonic()
+        return context
+
+    def invalidate(self) -> None:
+        try:
+            cache.incr(_VERSION_KEY)
+        except ValueError:
+            cache.set(_VERSION_KEY, 2, None)
+        self._local = None
+
+    @staticmethod
+    def _current_version() -> int:
+        version = cache.get(_VERSION_KEY)
+        if version is None:
+            cache.add(_VERSION_KEY, 1, None)
+            version = cache.get(_VERSION_KEY) or 1
+        return version
+
+
+_schema_cache: Optional[SchemaContextCache] = None
+_singleton_lock = threading.Lock()
+
+
+def _get_schema_cache() -> SchemaContextCache:
+    global _schema_cache
+    if _schema_cache is None:
+        with _singleton_lock:
+            if _schema_cache is None:
+                _schema_cache = SchemaContextCache(
+                    ttl=getattr(settings, 'ALICE_SCHEMA_CONTEXT_TTL', 3600),
+                )
+    return _schema_cache
+
+
+def get_schema_context(builder: Callable[[], SchemaContext]) -> SchemaContext:
+    return _get_schema_cache().get(builder)
+
+
+def invalidate_schema_context() -> None:
+    """Nova versão do artefato; todos os processos remontam no próximo uso."""
+    _get_schema_cache().invalidate()
@@ -1,20 +1,26 @@
 import time
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from django.db import connection
 from django.conf import settings
 from .gemini_service import GeminiService, ALICE_FRIENDLY_ERROR
 from .embedding_service import EmbeddingService
+from .embedding_cache import embedding_scope
 from .sql_validator import SQLValidator
 from .hybrid_search import HybridSearchService
 from .reranker import RerankerService
 from .few_shot_manager import FewShotManager
 from .sql_healer import SQLHealer
 from .context_resolver import ContextResolver
-from ..models import DatabaseSchema, QueryLog, ConversationSession, ConversationMessage
+from .schema_context import SchemaContext, get_schema_context
+from .answer_cache import get_answer_cache, scope_key
+from ..models import ALICE_SAFE_TABLES, DatabaseSchema, QueryLog, ConversationSession, ConversationMessage
 
 logger = logging.getLogger(__name__)
 
+# Callback de progresso: on_event('stage', {...}) nas etapas do pipeline e
+# on_event('token', {'text': ...}) para cada trecho da resposta humanizada.
+EventCallback = Callable[[str, Dict[str, Any]], None]
 
 FRIENDLY_MESSAGES = {
     'interpretation_error': "Desculpe, não consegui entender sua solicitação dessa vez. Pode reformular a pergunta ou me dar mais detalhes? 😊",
@@ -44,16 +50,8 @@ class SQLInterpreterService:
 
     def __init__(self):
         self.gemini_service = GeminiService()
-        self.embedding_service = EmbeddingService()
-        self.safe_tables = {
-            'accounts_user', 'budget_budget', 'budget_budgetmovement',
-            'budgetline_budgetline', 'budgetline_budgetlineversion',
-            'contract_contract', 'contract_contractinstallment',
-            'contract_contractamendment', 'employee_employee',
-            'sector_direction', 'sector_coordination', 'sector_management',
-            'center_management_center', 'center_requesting_center',
-            'aid_assistance', 'aid_assistanceemployee'
-        }
+        self.embedding_service = EmbeddingService(self.gemini_service)
+        self.safe_tables = set(ALICE_SAFE_TABLES)
         self._is_postgresql = self._check_database_type()
 
 
@@ -103,59 +101,59 @@ class SQLInterpreterService:
         """Verifica se o banco é PostgreSQL"""
         return 'postgresql' in settings.DATABASES['default']['ENGINE']
 
-    def get_database_schema(self) -> str:
+    def get_database_schema(self, question: Optional[str] = None) -> str:
         """
         Obtém informações sobre o schema do banco de dados, incluindo FK relationships.
+        Com `question`, devolve apenas as tabelas relevantes (e as referenciadas por FK).
         """
         try:
-            schema_info = self._get_cached_schema()
-            if not schema_info:
-                schema_info = self._generate_schema_info()
-                self._cache_schema_info(schema_info)
-
-            fk_section = self._get_fk_relationships()
-            if fk_section:
-                schema_info += fk_section
-            return schema_info
+            context = get_schema_context(self._build_schema_context)
+            tables = context.select_tables(question) if question else None
+            return context.render(tables)
         except Exception as e:
             logger.error(f"Erro ao obter schema do banco: {str(e)}")
             return self._get_basic_schema_fallback()
 
-    def _get_cached_schema(self) -> Optional[str]:
-        try:
-            schemas = DatabaseSchema.objects.all()
-            if not schemas.exists():
-                return None
+    def _build_schema_context(self) -> SchemaContext:
+        """Monta o artefato de schema (chamado só quando a versão em cache muda)."""
+        tables = self._get_cached_schema()
+        if not tables:
+            tables = self._generate_schema_info()
+        return SchemaContext(tables=tables, foreign_keys=self._get_fk_relationships())
 
-            schema_info = "ESQUEMA DO BANCO DE DADOS MINERVA:\n\n"
-            current_table = ""
+    def _get_cached_schema(self) -> Dict[str, str]:
+        """Blocos por tabela a partir de DatabaseSchema (populate_database_schema)."""
+        try:
+            table_descriptions = self._get_table_descriptions()
+            tables: Dict[str, str] = {}
 
-            for schema in schemas.order_by('table_name', 'column_name'):
-                if schema.table_name != current_table:
-                    current_table = schema.table_name
-                    schema_info += f"\nTABELA: {schema.table_name}\n"
-                    if schema.table_name in self._get_table_descriptions():
-                        schema_info += f"Descrição: {self._get_table_descriptions()[schema.table_name]}\n"
+            for schema in DatabaseSchema.objects.order_by('table_name', 'column_name'):
+                if schema.table_name not in tables:
+                    block = f"\nTABELA: {schema.table_name}\n"
+                    if schema.table_name in table_descriptions:
+                        block += f"Descrição: {table_descriptions[schema.table_name]}\n"
+                    tables[schema.table_name] = block
 
-                schema_info += f"  - {schema.column_name} ({schema.data_type})"
+                line = f"  - {schema.column_name} ({schema.data_type})"
                 if not schema.is_nullable:
-                    schema_info += " NOT NULL"
+                    line += " NOT NULL"
                 if schema.business_meaning:
-                    schema_info += f" - {schema.business_meaning}"
-                schema_info += "\n"
+                    line += f" - {schema.business_meaning}"
+                line += "\n"
 
                 if schema.sample_values:
-                    schema_info += f"    Exemplos: {', '.join(map(str, schema.sample_values[:3]))}\n"
+                    line += f"    Exemplos: {', '.join(map(str, schema.sample_values[:3]))}\n"
+                tables[schema.table_name] += line
 
-            return schema_info
+            return tables
         except Exception as e:
             logger.error(f"Erro ao buscar schema em cache: {str(e)}")
-            return None
+            return {}
 
-    def _generate_schema_info(self) -> str:
+    def _generate_schema_info(self) -> Dict[str, str]:
+        """Blocos por tabela a partir do catálogo do banco (quando DatabaseSchema está vazio)."""
+        tables: Dict[str, str] = {}
         with connection.cursor() as cursor:
-            schema_info = "ESQUEMA DO BANCO DE DADOS MINERVA:\n\n"
-
             if self._is_postgresql:
                 cursor.execute("""
                     SELECT table_name FROM information_schema.tables
@@ -174,17 +172,17 @@ class SQLInterpreterService:
                     ORDER BY name
                 """)
 
-            tables = cursor.fetchall()
+            table_rows = cursor.fetchall()
             table_descriptions = self._get_table_descriptions()
 
-            for table_row in tables:
+            for table_row in table_rows:
                 table_name = table_row[0]
                 if table_name not in self.safe_tables:
                     continue
 
-                schema_info += f"\nTABELA: {table_name}\n"
+                block = f"\nTABELA: {table_name}\n"
                 if table_name in table_descriptions:
-                    schema_info += f"Descrição: {table_descriptions[table_name]}\n"
+                    block += f"Descrição: {table_descriptions[table_name]}\n"
 
                 if self._is_postgresql:
                     cursor.execute("""
@@ -193,56 +191,37 @@ class SQLInterpreterService:
                         WHERE table_name = %s AND table_schema = 'public'
                         ORDER BY ordinal_position
                     """, [table_name])
-                    columns = cursor.fetchall()
-
-                    for col in columns:
-                        col_name, col_type, is_nullable, default_value = col
-                        schema_info += f"  - {col_name} ({col_type})"
-                        if is_nullable == 'NO':
-                            schema_info += " NOT NULL"
-                        if default_value:
-                            schema_info += f" DEFAULT {default_value}"
-
-                        try:
-                            cursor.execute(
-                                f'SELECT DISTINCT "{col_name}" FROM "{table_name}" '
-                                f'WHERE "{col_name}" IS NOT NULL LIMIT 3'
-                            )
-                            samples = cursor.fetchall()
-                            if samples:
-                                sample_values = [str(s[0]) for s in samples]
-                                schema_info += f" - Exemplos: {', '.join(sample_values)}"
-                        except Exception:
-                            pass
-
-                        schema_info += "\n"
+                    columns = [
+                        (col_name, col_type, is_nullable == 'NO', default_value)
+                        for col_name, col_type, is_nullable, default_value in cursor.fetchall()
+                    ]
+                    sample_sql = 'SELECT DISTINCT "{col}" FROM "{table}" WHERE "{col}" IS NOT NULL LIMIT 3'
                 else:
                     cursor.execute(f"PRAGMA table_info({table_name})")
-                    columns = cursor.fetchall()
-
-                    for col in columns:
-                        col_name, col_type, not_null, default_value = col[1], col[2], col[3], col[4]
-                        schema_info += f"  - {col_name} ({col_type})"
-                        if not_null:
-                            schema_info += " NOT NULL"
-                        if default_value:
-                            schema_info += f" DEFAULT {default_value}"
-
-                        try:
-                            cursor.execute(
-                                f"SELECT DISTINCT {col_name} FROM {table_name} "
-                                f"WHERE {col_name} IS NOT NULL LIMIT 3"
-                            )
-                            samples = cursor.fetchall()
-                            if samples:
-                                sample_values = [str(s[0]) for s in samples]
-                                schema_info += f" - Exemplos: {', '.join(sample_values)}"
-                        except Exception:
-                            pass
+                    columns = [(col[1], col[2], bool(col[3]), col[4]) for col in cursor.fetchall()]
+                    sample_sql = "SELECT DISTINCT {col} FROM {table} WHERE {col} IS NOT NULL LIMIT 3"
+
+                for col_name, col_type, not_null, default_value in columns:
+                    block += f"  - {col_name} ({col_type})"
+                    if not_null:
+                        block += " NOT NULL"
+                    if default_value:
+                        block += f" DEFAULT {default_value}"
+
+                    try:
+                        cursor.execute(sample_sql.format(col=col_name, table=table_name))
+                        samples = cursor.fetchall()
+                        if samples:
+                            sample_values = [str(s[0]) for s in samples]
+                            block += f" - Exemplos: {', '.join(sample_values)}"
+                    except Exception:
+                        pass
+
+                    block += "\n"
 
-                        schema_info += "\n"
+                tables[table_name] = block
 
-            return schema_info
+        return tables
 
     def _get_table_descriptions(self) -> Dict[str, str]:
         return {
@@ -286,52 +265,49 @@ class SQLInterpreterService:
         - status (VARCHAR) - Status do funcionário
         """
 
-    def _cache_schema_info(self, schema_info: str) -> None:
-        logger.info("Schema info cached")
-
-    def _get_fk_relationships(self) -> str:
+    def _get_fk_relationships(self) -> List[Tuple[str, str, str, str]]:
         """
-        Consulta information_schema para extrair FK relationships entre as tabelas seguras.
-        Retorna string formatada para inclusão no schema prompt.
+        Extrai FK relationships que envolvem as tabelas seguras.
+        Retorna lista de (from_table, from_column, to_table, to_column).
         """
-        if not self._is_postgresql:
-            return ""
         try:
             with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT
-                        kcu.table_name AS from_table,
-                        kcu.column_name AS from_column,
-                        ccu.table_name AS to_table,
-                        ccu.column_name AS to_column
-                    FROM information_schema.table_constraints AS tc
-                    JOIN information_schema.key_column_usage AS kcu
-                        ON tc.constraint_name = kcu.constraint_name
-                        AND tc.table_schema = kcu.table_schema
-                    JOIN information_schema.constraint_column_usage AS ccu
-                        ON ccu.constraint_name = tc.constraint_name
-                        AND ccu.table_schema = tc.table_schema
-                    WHERE tc.constraint_type = 'FOREIGN KEY'
-                        AND tc.table_schema = 'public'
-                    ORDER BY kcu.table_name, kcu.column_name
-                """)
-                rows = cursor.fetchall()
-
-            if not rows:
-                return ""
+                if self._is_postgresql:
+                    cursor.execute("""
+                        SELECT
+                            kcu.table_name AS from_table,
+                            kcu.column_name AS from_column,
+                            ccu.table_name AS to_table,
+                            ccu.column_name AS to_column
+                        FROM information_schema.table_constraints AS tc
+                        JOIN information_schema.key_column_usage AS kcu
+                            ON tc.constraint_name = kcu.constraint_name
+                            AND tc.table_schema = kcu.table_schema
+                        JOIN information_schema.constraint_column_usage AS ccu
+                            ON ccu.constraint_name = tc.constraint_name
+                            AND ccu.table_schema = tc.table_schema
+                        WHERE tc.constraint_type = 'FOREIGN KEY'
+                            AND tc.table_schema = 'public'
+                        ORDER BY kcu.table_name, kcu.column_name
+                    """)
+                    rows = cursor.fetchall()
+                else:
+                    rows = []
+                    for table_name in sorted(self.safe_tables):
+                        cursor.execute(f"PRAGMA foreign_key_list({table_name})")
+                        rows.extend(
+                            (table_name, fk[3], fk[2], fk[4]) for fk in cursor.fetchall()
+                        )
 
             safe = self.safe_tables
-            lines = ["\nRELACIONAMENTOS (FOREIGN KEYS):"]
-            for from_table, from_col, to_table, to_col in rows:
-                if from_table in safe or to_table in safe:
-                    lines.append(
-                        f"  {from_table}.{from_col} → {to_table}.{to_col}"
-                    )
-
-            return "\n".join(lines) + "\n" if len(lines) > 1 else ""
+            return [
+                (from_table, from_col, to_table, to_col)
+                for from_table, from_col, to_table, to_col in rows
+                if from_table in safe or to_table in safe
+            ]
         except Exception as exc:
             logger.warning(f"_get_fk_relationships falhou: {exc}")
-            return ""
+            return []
 
     def _get_chat_history(self, session: ConversationSession, limit: int = 8) -> List[Dict[str, str]]:
         """
@@ -460,7 +436,12 @@ Posso ajudar você a encontrar informações sobre contratos, orçamentos, funci
 
 
 
-    def interpret_and_execute(self, user_question: str, session: ConversationSession) -> Dict[str, Any]:
+    def interpret_and_execute(
+        self,
+        user_question: str,
+        session: ConversationSession,
+        on_event: Optional[EventCallback] = None,
+    ) -> Dict[str, Any]:
         """
         Interpreta pergunta e executa consulta SQL — Alice v2.
 
@@ -484,10 +465,23 @@ Posso ajudar você a encontrar informações sobre contratos, orçamentos, funci
         Args:
             user_question: Pergunta do usuário
             session: Sessão da conversa
+            on_event: Callback de progresso (opcional, usado pelos endpoints SSE)
 
         Returns:
             Dict com resultados e metadados (mesmo formato da v1)
         """
+        # Memo de embeddings da requisição: a pergunta resolvida é vetorizada uma
+        # única vez e reaproveitada pela busca híbrida, few-shot e record_*.
+        with embedding_scope() as embedding_stats:
+            return self._interpret_and_execute(user_question, session, embedding_stats, on_event)
+
+    def _interpret_and_execute(
+        self,
+        user_question: str,
+        session: ConversationSession,
+        embedding_stats,
+        on_event: Optional[EventCallback] = None,
+    ) -> Dict[str, Any]:
         start_time = time.time()
 
         try:
@@ -518,8 +512,11 @@ Posso ajudar você a encontrar informações sobre contratos, orçamentos, funci
                     data = execution_result['data']
                     count = len(data)
 
+                    if on_event is not None:
+                        on_event('stage', {'stage': 'rows_ready', 'result_count': count})
                     try:
-                        humanized_response = self.gemini_service.generate_humanized_response(
+                        humanized_response = self._humanize(
+                            on_event,
                             query_result=data,
                             original_question=user_question,
                             sql_query=sql_query,
@@ -590,7 +587,23 @@ Posso ajudar você a encontrar informações sobre contratos, orçamentos, funci
                     logger.warning(f"ContextResolver falhou (continuando): {exc}")
 
 
-            schema_info = self.get_database_schema()
+            answer_cache = get_answer_cache()
+            cache_scope = None
+            if answer_cache is not None:
+                try:
+                    cache_scope = scope_key(getattr(session, 'user', None))
+                    cached_result = self._answer_from_cache(
+                        answer_cache, cache_scope, user_question, resolved_question, session, start_time,
+                        on_event,
+                    )
+                    if cached_result is not None:
+                        return cached_result
+                except Exception as exc:
+                    logger.warning(f"Cache de respostas falhou (continuando): {exc}")
+                    cache_scope = None
+
+
+            schema_info = self.get_database_schema(question=resolved_question)
 
 
             query_embedding = None
@@ -731,6 +744,8 @@ Posso ajudar você a encontrar informações sobre contratos, orçamentos, funci
             if validation_result.normalized_sql:
                 sql_query = validation_result.normalized_sql
 
+            if on_event is not None:
+                on_event('stage', {'stage': 'sql_generated', 'sql_query': sql_query})
 
             execution_result = self._execute_sql_query(sql_query)
             execution_time = int((time.time() - start_time) * 1000)
@@ -769,6 +784,7 @@ Posso ajudar você a encontrar informações sobre contratos, orçamentos, funci
                 'few_shot_examples_count': len(few_shot_str.split('\n')) if few_shot_str else 0,
                 'hybrid_search_used': self.hybrid_search is not None,
                 'reranker_used': self.reranker is not None,
+                'embedding_cache': embedding_stats.as_dict(),
             }
 
 
@@ -789,10 +805,13 @@ Posso ajudar você a encontrar informações sobre contratos, orçamentos, funci
 
             if execution_result['success']:
                 data = execution_result['data']
+                if on_event is not None:
+                    on_event('stage', {'stage': 'rows_ready', 'result_count': len(data)})
 
 
                 if self.few_shot_manager is not None:
                     try:
+                        update_fields = ['context_used']
                         if len(data) == 0:
 
                             self.few_shot_manager.record_failure(resolved_question)
@@ -801,7 +820,7 @@ Posso ajudar você a encontrar informações sobre contratos, orçamentos, funci
                                 success_score if success_score is not None else 0.5,
                                 0.5
                             )
-                            query_log.save(update_fields=['success_score'])
+                            update_fields.append('success_score')
                         else:
                             self.few_shot_manager.record_success(
                                 user_question=resolved_question,
@@ -811,23 +830,44 @@ Posso ajudar você a encontrar informações sobre contratos, orçamentos, funci
                                 result_count=len(data),
                                 execution_ms=float(execution_time),
                             )
+
+                        query_log.context_used['embedding_cache'] = embedding_stats.as_dict()
+                        query_log.save(update_fields=update_fields)
                     except Exception as exc:
                         logger.warning(f"FewShotManager record falhou: {exc}")
 
 
-                humanized_response = self.gemini_service.generate_humanized_response(
+                humanized_response = self._humanize(
+                    on_event,
                     query_result=data,
                     original_question=user_question,
                     sql_query=sql_query,
                     context_documents=[d.get('content', '') for d in top_docs if d.get('content')]
                 )
+                response_text = humanized_response.get('content', '')
+
+                if cache_scope is not None and data and response_text:
+                    try:
+                        answer_cache.store(
+                            'sql', cache_scope, resolved_question,
+                            self.gemini_service.get_embedding(resolved_question),
+                            payload={
+                                'sql_query': sql_query,
+                                'interpretation': interpretation,
+                                'data': data,
+                                'humanized_response': response_text,
+                            },
+                            tables=self._extract_table_names(sql_query),
+                        )
+                    except Exception as exc:
+                        logger.warning(f"Falha ao gravar no cache de respostas: {exc}")
 
                 return {
                     'success': True,
                     'data': data,
                     'sql_query': sql_query,
                     'interpretation': interpretation,
-                    'humanized_response': humanized_response.get('content', ''),
+                    'humanized_response': response_text,
                     'execution_time_ms': execution_time,
                     'result_count': len(data),
                     'query_log_id': query_log.id,
@@ -867,6 +907,112 @@ Posso ajudar você a encontrar informações sobre contratos, orçamentos, funci
 
 
 
+    def _answer_from_cache(
+        self,
+        answer_cache,
+        cache_scope: str,
+        user_question: str,
+        resolved_question: str,
+        session: ConversationSession,
+        start_time: float,
+        on_event: Optional[EventCallback] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Resposta a partir do cache semântico, pulando geração de SQL pelo LLM.
+        Com ALICE_ANSWER_CACHE_RERUN_SQL, o SQL guardado é reexecutado; se os dados
+        mudaram, só a humanização é refeita. Retorna None para seguir o fluxo normal.
+        """
+        embedding = self.gemini_service.get_embedding(resolved_question)
+        hit = answer_cache.lookup('sql', cache_scope, embedding, resolved_question)
+        if hit is None:
+            return None
+
+        if on_event is not None:
+            on_event('stage', {'stage': 'cache_hit', 'similarity': round(hit.similarity, 4)})
+
+        payload = hit.payload
+        sql_query = payload['sql_query']
+        data = payload['data']
+        response_text = payload['humanized_response']
+        refreshed = False
+
+        if getattr(settings, 'ALICE_ANSWER_CACHE_RERUN_SQL', True):
+            execution_result = self._execute_sql_query(sql_query)
+            if not execution_result['success']:
+                return None
+            if execution_result['data'] != data:
+                data = execution_result['data']
+                humanized_response = self._humanize(
+                    on_event,
+                    query_result=data,
+                    original_question=user_question,
+                    sql_query=sql_query,
+                    context_documents=[],
+                )
+                response_text = humanized_response.get('content', '')
+                if not response_text:
+                    return None
+                refreshed = True
+                answer_cache.store(
+                    'sql', cache_scope, hit.question, embedding,
+                    payload={**payload, 'data': data, 'humanized_response': response_text},
+                    tables=hit.tables,
+                )
+
+        execution_time = int((time.time() - start_time) * 1000)
+        query_log = QueryLog.objects.create(
+            session=session,
+            user_question=user_question,
+            interpreted_intent=payload.get('interpretation', {}).get('intent', ''),
+            generated_sql=sql_query,
+            execution_status='SUCCESS',
+            execution_time_ms=execution_time,
+            result_count=len(data),
+            context_used={
+                'answer_cache': {
+                    'hit': True,
+                    'similarity': round(hit.similarity, 4),
+                    'cached_question': hit.question,
+                    'refreshed': refreshed,
+                },
+            },
+        )
+        logger.info(
+            f"Cache de respostas: hit (similaridade={hit.similarity:.3f}, refreshed={refreshed}) "
+            f"para {resolved_question!r}"
+        )
+
+        return {
+            'success': True,
+            'data': data,
+            'sql_query': sql_query,
+            'interpretation': payload.get('interpretation', {}),
+            'humanized_response': response_text,
+            'execution_time_ms': execution_time,
+            'result_count': len(data),
+            'query_log_id': query_log.id,
+            'cache_hit': True,
+        }
+
+    def _humanize(self, on_event: Optional[EventCallback], **kwargs) -> Dict[str, Any]:
+        """
+        generate_humanized_response; com on_event, a resposta é gerada em streaming
+        e cada trecho é repassado como evento 'token'.
+        """
+        if on_event is None:
+            return self.gemini_service.generate_humanized_response(**kwargs)
+
+        parts: List[str] = []
+        try:
+            for text in self.gemini_service.stream_humanized_response(**kwargs):
+                parts.append(text)
+                on_event('token', {'text': text})
+        except Exception as exc:
+            logger.warning(f"Streaming da resposta falhou: {exc}")
+            if not parts:
+                return self.gemini_service.generate_humanized_response(**kwargs)
+        return {'success': True, 'content': ''.join(parts)}
+
     def _validate_sql_query(self, sql_query: str) -> Dict[str, Any]:
         """Delegado ao SQLValidator. Mantido para backward compatibility."""
         result = self.sql_validator.validate(sql_query)
@@ -0,0 +1,292 @@
+"""
+Índice vetorial em memória para os caminhos sem pgvector (SQLite/dev, bancos sem a extensão).
+
+Em vez de carregar todas as linhas do ORM e calcular o cosseno em Python puro a
+cada consulta, mantém por partição (ex.: document_type) uma matriz float32
+contígua com os vetores já normalizados (L2). A busca vira um único produto
+matriz-vetor seguido de `argpartition` para o top-k.
+
+Atualização:
+  - post_save/post_delete (ver ai_assistant/signals.py) aplicam upserts/remoções
+    incrementais, consolidados na próxima busca;
+  - escritas em lote (bulk_create/bulk_update/update) chamam `invalidate()`;
+  - o índice é recarregado após ALICE_VECTOR_INDEX_TTL segundos, para enxergar
+    escritas feitas por outros processos.
+
+Uso:
+    index = get_document_index()
+    index.search(query_embedding, k=5, partition='SCHEMA', min_score=0.5)
+    # [(doc_id, similarity), ...]
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+Row = Tuple[int, Any, Any]
+
+
+def _normalize(vector: Any) -> Optional[np.ndarray]:
+    arr = np.asarray(vector, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(arr))
+    if arr.size == 0 or norm == 0.0:
+        return None
+    return arr / norm
+
+
+class _Partition:
+    """Matriz normalizada (n, d) + ids alinhados; mudanças ficam pendentes até a próxima busca."""
+
+    def __init__(self):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.matrix = np.empty((0, 0), dtype=np.float32)
+        self.pending: Dict[int, np.ndarray] = {}
+        self.removed: set = set()
+
+    def compact(self) -> None:
+        if not self.pending and not self.removed:
+            return
+        drop = self.removed | set(self.pending)
+        keep = ~np.isin(self.ids, list(drop)) if drop and self.ids.size else np.ones(self.ids.size, dtype=bool)
+        ids = self.ids[keep]
+        matrix = self.matrix[keep] if self.matrix.size else self.matrix
+
+        if self.pending:
+            new_ids = np.fromiter(self.pending.keys(), dtype=np.int64, count=len(self.pending))
+            new_rows = np.vstack(list(self.pending.values()))
+            if matrix.size and matrix.shape[1] != new_rows.shape[1]:
+                logger.warning("VectorIndex: dimensões divergentes (%d vs %d)", matrix.shape[1], new_rows.shape[1])
+            else:
+                ids = np.concatenate([ids, new_ids])
+                matrix = np.vstack([matrix, new_rows]) if matrix.size else new_rows
+
+        self.ids = ids
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        self.pending = {}
+        self.removed = set()
+
+    def top_k(
+        self,
+        query: np.ndarray,
+        k: int,
+        candidate_ids: Optional[np.ndarray] = None,
+    ) -> List[Tuple[int, float]]:
+        if not self.ids.size or self.matrix.shape[1] != query.shape[0]:
+            return []
+
+        scores = self.matrix @ query
+        ids = self.ids
+        if candidate_ids is not None:
+            mask = np.isin(ids, candidate_ids)
+            scores, ids = scores[mask], ids[mask]
+            if not ids.size:
+                return []
+
+        k = min(k, ids.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+
+class VectorIndex:
+    """
+    Índice vetorial por processo. `loader` devolve (id, partição, embedding) das
+    linhas que devem ser buscáveis; é chamado no primeiro uso e após invalidação/TTL.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Iterable[Row]], ttl: int = 300):
+        self.name = name
+        self._loader = loader
+        self._ttl = ttl
+        self._lock = threading.RLock()
+        self._partitions: Dict[Any, _Partition] = {}
+        self._loaded_at: Optional[float] = None
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    def search(
+        self,
+        query_embedding: List[float],
+        k: int = 5,
+        partition: Any = None,
+        min_score: Optional[float] = None,
+        candidate_ids: Optional[Iterable[int]] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Top-k por similaridade de cosseno.
+
+        Args:
+            query_embedding: Vetor da consulta
+            k: Número máximo de resultados
+            partition: Restringe a uma partição (None = todas)
+            min_score: Descarta resultados abaixo deste score
+            candidate_ids: Restringe a estes ids (filtros resolvidos no banco)
+
+        Returns:
+            Lista de (id, similaridade) ordenada por similaridade DESC
+        """
+        query = _normalize(query_embedding) if query_embedding is not None else None
+        if query is None or k <= 0:
+            return []
+
+        candidates = None
+        if candidate_ids is not None:
+            candidates = np.fromiter(candidate_ids, dtype=np.int64)
+            if not candidates.size:
+                return []
+
+        with self._lock:
+            self._ensure_loaded()
+            if partition is not None:
+                partitions = [self._partitions[partition]] if partition in self._partitions else []
+            else:
+                partitions = list(self._partitions.values())
+            results = []
+            for part in partitions:
+                part.compact()
+                results.extend(part.top_k(query, k, candidates))
+
+        if len(partitions) > 1:
+            results.sort(key=lambda item: item[1], reverse=True)
+            results = results[:k]
+        if min_score is not None:
+            results = [item for item in results if item[1] >= min_score]
+        return results
+
+    def upsert(self, row_id: int, partition: Any, embedding: Any) -> None:
+        """Inclui/atualiza um vetor. Ignorado se o índice ainda não foi carregado."""
+        vector = _normalize(embedding) if embedding is not None else None
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            for key, part in self._partitions.items():
+                if key != partition:
+                    part.pending.pop(row_id, None)
+                    part.removed.add(row_id)
+            if vector is None:
+                return
+            part = self._partitions.setdefault(partition, _Partition())
+            part.removed.discard(row_id)
+            part.pending[row_id] = vector
+
+    def remove(self, row_id: int) -> None:
+        with self._lock:
+            for part in self._partitions.values():
+                part.pending.pop(row_id, None)
+                part.removed.add(row_id)
+
+    def invalidate(self) -> None:
+        """Força recarga completa na próxima busca (usado após escritas em lote)."""
+        with self._lock:
+            self._partitions = {}
+            self._loaded_at = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            total = 0
+            for part in self._partitions.values():
+                part.compact()
+                total += int(part.ids.size)
+            return total
+
+    # ------------------------------------------------------------------
+    # Carga
+    # ------------------------------------------------------------------
+    def _ensure_loaded(self) -> None:
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self._ttl:
+            return
+
+        started = time.monotonic()
+        grouped: Dict[Any, Tuple[List[int], List[np.ndarray]]] = {}
+        for row_id, partition, embedding in self._loader():
+            vector = _normalize(embedding) if embedding is not None else None
+            if vector is None:
+                continue
+            ids, vectors = grouped.setdefault(partition, ([], []))
+            ids.append(row_id)
+            vectors.append(vector)
+
+        partitions = {}
+        for partition, (ids, vectors) in grouped.items():
+            dims = {v.shape[0] for v in vectors}
+            if len(dims) > 1:
+                dim = max(dims, key=lambda d: sum(1 for v in vectors if v.shape[0] == d))
+                logger.warning("VectorIndex[%s]: ignorando vetores fora da dimensão %d", self.name, dim)
+                pairs = [(i, v) for i, v in zip(ids, vectors) if v.shape[0] == dim]
+                ids, vectors = [p[0] for p in pairs], [p[1] for p in pairs]
+            part = _Partition()
+            part.ids = np.asarray(ids, dtype=np.int64)
+            part.matrix = np.ascontiguousarray(np.vstack(vectors), dtype=np.float32)
+            partitions[partition] = part
+
+        self._partitions = partitions
+        self._loaded_at = time.monotonic()
+        logger.debug(
+            "VectorIndex[%s]: %d vetores carregados em %.1fms",
+            self.name, sum(p.ids.size for p in partitions.values()), (self._loaded_at - started) * 1000,
+        )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Índices dos modelos da Alice
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _load_documents() -> Iterable[Row]:
+    from ..models import DocumentEmbedding
+    return (
+        DocumentEmbedding.objects
+        .filter(is_active=True)
+        .exclude(embedding=None)
+        .values_list('id', 'document_type', 'embedding')
+        .iterator()
+    )
+
+
+def _load_few_shot_examples() -> Iterable[Row]:
+    from ..models import FewShotExample
+    rows = (
+        FewShotExample.objects
+        .filter(is_active=True)
+        .exclude(embedding=None)
+        .values_list('id', 'embedding')
+        .iterator()
+    )
+    return ((row_id, None, embedding) for row_id, embedding in rows)
+
+
+_document_index: Optional[VectorIndex] = None
+_few_shot_index: Optional[VectorIndex] = None
+_singleton_lock = threading.Lock()
+
+
+def get_document_index() -> VectorIndex:
+    """Índice de DocumentEmbedding ativos, particionado por document_type."""
+    global _document_index
+    if _document_index is None:
+        with _singleton_lock:
+            if _document_index is None:
+                _document_index = VectorIndex(
+                    'documents', _load_documents,
+                    ttl=getattr(settings, 'ALICE_VECTOR_INDEX_TTL', 300),
+                )
+    return _document_index
+
+
+def get_few_shot_index() -> VectorIndex:
+    """Índice de FewShotExample ativos (partição única)."""
+    global _few_shot_index
+    if _few_shot_index is None:
+        with _singleton_lock:
+            if _few_shot_index is None:
+                _few_shot_index = VectorIndex(
+                    'few_shot', _load_few_shot_examples,
+                    ttl=getattr(settings, 'ALICE_VECTOR_INDEX_TTL', 300),
+                )
+    return _few_shot_index
@@ -0,0 +1,89 @@
+"""
+Signals para manter os artefatos em memória da Alice sincronizados com o banco:
+índice vetorial (DocumentEmbedding/FewShotExample), contexto de schema (DatabaseSchema)
+e cache semântico de respostas (escritas nas tabelas que a Alice consulta).
+"""
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, post_migrate
+from django.dispatch import receiver
+
+from .models import ALICE_SAFE_TABLES, DatabaseSchema, DocumentEmbedding, FewShotExample
+
+
+def get_document_index():
+    # Import tardio: ai_assistant.services carrega LangChain, desnecessário no ready()
+    from .services.vector_index import get_document_index as _get
+    return _get()
+
+
+def get_few_shot_index():
+    from .services.vector_index import get_few_shot_index as _get
+    return _get()
+
+
+@receiver(post_save, sender=DocumentEmbedding)
+def update_document_index_on_save(sender, instance, **kwargs):
+    """Após salvar um documento, atualizar (ou remover, se inativo) seu vetor no índice"""
+    if instance.is_active and instance.embedding is not None:
+        get_document_index().upsert(instance.id, instance.document_type, instance.embedding)
+    else:
+        get_document_index().remove(instance.id)
+
+
+@receiver(post_delete, sender=DocumentEmbedding)
+def update_document_index_on_delete(sender, instance, **kwargs):
+    get_document_index().remove(instance.id)
+
+
+@receiver(post_save, sender=FewShotExample)
+def update_few_shot_index_on_save(sender, instance, update_fields=None, **kwargs):
+    """Atualizações só de estatísticas (success_count etc.) não mexem no vetor"""
+    if update_fields and not {'embedding', 'is_active'} & set(update_fields):
+        return
+    if instance.is_active and instance.embedding is not None:
+        get_few_shot_index().upsert(instance.id, None, instance.embedding)
+    else:
+        get_few_shot_index().remove(instance.id)
+
+
+@receiver(post_delete, sender=FewShotExample)
+def update_few_shot_index_on_delete(sender, instance, **kwargs):
+    get_few_shot_index().remove(instance.id)
+
+
+@receiver(post_save, sender=DatabaseSchema)
+@receiver(post_delete, sender=DatabaseSchema)
+def invalidate_schema_context_on_change(sender, **kwargs):
+    """Mudança em DatabaseSchema gera nova versão do schema usado no prompt"""
+    from .services.schema_context import invalidate_schema_context
+    invalidate_schema_context()
+
+
+@receiver(post_migrate)
+def invalidate_schema_context_on_migrate(sender, **kwargs):
+    """Migrações podem alterar tabelas/colunas/FKs das tabelas consultadas pela Alice"""
+    if sender.name != 'ai_assistant':
+        return
+    from .services.schema_context import invalidate_schema_context
+    invalidate_schema_context()
+
+
+def track_table_writes_for_answer_cache(sender, raw=False, **kwargs):
+    """Escrita numa tabela invalida as respostas em cache que a consultaram"""
+    if raw:
+        return
+    from .services.answer_cache import mark_tables_written
+    tables = [sender._meta.db_table]
+    # Agora (leituras na mesma transação) e no commit: resposta montada com os
+    # dados antigos enquanto a transação estava aberta também fica inválida
+    mark_tables_written(tables)
+    transaction.on_commit(lambda: mark_tables_written(tables))
+
+
+# Tabelas que o SQL da Alice consulta + o índice de documentos lido pelos agentes de RAG
+for _model in apps.get_models():
+    if _model._meta.db_table in ALICE_SAFE_TABLES or _model is DocumentEmbedding:
+        _uid = f'ai_assistant.answer_cache:{_model._meta.label}'
+        post_save.connect(track_table_writes_for_answer_cache, sender=_model, dispatch_uid=_uid)
+        post_delete.connect(track_table_writes_for_answer_cache, sender=_model, dispatch_uid=_uid)
@@ -0,0 +1,211 @@
+"""
+Testes para o cache semântico de respostas da Alice.
+
+Cobre:
+- Hit acima do limiar e isolamento por escopo de permissão
+- Números e trechos entre aspas diferentes não casam, mesmo com embedding igual
+- Invalidação por escrita (post_save) numa tabela consultável tocada, de novo no commit
+- Substituição da entrada ao regravar a mesma pergunta
+- SQLInterpreterService respondendo do cache e reexecutando o SQL guardado
+- AliceGraphService guardando só respostas com as tabelas efetivamente lidas
+"""
+from unittest.mock import MagicMock, patch
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from ai_assistant.models import ALICE_SAFE_TABLES, ConversationSession, DatabaseSchema, QueryLog
+from sector.models import Direction
+from ai_assistant.services.answer_cache import SemanticAnswerCache, question_literals, scope_key
+from ai_assistant.services.sql_interpreter import SQLInterpreterService
+from ai_assistant.services.sql_validator import SQLValidator
+
+
+def _vec(*head, dim=8):
+    return list(head) + [0.0] * (dim - len(head))
+
+
+class SemanticAnswerCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.answers = SemanticAnswerCache(ttl=600, threshold=0.95, max_entries=10)
+
+    def test_hit_above_threshold_only_in_same_scope(self):
+        self.answers.store('sql', 'scope-a', 'Quantos contratos?', _vec(1.0, 0.1), {'n': 3}, ['contract_contract'])
+
+        hit = self.answers.lookup('sql', 'scope-a', _vec(1.0, 0.12))
+
+        self.assertIsNotNone(hit)
+        self.assertEqual(hit.payload, {'n': 3})
+        self.assertEqual(hit.question, 'Quantos contratos?')
+        self.assertIsNone(self.answers.lookup('sql', 'scope-a', _vec(0.0, 1.0)))
+        self.assertIsNone(self.answers.lookup('sql', 'scope-b', _vec(1.0, 0.1)))
+        self.assertIsNone(self.answers.lookup('graph', 'scope-a', _vec(1.0, 0.1)))
+
+    def test_numbers_and_quoted_terms_must_match(self):
+        self.answers.store('sql', 'scope', 'Contratos de 2023 do "Setor A"', _vec(1.0), {'n': 1}, [])
+
+        self.assertEqual(question_literals('Contratos de 2023 do "Setor A"'), ['2023', 'setor a'])
+        self.assertIsNotNone(self.answers.lookup('sql', 'scope', _vec(1.0), 'contratos de 2023 do "setor  a"'))
+        self.assertIsNone(self.answers.lookup('sql', 'scope', _vec(1.0), 'Contratos de 2024 do "Setor A"'))
+        self.assertIsNone(self.answers.lookup('sql', 'scope', _vec(1.0), 'Contratos de 2023 do "Setor B"'))
+        self.assertIsNone(self.answers.lookup('sql', 'scope', _vec(1.0), 'Contratos do "Setor A"'))
+
+    def test_write_to_touched_table_invalidates(self):
+        self.answers.store('sql', 'scope', 'Quais direções?', _vec(1.0), {'n': 1}, ['sector_direction'])
+        self.answers.store('sql', 'scope', 'Quantos contratos?', _vec(0.0, 1.0), {'n': 2}, ['contract_contract'])
+
+        Direction.objects.create(name='Direção Geral')
+
+        self.assertIsNone(self.answers.lookup('sql', 'scope', _vec(1.0)))
+        self.assertIsNotNone(self.answers.lookup('sql', 'scope', _vec(0.0, 1.0)))
+
+    def test_answer_built_before_commit_is_invalidated_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Direction.objects.create(name='Direção Geral')
+            # Leitura concorrente ainda vê os dados anteriores à transação
+            self.answers.store('sql', 'scope', 'Quais direções?', _vec(1.0), {'n': 1}, ['sector_direction'])
+
+        self.assertIsNone(self.answers.lookup('sql', 'scope', _vec(1.0)))
+
+    def test_writes_outside_queryable_tables_are_ignored(self):
+        self.answers.store(
+            'sql', 'scope', 'Quais colunas?', _vec(1.0), {'n': 1}, ['ai_assistant_databaseschema']
+        )
+
+        DatabaseSchema.objects.create(table_name='contract_contract', column_name='id', data_type='integer')
+
+        self.assertIsNotNone(self.answers.lookup('sql', 'scope', _vec(1.0)))
+        self.assertIsNone(cache.get('alice:answers:written:ai_assistant_databaseschema'))
+
+    def test_same_question_replaces_entry(self):
+        self.answers.store('sql', 'scope', 'Quantos contratos?', _vec(1.0), {'n': 1}, [])
+        self.answers.store('sql', 'scope', 'quantos contratos? ', _vec(1.0), {'n': 2}, [])
+
+        self.assertEqual(self.answers.lookup('sql', 'scope', _vec(1.0)).payload, {'n': 2})
+        self.assertEqual(len(cache.get('alice:answers:sql:scope')), 1)
+
+
+class InterpreterAnswerCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        user = get_user_model().objects.create_superuser(email="admin@minerva.local", password="testpass123")
+        self.session = ConversationSession.objects.create(user=user, session_id='s1')
+        self.scope = scope_key(user)
+        self.interpreter = SQLInterpreterService.__new__(SQLInterpreterService)
+        self.interpreter.gemini_service = MagicMock()
+        self.interpreter.gemini_service.get_embedding.return_value = _vec(1.0)
+        self.interpreter.gemini_service.generate_humanized_response.return_value = {'content': 'Agora são 5.'}
+        self.answers = SemanticAnswerCache(ttl=600, threshold=0.95, max_entries=10)
+        self.answers.store(
+            'sql', self.scope, 'Quantos contratos?', _vec(1.0),
+            payload={
+                'sql_query': 'SELECT COUNT(*) AS total FROM contract_contract',
+                'interpretation': {'intent': 'count'},
+                'data': [{'total': 4}],
+                'humanized_response': 'São 4 contratos.',
+            },
+            tables=['contract_contract'],
+        )
+
+    def _answer(self):
+        return self.interpreter._answer_from_cache(
+            self.answers, self.scope, 'Quantos contratos?', 'Quantos contratos?', self.session, 0.0
+        )
+
+    def test_hit_with_unchanged_data_skips_humanization(self):
+        self.interpreter._execute_sql_query = MagicMock(return_value={'success': True, 'data': [{'total': 4}]})
+
+        result = self._answer()
+
+        self.assertTrue(result['cache_hit'])
+        self.assertEqual(result['humanized_response'], 'São 4 contratos.')
+        self.interpreter.gemini_service.generate_humanized_response.assert_not_called()
+        log = QueryLog.objects.get(id=result['query_log_id'])
+        self.assertTrue(log.context_used['answer_cache']['hit'])
+
+    def test_hit_with_changed_data_rehumanizes_and_refreshes(self):
+        self.interpreter._execute_sql_query = MagicMock(return_value={'success': True, 'data': [{'total': 5}]})
+
+        result = self._answer()
+
+        self.assertEqual(result['data'], [{'total': 5}])
+        self.assertEqual(result['humanized_response'], 'Agora são 5.')
+        self.assertEqual(self.answers.lookup('sql', self.scope, _vec(1.0)).payload['data'], [{'total': 5}])
+
+    def test_question_with_other_number_is_a_miss(self):
+        self.interpreter._execute_sql_query = MagicMock()
+
+        result = self.interpreter._answer_from_cache(
+            self.answers, self.scope, 'Quantos contratos em 2024?', 'Quantos contratos em 2024?', self.session, 0.0
+        )
+
+        self.assertIsNone(result)
+        self.interpreter._execute_sql_query.assert_not_called()
+
+    def test_failed_rerun_is_a_miss(self):
+        self.interpreter._execute_sql_query = MagicMock(return_value={'success': False, 'error': 'x'})
+        self.assertIsNone(self._answer())
+
+
+@patch('ai_assistant.services.memory_service._get_redis', return_value=None)
+class GraphAnswerCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.answers = SemanticAnswerCache(ttl=600, threshold=0.95, max_entries=10)
+
+    def _run(self, final_state):
+        from ai_assistant.services.alice_graph import AliceGraphService
+        graph = MagicMock()
+        graph.invoke.return_value = {
+            'agent_type': 'database',
+            'confidence': 0.92,
+            'source': 'Banco de Dados',
+            'final_response': 'Há 3 direções.',
+            **final_state,
+        }
+        with patch('ai_assistant.services.alice_graph.get_graph', return_value=graph):
+            svc = AliceGraphService()
+            svc._answer_cache_key = MagicMock(return_value=(self.answers, 'scope', _vec(1.0)))
+            return svc.run('Quantas direções?')
+
+    def test_stores_answer_with_tables_read_by_agent(self, _redis):
+        self._run({'tables_read': ['sector_direction']})
+
+        hit = self.answers.lookup('graph', 'scope', _vec(1.0), 'Quantas direções?')
+        self.assertEqual(hit.tables, ['sector_direction'])
+        Direction.objects.create(name='Direção Geral')
+        self.assertIsNone(self.answers.lookup('graph', 'scope', _vec(1.0), 'Quantas direções?'))
+
+    def test_answer_with_unknown_tables_is_not_stored(self, _redis):
+        self._run({})
+
+        self.assertIsNone(self.answers.lookup('graph', 'scope', _vec(1.0), 'Quantas direções?'))
+
+    def test_database_node_records_tables_of_executed_sql(self, _redis):
+        from ai_assistant.services import alice_graph
+        svc = SQLInterpreterService.__new__(SQLInterpreterService)
+        svc.sql_validator = SQLValidator(safe_tables=ALICE_SAFE_TABLES)
+        svc.interpret_and_execute = MagicMock(return_value={
+            'success': True,
+            'humanized_response': '3 contratos do João.',
+            'sql_query': (
+                'SELECT COUNT(*) FROM contract_contract c '
+                'JOIN employee_employee e ON e.id = c.main_inspector_id'
+            ),
+        })
+        agent = MagicMock()
+        agent.run.return_value = {'success': False, 'response': '', 'tools_used': [], 'tables': None}
+
+        with patch('ai_assistant.services.alice_agent.AliceAgentService', return_value=agent), \
+                patch('ai_assistant.services.sql_interpreter.SQLInterpreterService', return_value=svc), \
+                patch.object(alice_graph, '_get_or_create_temp_session', return_value=None):
+            state = alice_graph.database_agent_node({'question': 'Contratos do João?'})
+
+        self.assertEqual(state['tables_read'], ['contract_contract', 'employee_employee'])
@@ -0,0 +1,144 @@
+"""
+Testes para o caminho async (ASGI) do agente Alice.
+
+Cobre:
+- graph.ainvoke usando as versões async dos nós (llm.ainvoke, nunca llm.invoke)
+- AliceGraphService.arun com memória async e o mesmo formato de run()
+- Views async do agente (AsyncAPIView: autenticação/erros do DRF, validação do corpo, SSE)
+"""
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from langchain_core.messages import AIMessage, AIMessageChunk
+from rest_framework.throttling import UserRateThrottle
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+def _fake_llm(reply, streamed):
+    async def astream(messages):
+        for text in streamed:
+            yield AIMessageChunk(content=text)
+
+    llm = MagicMock()
+    llm.ainvoke = AsyncMock(return_value=AIMessage(content=reply))
+    llm.astream = astream
+    llm.invoke.side_effect = AssertionError("llm.invoke chamado no caminho async")
+    llm.stream.side_effect = AssertionError("llm.stream chamado no caminho async")
+    return llm
+
+
+@override_settings(ALICE_ANSWER_CACHE_ENABLED=False)
+class AsyncGraphTests(TestCase):
+
+    @patch('ai_assistant.services.alice_graph._get_llm')
+    async def test_ainvoke_runs_async_nodes(self, mock_get_llm):
+        from ai_assistant.services.alice_graph import _build_graph
+        mock_get_llm.return_value = _fake_llm('system', ['Acesse o menu ', 'Contratos.'])
+        events = []
+
+        state = await _build_graph().ainvoke({
+            'question': 'Como cadastro um contrato?',
+            'resolved_question': 'Como cadastro um contrato?',
+            'on_event': lambda event, data: events.append((event, data)),
+        })
+
+        self.assertEqual(state['agent_type'], 'system')
+        self.assertEqual(state['final_response'], 'Acesse o menu Contratos.')
+        self.assertEqual(events, [
+            ('stage', {'stage': 'classified', 'agent_type': 'system'}),
+            ('token', {'text': 'Acesse o menu '}),
+            ('token', {'text': 'Contratos.'}),
+        ])
+
+    @patch('ai_assistant.services.alice_graph.get_graph')
+    @patch('ai_assistant.services.memory_service._get_redis', return_value=MagicMock())
+    async def test_arun_uses_async_memory(self, _mock_redis, mock_get_graph):
+        from ai_assistant.services.alice_graph import AliceGraphService
+        mock_get_graph.return_value.ainvoke = AsyncMock(return_value={
+            'agent_type': 'general', 'final_response': 'Olá!', 'confidence': 0.75,
+            'source': 'Conhecimento Geral', 'tools_used': ['general_llm'],
+        })
+        svc = AliceGraphService()
+        svc._memory.aget_history = AsyncMock(return_value=[])
+        svc._memory.asave_message = AsyncMock()
+
+        result = await svc.arun('Oi', session_id='s1')
+
+        self.assertEqual(result['response'], 'Olá!')
+        self.assertEqual(result['agent_type'], 'general')
+        svc._memory.aget_history.assert_awaited_once_with('s1', limit=10)
+        self.assertEqual(svc._memory.asave_message.await_count, 2)
+        mock_get_graph.return_value.invoke.assert_not_called()
+
+
+class AsyncAgentViewTests(TestCase):
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(email="gaby@minerva.local", password="testpass123")
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+
+    @patch('ai_assistant.services.alice_graph.AliceGraphService.arun', new_callable=AsyncMock)
+    @patch('ai_assistant.services.memory_service._get_redis', return_value=None)
+    async def test_agent_chat_returns_payload(self, _mock_redis, mock_arun):
+        mock_arun.return_value = {
+            'success': True, 'response': 'Existem 4 contratos.', 'confidence': 0.9,
+            'source': 'Banco de Dados', 'agent_type': 'database', 'tools_used': ['sql_interpreter'],
+        }
+
+        response = await self.async_client.post(
+            '/api/v1/alice/agent/', json.dumps({'message': 'Quantos contratos?'}),
+            content_type='application/json', headers=self.headers,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['response'], 'Existem 4 contratos.')
+        self.assertEqual(mock_arun.await_args.args, ('Quantos contratos?',))
+
+    async def test_agent_chat_requires_message(self):
+        response = await self.async_client.post(
+            '/api/v1/alice/agent/', json.dumps({'message': '  '}),
+            content_type='application/json', headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 400)
+
+    async def test_agent_chat_requires_token(self):
+        response = await self.async_client.post(
+            '/api/v1/alice/agent/', json.dumps({'message': 'Oi'}), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 401)
+
+    @patch.object(UserRateThrottle, 'THROTTLE_RATES', {'user': '1/hour', 'anon': '1/hour'})
+    async def test_agent_chat_uses_drf_throttle_and_error_format(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        await self.async_client.post(
+            '/api/v1/alice/agent/', json.dumps({'message': ' '}), content_type='application/json', headers=self.headers,
+        )
+        response = await self.async_client.post(
+            '/api/v1/alice/agent/', json.dumps({'message': ' '}), content_type='application/json', headers=self.headers,
+        )
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('detail', response.json())
+        self.assertIn('Retry-After', response.headers)
+
+    @patch('ai_assistant.services.alice_graph.AliceGraphService.arun', new_callable=AsyncMock)
+    @patch('ai_assistant.services.memory_service._get_redis', return_value=None)
+    async def test_agent_stream_ends_with_done_event(self, _mock_redis, mock_arun):
+        mock_arun.return_value = {
+            'success': True, 'response': 'Olá!', 'confidence': 0.9,
+            'source': 'Conhecimento Geral', 'agent_type': 'general', 'tools_used': [],
+        }
+
+        response = await self.async_client.post(
+            '/api/v1/alice/agent/stream/', json.dumps({'message': 'Oi'}),
+            content_type='application/json', headers={**self.headers, 'Accept': 'text/event-stream'},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertIn('event: done', body)
+        self.assertIn('Olá!', body)
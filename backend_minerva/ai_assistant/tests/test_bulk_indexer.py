@@ -0,0 +1,98 @@
+"""
+Testes para BulkEmbeddingIndexer.
+
+Cobre:
+- Agrupamento em lotes do tamanho do provedor e gravação via bulk_create
+- Backoff quando o provedor sinaliza rate limit
+- Retomada a partir do checkpoint sem revetorizar documentos já gravados
+"""
+import json
+import os
+import tempfile
+from unittest.mock import MagicMock, patch
+from django.test import TestCase
+
+from ai_assistant.models import DocumentEmbedding
+from ai_assistant.services.bulk_indexer import BulkEmbeddingIndexer, document_key
+from ai_assistant.services.embedding_cache import EmbeddingCache
+
+
+def _docs(n, doc_type='FAQ'):
+    return [
+        {'document_type': doc_type, 'title': f'Doc {i}', 'content': f'conteúdo {i}', 'metadata': {}}
+        for i in range(n)
+    ]
+
+
+class _ResourceExhausted(Exception):
+    pass
+
+
+class BulkEmbeddingIndexerTests(TestCase):
+
+    def setUp(self):
+        cache_patch = patch(
+            'ai_assistant.services.bulk_indexer.get_embedding_cache',
+            return_value=EmbeddingCache(maxsize=64, ttl=60, use_redis=False),
+        )
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+
+        self.gemini = MagicMock()
+        self.gemini.EMBEDDING_MODEL = 'test-model'
+        self.gemini.embeddings_model.embed_documents.side_effect = (
+            lambda texts, batch_size=100: [[0.1] * 768 for _ in texts]
+        )
+
+    def test_groups_into_batches_and_bulk_creates(self):
+        indexer = BulkEmbeddingIndexer(self.gemini, batch_size=2, max_workers=2)
+
+        result = indexer.index(_docs(5))
+
+        self.assertEqual(result.created, 5)
+        self.assertEqual(result.batches, 3)
+        self.assertEqual(result.by_type, {'FAQ': 5})
+        self.assertEqual(self.gemini.embeddings_model.embed_documents.call_count, 3)
+        self.assertEqual(DocumentEmbedding.objects.count(), 5)
+
+    @patch('ai_assistant.services.bulk_indexer.time.sleep')
+    def test_retries_on_rate_limit(self, mock_sleep):
+        calls = {'n': 0}
+
+        def flaky(texts, batch_size=100):
+            calls['n'] += 1
+            if calls['n'] == 1:
+                raise _ResourceExhausted('429 RESOURCE_EXHAUSTED')
+            return [[0.2] * 768 for _ in texts]
+
+        self.gemini.embeddings_model.embed_documents.side_effect = flaky
+        indexer = BulkEmbeddingIndexer(self.gemini, batch_size=10, max_workers=1)
+
+        result = indexer.index(_docs(3))
+
+        self.assertEqual(result.created, 3)
+        mock_sleep.assert_called_once()
+
+    def test_non_rate_limit_error_marks_batch_failed(self):
+        self.gemini.embeddings_model.embed_documents.side_effect = ValueError('boom')
+        indexer = BulkEmbeddingIndexer(self.gemini, batch_size=10, max_workers=1)
+
+        result = indexer.index(_docs(3))
+
+        self.assertEqual(result.created, 0)
+        self.assertEqual(result.failed, 3)
+
+    def test_resumes_from_checkpoint(self):
+        docs = _docs(4)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'checkpoint.json')
+            with open(path, 'w', encoding='utf-8') as fh:
+                json.dump({'completed': [document_key(docs[0]), document_key(docs[1])]}, fh)
+
+            indexer = BulkEmbeddingIndexer(self.gemini, batch_size=10, checkpoint_path=path)
+            self.assertTrue(indexer.is_resuming)
+            result = indexer.index(docs)
+
+            self.assertEqual(result.skipped, 2)
+            self.assertEqual(result.created, 2)
+            self.assertFalse(os.path.exists(path))
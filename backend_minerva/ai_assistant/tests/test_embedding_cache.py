@@ -0,0 +1,83 @@
+"""
+Testes para o cache de embeddings da Alice.
+
+Cobre:
+- Memo por requisição (mesmo texto → uma chamada ao provedor)
+- LRU do processo entre requisições
+- Chave independente de caixa/espaços e dependente do modelo
+- Lote consultando o provedor apenas para os textos ausentes
+- Falhas do provedor não são cacheadas
+"""
+from unittest.mock import MagicMock
+from django.test import SimpleTestCase
+
+from ai_assistant.services.embedding_cache import (
+    EmbeddingCache,
+    current_embedding_stats,
+    embedding_scope,
+    make_key,
+)
+
+
+class EmbeddingCacheTests(SimpleTestCase):
+
+    def _make_cache(self):
+        return EmbeddingCache(maxsize=16, ttl=60, use_redis=False)
+
+    def test_request_memo_avoids_second_call(self):
+        cache = self._make_cache()
+        compute = MagicMock(return_value=[0.1, 0.2])
+
+        with embedding_scope() as stats:
+            cache.get_or_compute('Quantos contratos?', 'm', compute)
+            cache.get_or_compute('Quantos contratos?', 'm', compute)
+
+        compute.assert_called_once()
+        self.assertEqual(stats.misses, 1)
+        self.assertEqual(stats.memo_hits, 1)
+
+    def test_process_cache_shared_between_requests(self):
+        cache = self._make_cache()
+        compute = MagicMock(return_value=[0.1, 0.2])
+
+        with embedding_scope():
+            cache.get_or_compute('orçamentos 2024', 'm', compute)
+        with embedding_scope() as stats:
+            cache.get_or_compute('orçamentos 2024', 'm', compute)
+
+        compute.assert_called_once()
+        self.assertEqual(stats.local_hits, 1)
+        self.assertEqual(stats.misses, 0)
+
+    def test_nested_scopes_share_stats(self):
+        with embedding_scope() as outer:
+            with embedding_scope() as inner:
+                self.assertIs(outer, inner)
+                self.assertIs(current_embedding_stats(), outer)
+        self.assertIsNone(current_embedding_stats())
+
+    def test_key_normalizes_text_and_includes_model(self):
+        self.assertEqual(
+            make_key('  Contratos   ATIVOS ', 'm'),
+            make_key('contratos ativos', 'm'),
+        )
+        self.assertNotEqual(make_key('contratos', 'm1'), make_key('contratos', 'm2'))
+
+    def test_batch_only_computes_missing(self):
+        cache = self._make_cache()
+        cache.get_or_compute('a', 'm', lambda t: [1.0])
+        compute_batch = MagicMock(return_value=[[2.0], [3.0]])
+
+        result = cache.get_or_compute_many(['a', 'b', 'c'], 'm', compute_batch)
+
+        compute_batch.assert_called_once_with(['b', 'c'])
+        self.assertEqual(result, [[1.0], [2.0], [3.0]])
+
+    def test_empty_embedding_is_not_cached(self):
+        cache = self._make_cache()
+        compute = MagicMock(return_value=[])
+
+        cache.get_or_compute('falha', 'm', compute)
+        cache.get_or_compute('falha', 'm', compute)
+
+        self.assertEqual(compute.call_count, 2)
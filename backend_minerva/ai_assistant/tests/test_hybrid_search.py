@@ -5,10 +5,13 @@ Cobre:
 - RRF fusion com dois rankings
 - Retorno vazio quando não há resultados
 - Fallback ILIKE quando content_tsv indisponível
+- Modo fundido (uma consulta) com fallback para as consultas separadas
+- Cache dos probes de capacidade por processo/alias
 """
 from unittest.mock import MagicMock, patch
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
+from ai_assistant.services import db_capabilities
 from ai_assistant.services.hybrid_search import HybridSearchService
 
 
@@ -72,3 +75,89 @@ class HybridSearchNoDbTests(TestCase):
         with patch.object(svc, '_fulltext_search', return_value=[]):
             results = svc.search("contratos vencendo", query_embedding=[0.1] * 768)
         self.assertEqual(results, [])
+
+
+class FusedSearchTests(TestCase):
+    """Testa o despacho para a consulta única com RRF no SQL."""
+
+    def _make_service(self):
+        svc = HybridSearchService.__new__(HybridSearchService)
+        svc.gemini_service = MagicMock()
+        svc._pgvector_available = True
+        svc._tsv_column_available = True
+        return svc
+
+    def test_uses_single_query_when_pgvector_available(self):
+        svc = self._make_service()
+        fused_rows = [{'id': 1, 'content': 'c', 'document_type': 'FAQ', 'title': 't',
+                       'rrf_score': 2 / 61, 'vector_score': 0.9, 'fulltext_score': 0.4}]
+        with patch.object(svc, '_fused_search', return_value=fused_rows) as fused, \
+                patch.object(svc, '_vector_search') as vector:
+            results = svc.search("contratos", query_embedding=[0.1] * 768, limit=20, top_k=5)
+
+        self.assertEqual(results, fused_rows)
+        fused.assert_called_once_with("contratos", [0.1] * 768, 20, 5)
+        vector.assert_not_called()
+
+    def test_falls_back_to_separate_queries_on_error(self):
+        svc = self._make_service()
+        with patch.object(svc, '_fused_search', side_effect=RuntimeError('syntax error')), \
+                patch.object(svc, '_vector_search', return_value=[(7, 0.8)]), \
+                patch.object(svc, '_fulltext_search', return_value=[]), \
+                patch.object(svc, '_fetch_documents_by_ids', return_value=[
+                    {'id': 7, 'content': 'c', 'document_type': 'FAQ', 'title': 't'}
+                ]):
+            results = svc.search("contratos", query_embedding=[0.1] * 768)
+
+        self.assertEqual([r['id'] for r in results], [7])
+        self.assertAlmostEqual(results[0]['rrf_score'], 1 / 61, places=6)
+
+
+class CapabilityProbeTests(TestCase):
+
+    def setUp(self):
+        db_capabilities.reset_capabilities()
+        self.addCleanup(db_capabilities.reset_capabilities)
+
+    def test_probe_runs_once_per_alias(self):
+        check = MagicMock(return_value=True)
+        fake = MagicMock(vendor='postgresql')
+        with patch.object(db_capabilities, 'connections', {'default': fake, 'replica': fake}):
+            self.assertTrue(db_capabilities._probe('default', 'x', check))
+            self.assertTrue(db_capabilities._probe('default', 'x', check))
+            self.assertTrue(db_capabilities._probe('replica', 'x', check))
+
+        self.assertEqual(check.call_count, 2)
+
+    def test_non_postgres_skips_query(self):
+        check = MagicMock()
+        with patch.object(db_capabilities, 'connections', {'default': MagicMock(vendor='sqlite')}):
+            self.assertFalse(db_capabilities._probe('default', 'x', check))
+        check.assert_not_called()
+
+    def test_failed_probe_is_retried_after_negative_ttl(self):
+        check = MagicMock(side_effect=[RuntimeError('timeout'), True])
+        with patch.object(db_capabilities, 'connections', {'default': MagicMock(vendor='postgresql')}), \
+                override_settings(ALICE_CAPABILITY_RETRY_SECONDS=60), \
+                patch.object(db_capabilities.time, 'monotonic', return_value=1000.0) as now:
+            self.assertFalse(db_capabilities._probe('default', 'x', check))
+            self.assertFalse(db_capabilities._probe('default', 'x', check))
+            self.assertEqual(check.call_count, 1)
+
+            now.return_value = 1061.0
+            self.assertTrue(db_capabilities._probe('default', 'x', check))
+
+        self.assertEqual(check.call_count, 2)
+
+    def test_failure_in_use_only_disables_until_retry(self):
+        check = MagicMock(return_value=True)
+        with patch.object(db_capabilities, 'connections', {'default': MagicMock(vendor='postgresql')}), \
+                patch.object(db_capabilities.time, 'monotonic', return_value=1000.0) as now:
+            self.assertTrue(db_capabilities._probe('default', 'x', check))
+            db_capabilities.mark_unavailable('x')
+            self.assertFalse(db_capabilities._probe('default', 'x', check))
+
+            now.return_value = 2000.0
+            self.assertTrue(db_capabilities._probe('default', 'x', check))
+
+        self.assertEqual(check.call_count, 2)
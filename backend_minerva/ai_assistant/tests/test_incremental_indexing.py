@@ -0,0 +1,186 @@
+"""
+Testes para a indexação incremental por hash de conteúdo.
+
+Cobre:
+- Documentos inalterados não voltam ao provedor
+- Conteúdo alterado ou troca de modelo revetoriza a linha existente
+- Documentos removidos da fonte são desativados (não apagados) e reativados sem custo
+- Gravações em lote marcam a tabela no cache de respostas da Alice após o commit
+- FewShotManager.record_success reaproveita o exemplo pela pergunta normalizada
+"""
+from unittest.mock import MagicMock, patch
+from django.core.cache import cache
+from django.test import TestCase
+
+from ai_assistant.models import DocumentEmbedding, FewShotExample
+from ai_assistant.services.bulk_indexer import BulkEmbeddingIndexer, content_hash
+from ai_assistant.services.embedding_cache import EmbeddingCache
+from ai_assistant.services.few_shot_manager import FewShotManager, question_content_hash
+
+
+def _doc(title, content, doc_type='FAQ'):
+    return {'document_type': doc_type, 'title': title, 'content': content, 'metadata': {}}
+
+
+class IncrementalSyncTests(TestCase):
+
+    def setUp(self):
+        cache_patch = patch(
+            'ai_assistant.services.bulk_indexer.get_embedding_cache',
+            side_effect=lambda: EmbeddingCache(maxsize=64, ttl=60, use_redis=False),
+        )
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+
+        self.gemini = MagicMock()
+        self.gemini.EMBEDDING_MODEL = 'test-model'
+        self.gemini.embeddings_model.embed_documents.side_effect = (
+            lambda texts, batch_size=100: [[0.1] * 768 for _ in texts]
+        )
+
+    def _sync(self, documents):
+        return BulkEmbeddingIndexer(self.gemini, max_workers=1).sync(documents, document_types=['FAQ'])
+
+    def _embedded_texts(self):
+        return [
+            text
+            for call in self.gemini.embeddings_model.embed_documents.call_args_list
+            for text in call.args[0]
+        ]
+
+    def test_first_sync_creates_with_hash_and_model(self):
+        result = self._sync([_doc('A', 'conteúdo a'), _doc('B', 'conteúdo b')])
+
+        self.assertEqual(result.created, 2)
+        doc = DocumentEmbedding.objects.get(title='A')
+        self.assertEqual(doc.content_hash, content_hash('conteúdo a'))
+        self.assertEqual(doc.embedding_model, 'test-model')
+
+    def test_unchanged_documents_skip_provider(self):
+        self._sync([_doc('A', 'conteúdo a'), _doc('B', 'conteúdo b')])
+        self.gemini.embeddings_model.embed_documents.reset_mock()
+
+        result = self._sync([_doc('A', 'conteúdo a'), _doc('B', 'conteúdo b')])
+
+        self.assertEqual(result.unchanged, 2)
+        self.assertEqual(result.created + result.updated, 0)
+        self.gemini.embeddings_model.embed_documents.assert_not_called()
+
+    def test_changed_document_updates_existing_row(self):
+        self._sync([_doc('A', 'conteúdo a'), _doc('B', 'conteúdo b')])
+        original_id = DocumentEmbedding.objects.get(title='A').id
+        self.gemini.embeddings_model.embed_documents.reset_mock()
+
+        result = self._sync([_doc('A', 'conteúdo novo'), _doc('B', 'conteúdo b')])
+
+        self.assertEqual(result.updated, 1)
+        self.assertEqual(result.unchanged, 1)
+        self.assertEqual(self._embedded_texts(), ['conteúdo novo'])
+        doc = DocumentEmbedding.objects.get(title='A')
+        self.assertEqual(doc.id, original_id)
+        self.assertEqual(doc.content, 'conteúdo novo')
+        self.assertEqual(DocumentEmbedding.objects.count(), 2)
+
+    def test_model_change_forces_reembedding(self):
+        self._sync([_doc('A', 'conteúdo a')])
+        self.gemini.EMBEDDING_MODEL = 'outro-modelo'
+
+        result = self._sync([_doc('A', 'conteúdo a')])
+
+        self.assertEqual(result.updated, 1)
+        self.assertEqual(DocumentEmbedding.objects.get(title='A').embedding_model, 'outro-modelo')
+
+    def test_removed_document_is_deactivated_then_reactivated(self):
+        self._sync([_doc('A', 'conteúdo a'), _doc('B', 'conteúdo b')])
+
+        result = self._sync([_doc('A', 'conteúdo a')])
+
+        self.assertEqual(result.deactivated, 1)
+        self.assertFalse(DocumentEmbedding.objects.get(title='B').is_active)
+
+        self.gemini.embeddings_model.embed_documents.reset_mock()
+        result = self._sync([_doc('A', 'conteúdo a'), _doc('B', 'conteúdo b')])
+
+        self.assertEqual(result.unchanged, 2)
+        self.assertTrue(DocumentEmbedding.objects.get(title='B').is_active)
+        self.gemini.embeddings_model.embed_documents.assert_not_called()
+
+    def test_other_document_types_are_untouched(self):
+        DocumentEmbedding.objects.create(document_type='SCHEMA', title='t', content='c')
+
+        self._sync([_doc('A', 'conteúdo a')])
+
+        self.assertTrue(DocumentEmbedding.objects.get(document_type='SCHEMA').is_active)
+
+    def _assert_marks_answer_cache_on_commit(self, documents):
+        key = f'alice:answers:written:{DocumentEmbedding._meta.db_table}'
+        cache.delete(key)
+        self.addCleanup(cache.delete, key)
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self._sync(documents)
+        self.assertIsNone(cache.get(key))
+        self.assertTrue(callbacks)
+
+        for callback in callbacks:
+            callback()
+        self.assertIsNotNone(cache.get(key))
+
+    def test_written_batches_mark_answer_cache(self):
+        self._assert_marks_answer_cache_on_commit([_doc('A', 'conteúdo a')])
+
+    def test_deactivation_marks_answer_cache(self):
+        self._sync([_doc('A', 'conteúdo a'), _doc('B', 'conteúdo b')])
+
+        self._assert_marks_answer_cache_on_commit([_doc('A', 'conteúdo a')])
+
+
+class FewShotHashTests(TestCase):
+
+    def setUp(self):
+        self.gemini = MagicMock()
+        self.gemini.EMBEDDING_MODEL = 'test-model'
+        self.gemini.get_embedding.return_value = [0.1] * 768
+        self.gemini.get_embeddings_batch.side_effect = lambda texts: [[0.2] * 768 for _ in texts]
+        self.manager = FewShotManager(self.gemini)
+
+    def test_same_normalized_question_skips_embedding(self):
+        first = self.manager.record_success('Quantos contratos ativos?', 'SELECT 1', 'count', [])
+        self.gemini.get_embedding.reset_mock()
+
+        second = self.manager.record_success('  quantos   CONTRATOS ativos? ', 'SELECT 1', 'count', [])
+
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(FewShotExample.objects.get(id=first.id).success_count, 2)
+        self.gemini.get_embedding.assert_not_called()
+
+    def test_reembed_only_stale_examples(self):
+        self.manager.record_success('Quantos contratos ativos?', 'SELECT 1', 'count', [])
+        FewShotExample.objects.create(
+            user_question='Orçamento disponível?', canonical_sql='SELECT 2', intent='sum',
+            embedding_model='modelo-antigo',
+        )
+        self.gemini.get_embedding.reset_mock()
+
+        count = self.manager.reembed_stale_examples()
+
+        self.assertEqual(count, 1)
+        self.gemini.get_embedding.assert_not_called()
+        self.gemini.get_embeddings_batch.assert_called_once_with(['Orçamento disponível?'])
+        stale = FewShotExample.objects.get(user_question='Orçamento disponível?')
+        self.assertEqual(stale.embedding_model, 'test-model')
+        self.assertEqual(stale.content_hash, question_content_hash('Orçamento disponível?'))
+
+    def test_reembed_sends_stale_examples_in_batches(self):
+        FewShotExample.objects.bulk_create([
+            FewShotExample(user_question=f'Pergunta {i}?', canonical_sql='SELECT 1', intent='count')
+            for i in range(150)
+        ])
+
+        count = self.manager.reembed_stale_examples()
+
+        self.assertEqual(count, 150)
+        self.assertEqual(
+            [len(call.args[0]) for call in self.gemini.get_embeddings_batch.call_args_list], [100, 50]
+        )
+        self.gemini.get_embedding.assert_not_called()
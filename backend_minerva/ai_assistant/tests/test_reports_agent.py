@@ -0,0 +1,131 @@
+"""
+Testes para o agente de relatórios (fontes consultadas em paralelo).
+
+Cobre:
+- Banco e documentos executados ao mesmo tempo (as duas fontes se encontram numa barreira)
+- Fonte que estoura o prazo fica de fora e o relatório sai parcial
+- Mesmo comportamento no caminho async (nós síncronos no pool, asyncio.wait_for por fonte)
+
+Sem asserts de tempo de parede: a sobreposição é provada por threading.Barrier
+(executadas em sequência, a primeira fonte nunca passaria dela) e a fonte lenta
+fica presa num Event liberado só ao fim do teste.
+"""
+import asyncio
+import threading
+from unittest.mock import MagicMock, patch
+from django.test import SimpleTestCase, override_settings
+from langchain_core.messages import AIMessageChunk
+
+
+def _source(response, confidence, tool, gate=None, finished=None):
+    def node(state):
+        if gate is not None:
+            gate()
+        if finished is not None:
+            finished.append(tool)
+        return {**state, 'agent_response': response, 'confidence': confidence, 'tools_used': [tool]}
+    return node
+
+
+@override_settings(ALICE_REPORT_DATABASE_TIMEOUT=2.0, ALICE_REPORT_DOCUMENT_TIMEOUT=0.2)
+class ReportsAgentTests(SimpleTestCase):
+
+    def setUp(self):
+        self.prompts = []
+
+        def stream(messages):
+            self.prompts.append(messages[0].content)
+            yield AIMessageChunk(content='Relatório consolidado.')
+
+        async def astream(messages):
+            self.prompts.append(messages[0].content)
+            yield AIMessageChunk(content='Relatório consolidado.')
+
+        self.llm = MagicMock()
+        self.llm.stream = stream
+        self.llm.astream = astream
+        patcher = patch('ai_assistant.services.alice_graph._get_llm', return_value=self.llm)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.events = []
+        self.state = {
+            'question': 'Relatório de contratos por centro gestor',
+            'on_event': lambda event, data: self.events.append((event, data)),
+        }
+        self.finished = []
+
+    def _concurrent_nodes(self):
+        # As duas fontes precisam estar na barreira ao mesmo tempo para seguir
+        barrier = threading.Barrier(2, timeout=1.0)
+        return {
+            'database': _source('4 contratos ativos.', 0.9, 'sql_interpreter', barrier.wait, self.finished),
+            'document': _source('Edital 01/2024.', 0.7, 'rag_search', barrier.wait, self.finished),
+        }
+
+    def _nodes_with_stuck_document_source(self):
+        # A fonte de documentos só termina quando o teste acabar (bem depois do prazo de 0.2s)
+        release = threading.Event()
+        self.addCleanup(release.set)
+        return {
+            'database': _source('4 contratos ativos.', 0.9, 'sql_interpreter', finished=self.finished),
+            'document': _source(
+                'Edital 01/2024.', 0.7, 'rag_search', lambda: release.wait(10), self.finished
+            ),
+        }
+
+    def test_sources_run_concurrently(self):
+        from ai_assistant.services import alice_graph
+
+        with patch.object(alice_graph, '_report_branch_nodes', return_value=self._concurrent_nodes()), \
+                override_settings(ALICE_REPORT_DOCUMENT_TIMEOUT=2.0):
+            state = alice_graph.reports_agent_node(self.state)
+
+        self.assertEqual(sorted(self.finished), ['rag_search', 'sql_interpreter'])
+        self.assertEqual(state['agent_response'], 'Relatório consolidado.')
+        self.assertEqual(state['confidence'], 0.8)
+        self.assertEqual(sorted(state['tools_used']), ['rag_search', 'sql_interpreter'])
+        self.assertNotIn('parcial', self.prompts[0])
+        self.assertEqual(self.events[0], ('stage', {'stage': 'sources_ready', 'missing': []}))
+
+    def test_slow_source_yields_partial_report(self):
+        from ai_assistant.services import alice_graph
+        nodes = self._nodes_with_stuck_document_source()
+
+        with patch.object(alice_graph, '_report_branch_nodes', return_value=nodes):
+            state = alice_graph.reports_agent_node(self.state)
+
+        # O relatório saiu com a fonte de documentos ainda presa
+        self.assertEqual(self.finished, ['sql_interpreter'])
+        self.assertEqual(state['confidence'], 0.45)
+        self.assertEqual(state['tools_used'], ['sql_interpreter'])
+        prompt = self.prompts[0]
+        self.assertIn('4 contratos ativos.', prompt)
+        self.assertNotIn('Edital 01/2024.', prompt)
+        self.assertIn('relatório é parcial', prompt)
+        self.assertEqual(self.events[0], ('stage', {'stage': 'sources_ready', 'missing': ['document']}))
+        # Relatório parcial não vai para o cache de respostas
+        self.assertNotIn('tables_read', state)
+
+    def test_async_sources_run_concurrently(self):
+        from ai_assistant.services import alice_graph
+        # Nós síncronos de verdade (bloqueiam na barreira): sync_to_async os serializaria na mesma thread
+
+        with patch.object(alice_graph, '_report_branch_nodes', return_value=self._concurrent_nodes()), \
+                override_settings(ALICE_REPORT_DOCUMENT_TIMEOUT=2.0):
+            state = asyncio.run(alice_graph.areports_agent_node(self.state))
+
+        self.assertEqual(sorted(self.finished), ['rag_search', 'sql_interpreter'])
+        self.assertEqual(state['confidence'], 0.8)
+        self.assertNotIn('parcial', self.prompts[0])
+
+    def test_async_slow_source_yields_partial_report(self):
+        from ai_assistant.services import alice_graph
+        nodes = self._nodes_with_stuck_document_source()
+
+        with patch.object(alice_graph, '_report_branch_nodes', return_value=nodes):
+            state = asyncio.run(alice_graph.areports_agent_node(self.state))
+
+        self.assertEqual(self.finished, ['sql_interpreter'])
+        self.assertEqual(state['agent_response'], 'Relatório consolidado.')
+        self.assertEqual(state['confidence'], 0.45)
+        self.assertIn('relatório é parcial', self.prompts[0])
@@ -0,0 +1,90 @@
+"""
+Testes para o contexto de schema versionado.
+
+Cobre:
+- Artefato montado uma vez e servido sem consultas ao banco
+- Invalidação pelo post_save de DatabaseSchema
+- Fatias por tabela com expansão por FK
+"""
+from unittest.mock import MagicMock, patch
+from django.core.cache import cache
+from django.test import TestCase
+
+from ai_assistant.models import DatabaseSchema
+from ai_assistant.services.schema_context import SchemaContext, get_schema_context, invalidate_schema_context
+from ai_assistant.services.sql_interpreter import SQLInterpreterService
+
+
+def _context():
+    return SchemaContext(
+        tables={
+            'contract_contract': "\nTABELA: contract_contract\n  - id (integer)\n",
+            'employee_employee': "\nTABELA: employee_employee\n  - id (integer)\n",
+            'budget_budget': "\nTABELA: budget_budget\n  - id (integer)\n",
+            'accounts_user': "\nTABELA: accounts_user\n  - id (integer)\n",
+        },
+        foreign_keys=[
+            ('contract_contract', 'fiscal_id', 'employee_employee', 'id'),
+            ('contract_contract', 'created_by_id', 'accounts_user', 'id'),
+            ('budget_budget', 'created_by_id', 'accounts_user', 'id'),
+        ],
+    )
+
+
+class SchemaContextSliceTests(TestCase):
+
+    def test_selects_mentioned_tables_and_fk_targets(self):
+        tables = _context().select_tables("Quais contratos vencem este mês?")
+        self.assertEqual(tables, ['contract_contract', 'employee_employee'])
+
+    def test_unknown_question_returns_full_schema(self):
+        self.assertIsNone(_context().select_tables("Qual o status?"))
+
+    def test_render_slice_keeps_only_internal_fks(self):
+        context = _context()
+        text = context.render(['contract_contract', 'employee_employee'])
+
+        self.assertIn("TABELA: contract_contract", text)
+        self.assertNotIn("TABELA: budget_budget", text)
+        self.assertIn("contract_contract.fiscal_id → employee_employee.id", text)
+        self.assertNotIn("accounts_user", text)
+        self.assertIn("budget_budget.created_by_id", context.render())
+
+
+class SchemaContextCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        invalidate_schema_context()
+        self.addCleanup(cache.clear)
+
+    def test_builder_called_once_until_invalidated(self):
+        builder = MagicMock(side_effect=_context)
+
+        get_schema_context(builder)
+        with self.assertNumQueries(0):
+            get_schema_context(builder)
+        self.assertEqual(builder.call_count, 1)
+
+        DatabaseSchema.objects.create(table_name='contract_contract', column_name='id', data_type='integer')
+        get_schema_context(builder)
+        self.assertEqual(builder.call_count, 2)
+
+    @patch('ai_assistant.services.sql_interpreter.GeminiService')
+    def test_interpreter_renders_from_database_schema(self, _gemini):
+        DatabaseSchema.objects.create(
+            table_name='contract_contract', column_name='status', data_type='varchar',
+            is_nullable=False, business_meaning='Status atual', sample_values=['ATIVO'],
+        )
+        DatabaseSchema.objects.create(table_name='budget_budget', column_name='year', data_type='integer')
+        interpreter = SQLInterpreterService.__new__(SQLInterpreterService)
+        interpreter.safe_tables = {'contract_contract', 'budget_budget'}
+        interpreter._is_postgresql = False
+
+        full = interpreter.get_database_schema()
+        sliced = interpreter.get_database_schema(question="Quantos contratos ativos?")
+
+        self.assertIn("  - status (varchar) NOT NULL - Status atual\n    Exemplos: ATIVO\n", full)
+        self.assertIn("TABELA: budget_budget", full)
+        self.assertIn("TABELA: contract_contract", sliced)
+        self.assertNotIn("TABELA: budget_budget", sliced)
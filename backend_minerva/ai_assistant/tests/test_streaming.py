@@ -0,0 +1,105 @@
+"""
+Testes para os endpoints SSE da Alice.
+
+Cobre:
+- stream_pipeline: 'start' imediato, eventos na ordem publicada, 'done' com o payload de finish
+- Persistência mesmo quando o cliente desconecta no meio do stream
+- AliceChatStreamView: tokens do interpretador e mensagens gravadas ao final
+"""
+import json
+from unittest.mock import MagicMock, patch
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ai_assistant.models import ConversationMessage
+from ai_assistant.services.chat_stream import stream_pipeline
+
+
+def _parse(chunks):
+    events = []
+    for block in ''.join(chunks).split('\n\n'):
+        if block.startswith('event: '):
+            name, data = block.split('\n', 1)
+            events.append((name[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+
+class StreamPipelineTests(SimpleTestCase):
+
+    def test_events_in_order_then_done(self):
+        def run(on_event):
+            on_event('stage', {'stage': 'sql_generated'})
+            on_event('token', {'text': 'Olá'})
+            return {'answer': 'Olá'}
+
+        finish = MagicMock(return_value={'response': 'Olá'})
+        events = _parse(stream_pipeline(run, finish))
+
+        self.assertEqual([name for name, _ in events], ['start', 'stage', 'token', 'done'])
+        self.assertEqual(events[-1][1], {'response': 'Olá'})
+        finish.assert_called_once_with({'answer': 'Olá'})
+
+    def test_failed_pipeline_finishes_with_none(self):
+        def run(on_event):
+            raise RuntimeError('LLM fora do ar')
+
+        finish = MagicMock(return_value={'response': 'erro'})
+        events = _parse(stream_pipeline(run, finish))
+
+        self.assertEqual(events[-1], ('done', {'response': 'erro'}))
+        finish.assert_called_once_with(None)
+
+    def test_disconnect_still_persists(self):
+        finish = MagicMock(return_value={})
+        stream = stream_pipeline(lambda on_event: {'ok': True}, finish)
+
+        next(stream)
+        stream.close()
+
+        finish.assert_called_once_with({'ok': True})
+
+
+class AliceChatStreamViewTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email="gaby@minerva.local", password="testpass123")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    @patch('ai_assistant.views.SQLInterpreterService')
+    def test_streams_tokens_and_persists_reply(self, interpreter_cls):
+        def interpret(message, session, on_event=None):
+            on_event('stage', {'stage': 'rows_ready', 'result_count': 1})
+            on_event('token', {'text': 'São 4 '})
+            on_event('token', {'text': 'contratos.'})
+            return {
+                'success': True, 'humanized_response': 'São 4 contratos.', 'sql_query': 'SELECT 1',
+                'data': [{'total': 4}], 'result_count': 1, 'execution_time_ms': 10,
+            }
+        interpreter_cls.return_value.interpret_and_execute.side_effect = interpret
+
+        response = self.client.post(
+            '/api/v1/alice/chat/stream/', {'message': 'Quantos contratos?'},
+            format='json', HTTP_ACCEPT='text/event-stream',
+        )
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = _parse(chunk.decode() for chunk in response.streaming_content)
+        self.assertEqual(
+            [name for name, _ in events], ['start', 'stage', 'token', 'token', 'done']
+        )
+        done = events[-1][1]
+        self.assertEqual(done['response'], 'São 4 contratos.')
+        self.assertEqual(
+            list(ConversationMessage.objects.order_by('id').values_list('message_type', 'content')),
+            [('USER', 'Quantos contratos?'), ('ASSISTANT', 'São 4 contratos.')],
+        )
+        self.assertEqual(done['metadata']['assistant_message_id'], ConversationMessage.objects.last().id)
+
+    def test_validation_error_is_not_streamed(self):
+        response = self.client.post(
+            '/api/v1/alice/chat/stream/', {}, format='json', HTTP_ACCEPT='text/event-stream',
+        )
+        self.assertEqual(response.status_code, 400)
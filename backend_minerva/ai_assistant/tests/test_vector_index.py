@@ -0,0 +1,133 @@
+"""
+Testes para o índice vetorial NumPy em memória.
+
+Cobre:
+- Top-k por cosseno, partição e filtro por ids candidatos
+- Upsert/remoção incrementais sem recarregar do banco
+- Signals mantendo o índice de DocumentEmbedding atualizado
+- Fallbacks de EmbeddingService e FewShotManager devolvendo os mesmos dicts
+"""
+from unittest.mock import MagicMock
+from django.test import SimpleTestCase, TestCase
+
+from ai_assistant.models import DocumentEmbedding, FewShotExample
+from ai_assistant.services.embedding_service import EmbeddingService
+from ai_assistant.services.few_shot_manager import FewShotManager
+from ai_assistant.services.vector_index import VectorIndex, get_document_index, get_few_shot_index
+
+
+def _vec(*head, dim=8):
+    return list(head) + [0.0] * (dim - len(head))
+
+
+class VectorIndexTests(SimpleTestCase):
+
+    def _make_index(self, rows):
+        loader = MagicMock(side_effect=lambda: iter(rows))
+        return VectorIndex('test', loader, ttl=300), loader
+
+    def test_top_k_orders_by_cosine(self):
+        index, _ = self._make_index([
+            (1, 'A', _vec(1.0, 0.0)),
+            (2, 'A', _vec(0.7, 0.7)),
+            (3, 'B', _vec(0.0, 1.0)),
+        ])
+
+        hits = index.search(_vec(1.0, 0.1), k=2)
+
+        self.assertEqual([doc_id for doc_id, _ in hits], [1, 2])
+        self.assertAlmostEqual(hits[0][1], 0.995, places=3)
+
+    def test_partition_min_score_and_candidates(self):
+        index, _ = self._make_index([
+            (1, 'A', _vec(1.0, 0.0)),
+            (2, 'A', _vec(0.0, 1.0)),
+            (3, 'B', _vec(1.0, 0.0)),
+        ])
+
+        self.assertEqual([i for i, _ in index.search(_vec(1.0), k=5, partition='A')], [1, 2])
+        self.assertEqual([i for i, _ in index.search(_vec(1.0), k=5, partition='A', min_score=0.5)], [1])
+        self.assertEqual([i for i, _ in index.search(_vec(1.0), k=5, candidate_ids=[2, 3])], [3, 2])
+        self.assertEqual(index.search(_vec(1.0), k=5, partition='C'), [])
+
+    def test_incremental_upsert_and_remove(self):
+        index, loader = self._make_index([(1, 'A', _vec(1.0, 0.0))])
+        index.search(_vec(1.0), k=1)
+
+        index.upsert(2, 'A', _vec(0.0, 1.0))
+        index.upsert(1, 'B', _vec(1.0, 0.0))
+        self.assertEqual(index.search(_vec(0.0, 1.0), k=1), [(2, 1.0)])
+        self.assertEqual([i for i, _ in index.search(_vec(1.0), k=5, partition='B')], [1])
+
+        index.remove(1)
+        self.assertEqual(len(index), 1)
+        loader.assert_called_once()
+
+    def test_zero_query_returns_empty(self):
+        index, _ = self._make_index([(1, 'A', _vec(1.0))])
+        self.assertEqual(index.search(_vec(), k=1), [])
+
+
+class VectorIndexFallbackTests(TestCase):
+
+    def setUp(self):
+        get_document_index().invalidate()
+        get_few_shot_index().invalidate()
+        self.addCleanup(get_document_index().invalidate)
+        self.addCleanup(get_few_shot_index().invalidate)
+
+    def _embedding(self, *head):
+        return _vec(*head, dim=768)
+
+    def test_signals_keep_document_index_current(self):
+        doc = DocumentEmbedding.objects.create(
+            document_type='FAQ', title='a', content='a', embedding=self._embedding(1.0)
+        )
+        self.assertEqual(len(get_document_index()), 1)
+
+        DocumentEmbedding.objects.create(
+            document_type='FAQ', title='b', content='b', embedding=self._embedding(0.0, 1.0)
+        )
+        self.assertEqual(len(get_document_index()), 2)
+
+        doc.is_active = False
+        doc.save()
+        self.assertEqual(len(get_document_index()), 1)
+
+    def test_embedding_service_fallback_returns_result_dicts(self):
+        DocumentEmbedding.objects.create(
+            document_type='FAQ', title='próximo', content='c1', metadata={'k': 1},
+            embedding=self._embedding(1.0, 0.1),
+        )
+        DocumentEmbedding.objects.create(
+            document_type='FAQ', title='distante', content='c2', embedding=self._embedding(0.0, 1.0),
+        )
+        DocumentEmbedding.objects.create(
+            document_type='SCHEMA', title='outro tipo', content='c3', embedding=self._embedding(1.0),
+        )
+        service = EmbeddingService.__new__(EmbeddingService)
+
+        results = service._search_fallback(self._embedding(1.0), document_type='FAQ', limit=5, threshold=0.5)
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['title'], 'próximo')
+        self.assertEqual(results[0]['metadata'], {'k': 1})
+        self.assertEqual(
+            set(results[0]), {'id', 'document_type', 'title', 'content', 'metadata', 'similarity'}
+        )
+
+    def test_few_shot_search_respects_min_success_count(self):
+        common = {'canonical_sql': 'SELECT 1', 'intent': 'count'}
+        FewShotExample.objects.create(
+            user_question='q1', success_count=1, embedding=self._embedding(1.0), **common
+        )
+        good = FewShotExample.objects.create(
+            user_question='q2', success_count=5, embedding=self._embedding(0.9, 0.1), **common
+        )
+        manager = FewShotManager.__new__(FewShotManager)
+
+        results = manager._search_python_cosine(self._embedding(1.0), top_k=3, min_success_count=2)
+        similar = manager._find_similar_python(self._embedding(1.0), threshold=0.99)
+
+        self.assertEqual([r['id'] for r in results], [good.id])
+        self.assertEqual(similar.user_question, 'q1')
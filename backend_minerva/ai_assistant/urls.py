@@ -14,16 +14,19 @@ urlpatterns = [
 
 
     path('chat/', views.AliceChatView.as_view(), name='alice-chat'),
+    path('chat/stream/', views.AliceChatStreamView.as_view(), name='alice-chat-stream'),
 
 
     path('stats/', views.alice_stats, name='alice-stats'),
     path('quick/', views.quick_question, name='alice-quick'),
     path('feedback/', views.submit_feedback, name='alice-feedback'),
-    path('agent/', views.alice_agent_chat, name='alice-agent'),
+    path('agent/', views.AliceAgentChatView.as_view(), name='alice-agent'),
+    path('agent/stream/', views.AliceAgentChatStreamView.as_view(), name='alice-agent-stream'),
 
 
     path('sessions/<int:pk>/messages/', views.ConversationSessionViewSet.as_view({'get': 'retrieve'}), name='session-messages'),
     path('sessions/<int:pk>/send/', views.ConversationSessionViewSet.as_view({'post': 'send_message'}), name='session-send'),
+    path('sessions/<int:pk>/send/stream/', views.ConversationSessionViewSet.as_view({'post': 'send_message_stream'}, **views.ConversationSessionViewSet.send_message_stream.kwargs), name='session-send-stream'),
     path('sessions/<int:pk>/clear/', views.ConversationSessionViewSet.as_view({'post': 'clear_session'}), name='session-clear'),
 
 
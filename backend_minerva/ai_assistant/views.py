@@ -1,13 +1,18 @@
 import uuid
 import logging
+from asgiref.sync import sync_to_async
 from drf_spectacular.utils import extend_schema
 from django.conf import settings
 from django.db.models import Count, Avg, Q
 from django.utils import timezone
 from rest_framework import status, viewsets, permissions
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from core.async_views import AsyncAPIView
+from core.counting import track_counts
+from core.pagination import CustomPageNumberPagination
 from .models import (
     ConversationSession,
     ConversationMessage,
@@ -29,9 +34,12 @@ from .serializers import (
     QuickQuestionSerializer
 )
 from .services.sql_interpreter import SQLInterpreterService, FRIENDLY_MESSAGES
+from .services.chat_stream import EventStreamRenderer, asse_response, sse_response
 
 logger = logging.getLogger(__name__)
 
+track_counts(QueryLog)
+
 
 def get_error_details(exception):
     """
@@ -43,6 +51,93 @@ def get_error_details(exception):
     return "Entre em contato com o suporte para mais informações"
 
 
+def _resolve_chat_session(request, data):
+    """Sessão do chat: nova (create_new_session / sem session_id) ou ativa do usuário; None se não existir."""
+    message = data['message']
+    session_id = data.get('session_id')
+    if data.get('create_new_session', False) or not session_id:
+        return ConversationSession.objects.create(
+            user=request.user,
+            session_id=str(uuid.uuid4()),
+            title=message[:50] + '...' if len(message) > 50 else message
+        )
+    try:
+        return ConversationSession.objects.get(session_id=session_id, user=request.user, is_active=True)
+    except ConversationSession.DoesNotExist:
+        return None
+
+
+def _save_interpreter_reply(session, user_message, result):
+    """
+    Persiste a resposta do SQLInterpreter (result=None quando o pipeline falhou)
+    e retorna o payload no formato do chat síncrono. Usado pelos endpoints SSE.
+    """
+    if result is not None and result.get('success'):
+        assistant_message = ConversationMessage.objects.create(
+            session=session,
+            message_type='ASSISTANT',
+            content=result['humanized_response'],
+            metadata={
+                'sql_query': result.get('sql_query', ''),
+                'result_count': result.get('result_count', 0),
+                'execution_time_ms': result.get('execution_time_ms', 0),
+                'cache_hit': result.get('cache_hit', False),
+            }
+        )
+        payload = {
+            'success': True,
+            'session_id': session.session_id,
+            'response': result['humanized_response'],
+            'sql_query': result.get('sql_query', ''),
+            'data': result.get('data', []),
+            'execution_time_ms': result.get('execution_time_ms', 0),
+            'result_count': result.get('result_count', 0),
+            'needs_clarification': result.get('needs_clarification', False),
+            'metadata': {
+                'user_message_id': user_message.id,
+                'assistant_message_id': assistant_message.id,
+                'query_log_id': result.get('query_log_id')
+            }
+        }
+    else:
+        friendly_response = (result or {}).get('humanized_response', FRIENDLY_MESSAGES['internal_error'])
+        assistant_message = ConversationMessage.objects.create(
+            session=session,
+            message_type='ASSISTANT',
+            content=friendly_response,
+            metadata={
+                'error_details': (result or {}).get('details', ''),
+                'was_error': True
+            }
+        )
+        payload = {
+            'success': True,
+            'session_id': session.session_id,
+            'response': friendly_response,
+            'metadata': {
+                'user_message_id': user_message.id,
+                'assistant_message_id': assistant_message.id
+            }
+        }
+
+    session.updated_at = timezone.now()
+    session.save(update_fields=['updated_at'])
+    return payload
+
+
+def _stream_interpreter_reply(session, message):
+    """Resposta SSE do SQLInterpreter para uma mensagem já validada da sessão."""
+    user_message = ConversationMessage.objects.create(
+        session=session,
+        message_type='USER',
+        content=message
+    )
+    return sse_response(
+        run=lambda on_event: SQLInterpreterService().interpret_and_execute(message, session, on_event=on_event),
+        finish=lambda result: _save_interpreter_reply(session, user_message, result),
+    )
+
+
 @extend_schema(tags=['IA'])
 class ConversationSessionViewSet(viewsets.ModelViewSet):
     """
@@ -164,6 +259,22 @@ class ConversationSessionViewSet(viewsets.ModelViewSet):
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(
+        detail=True, methods=['post'], url_path='send/stream',
+        renderer_classes=[JSONRenderer, EventStreamRenderer],
+    )
+    def send_message_stream(self, request, pk=None):
+        """
+        Variante SSE de send_message: eventos de etapa, resposta token a token
+        e, ao final, o mesmo payload de send_message no evento 'done'
+        """
+        session = self.get_object()
+        serializer = ChatRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        return _stream_interpreter_reply(session, serializer.validated_data['message'])
+
     @action(detail=True, methods=['post'])
     def clear_session(self, request, pk=None):
         """
@@ -199,28 +310,14 @@ class AliceChatView(APIView):
 
         data = serializer.validated_data
         message = data['message']
-        session_id = data.get('session_id')
-        create_new_session = data.get('create_new_session', False)
 
         try:
-            if create_new_session or not session_id:
-                session = ConversationSession.objects.create(
-                    user=request.user,
-                    session_id=str(uuid.uuid4()),
-                    title=message[:50] + '...' if len(message) > 50 else message
-                )
-            else:
-                try:
-                    session = ConversationSession.objects.get(
-                        session_id=session_id,
-                        user=request.user,
-                        is_active=True
-                    )
-                except ConversationSession.DoesNotExist:
-                    return Response({
-                        'success': False,
-                        'error': 'Sessão não encontrada ou inativa'
-                    }, status=status.HTTP_404_NOT_FOUND)
+            session = _resolve_chat_session(request, data)
+            if session is None:
+                return Response({
+                    'success': False,
+                    'error': 'Sessão não encontrada ou inativa'
+                }, status=status.HTTP_404_NOT_FOUND)
 
             user_message = ConversationMessage.objects.create(
                 session=session,
@@ -295,6 +392,31 @@ class AliceChatView(APIView):
             }, status=status.HTTP_200_OK)
 
 
+@extend_schema(tags=['IA'])
+class AliceChatStreamView(APIView):
+    """
+    Variante SSE do chat com Alice (text/event-stream).
+    O evento 'done' traz o mesmo payload de AliceChatView.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
+
+    def post(self, request):
+        serializer = ChatRequestSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        session = _resolve_chat_session(request, serializer.validated_data)
+        if session is None:
+            return Response({
+                'success': False,
+                'error': 'Sessão não encontrada ou inativa'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        return _stream_interpreter_reply(session, serializer.validated_data['message'])
+
+
 @extend_schema(tags=['IA'])
 class QueryLogViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -302,6 +424,7 @@ class QueryLogViewSet(viewsets.ReadOnlyModelViewSet):
     """
     serializer_class = QueryLogSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CustomPageNumberPagination
 
     def get_queryset(self):
         return QueryLog.objects.filter(
@@ -412,45 +535,90 @@ def quick_question(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+_AGENT_ERROR_RESPONSE = {
+    'success': True,
+    'response': "Desculpe, não consegui processar sua pergunta agora. Pode tentar novamente? 😊",
+    'confidence': 0.0,
+    'source': '',
+}
+
+
+def _agent_payload(result):
+    if result is None:
+        return dict(_AGENT_ERROR_RESPONSE)
+    return {
+        'success': result['success'],
+        'response': result['response'],
+        'confidence': result.get('confidence', 0.0),
+        'source': result.get('source', ''),
+        'agent_type': result.get('agent_type', ''),
+        'tools_used': result.get('tools_used', []),
+    }
+
+
+def _read_agent_request(request):
+    """(message, session_id) do corpo, ou (None, None) quando falta a mensagem."""
+    message = str(request.data.get('message') or '').strip()
+    session_id = str(request.data.get('session_id') or '').strip() or None
+    return (message, session_id) if message else (None, None)
+
+
+_MISSING_MESSAGE = {'error': 'message é obrigatório'}
+
+
 @extend_schema(tags=['IA'])
-@api_view(['POST'])
-@permission_classes([permissions.IsAuthenticated])
-def alice_agent_chat(request):
+class AliceAgentChatView(AsyncAPIView):
     """
     Endpoint do agente Alice (LangGraph multi-agente Enterprise).
     Usa DeepSeek como LLM principal com fallback para Gemini.
 
+    View async: sob ASGI o grafo roda com graph.ainvoke e as chamadas ao LLM
+    não prendem um worker enquanto aguardam resposta.
+
     Body:
         message: str       (pergunta do usuário)
         session_id: str    (opcional — vincula ao histórico da sessão)
     """
-    message = request.data.get('message', '').strip()
-    session_id = request.data.get('session_id', '').strip() or None
+    permission_classes = [permissions.IsAuthenticated]
 
-    if not message:
-        return Response({'error': 'message é obrigatório'}, status=status.HTTP_400_BAD_REQUEST)
+    async def post(self, request):
+        message, session_id = _read_agent_request(request)
+        if message is None:
+            return Response(_MISSING_MESSAGE, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            from .services.alice_graph import AliceGraphService
+            agent = await sync_to_async(AliceGraphService)()
+            result = await agent.arun(message, session_id=session_id, user=request.user)
+            return Response(_agent_payload(result))
+        except Exception as exc:
+            logger.error("Erro no alice_agent_chat (LangGraph): %s", exc)
+            return Response(_AGENT_ERROR_RESPONSE)
+
+
+@extend_schema(tags=['IA'])
+class AliceAgentChatStreamView(AsyncAPIView):
+    """
+    Variante SSE do agente Alice (LangGraph): evento 'stage' após a classificação
+    e etapas do agente, 'token' com a resposta sendo gerada e 'done' com o mesmo
+    payload de AliceAgentChatView.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
+
+    async def post(self, request):
+        message, session_id = _read_agent_request(request)
+        if message is None:
+            return Response(_MISSING_MESSAGE, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
         from .services.alice_graph import AliceGraphService
-        agent = AliceGraphService()
-        result = agent.run(message, session_id=session_id, user=request.user)
+        agent = await sync_to_async(AliceGraphService)()
+        user = request.user
 
-        return Response({
-            'success': result['success'],
-            'response': result['response'],
-            'confidence': result.get('confidence', 0.0),
-            'source': result.get('source', ''),
-            'agent_type': result.get('agent_type', ''),
-            'tools_used': result.get('tools_used', []),
-        })
-    except Exception as exc:
-        logger.error("Erro no alice_agent_chat (LangGraph): %s", exc)
-        return Response({
-            'success': True,
-            'response': "Desculpe, não consegui processar sua pergunta agora. Pode tentar novamente? 😊",
-            'confidence': 0.0,
-            'source': '',
-        })
+        return asse_response(
+            run=lambda on_event: agent.arun(message, session_id=session_id, user=user, on_event=on_event),
+            finish=_agent_payload,
+        )
 
 
 @extend_schema(tags=['IA'])
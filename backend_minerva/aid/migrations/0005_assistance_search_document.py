@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:14
+
+from django.db import migrations, models
+
+from core.search import backfill_operation, trigram_index_operation
+
+# Caminhos registrados em models.py na data desta migração
+SEARCH_PATHS = ('employee__full_name', 'employee__cpf', 'budget_line__summary_description', 'type', 'notes')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aid', '0004_assistance_aid_assista_status_6bc8c3_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assistance',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Documento de busca'),
+        ),
+        backfill_operation('aid', 'assistance', SEARCH_PATHS),
+        trigram_index_operation('aid_assistance'),
+    ]
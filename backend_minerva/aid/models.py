@@ -1,4 +1,5 @@
 from django.db import models, transaction
+from core.search import register as register_search
 from accounts.models import User
 from budgetline.models import BudgetLine
 from budget.models import Budget
@@ -39,6 +40,7 @@ class Assistance(models.Model):
     updated_at = models.DateTimeField(auto_now=True,verbose_name='Atualizado em')
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='created_assistances', verbose_name='Criado por')
     updated_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='updated_assistances', verbose_name='Atualizado por')
+    search_document = models.TextField(default='', blank=True, editable=False, verbose_name='Documento de busca')
 
     @transaction.atomic
     def save(self, *args, **kwargs):
@@ -47,6 +49,8 @@ class Assistance(models.Model):
         - Deve subtrair o valor do orçamento
         - Validar se o orçamento tem saldo suficiente
         """
+        from budget.services.balances import lock_budget
+
         is_new = self.pk is None
         old_total_amount = Decimal('0.00')
 
@@ -66,7 +70,7 @@ class Assistance(models.Model):
                     raise AidOperationException("O auxílio deve estar vinculado a um orçamento.")
 
 
-            budget = Budget.objects.select_for_update().get(pk=self.budget.pk)
+            budget = lock_budget(self.budget.pk)
 
             if budget.available_amount < self.total_amount:
                 raise InsufficientAidBudgetException(
@@ -77,7 +81,7 @@ class Assistance(models.Model):
 
         if not is_new and old_total_amount != self.total_amount:
             difference = self.total_amount - old_total_amount
-            budget = Budget.objects.select_for_update().get(pk=self.budget.pk)
+            budget = lock_budget(self.budget.pk)
 
             if difference > 0:
                 if budget.available_amount < difference:
@@ -88,25 +92,17 @@ class Assistance(models.Model):
                         f"excede o saldo disponível do orçamento (R$ {budget.available_amount:.2f})."
                     )
 
+        # Orçamento atualizado pelos signals (aid/signals.py)
         super().save(*args, **kwargs)
 
-
-        if self.budget:
-            self.budget.update_calculated_amounts()
-
     @transaction.atomic
     def delete(self, *args, **kwargs):
         """
         Ao deletar um auxílio:
         - O valor deve retornar ao orçamento
         """
-        budget = self.budget
         super().delete(*args, **kwargs)
 
-
-        if budget:
-            budget.update_calculated_amounts()
-
     def __str__(self):
         if self.budget_line:
             return self.employee.name + ' - ' + str(self.budget_line)
@@ -121,4 +117,8 @@ class Assistance(models.Model):
             models.Index(fields=['employee']),
             models.Index(fields=['budget_line']),
             models.Index(fields=['status', 'employee']),
-        ]
\ No newline at end of file
+        ]
+
+
+# Texto pesquisável das listagens (core.search)
+register_search(Assistance, ('employee__full_name', 'employee__cpf', 'budget_line__summary_description', 'type', 'notes'))
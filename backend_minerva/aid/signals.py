@@ -1,11 +1,25 @@
 """
 Signals para atualização automática de valores relacionados
+
+O orçamento afetado é atualizado por budget/services/balances.py.
 """
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
+from budget.services.balances import record_deleted, record_saved, remember_previous
 from .models import Assistance
 
 
+@receiver(pre_save, sender=Assistance)
+def remember_assistance_contribution(sender, instance, **kwargs):
+    """
+    Antes de salvar, guardar valor/status/orçamento atuais para calcular a diferença
+    """
+    if hasattr(instance, '_skip_signal'):
+        return
+
+    remember_previous(instance)
+
+
 @receiver(post_save, sender=Assistance)
 def update_budget_on_assistance_save(sender, instance, created, **kwargs):
     """
@@ -14,8 +28,7 @@ def update_budget_on_assistance_save(sender, instance, created, **kwargs):
     if hasattr(instance, '_skip_signal'):
         return
 
-    if instance.budget:
-        instance.budget.update_calculated_amounts()
+    record_saved(instance)
 
 
 @receiver(post_delete, sender=Assistance)
@@ -23,5 +36,4 @@ def update_budget_on_assistance_delete(sender, instance, **kwargs):
     """
     Após deletar um auxílio, devolver o valor ao orçamento
     """
-    if instance.budget:
-        instance.budget.update_calculated_amounts()
+    record_deleted(instance)
@@ -3,14 +3,16 @@ from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from accounts.permissions import IsCoordinatorOrAbove
-from django.db.models import Q
 
+from core.counting import track_counts
 from core.pagination import CustomPageNumberPagination
 from .models import Assistance
 from .serializers import AidSerializer
 from .utils.exceptions import AidNotFound
 from .utils.messages import AID_MESSAGES
 
+track_counts(Assistance)
+
 
 
 @extend_schema(tags=['Auxílios'])
@@ -21,41 +23,20 @@ class AidListAPIView(generics.ListAPIView):
     pagination_class = CustomPageNumberPagination
 
     def get_queryset(self):
-        import logging
-        logger = logging.getLogger(__name__)
-
         queryset = Assistance.objects.select_related(
             'employee', 'budget_line', 'created_by', 'updated_by'
         ).all()
 
-        logger.info(f"[AID] Total antes do filtro: {queryset.count()}")
-
-
-
         status_filter = self.request.query_params.get('status', None)
-        logger.info(f"[AID] Status filter recebido: '{status_filter}'")
-
         if status_filter and status_filter.upper() != 'ALL' and status_filter.strip() != '':
             queryset = queryset.filter(status=status_filter)
-            logger.info(f"[AID] Após filtro status={status_filter}: {queryset.count()} registros")
-
-
-        search = self.request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(
-                Q(employee__full_name__icontains=search) |
-                Q(employee__cpf__icontains=search) |
-                Q(budget_line__name__icontains=search) |
-                Q(type__icontains=search) |
-                Q(notes__icontains=search)
-            )
 
+        # ?search= fica com o DocumentSearchFilter (core.search)
 
         ordering = self.request.query_params.get('ordering', None)
         if ordering:
             queryset = queryset.order_by(ordering)
 
-        logger.info(f"[AID] Total final retornado: {queryset.count()}")
         return queryset
 
 
@@ -5,3 +5,6 @@ class BudgetConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'budget'
     verbose_name = 'Orçamentos'
+
+    def ready(self):
+        import budget.signals
@@ -1,13 +1,42 @@
 """
-Comando para recalcular valores em cache de todos os orçamentos.
+Comando para recalcular valores em cache de todos os orçamentos e linhas orçamentárias.
 Útil após migração ou para corrigir inconsistências.
+
+O recálculo é set-based: cada lote (ano + centro gestor) custa dois UPDATEs
+agregados, independentemente do número de orçamentos, linhas e contratos.
+Uso: python manage.py recalculate_budget_cache [--year 2026] [--workers 4] [--dry-run]
 """
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
 from django.core.management.base import BaseCommand
+from django.db import connections
+
 from budget.models import Budget
+from budget.services.balances import RebuildResult, rebuild_balances
+
+# Divergências listadas no --dry-run; o restante só entra na contagem
+MAX_DIFF_LINES = 200
+
+
+def _init_worker():
+    # Processos "spawn" começam sem o Django configurado; "fork" herda, mas
+    # as conexões do processo pai não podem ser reaproveitadas
+    django.setup()
+    connections.close_all()
+
+
+def _rebuild_chunk(budget_ids, dry_run):
+    try:
+        return rebuild_balances(budget_ids, dry_run=dry_run)
+    finally:
+        connections.close_all()
 
 
 class Command(BaseCommand):
-    help = 'Recalcula valores em cache de todos os orçamentos'
+    help = 'Recalcula valores em cache de todos os orçamentos e linhas orçamentárias'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -15,40 +44,89 @@ class Command(BaseCommand):
             type=int,
             help='ID específico do orçamento para recalcular (opcional)',
         )
+        parser.add_argument(
+            '--year',
+            type=int,
+            help='Recalcular apenas os orçamentos deste ano (opcional)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Processos em paralelo (um lote ano/centro gestor por vez em cada processo)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas listar as divergências, sem gravar',
+        )
 
     def handle(self, *args, **options):
         budget_id = options.get('budget_id')
+        dry_run = options['dry_run']
 
+        budgets = Budget.objects.all()
         if budget_id:
-            try:
-                budget = Budget.objects.get(pk=budget_id)
-                budgets = [budget]
-                self.stdout.write(f'Recalculando orçamento ID {budget_id}...')
-            except Budget.DoesNotExist:
-                self.stdout.write(
-                    self.style.ERROR(f'Orçamento com ID {budget_id} não encontrado')
-                )
-                return
-        else:
-            budgets = Budget.objects.all()
-            total = budgets.count()
-            self.stdout.write(f'Recalculando {total} orçamentos...')
-
-        updated = 0
-        for budget in budgets:
-            budget.recalculate_cached_amounts()
-            budget.save(update_fields=[
-                'cached_used_amount',
-                'cached_incoming_movements',
-                'cached_outgoing_movements',
-                'available_amount',
-                'updated_at'
-            ])
-            updated += 1
-
-            if updated % 100 == 0:
-                self.stdout.write(f'  Processados: {updated}...')
-
-        self.stdout.write(
-            self.style.SUCCESS(f'[OK] {updated} orcamentos recalculados com sucesso!')
-        )
+            budgets = budgets.filter(pk=budget_id)
+        if options.get('year'):
+            budgets = budgets.filter(year=options['year'])
+
+        chunks = defaultdict(list)
+        for pk, year, center_id in budgets.order_by().values_list('pk', 'year', 'management_center_id'):
+            chunks[(year, center_id)].append(pk)
+
+        if not chunks:
+            if budget_id:
+                self.stdout.write(self.style.ERROR(f'Orçamento com ID {budget_id} não encontrado'))
+            else:
+                self.stdout.write('Nenhum orçamento para recalcular.')
+            return
+
+        total = sum(len(ids) for ids in chunks.values())
+        action = 'Verificando' if dry_run else 'Recalculando'
+        self.stdout.write(f'{action} {total} orçamentos em {len(chunks)} lotes (ano/centro gestor)...')
+
+        started = time.monotonic()
+        result = RebuildResult()
+        for done, chunk in enumerate(self._run(list(chunks.values()), dry_run, options['workers']), start=1):
+            result.budgets += chunk.budgets
+            result.budget_lines += chunk.budget_lines
+            result.drift.extend(chunk.drift)
+            if done % 50 == 0:
+                self.stdout.write(f'  Lotes processados: {done}/{len(chunks)}...')
+        elapsed = time.monotonic() - started
+
+        if dry_run:
+            self._write_diff(result)
+            self.stdout.write(self.style.SUCCESS(
+                f'[DRY-RUN] {result.budgets} orcamentos e {result.budget_lines} linhas divergentes '
+                f'({elapsed:.1f}s); nada foi gravado'
+            ))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f'[OK] {result.budgets} orcamentos e {result.budget_lines} linhas recalculados em {elapsed:.1f}s'
+        ))
+
+    def _run(self, chunks, dry_run, workers):
+        if workers <= 1 or len(chunks) == 1:
+            for budget_ids in chunks:
+                yield rebuild_balances(budget_ids, dry_run=dry_run)
+            return
+
+        # Conexões abertas não podem ser herdadas pelos processos filhos
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(_rebuild_chunk, budget_ids, dry_run) for budget_ids in chunks]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def _write_diff(self, result):
+        drift = sorted(result.drift, key=lambda d: (d.model, d.pk, d.field))
+        for item in drift[:MAX_DIFF_LINES]:
+            self.stdout.write(
+                f'  {item.model} #{item.pk} {item.field}: {item.stored} -> {item.expected} '
+                f'({item.expected - item.stored:+})'
+            )
+        if len(drift) > MAX_DIFF_LINES:
+            self.stdout.write(f'  ... e mais {len(drift) - MAX_DIFF_LINES} divergências')
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:14
+
+from django.db import migrations, models
+
+from core.search import backfill_operation, trigram_index_operation
+
+# Caminhos registrados em models.py na data desta migração
+SEARCH_PATHS = ('category', 'year', 'management_center__name')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0002_add_cached_amount_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='budget',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Documento de busca'),
+        ),
+        backfill_operation('budget', 'budget', SEARCH_PATHS),
+        trigram_index_operation('budget_budget'),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:29
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0003_budget_search_document'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='budget',
+            name='available_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10, verbose_name='Valor Disponível'),
+        ),
+    ]
@@ -1,11 +1,11 @@
 from django.db import models
+from core.search import register as register_search
 from django.core.validators import MinValueValidator
 from accounts.models import User
 from .utils.validators import validate_year
 from center.models import ManagementCenter
 from accounts.mixins import HierarchicalQuerysetMixin
 from decimal import Decimal
-from django.db.models import Sum
 
 
 class Budget(models.Model, HierarchicalQuerysetMixin):
@@ -30,7 +30,6 @@ class Budget(models.Model, HierarchicalQuerysetMixin):
     available_amount = models.DecimalField(
         max_digits=10,
         decimal_places=2,
-        validators=[MinValueValidator(Decimal('0.00'))],
         default=Decimal('0.00'),
         verbose_name='Valor Disponível'
     )
@@ -61,6 +60,7 @@ class Budget(models.Model, HierarchicalQuerysetMixin):
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
     created_by = models.ForeignKey(User, related_name='budgets_created', on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Criado por')
     updated_by = models.ForeignKey(User, related_name='budgets_updated', on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Atualizado por')
+    search_document = models.TextField(default='', blank=True, editable=False, verbose_name='Documento de busca')
 
     @property
     def used_amount(self):
@@ -85,52 +85,21 @@ class Budget(models.Model, HierarchicalQuerysetMixin):
         return max(available, Decimal('0.00'))
 
     def recalculate_cached_amounts(self):
-        """Recalcula e atualiza todos os campos em cache"""
+        """Recalcula os campos em cache (uma única consulta agregada)"""
+        from .services.balances import BUDGET_BALANCE_FIELDS, budget_balance_expressions
 
-        self.cached_used_amount = self.budget_lines.aggregate(
-            total=Sum('budgeted_amount')
-        )['total'] or Decimal('0.00')
-
-
-        self.cached_incoming_movements = self.incoming_movements.aggregate(
-            total=Sum('amount')
-        )['total'] or Decimal('0.00')
-
-
-        self.cached_outgoing_movements = self.outgoing_movements.aggregate(
-            total=Sum('amount')
-        )['total'] or Decimal('0.00')
-
-
-        cached_assistances = self.assistances.filter(
-            status__in=['AGUARDANDO', 'ATIVO']
-        ).aggregate(
-            total=Sum('total_amount')
-        )['total'] or Decimal('0.00')
-
-
-        base_amount = Decimal(str(self.total_amount))
-        self.available_amount = (
-            base_amount +
-            self.cached_incoming_movements -
-            self.cached_outgoing_movements -
-            self.cached_used_amount -
-            cached_assistances
-        )
-
-
-        self.available_amount = max(self.available_amount, Decimal('0.00'))
+        values = Budget.objects.filter(pk=self.pk).annotate(
+            **{f'new_{name}': expression for name, expression in budget_balance_expressions().items()}
+        ).values(*(f'new_{name}' for name in BUDGET_BALANCE_FIELDS)).get()
+        for name in BUDGET_BALANCE_FIELDS:
+            setattr(self, name, values[f'new_{name}'])
 
     def update_calculated_amounts(self):
-        """Atualiza valores calculados e salva"""
-        self.recalculate_cached_amounts()
-        self.save(update_fields=[
-            'cached_used_amount',
-            'cached_incoming_movements',
-            'cached_outgoing_movements',
-            'available_amount',
-            'updated_at'
-        ])
+        """Atualiza valores calculados no banco e na instância"""
+        from .services.balances import BUDGET_BALANCE_FIELDS, recalculate_budgets
+
+        recalculate_budgets([self.pk])
+        self.refresh_from_db(fields=BUDGET_BALANCE_FIELDS + ['updated_at'])
 
     def save(self, *args, **kwargs):
         if 'update_fields' not in kwargs or 'available_amount' not in kwargs.get('update_fields', []):
@@ -189,18 +158,6 @@ class BudgetMovement(models.Model):
     created_by = models.ForeignKey(User, related_name='budget_movements_created', on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Criado por')
     updated_by = models.ForeignKey(User, related_name='budget_movements_updated', on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Atualizado por')
 
-    def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        self.source.update_calculated_amounts()
-        self.destination.update_calculated_amounts()
-
-    def delete(self, *args, **kwargs):
-        source_budget = self.source
-        destination_budget = self.destination
-        super().delete(*args, **kwargs)
-        source_budget.update_calculated_amounts()
-        destination_budget.update_calculated_amounts()
-
     def __str__(self):
         return f"{self.source} -> {self.destination} ({self.amount})"
 
@@ -208,3 +165,7 @@ class BudgetMovement(models.Model):
         verbose_name = 'Movimentação'
         verbose_name_plural = 'Movimentações'
         ordering = ['-movement_date']
+
+
+# Texto pesquisável das listagens (core.search)
+register_search(Budget, ('category', 'year', 'management_center__name'))
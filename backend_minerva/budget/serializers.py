@@ -1,5 +1,6 @@
 from decimal import Decimal
 from .models import Budget, BudgetMovement
+from .services.balances import displayed_balance
 from rest_framework import serializers
 from center.models import ManagementCenter
 from center.serializers import ManagementCenterSerializer, UserInfoSerializer
@@ -16,6 +17,8 @@ class BudgetSerializer(serializers.ModelSerializer):
     updated_by = UserInfoSerializer(read_only=True)
 
 
+    # Gravado com sinal (ver budget.services.balances); exibido com piso em zero
+    available_amount = serializers.SerializerMethodField()
     used_amount = serializers.ReadOnlyField()
     calculated_available_amount = serializers.ReadOnlyField()
     valor_remanejado_entrada = serializers.ReadOnlyField()
@@ -32,6 +35,9 @@ class BudgetSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_at', 'updated_at', 'available_amount', 'used_amount', 'calculated_available_amount', 'valor_remanejado_entrada', 'valor_remanejado_saida']
 
+    def get_available_amount(self, obj):
+        return str(displayed_balance(obj.available_amount))
+
 
 class BudgetDetailSerializer(BudgetSerializer):
     """
@@ -89,7 +95,7 @@ class BudgetDetailSerializer(BudgetSerializer):
         return {
             'total_lines': lines_qs.count(),
             'total_budgeted_amount': float(total_budgeted),
-            'remaining_amount': float(obj.available_amount),
+            'remaining_amount': float(displayed_balance(obj.available_amount)),
             'utilization_percentage': round((float(total_budgeted) / float(obj.total_amount)) * 100, 2) if obj.total_amount > 0 else 0,
             'process_status_distribution': {
                 item['process_status'] or 'N/A': item['count'] for item in process_status
@@ -0,0 +1,475 @@
+"""
+Saldos da cascata Orçamento → Linha Orçamentária → Contrato/Auxílio.
+
+Cada registro contribui para o saldo de outra linha/orçamento (ver `_LEDGER`):
+
+    Contrato ativo        → linha:     available_amount -= original_value
+    BudgetLineMovement    → linhas:    origem -= valor, destino += valor
+    BudgetLine            → orçamento: cached_used_amount += orçado, available_amount -= orçado
+    Auxílio comprometido  → orçamento: available_amount -= total_amount
+    BudgetMovement        → orçamentos: saída/entrada (cached_*_movements e available_amount)
+
+Os signals chamam `remember_previous` (pre_save), `record_saved` (post_save) e
+`record_deleted` (post_delete). O que acontece depende de BUDGET_BALANCE_MODE:
+
+    recompute (padrão) — unit of work: os registros afetados são marcados como
+        "sujos" e um único UPDATE set-based por tabela recalcula tudo no commit.
+    delta — a diferença entre a contribuição nova e a anterior é aplicada na hora
+        com F() (UPDATE saldo = saldo + delta), atômica com a escrita; o custo não
+        cresce com o histórico do orçamento. `find_balance_drift` (tarefa
+        budget.check_balance_drift) compara com o recálculo completo.
+
+Os saldos são gravados com sinal nos dois modos: um contrato reativado acima do
+disponível deixa available_amount negativo, e um encerramento posterior devolve
+exatamente o que foi comprometido. Piso em zero só na exibição
+(`displayed_balance` / `displayed_balance_expression`) — gravar o piso perderia
+a parte excedente e o delta seguinte deixaria a linha com saldo que não existe.
+
+Leituras que validam saldo (antes de criar um contrato, por exemplo) usam
+`lock_budget` / `lock_budget_line`: travam o registro e, no modo recompute,
+recalculam antes de ler — o saldo consultado nunca depende de um recálculo pendente.
+
+Como UPDATE não dispara post_save, toda escrita de saldo (flush, deltas, reparo e
+rebuild) marca budget_budget/budgetline_budgetline no cache de respostas da Alice
+após o commit (`_notify_balances_written`).
+
+Uso:
+    budget_line = lock_budget_line(pk)   # saldo atualizado e travado
+"""
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from asgiref.local import Local
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal('0.00')
+
+# Status de auxílio que ainda comprometem o orçamento
+COMMITTED_ASSISTANCE_STATUSES = ('AGUARDANDO', 'ATIVO')
+# Status de contrato que comprometem a linha orçamentária
+COMMITTED_CONTRACT_STATUSES = ('ATIVO',)
+
+BUDGET_BALANCE_FIELDS = [
+    'cached_used_amount',
+    'cached_incoming_movements',
+    'cached_outgoing_movements',
+    'available_amount',
+]
+
+MODE_RECOMPUTE = 'recompute'
+MODE_DELTA = 'delta'
+
+# Pendências por contexto (mesmo escopo das conexões do Django: thread ou task async)
+_pending = Local()
+
+
+def _money() -> DecimalField:
+    return DecimalField(max_digits=10, decimal_places=2)
+
+
+def _sum_of(queryset, group_by: str, field: str):
+    """Subquery correlacionada SUM(field) agrupada pela FK `group_by`, 0 quando vazia."""
+    total = (
+        queryset.filter(**{group_by: OuterRef('pk')})
+        .order_by()
+        .values(group_by)
+        .annotate(total=Sum(field))
+        .values('total')[:1]
+    )
+    return Coalesce(Subquery(total, output_field=_money()), Value(ZERO), output_field=_money())
+
+
+def budget_balance_expressions() -> Dict[str, object]:
+    """Expressões dos caches do orçamento (para annotate ou UPDATE)."""
+    from aid.models import Assistance
+    from budget.models import BudgetMovement
+    from budgetline.models import BudgetLine
+
+    used = _sum_of(BudgetLine.objects.all(), 'budget', 'budgeted_amount')
+    incoming = _sum_of(BudgetMovement.objects.all(), 'destination', 'amount')
+    outgoing = _sum_of(BudgetMovement.objects.all(), 'source', 'amount')
+    assistances = _sum_of(
+        Assistance.objects.filter(status__in=COMMITTED_ASSISTANCE_STATUSES), 'budget', 'total_amount'
+    )
+    return {
+        'cached_used_amount': used,
+        'cached_incoming_movements': incoming,
+        'cached_outgoing_movements': outgoing,
+        'available_amount': ExpressionWrapper(
+            F('total_amount') + incoming - outgoing - used - assistances, output_field=_money(),
+        ),
+    }
+
+
+def budget_line_available_expression():
+    """available_amount = orçado + entradas - saídas - contratos ativos (com sinal)."""
+    from budgetline.models import BudgetLineMovement
+    from contract.models import Contract
+
+    incoming = _sum_of(BudgetLineMovement.objects.all(), 'destination_line', 'movement_amount')
+    outgoing = _sum_of(BudgetLineMovement.objects.all(), 'source_line', 'movement_amount')
+    contracted = _sum_of(
+        Contract.objects.filter(status__in=COMMITTED_CONTRACT_STATUSES), 'budget_line', 'original_value'
+    )
+    return ExpressionWrapper(F('budgeted_amount') + incoming - outgoing - contracted, output_field=_money())
+
+
+def displayed_balance(value: Any) -> Decimal:
+    """Saldo para exibição: o valor gravado fica negativo quando o comprometido passa do disponível."""
+    return max(_amount(value), ZERO)
+
+
+def displayed_balance_expression(field_name: str = 'available_amount'):
+    """`displayed_balance` em SQL, para agregações (SUM dos saldos exibidos)."""
+    return Greatest(F(field_name), Value(ZERO), output_field=_money())
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Recalculo set-based
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _notify_balances_written() -> None:
+    """UPDATE set-based não dispara post_save: avisa o cache de respostas da Alice no commit."""
+    def notify():
+        from ai_assistant.services.answer_cache import mark_tables_written
+        from budget.models import Budget
+        from budgetline.models import BudgetLine
+        mark_tables_written([Budget._meta.db_table, BudgetLine._meta.db_table])
+
+    transaction.on_commit(notify, robust=True)
+
+
+def recalculate_budgets(budget_ids: Iterable[int]) -> int:
+    """Um UPDATE para todos os orçamentos informados. Retorna o número de linhas atualizadas."""
+    from budget.models import Budget
+
+    ids = [pk for pk in set(budget_ids) if pk is not None]
+    if not ids:
+        return 0
+    return Budget.objects.filter(pk__in=ids).update(
+        **budget_balance_expressions(), updated_at=timezone.now()
+    )
+
+
+def recalculate_budget_lines(budget_line_ids: Iterable[int]) -> int:
+    """Um UPDATE para todas as linhas orçamentárias informadas."""
+    from budgetline.models import BudgetLine
+
+    ids = [pk for pk in set(budget_line_ids) if pk is not None]
+    if not ids:
+        return 0
+    return BudgetLine.objects.filter(pk__in=ids).update(
+        available_amount=budget_line_available_expression(), updated_at=timezone.now()
+    )
+
+
+def balance_mode() -> str:
+    return getattr(settings, 'BUDGET_BALANCE_MODE', MODE_RECOMPUTE)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Contribuições de cada registro
+# ─────────────────────────────────────────────────────────────────────────────
+
+BUDGET = 'budget'
+BUDGET_LINE = 'budget_line'
+
+# (destino, pk do destino, {campo: valor com sinal})
+Entry = Tuple[str, Optional[int], Dict[str, Decimal]]
+
+
+def _amount(value: Any) -> Decimal:
+    return Decimal(str(value)) if value is not None else ZERO
+
+
+def _contract_entries(v: Dict[str, Any]) -> List[Entry]:
+    if v['status'] not in COMMITTED_CONTRACT_STATUSES:
+        return []
+    return [(BUDGET_LINE, v['budget_line_id'], {'available_amount': -_amount(v['original_value'])})]
+
+
+def _assistance_entries(v: Dict[str, Any]) -> List[Entry]:
+    if v['status'] not in COMMITTED_ASSISTANCE_STATUSES:
+        return []
+    return [(BUDGET, v['budget_id'], {'available_amount': -_amount(v['total_amount'])})]
+
+
+def _budget_line_entries(v: Dict[str, Any]) -> List[Entry]:
+    amount = _amount(v['budgeted_amount'])
+    return [(BUDGET, v['budget_id'], {'cached_used_amount': amount, 'available_amount': -amount})]
+
+
+def _budget_line_movement_entries(v: Dict[str, Any]) -> List[Entry]:
+    amount = _amount(v['movement_amount'])
+    return [
+        (BUDGET_LINE, v['source_line_id'], {'available_amount': -amount}),
+        (BUDGET_LINE, v['destination_line_id'], {'available_amount': amount}),
+    ]
+
+
+def _budget_movement_entries(v: Dict[str, Any]) -> List[Entry]:
+    amount = _amount(v['amount'])
+    return [
+        (BUDGET, v['source_id'], {'cached_outgoing_movements': amount, 'available_amount': -amount}),
+        (BUDGET, v['destination_id'], {'cached_incoming_movements': amount, 'available_amount': amount}),
+    ]
+
+
+# label do model → (campos que definem a contribuição, função de contribuição)
+_LEDGER: Dict[str, Tuple[Tuple[str, ...], Callable[[Dict[str, Any]], List[Entry]]]] = {
+    'contract.contract': (('budget_line_id', 'original_value', 'status'), _contract_entries),
+    'aid.assistance': (('budget_id', 'total_amount', 'status'), _assistance_entries),
+    'budgetline.budgetline': (('budget_id', 'budgeted_amount'), _budget_line_entries),
+    'budgetline.budgetlinemovement': (
+        ('source_line_id', 'destination_line_id', 'movement_amount'), _budget_line_movement_entries
+    ),
+    'budget.budgetmovement': (('source_id', 'destination_id', 'amount'), _budget_movement_entries),
+}
+
+
+def _entries(instance, values: Optional[Dict[str, Any]] = None) -> List[Entry]:
+    fields, contribute = _LEDGER[instance._meta.label_lower]
+    if values is None:
+        values = {name: getattr(instance, name) for name in fields}
+    return [entry for entry in contribute(values) if entry[1] is not None]
+
+
+def remember_previous(instance) -> None:
+    """pre_save: guarda a contribuição atual do registro (antes da alteração)."""
+    instance._balance_previous = []
+    if instance.pk is None:
+        return
+    fields, _ = _LEDGER[instance._meta.label_lower]
+    values = type(instance)._base_manager.filter(pk=instance.pk).values(*fields).first()
+    if values is not None:
+        instance._balance_previous = _entries(instance, values)
+
+
+def record_saved(instance) -> None:
+    """post_save: aplica a diferença entre a contribuição nova e a anterior."""
+    previous = getattr(instance, '_balance_previous', [])
+    instance._balance_previous = []
+    _apply(_entries(instance), previous)
+
+
+def record_deleted(instance) -> None:
+    """post_delete: devolve a contribuição do registro removido."""
+    _apply([], _entries(instance))
+
+
+def _apply(current: List[Entry], previous: List[Entry]) -> None:
+    if balance_mode() != MODE_DELTA:
+        for target, pk, _ in current + previous:
+            (mark_budgets_dirty if target == BUDGET else mark_budget_lines_dirty)(pk)
+        return
+
+    deltas: Dict[Tuple[str, int], Dict[str, Decimal]] = defaultdict(lambda: defaultdict(Decimal))
+    for sign, entries in ((1, current), (-1, previous)):
+        for target, pk, amounts in entries:
+            for name, amount in amounts.items():
+                deltas[(target, pk)][name] += sign * amount
+    apply_deltas(deltas)
+
+
+def apply_deltas(deltas: Dict[Tuple[str, int], Dict[str, Decimal]]) -> None:
+    """Um UPDATE ... SET campo = campo + delta por registro afetado (deltas nulos são ignorados)."""
+    from budget.models import Budget
+    from budgetline.models import BudgetLine
+
+    models_by_target = {BUDGET: Budget, BUDGET_LINE: BudgetLine}
+    now = timezone.now()
+    written = False
+    for (target, pk), amounts in deltas.items():
+        changes = {name: F(name) + amount for name, amount in amounts.items() if amount}
+        if changes:
+            models_by_target[target].objects.filter(pk=pk).update(**changes, updated_at=now)
+            written = True
+    if written:
+        _notify_balances_written()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Unit of work
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _dirty(kind: str) -> Set[int]:
+    dirty = getattr(_pending, kind, None)
+    if dirty is None:
+        dirty = set()
+        setattr(_pending, kind, dirty)
+    return dirty
+
+
+def _schedule() -> None:
+    # Registrado a cada marcação: se um savepoint for desfeito o callback dele some,
+    # e as execuções extras encontram as pendências vazias
+    transaction.on_commit(flush_pending_balances, robust=True)
+
+
+def mark_budgets_dirty(*budget_ids: Optional[int]) -> None:
+    ids = {pk for pk in budget_ids if pk is not None}
+    if ids:
+        _dirty('budgets').update(ids)
+        _schedule()
+
+
+def mark_budget_lines_dirty(*budget_line_ids: Optional[int]) -> None:
+    ids = {pk for pk in budget_line_ids if pk is not None}
+    if ids:
+        _dirty('budget_lines').update(ids)
+        _schedule()
+
+
+def flush_pending_balances() -> None:
+    """Recalcula tudo que foi marcado (chamado no commit; idempotente)."""
+    line_ids, budget_ids = _dirty('budget_lines'), _dirty('budgets')
+    if not line_ids and not budget_ids:
+        return
+    _pending.budget_lines, _pending.budgets = set(), set()
+
+    # Linhas e orçamentos são independentes: o orçamento usa só o valor orçado das linhas
+    lines = recalculate_budget_lines(line_ids)
+    budgets = recalculate_budgets(budget_ids)
+    if lines or budgets:
+        _notify_balances_written()
+    logger.debug(f"Saldos recalculados: {lines} linhas, {budgets} orçamentos")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Leituras para validação de saldo
+# ─────────────────────────────────────────────────────────────────────────────
+
+def lock_budget(budget_id: int):
+    """Orçamento com os caches atualizados e travado até o fim da transação."""
+    from budget.models import Budget
+
+    if balance_mode() != MODE_DELTA:
+        # O UPDATE já trava a linha; o select_for_update só lê sob o mesmo lock
+        recalculate_budgets([budget_id])
+        _dirty('budgets').discard(budget_id)
+    return Budget.objects.select_for_update().get(pk=budget_id)
+
+
+def lock_budget_line(budget_line_id: int):
+    """Linha orçamentária com available_amount atualizado e travada até o fim da transação."""
+    from budgetline.models import BudgetLine
+
+    if balance_mode() != MODE_DELTA:
+        recalculate_budget_lines([budget_line_id])
+        _dirty('budget_lines').discard(budget_line_id)
+    return BudgetLine.objects.select_for_update().get(pk=budget_line_id)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Verificação de divergência (modo delta)
+# ─────────────────────────────────────────────────────────────────────────────
+
+@dataclass
+class BalanceDrift:
+    model: str
+    pk: int
+    field: str
+    stored: Decimal
+    expected: Decimal
+
+    @property
+    def difference(self) -> Decimal:
+        return self.stored - self.expected
+
+
+def _cents(value: Any) -> Decimal:
+    return _amount(value).quantize(Decimal('0.01'))
+
+
+def find_balance_drift(budget_ids: Optional[Iterable[int]] = None) -> List[BalanceDrift]:
+    """
+    Compara os saldos gravados com o recálculo completo (duas consultas agregadas).
+    `budget_ids` restringe aos orçamentos informados e às suas linhas.
+    """
+    from budget.models import Budget
+    from budgetline.models import BudgetLine
+
+    budgets = Budget.objects.all()
+    lines = BudgetLine.objects.all()
+    if budget_ids is not None:
+        budget_ids = list(budget_ids)
+        budgets = budgets.filter(pk__in=budget_ids)
+        lines = lines.filter(budget_id__in=budget_ids)
+
+    drift: List[BalanceDrift] = []
+    expected_budgets = budgets.order_by().annotate(
+        **{f'expected_{name}': expression for name, expression in budget_balance_expressions().items()}
+    ).values('pk', *BUDGET_BALANCE_FIELDS, *(f'expected_{name}' for name in BUDGET_BALANCE_FIELDS))
+    for row in expected_budgets.iterator(chunk_size=2000):
+        for name in BUDGET_BALANCE_FIELDS:
+            stored, expected = _cents(row[name]), _cents(row[f'expected_{name}'])
+            if stored != expected:
+                drift.append(BalanceDrift('budget.Budget', row['pk'], name, stored, expected))
+
+    expected_lines = lines.order_by().annotate(
+        expected_available_amount=budget_line_available_expression()
+    ).values('pk', 'available_amount', 'expected_available_amount')
+    for row in expected_lines.iterator(chunk_size=2000):
+        stored, expected = _cents(row['available_amount']), _cents(row['expected_available_amount'])
+        if stored != expected:
+            drift.append(BalanceDrift('budgetline.BudgetLine', row['pk'], 'available_amount', stored, expected))
+
+    return drift
+
+
+def repair_balance_drift(drift: Iterable[BalanceDrift]) -> None:
+    drift = list(drift)
+    budgets = recalculate_budgets({d.pk for d in drift if d.model == 'budget.Budget'})
+    lines = recalculate_budget_lines({d.pk for d in drift if d.model == 'budgetline.BudgetLine'})
+    if lines or budgets:
+        _notify_balances_written()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Reconstrução completa (manage.py recalculate_budget_cache)
+# ─────────────────────────────────────────────────────────────────────────────
+
+@dataclass
+class RebuildResult:
+    budgets: int = 0
+    budget_lines: int = 0
+    drift: List[BalanceDrift] = field(default_factory=list)
+
+
+def rebuild_balances(budget_ids: List[int], dry_run: bool = False) -> RebuildResult:
+    """
+    Recalcula os orçamentos informados e todas as suas linhas: dois UPDATEs
+    set-based. Com `dry_run` nada é gravado; retorna as divergências encontradas.
+    """
+    from budget.models import Budget
+    from budgetline.models import BudgetLine
+
+    if dry_run:
+        drift = find_balance_drift(budget_ids)
+        return RebuildResult(
+            budgets=len({d.pk for d in drift if d.model == 'budget.Budget'}),
+            budget_lines=len({d.pk for d in drift if d.model == 'budgetline.BudgetLine'}),
+            drift=drift,
+        )
+
+    now = timezone.now()
+    with transaction.atomic():
+        # Linhas primeiro: independentes dos orçamentos, mas mantêm a ordem de locks do restante do código
+        lines = BudgetLine.objects.filter(budget_id__in=budget_ids).update(
+            available_amount=budget_line_available_expression(), updated_at=now
+        )
+        budgets = Budget.objects.filter(pk__in=budget_ids).update(
+            **budget_balance_expressions(), updated_at=now
+        )
+        if lines or budgets:
+            _notify_balances_written()
+    return RebuildResult(budgets=budgets, budget_lines=lines)
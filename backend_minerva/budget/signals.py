@@ -0,0 +1,39 @@
+"""
+Signals para atualização automática de valores relacionados
+
+Os orçamentos de origem e destino são atualizados por budget/services/balances.py.
+"""
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from .models import BudgetMovement
+from .services.balances import record_deleted, record_saved, remember_previous
+
+
+@receiver(pre_save, sender=BudgetMovement)
+def remember_movement_contribution(sender, instance, **kwargs):
+    """
+    Antes de salvar, guardar valor/orçamentos atuais para calcular a diferença
+    """
+    if hasattr(instance, '_skip_signal'):
+        return
+
+    remember_previous(instance)
+
+
+@receiver(post_save, sender=BudgetMovement)
+def update_budgets_on_movement_save(sender, instance, created, **kwargs):
+    """
+    Após salvar uma movimentação, atualizar os orçamentos de origem e destino
+    """
+    if hasattr(instance, '_skip_signal'):
+        return
+
+    record_saved(instance)
+
+
+@receiver(post_delete, sender=BudgetMovement)
+def update_budgets_on_movement_delete(sender, instance, **kwargs):
+    """
+    Após deletar uma movimentação, atualizar os orçamentos de origem e destino
+    """
+    record_deleted(instance)
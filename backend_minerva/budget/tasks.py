@@ -0,0 +1,43 @@
+import logging
+
+from celery import shared_task
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Divergências detalhadas no log; o restante só entra na contagem
+_MAX_LOGGED = 50
+
+
+@shared_task(name='budget.check_balance_drift')
+def check_balance_drift(repair=None):
+    """Compara os saldos gravados com o recálculo completo e reporta divergências.
+
+    No modo delta (BUDGET_BALANCE_MODE=delta) os saldos são mantidos por
+    incrementos; esta tarefa é a rede de segurança que detecta qualquer deriva
+    (escritas fora do ORM, `_skip_signal`). Com
+    `repair` (ou BUDGET_BALANCE_DRIFT_REPAIR) os registros divergentes são
+    recalculados. Deve rodar periodicamente (ex: diariamente).
+    """
+    from .services.balances import find_balance_drift, repair_balance_drift
+
+    if repair is None:
+        repair = getattr(settings, 'BUDGET_BALANCE_DRIFT_REPAIR', False)
+
+    drift = find_balance_drift()
+    for item in drift[:_MAX_LOGGED]:
+        logger.warning(
+            "Saldo divergente em %s #%s (%s): gravado %s, esperado %s (diferença %s).",
+            item.model, item.pk, item.field, item.stored, item.expected, item.difference,
+        )
+
+    if drift and repair:
+        repair_balance_drift(drift)
+
+    budgets = len({item.pk for item in drift if item.model == 'budget.Budget'})
+    budget_lines = len({item.pk for item in drift if item.model == 'budgetline.BudgetLine'})
+    logger.info(
+        "check_balance_drift: %d orçamentos e %d linhas divergentes%s.",
+        budgets, budget_lines, " (corrigidos)" if drift and repair else "",
+    )
+    return {'budgets': budgets, 'budget_lines': budget_lines, 'repaired': bool(drift and repair)}
@@ -0,0 +1,250 @@
+"""
+Testes para o recálculo de saldos em unit of work (budget/services/balances.py).
+
+Cobre:
+- Saldos da linha e do orçamento corretos após o commit
+- Várias escritas na mesma transação → um UPDATE por tabela no commit
+- Validação de saldo enxerga escritas ainda não recalculadas da própria transação
+- Edição de contrato com poucas consultas
+- Modo delta: incrementos F() sem reagregar e verificação de divergência
+- Saldos gravados por UPDATE invalidam o cache de respostas da Alice no commit
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import User
+from aid.models import Assistance
+from budget.models import Budget, BudgetMovement
+from budget.services.balances import displayed_balance, find_balance_drift, rebuild_balances
+from budget.tasks import check_balance_drift
+from budgetline.models import BudgetLine, BudgetLineMovement, BudgetLineVersion
+from center.models import ManagementCenter
+from contract.exceptions import InsufficientContractBudgetException
+from contract.models import Contract
+from employee.models import Employee
+
+
+class BalanceFixtureMixin:
+
+    def setUp(self):
+        self.user = User.objects.create_superuser(email='orc@minerva.local', password='testpass123')
+        self.employee = Employee.objects.create(full_name='Fiscal', email='fiscal@minerva.local', cpf='00000000000')
+        center = ManagementCenter.objects.create(name='MC Teste')
+        self.budget = Budget.objects.create(
+            year=2026, category='CAPEX', management_center=center, total_amount=Decimal('100000.00'),
+            available_amount=Decimal('100000.00'), created_by=self.user, updated_by=self.user,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.line = BudgetLine.objects.create(
+                budget=self.budget, expense_type='Base Principal', probable_procurement_type='FUNDO FIXO',
+                budgeted_amount=Decimal('10000.00'),
+            )
+
+    def _contract(self, value):
+        return Contract.objects.create(
+            budget_line=self.line, main_inspector=self.employee, substitute_inspector=self.employee,
+            payment_nature='MENSAL', description='Contrato', original_value=Decimal(value),
+            start_date=date.today(), created_by=self.user, updated_by=self.user,
+        )
+
+    def _refresh(self):
+        self.line.refresh_from_db()
+        self.budget.refresh_from_db()
+
+
+class BalanceUnitOfWorkTests(BalanceFixtureMixin, TestCase):
+
+    def test_balances_after_commit(self):
+        self._refresh()
+        self.assertEqual(self.line.available_amount, Decimal('10000.00'))
+        self.assertEqual(self.budget.cached_used_amount, Decimal('10000.00'))
+        self.assertEqual(self.budget.available_amount, Decimal('90000.00'))
+
+        other = Budget.objects.create(
+            year=2026, category='OPEX', management_center=self.budget.management_center,
+            total_amount=Decimal('5000.00'),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self._contract('2500.00')
+            Assistance.objects.create(
+                employee=self.employee, budget=self.budget, total_amount=Decimal('1000.00'),
+                start_date=date.today(),
+            )
+            BudgetMovement.objects.create(source=self.budget, destination=other, amount=Decimal('3000.00'))
+
+        self._refresh()
+        other.refresh_from_db()
+        self.assertEqual(self.line.available_amount, Decimal('7500.00'))
+        self.assertEqual(self.budget.cached_outgoing_movements, Decimal('3000.00'))
+        self.assertEqual(self.budget.available_amount, Decimal('86000.00'))
+        self.assertEqual(other.cached_incoming_movements, Decimal('3000.00'))
+        self.assertEqual(other.available_amount, Decimal('8000.00'))
+
+    def test_writes_are_coalesced_into_one_update_per_table(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            target = BudgetLine.objects.create(
+                budget=self.budget, expense_type='Base Principal', probable_procurement_type='FUNDO FIXO',
+                budgeted_amount=Decimal('1000.00'),
+            )
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                for _ in range(5):
+                    self._contract('100.00')
+                BudgetLineMovement.objects.create(
+                    source_line=self.line, destination_line=target, movement_amount=Decimal('500.00')
+                )
+
+        with CaptureQueriesContext(connection) as queries:
+            for callback in callbacks:
+                callback()
+
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "budget')]
+        self.assertEqual(len(updates), 1)  # as duas linhas num único UPDATE; orçamento intocado
+        self._refresh()
+        target.refresh_from_db()
+        self.assertEqual(self.line.available_amount, Decimal('9000.00'))
+        self.assertEqual(target.available_amount, Decimal('1500.00'))
+
+    def test_validation_sees_pending_writes(self):
+        with self.assertRaises(InsufficientContractBudgetException):
+            with transaction.atomic():
+                self._contract('6000.00')
+                self._contract('6000.00')
+
+    def test_contract_edit_is_cheap_and_creates_no_line_version(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            contract = self._contract('1000.00')
+
+        contract.original_value = Decimal('1500.00')
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            contract.save()
+
+        # Sem contar a marcação das tabelas de resumo do dashboard
+        balance_queries = [q for q in queries.captured_queries if 'dashboard_' not in q['sql']]
+        self.assertLessEqual(len(balance_queries), 8)
+        self.line.refresh_from_db()
+        self.assertEqual(self.line.available_amount, Decimal('8500.00'))
+        self.assertFalse(BudgetLineVersion.objects.exists())
+
+
+@override_settings(BUDGET_BALANCE_MODE='delta')
+class DeltaBalanceTests(BalanceFixtureMixin, TestCase):
+
+    def test_contract_lifecycle_applies_deltas_without_aggregation(self):
+        with CaptureQueriesContext(connection) as queries:
+            contract = self._contract('2000.00')
+        self.assertFalse(any('SUM(' in q['sql'] for q in queries.captured_queries))
+        self.line.refresh_from_db()
+        self.assertEqual(self.line.available_amount, Decimal('8000.00'))
+
+        contract.original_value = Decimal('2500.00')
+        contract.save()
+        self.line.refresh_from_db()
+        self.assertEqual(self.line.available_amount, Decimal('7500.00'))
+
+        contract.status = 'ENCERRADO'
+        contract.save()
+        self.line.refresh_from_db()
+        self.assertEqual(self.line.available_amount, Decimal('10000.00'))
+
+        contract.status = 'ATIVO'
+        contract.save()
+        contract.delete()
+        self.line.refresh_from_db()
+        self.assertEqual(self.line.available_amount, Decimal('10000.00'))
+        self.assertEqual(find_balance_drift(), [])
+
+    def test_budget_deltas_match_full_recompute(self):
+        other = Budget.objects.create(
+            year=2026, category='OPEX', management_center=self.budget.management_center,
+            total_amount=Decimal('5000.00'), available_amount=Decimal('5000.00'),
+        )
+        assistance = Assistance.objects.create(
+            employee=self.employee, budget=self.budget, total_amount=Decimal('1000.00'), start_date=date.today(),
+        )
+        movement = BudgetMovement.objects.create(source=self.budget, destination=other, amount=Decimal('3000.00'))
+        self.line.budgeted_amount = Decimal('12000.00')
+        self.line.save()
+
+        assistance.status = 'CANCELADO'
+        assistance.save()
+        movement.amount = Decimal('2000.00')
+        movement.save()
+
+        self._refresh()
+        other.refresh_from_db()
+        self.assertEqual(self.line.available_amount, Decimal('12000.00'))
+        self.assertEqual(self.budget.cached_used_amount, Decimal('12000.00'))
+        self.assertEqual(self.budget.cached_outgoing_movements, Decimal('2000.00'))
+        self.assertEqual(self.budget.available_amount, Decimal('86000.00'))
+        self.assertEqual(other.available_amount, Decimal('7000.00'))
+        self.assertEqual(find_balance_drift(), [])
+
+    def test_drift_check_reports_and_repairs(self):
+        BudgetLine.objects.filter(pk=self.line.pk).update(available_amount=Decimal('1.00'))
+
+        drift = find_balance_drift()
+        self.assertEqual([(d.model, d.pk, d.expected) for d in drift],
+                         [('budgetline.BudgetLine', self.line.pk, Decimal('10000.00'))])
+
+        self.assertEqual(check_balance_drift(repair=True), {'budgets': 0, 'budget_lines': 1, 'repaired': True})
+        self.assertEqual(find_balance_drift(), [])
+
+    def test_overcommitted_line_stays_signed_through_drift_repair(self):
+        first = self._contract('10000.00')
+        first.status = 'ENCERRADO'
+        first.save()
+        second = self._contract('10000.00')
+
+        # Reativar sem saldo deixa a linha negativa — igual ao recálculo completo
+        first.status = 'ATIVO'
+        first.save()
+        self.line.refresh_from_db()
+        self.assertEqual(self.line.available_amount, Decimal('-10000.00'))
+        self.assertEqual(find_balance_drift(), [])
+        self.assertEqual(check_balance_drift(repair=True)['budget_lines'], 0)
+        self.assertEqual(displayed_balance(self.line.available_amount), Decimal('0.00'))
+
+        second.status = 'ENCERRADO'
+        second.save()
+        self.line.refresh_from_db()
+        self.assertEqual(self.line.available_amount, Decimal('0.00'))
+        self.assertEqual(find_balance_drift(), [])
+
+
+class BalanceAnswerCacheTests(BalanceFixtureMixin, TestCase):
+    """UPDATE não dispara post_save: os saldos avisam o cache de respostas por conta própria."""
+
+    WRITTEN_KEYS = ('alice:answers:written:budget_budget', 'alice:answers:written:budgetline_budgetline')
+
+    def setUp(self):
+        super().setUp()
+        cache.delete_many(self.WRITTEN_KEYS)
+        self.addCleanup(cache.delete_many, self.WRITTEN_KEYS)
+
+    def _assert_stamped_on_commit(self, write):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            write()
+        # Nada antes do commit: o post_save do contrato não marca as tabelas de saldo
+        self.assertEqual(cache.get_many(self.WRITTEN_KEYS), {})
+        for callback in callbacks:
+            callback()
+        self.assertEqual(set(cache.get_many(self.WRITTEN_KEYS)), set(self.WRITTEN_KEYS))
+
+    def test_recompute_flush_marks_balance_tables(self):
+        # No modo recompute o próprio flush roda no commit e registra o aviso para depois dele
+        with self.captureOnCommitCallbacks(execute=True):
+            self._contract('1000.00')
+        self.assertEqual(set(cache.get_many(self.WRITTEN_KEYS)), set(self.WRITTEN_KEYS))
+
+    @override_settings(BUDGET_BALANCE_MODE='delta')
+    def test_deltas_mark_balance_tables(self):
+        self._assert_stamped_on_commit(lambda: self._contract('1000.00'))
+
+    def test_rebuild_marks_balance_tables(self):
+        self._assert_stamped_on_commit(lambda: rebuild_balances([self.budget.pk]))
@@ -0,0 +1,50 @@
+"""
+Testes para manage.py recalculate_budget_cache.
+
+Cobre:
+- --dry-run lista as divergências (orçamento e linha) sem gravar
+- Reconstrução corrige orçamentos e linhas com UPDATEs set-based
+"""
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from budget.models import Budget
+from budgetline.models import BudgetLine
+
+from .test_balances import BalanceFixtureMixin
+
+
+class RecalculateBudgetCacheCommandTests(BalanceFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self._contract('1500.00')
+        Budget.objects.filter(pk=self.budget.pk).update(available_amount=Decimal('5.00'))
+        BudgetLine.objects.filter(pk=self.line.pk).update(available_amount=Decimal('7.00'))
+
+    def test_dry_run_lists_drift_without_writing(self):
+        out = StringIO()
+        call_command('recalculate_budget_cache', '--dry-run', stdout=out)
+
+        output = out.getvalue()
+        self.assertIn(f'budget.Budget #{self.budget.pk} available_amount: 5.00 -> 90000.00', output)
+        self.assertIn(f'budgetline.BudgetLine #{self.line.pk} available_amount: 7.00 -> 8500.00', output)
+        self._refresh()
+        self.assertEqual(self.budget.available_amount, Decimal('5.00'))
+        self.assertEqual(self.line.available_amount, Decimal('7.00'))
+
+    def test_rebuild_fixes_budgets_and_lines(self):
+        with CaptureQueriesContext(connection) as queries:
+            call_command('recalculate_budget_cache', '--year', '2026', stdout=StringIO())
+
+        updates = [q for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 2)
+        self._refresh()
+        self.assertEqual(self.budget.available_amount, Decimal('90000.00'))
+        self.assertEqual(self.line.available_amount, Decimal('8500.00'))
@@ -13,6 +13,8 @@ from datetime import datetime
 from decimal import Decimal
 import locale
 
+from budget.services.balances import displayed_balance
+
 
 try:
     locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
@@ -90,7 +92,7 @@ def generate_budget_pdf(budget):
         ['Categoria:', budget.get_category_display()],
         ['Centro Gestor:', str(budget.management_center.name)],
         ['Valor Total:', format_currency(budget.total_amount)],
-        ['Valor Disponível:', format_currency(budget.available_amount)],
+        ['Valor Disponível:', format_currency(displayed_balance(budget.available_amount))],
         ['Status:', budget.get_status_display()],
         ['Criado em:', budget.created_at.strftime('%d/%m/%Y às %H:%M')],
         ['Criado por:', str(budget.created_by) if budget.created_by else 'N/A'],
@@ -321,7 +323,7 @@ def generate_budget_summary_pdf(budgets_queryset):
             budget.get_category_display(),
             str(budget.management_center.name)[:30] + ('...' if len(str(budget.management_center.name)) > 30 else ''),
             format_currency(budget.total_amount),
-            format_currency(budget.available_amount),
+            format_currency(displayed_balance(budget.available_amount)),
             budget.get_status_display()
         ])
 
@@ -344,7 +346,7 @@ def generate_budget_summary_pdf(budgets_queryset):
 
     total_budgets = budgets_queryset.count()
     total_amount = sum(budget.total_amount for budget in budgets_queryset)
-    total_available = sum(budget.available_amount for budget in budgets_queryset)
+    total_available = sum(displayed_balance(budget.available_amount) for budget in budgets_queryset)
 
     stats_data = [
         ['Total de Orçamentos:', str(total_budgets)],
@@ -18,8 +18,10 @@ from .serializers import BudgetSerializer, BudgetDetailSerializer, BudgetMovemen
 from .utils.messages import BUDGET_MSGS, BUDGET_MOVEMENT_MSGS
 from .utils.pdf_generator import generate_budget_pdf, generate_budget_summary_pdf
 from center.models import ManagementCenter
+from core.search import DocumentSearchFilter
 from center.serializers import ManagementCenterSerializer
 from accounts.mixins import HierarchicalFilterMixin
+from core.caching import cached_view
 
 
 
@@ -44,7 +46,7 @@ class BudgetListView(generics.ListAPIView, HierarchicalFilterMixin):
     queryset = Budget.objects.select_related('management_center', 'created_by', 'updated_by').prefetch_related('budget_lines')
     serializer_class = BudgetSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, DocumentSearchFilter, filters.OrderingFilter]
     search_fields = ['year', 'category', 'management_center__name']
     ordering_fields = ['year', 'category', 'total_amount', 'management_center__name', 'created_at', 'updated_at']
     ordering = ['-created_at']
@@ -376,6 +378,7 @@ class BudgetMovementDeleteView(generics.DestroyAPIView):
 @extend_schema(tags=['Orçamento'])
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_view('budget_form_metadata', models=[ManagementCenter])
 def budget_form_metadata(request):
     """
     API endpoint to provide metadata for budget forms including available management centers.
@@ -383,7 +386,7 @@ def budget_form_metadata(request):
     """
     try:
 
-        management_centers = ManagementCenter.objects.all().order_by('name')
+        management_centers = ManagementCenter.objects.select_related('created_by', 'updated_by').order_by('name')
         centers_serializer = ManagementCenterSerializer(management_centers, many=True)
 
 
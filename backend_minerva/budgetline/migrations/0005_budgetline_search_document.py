@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:14
+
+from django.db import migrations, models
+
+from core.search import backfill_operation, trigram_index_operation
+
+# Caminhos registrados em models.py na data desta migração
+SEARCH_PATHS = ('summary_description', 'budget__category', 'budget__year')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budgetline', '0004_budgetline_budgetline__budget__ee0088_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='budgetline',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Documento de busca'),
+        ),
+        backfill_operation('budgetline', 'budgetline', SEARCH_PATHS),
+        trigram_index_operation('budgetline_budgetline'),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budgetline', '0005_budgetline_search_document'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='budgetline',
+            name='available_amount',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Valor disponível para criação de contratos', max_digits=10, verbose_name='Valor Disponível'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models, transaction
+from core.search import register as register_search
 from django.core.validators import MinValueValidator
 from accounts.models import User
 from budget.models import Budget
@@ -135,7 +136,6 @@ class BudgetLine(models.Model, HierarchicalQuerysetMixin):
         max_digits=10,
         decimal_places=2,
         default=0,
-        validators=[MinValueValidator(0)],
         verbose_name='Valor Disponível',
         help_text='Valor disponível para criação de contratos'
     )
@@ -197,18 +197,22 @@ class BudgetLine(models.Model, HierarchicalQuerysetMixin):
     updated_at = models.DateTimeField(auto_now=True,verbose_name='Atualizado em')
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='budget_lines_created',verbose_name='Criado por')
     updated_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='budget_lines_updated',verbose_name='Atualizado por')
+    search_document = models.TextField(default='', blank=True, editable=False, verbose_name='Documento de busca')
 
     @transaction.atomic
     def save(self, *args, **kwargs):
         from budget.exceptions import InsufficientBudgetException
+        from budget.services.balances import lock_budget, lock_budget_line
 
         is_new = self.pk is None
         old_budgeted_amount = Decimal('0.00')
 
         if not is_new:
 
-            old_instance = BudgetLine.objects.get(pk=self.pk)
-            old_budgeted_amount = old_instance.budgeted_amount
+            # Saldo da própria linha lido sob lock: o valor gravado abaixo parte dele
+            current = lock_budget_line(self.pk)
+            old_budgeted_amount = current.budgeted_amount
+            self.available_amount = current.available_amount
 
 
         if is_new:
@@ -216,7 +220,7 @@ class BudgetLine(models.Model, HierarchicalQuerysetMixin):
                 raise BudgetLineOperationException("A linha orçamentária deve estar vinculada a um orçamento.")
 
 
-            budget = Budget.objects.select_for_update().get(pk=self.budget.pk)
+            budget = lock_budget(self.budget.pk)
 
             if budget.available_amount < self.budgeted_amount:
                 raise InsufficientBudgetException(
@@ -233,7 +237,7 @@ class BudgetLine(models.Model, HierarchicalQuerysetMixin):
 
         if not is_new and old_budgeted_amount != self.budgeted_amount:
             difference = self.budgeted_amount - old_budgeted_amount
-            budget = Budget.objects.select_for_update().get(pk=self.budget.pk)
+            budget = lock_budget(self.budget.pk)
 
             if difference > 0:
                 if budget.available_amount < difference:
@@ -253,13 +257,11 @@ class BudgetLine(models.Model, HierarchicalQuerysetMixin):
                         f"Operação não permitida: não é possível reduzir R$ {reduction:.2f} "
                         f"pois apenas R$ {self.available_amount:.2f} está disponível na linha."
                     )
-                self.available_amount -= reduction
-
-        super().save(*args, **kwargs)
 
+            self.available_amount += difference
 
-        if self.budget:
-            self.budget.update_calculated_amounts()
+        # Orçamento pai atualizado pelos signals (budgetline/signals.py)
+        super().save(*args, **kwargs)
 
         if not is_new:
             self.create_version("Atualização da linha orçamentária", kwargs.get('updated_by'))
@@ -278,55 +280,26 @@ class BudgetLine(models.Model, HierarchicalQuerysetMixin):
                 "que possui contratos vinculados. Cancele ou exclua os contratos primeiro."
             )
 
-        budget = self.budget
         super().delete(*args, **kwargs)
 
-
-
-        if budget:
-            budget.update_calculated_amounts()
-
     def recalculate_available_amount(self):
         """
-        Recalcula o valor disponível da linha baseado nos contratos criados
-        available_amount = budgeted_amount - soma(contratos.original_value)
+        Recalcula o valor disponível da linha (uma única consulta)
+        available_amount = budgeted_amount + entradas - saídas - soma(contratos ativos)
         """
-        from django.db.models import Sum
-        from contract.models import Contract
-
-        total_contracted = self.contracts.filter(
-            status='ATIVO'
-        ).aggregate(
-            total=Sum('original_value')
-        )['total'] or Decimal('0.00')
-
-
-        total_incoming = self.incoming_movements.aggregate(
-            total=Sum('movement_amount')
-        )['total'] or Decimal('0.00')
-
-        total_outgoing = self.outgoing_movements.aggregate(
-            total=Sum('movement_amount')
-        )['total'] or Decimal('0.00')
-
-
-        self.available_amount = (
-            self.budgeted_amount +
-            total_incoming -
-            total_outgoing -
-            total_contracted
-        )
-
-
-        if self.available_amount < 0:
-            self.available_amount = Decimal('0.00')
+        from budget.services.balances import budget_line_available_expression
 
+        self.available_amount = BudgetLine.objects.filter(pk=self.pk).annotate(
+            new_available_amount=budget_line_available_expression()
+        ).values_list('new_available_amount', flat=True).get()
         return self.available_amount
 
     def update_available_amount(self):
-        """Atualiza e salva o valor disponível"""
-        self.recalculate_available_amount()
-        self.save(update_fields=['available_amount', 'updated_at'])
+        """Atualiza o valor disponível no banco e na instância"""
+        from budget.services.balances import recalculate_budget_lines
+
+        recalculate_budget_lines([self.pk])
+        self.refresh_from_db(fields=['available_amount', 'updated_at'])
 
     def create_version(self, change_reason, user=None):
         latest_version = self.versions.first()
@@ -417,6 +390,8 @@ class BudgetLineMovement(models.Model):
         - Validar que a linha de origem tem saldo suficiente
         - Subtrair da origem e adicionar ao destino
         """
+        from budget.services.balances import lock_budget_line
+
         is_new = self.pk is None
 
         if is_new:
@@ -432,7 +407,7 @@ class BudgetLineMovement(models.Model):
                 )
 
 
-            source = BudgetLine.objects.select_for_update().get(pk=self.source_line.pk)
+            source = lock_budget_line(self.source_line.pk)
 
 
             if source.available_amount < self.movement_amount:
@@ -443,13 +418,9 @@ class BudgetLineMovement(models.Model):
                     f"excede o saldo disponível da linha de origem (R$ {source.available_amount:.2f})."
                 )
 
+        # Saldos das linhas recalculados no commit (budgetline/signals.py)
         super().save(*args, **kwargs)
 
-
-        if is_new:
-            self.source_line.update_available_amount()
-            self.destination_line.update_available_amount()
-
     @transaction.atomic
     def delete(self, *args, **kwargs):
         """
@@ -457,17 +428,8 @@ class BudgetLineMovement(models.Model):
         - Devolver o valor à linha de origem
         - Subtrair da linha de destino
         """
-        source = self.source_line
-        destination = self.destination_line
-
         super().delete(*args, **kwargs)
 
-
-        if source:
-            source.update_available_amount()
-        if destination:
-            destination.update_available_amount()
-
     def __str__(self):
         if self.source_line and self.destination_line:
             return f'{self.source_line} → {self.destination_line} - R$ {self.movement_amount}'
@@ -617,4 +579,8 @@ class BudgetLineVersion(models.Model):
         verbose_name = 'Versão de Linha Orçamentária'
         verbose_name_plural = 'Versões de Linhas Orçamentárias'
         unique_together = ['budget_line', 'version_number']
-        ordering = ['-version_number']
\ No newline at end of file
+        ordering = ['-version_number']
+
+
+# Texto pesquisável das listagens (core.search)
+register_search(BudgetLine, ('summary_description', 'budget__category', 'budget__year'))
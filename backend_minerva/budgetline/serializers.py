@@ -2,6 +2,7 @@ from rest_framework import serializers
 from .models import BudgetLine, BudgetLineMovement, BudgetLineVersion
 from center.serializers import ManagementCenterSerializer, UserInfoSerializer
 from employee.serializers import EmployeeSerializer
+from budget.services.balances import displayed_balance
 
 class BudgetLineDetailSerializer(serializers.ModelSerializer):
     """
@@ -48,7 +49,7 @@ class BudgetLineDetailSerializer(serializers.ModelSerializer):
                 'category': obj.budget.category,
                 'management_center_name': obj.budget.management_center.name if obj.budget.management_center else None,
                 'total_amount': str(obj.budget.total_amount),
-                'available_amount': str(obj.budget.available_amount)
+                'available_amount': str(displayed_balance(obj.budget.available_amount))
             }
         return None
 
@@ -1,11 +1,27 @@
 """
 Signals para atualização automática de valores relacionados
+
+Os saldos afetados são atualizados por budget/services/balances.py: recalculados
+uma única vez no commit (modo recompute) ou ajustados na hora por delta (modo delta).
 """
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
+from budget.services.balances import record_deleted, record_saved, remember_previous
 from .models import BudgetLine, BudgetLineMovement
 
 
+@receiver(pre_save, sender=BudgetLine)
+@receiver(pre_save, sender=BudgetLineMovement)
+def remember_balance_contribution(sender, instance, **kwargs):
+    """
+    Antes de salvar, guardar a contribuição atual para calcular a diferença
+    """
+    if hasattr(instance, '_skip_signal'):
+        return
+
+    remember_previous(instance)
+
+
 @receiver(post_save, sender=BudgetLine)
 def update_budget_on_line_save(sender, instance, created, **kwargs):
     """
@@ -15,8 +31,7 @@ def update_budget_on_line_save(sender, instance, created, **kwargs):
     if hasattr(instance, '_skip_signal'):
         return
 
-    if instance.budget:
-        instance.budget.update_calculated_amounts()
+    record_saved(instance)
 
 
 @receiver(post_delete, sender=BudgetLine)
@@ -24,8 +39,7 @@ def update_budget_on_line_delete(sender, instance, **kwargs):
     """
     Após deletar uma linha orçamentária, atualizar o orçamento pai
     """
-    if instance.budget:
-        instance.budget.update_calculated_amounts()
+    record_deleted(instance)
 
 
 @receiver(post_save, sender=BudgetLineMovement)
@@ -36,10 +50,7 @@ def update_lines_on_movement_save(sender, instance, created, **kwargs):
     if hasattr(instance, '_skip_signal'):
         return
 
-    if instance.source_line:
-        instance.source_line.update_available_amount()
-    if instance.destination_line:
-        instance.destination_line.update_available_amount()
+    record_saved(instance)
 
 
 @receiver(post_delete, sender=BudgetLineMovement)
@@ -47,7 +58,4 @@ def update_lines_on_movement_delete(sender, instance, **kwargs):
     """
     Após deletar uma movimentação, atualizar as linhas de origem e destino
     """
-    if instance.source_line:
-        instance.source_line.update_available_amount()
-    if instance.destination_line:
-        instance.destination_line.update_available_amount()
+    record_deleted(instance)
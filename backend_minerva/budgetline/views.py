@@ -3,11 +3,14 @@ from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from accounts.permissions import IsManagerOrAbove
+from core.counting import track_counts
+from core.pagination import CustomPageNumberPagination
 
 from .models import BudgetLine, BudgetLineMovement, BudgetLineVersion
 from .serializers import BudgetLineSerializer, BudgetLineMovementSerializer, BudgetLineVersionSerializer
 from .utils.message import BUDGETSLINE_MESSAGES
 
+track_counts(BudgetLine)
 
 _BUDGETLINE_SELECT = (
     'budget__management_center',
@@ -33,6 +36,7 @@ class BudgetLineListAPIView(generics.ListAPIView):
     queryset = BudgetLine.objects.select_related(*_BUDGETLINE_SELECT)
     serializer_class = BudgetLineSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CustomPageNumberPagination
 
 
 @extend_schema(tags=['Linhas Orçamentárias'])
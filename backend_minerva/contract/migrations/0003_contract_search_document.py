@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:14
+
+from django.db import migrations, models
+
+from core.search import backfill_operation, trigram_index_operation
+
+# Caminhos registrados em models.py na data desta migração
+SEARCH_PATHS = ('protocol_number', 'description')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contract', '0002_contract_contract_co_status_601477_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contract',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Documento de busca'),
+        ),
+        backfill_operation('contract', 'contract', SEARCH_PATHS),
+        trigram_index_operation('contract_contract'),
+    ]
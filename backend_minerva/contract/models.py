@@ -1,4 +1,5 @@
 from django.db import models, transaction
+from core.search import register as register_search
 from django.core.validators import MinValueValidator
 from accounts.models import User
 from employee.models import Employee
@@ -39,6 +40,7 @@ class Contract(models.Model, HierarchicalQuerysetMixin):
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
     created_by = models.ForeignKey(User, on_delete=models.PROTECT, related_name='contracts_created', verbose_name='Criado por')
     updated_by = models.ForeignKey(User, on_delete=models.PROTECT, related_name='contracts_updated', verbose_name='Atualizado por')
+    search_document = models.TextField(default='', blank=True, editable=False, verbose_name='Documento de busca')
 
     @transaction.atomic
     def save(self, *args, **kwargs):
@@ -47,6 +49,8 @@ class Contract(models.Model, HierarchicalQuerysetMixin):
         - Deve subtrair o valor do available_amount da linha orçamentária
         - Validar se a linha tem saldo suficiente
         """
+        from budget.services.balances import lock_budget_line
+
         is_new = self.pk is None
         old_original_value = Decimal('0.00')
         old_status = None
@@ -67,7 +71,7 @@ class Contract(models.Model, HierarchicalQuerysetMixin):
                 raise ContractOperationException("O contrato deve estar vinculado a uma linha orçamentária.")
 
 
-            budget_line = BudgetLine.objects.select_for_update().get(pk=self.budget_line.pk)
+            budget_line = lock_budget_line(self.budget_line.pk)
 
             if budget_line.available_amount < self.original_value:
                 raise InsufficientContractBudgetException(
@@ -78,7 +82,7 @@ class Contract(models.Model, HierarchicalQuerysetMixin):
 
         if not is_new and old_original_value != self.original_value:
             difference = self.original_value - old_original_value
-            budget_line = BudgetLine.objects.select_for_update().get(pk=self.budget_line.pk)
+            budget_line = lock_budget_line(self.budget_line.pk)
 
             if difference > 0:
                 if budget_line.available_amount < difference:
@@ -94,30 +98,17 @@ class Contract(models.Model, HierarchicalQuerysetMixin):
 
             pass
 
+        # Saldo da linha atualizado pelos signals (contract/signals.py)
         super().save(*args, **kwargs)
 
-
-        if self.budget_line:
-            self.budget_line.update_available_amount()
-
-            if self.budget_line.budget:
-                self.budget_line.budget.update_calculated_amounts()
-
     @transaction.atomic
     def delete(self, *args, **kwargs):
         """
         Ao deletar um contrato:
         - O valor deve retornar à linha orçamentária
         """
-        budget_line = self.budget_line
         super().delete(*args, **kwargs)
 
-
-        if budget_line:
-            budget_line.update_available_amount()
-            if budget_line.budget:
-                budget_line.budget.update_calculated_amounts()
-
     def __str__(self):
         return self.protocol_number
 
@@ -217,4 +208,8 @@ class ContractAmendment(models.Model):
     class Meta:
         verbose_name = 'Aditivo'
         verbose_name_plural = 'Aditivos'
-        ordering = ['contract', 'created_at']
\ No newline at end of file
+        ordering = ['contract', 'created_at']
+
+
+# Texto pesquisável das listagens (core.search)
+register_search(Contract, ('protocol_number', 'description'))
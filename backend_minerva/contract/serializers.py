@@ -9,7 +9,7 @@ class ContractSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Contract
-        fields = '__all__'
+        exclude = ('search_document',)
         read_only_fields = ('id', 'protocol_number', 'created_at', 'updated_at', 'created_by', 'updated_by')
 
     def get_main_inspector_detail(self, obj):
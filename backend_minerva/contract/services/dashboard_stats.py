@@ -0,0 +1,256 @@
+"""
+Métricas do dashboard principal (contract.views.dashboard_stats).
+
+Uma passada de agregação condicional por entidade em vez de um `.count()` por
+métrica: contratos (total, ativos, encerrados, vencendo, vencidos e, para acesso
+total, sem data de término), funcionários, orçamento, auxílios, linhas e
+orçamento por categoria. O escopo de contratos usa `IN (subconsulta)` nos fiscais,
+sem JOIN nem DISTINCT.
+
+O resultado depende só do escopo (`DashboardScope`), não do usuário: a view guarda
+em cache por `DashboardScope.cache_key` durante CONTRACT_DASHBOARD_CACHE_TTL.
+"""
+import hashlib
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from budget.services.balances import displayed_balance_expression
+from core.server_timing import ServerTiming
+from employee.models import Employee
+from employee.utils.access_control import SCOPE_ALL, filter_by_employee_scope, get_employee_scope
+
+EXPIRING_DAYS = 30
+
+
+@dataclass(frozen=True)
+class DashboardScope:
+    full_access: bool
+    scope_level: str
+    scope_name: str
+    user_group: Optional[str]
+    employee_scope: Tuple[str, Optional[int]]
+    # (campo, valor) do filtro de orçamentos por CenterHierarchy, ou None
+    budget_scope: Optional[Tuple[str, int]]
+
+    @property
+    def cache_key(self) -> str:
+        name = hashlib.md5(self.scope_name.encode()).hexdigest()[:12]
+        field, value = self.employee_scope
+        budget = ':'.join(str(part) for part in self.budget_scope) if self.budget_scope else '-'
+        return f"contract:dashboard:{self.scope_level}:{self.user_group}:{field}:{value}:{budget}:{name}"
+
+
+def resolve_dashboard_scope(user) -> DashboardScope:
+    is_superuser = user.is_superuser
+    try:
+        user_group = user.groups.values_list('name', flat=True).first() if not is_superuser else 'PRESIDENTE'
+    except Exception:
+        user_group = None
+
+    full_access = is_superuser or user_group == 'PRESIDENTE'
+    scope_level = 'admin' if is_superuser else (user_group or 'FUNCIONARIO').lower()
+
+    emp = getattr(user, 'employee', None)
+    budget_scope = None
+    if full_access:
+        scope_name = 'Sistema'
+    elif user_group == 'DIRETOR' and emp and emp.direction:
+        scope_name = str(emp.direction)
+        budget_scope = ('direction', emp.direction_id)
+    elif user_group == 'GERENTE' and emp and emp.management:
+        scope_name = str(emp.management)
+        budget_scope = ('management', emp.management_id)
+    elif emp and emp.coordination:
+        scope_name = str(emp.coordination)
+        budget_scope = ('coordination', emp.coordination_id)
+    else:
+        scope_name = 'Sem escopo'
+
+    return DashboardScope(
+        full_access=full_access,
+        scope_level=scope_level,
+        scope_name=scope_name,
+        user_group=user_group,
+        employee_scope=get_employee_scope(user),
+        budget_scope=budget_scope,
+    )
+
+
+def _contract_stats(contracts, today, full_access: bool) -> Dict[str, int]:
+    active = Q(status='ATIVO')
+    expiring = active & Q(expiration_date__gte=today, expiration_date__lte=today + timedelta(days=EXPIRING_DAYS))
+    aggregates = {
+        'total': Count('id'),
+        'active': Count('id', filter=active),
+        'closed': Count('id', filter=Q(status='ENCERRADO')),
+        'expiring_30_days': Count('id', filter=expiring),
+        'expired': Count('id', filter=active & Q(expiration_date__lt=today)),
+    }
+    if full_access:
+        aggregates['without_end_date'] = Count('id', filter=active & Q(end_date__isnull=True))
+    return contracts.aggregate(**aggregates)
+
+
+def _scoped_budget_total(scope: DashboardScope):
+    from budget.models import Budget
+    from center.models import CenterHierarchy
+
+    if scope.full_access:
+        budgets = Budget.objects.all()
+    elif scope.budget_scope:
+        field, value = scope.budget_scope
+        centers = CenterHierarchy.objects.filter(**{f'{field}_id': value}).values('management_center_id')
+        budgets = Budget.objects.filter(management_center_id__in=centers)
+    else:
+        return 0
+    return budgets.aggregate(total=Sum('total_amount'))['total'] or 0
+
+
+def _top_fiscais(employees, limit: int):
+    return list(
+        employees.annotate(
+            contract_count=Count(
+                'contracts_main_inspector',
+                filter=Q(contracts_main_inspector__status='ATIVO'),
+                distinct=True,
+            )
+        ).filter(contract_count__gt=0)
+        .order_by('-contract_count')[:limit]
+        .values('full_name', 'position', 'contract_count')
+    )
+
+
+def _admin_stats(contract_stats: Dict[str, int]) -> Dict[str, Any]:
+    from budget.models import Budget
+    from budgetline.models import BudgetLine
+    from contract.models import Contract
+
+    users_total = get_user_model().objects.filter(is_active=True).count()
+
+    top_contracts = list(
+        Contract.objects.filter(status='ATIVO')
+        .order_by('-current_value')[:10]
+        .values('protocol_number', 'description', 'current_value', 'main_inspector__full_name')
+    )
+
+    # Totais gerais saem das próprias categorias
+    budget_by_category = list(
+        Budget.objects.values('category').annotate(
+            total=Sum('total_amount'),
+            available=Sum(displayed_balance_expression()),
+            count=Count('id'),
+        ).order_by('category')
+    )
+
+    lines_agg = BudgetLine.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(status='ATIVO')),
+    )
+
+    return {
+        'users_total': users_total,
+        'top_fiscais': _top_fiscais(Employee.objects.all(), 10),
+        'top_contracts_by_value': [
+            {**c, 'current_value': float(c['current_value'])}
+            for c in top_contracts
+        ],
+        'budget_by_category': [
+            {
+                'category': b['category'],
+                'total': float(b['total'] or 0),
+                'available': float(b['available'] or 0),
+                'count': b['count'],
+            }
+            for b in budget_by_category
+        ],
+        'budget_total': float(sum(b['total'] or 0 for b in budget_by_category)),
+        'budget_available': float(sum(b['available'] or 0 for b in budget_by_category)),
+        'contracts_without_end_date': contract_stats['without_end_date'],
+        'lines_total': lines_agg['total'],
+        'lines_active': lines_agg['active'],
+    }
+
+
+def build_dashboard_stats(scope: DashboardScope, timing: Optional[ServerTiming] = None) -> Dict[str, Any]:
+    """Monta a resposta de dashboard_stats para o escopo (etapas medidas em `timing`)."""
+    from aid.models import Assistance
+    from contract.models import Contract
+
+    timing = timing or ServerTiming()
+    today = timezone.now().date()
+    full_access = scope.full_access
+
+    employees = filter_by_employee_scope(Employee.objects.all(), scope.employee_scope)
+    if scope.employee_scope[0] == SCOPE_ALL:
+        contracts = Contract.objects.all()
+    else:
+        contracts = Contract.objects.filter(Q(main_inspector__in=employees) | Q(substitute_inspector__in=employees))
+
+    with timing('contracts'):
+        stats = _contract_stats(contracts, today, full_access)
+
+    with timing('lists'):
+        expiring_list = list(
+            contracts.filter(
+                status='ATIVO',
+                expiration_date__gte=today,
+                expiration_date__lte=today + timedelta(days=EXPIRING_DAYS),
+            )
+            .order_by('expiration_date')
+            .values(
+                'protocol_number', 'description', 'expiration_date',
+                'current_value', 'main_inspector__full_name',
+            )[:10]
+        )
+
+        recent_list = list(
+            contracts.filter(created_at__gte=today - timedelta(days=7))
+            .order_by('-created_at')
+            .values('protocol_number', 'description', 'original_value', 'created_at')[:5]
+        )
+
+    with timing('scope_totals'):
+        total_employees = employees.filter(status='ATIVO').count()
+        budget_total = _scoped_budget_total(scope)
+        aids = Assistance.objects.all() if full_access else Assistance.objects.filter(employee__in=employees)
+        total_aids = aids.count()
+
+    response_data = {
+        'scope_level': scope.scope_level,
+        'full_access': full_access,
+        'scope_name': scope.scope_name,
+        'contracts': {
+            'total': stats['total'],
+            'active': stats['active'],
+            'closed': stats['closed'],
+            'expiring_30_days': stats['expiring_30_days'],
+            'expired': stats['expired'],
+        },
+        'employees': {'active': total_employees},
+        'budget': {'total': float(budget_total)},
+        'aids': {'total': total_aids},
+        'expiring_contracts': expiring_list,
+        'recent_contracts': recent_list,
+        'status_breakdown': [
+            {'name': 'Ativos', 'value': stats['active']},
+            {'name': 'Encerrados', 'value': stats['closed']},
+            {'name': 'Vencidos', 'value': stats['expired']},
+        ],
+    }
+
+    # --- Extra stats for DIRETOR and GERENTE (scoped top fiscais) ---
+    if not full_access and scope.user_group in ('DIRETOR', 'GERENTE'):
+        with timing('extra'):
+            response_data['extra_stats'] = {'top_fiscais': _top_fiscais(employees, 5)}
+
+    # --- Extra stats for full-access users (admin/presidente) ---
+    if full_access:
+        with timing('admin'):
+            response_data['admin_stats'] = _admin_stats(stats)
+
+    return response_data
@@ -1,11 +1,26 @@
 """
 Signals para atualização automática de valores relacionados
+
+O contrato só afeta o saldo da linha orçamentária (o orçamento depende apenas do
+valor orçado das linhas); ver budget/services/balances.py.
 """
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
+from budget.services.balances import record_deleted, record_saved, remember_previous
 from .models import Contract
 
 
+@receiver(pre_save, sender=Contract)
+def remember_contract_contribution(sender, instance, **kwargs):
+    """
+    Antes de salvar, guardar valor/status/linha atuais para calcular a diferença
+    """
+    if hasattr(instance, '_skip_signal'):
+        return
+
+    remember_previous(instance)
+
+
 @receiver(post_save, sender=Contract)
 def update_budget_line_on_contract_save(sender, instance, created, **kwargs):
     """
@@ -14,10 +29,7 @@ def update_budget_line_on_contract_save(sender, instance, created, **kwargs):
     if hasattr(instance, '_skip_signal'):
         return
 
-    if instance.budget_line:
-        instance.budget_line.update_available_amount()
-        if instance.budget_line.budget:
-            instance.budget_line.budget.update_calculated_amounts()
+    record_saved(instance)
 
 
 @receiver(post_delete, sender=Contract)
@@ -25,7 +37,4 @@ def update_budget_line_on_contract_delete(sender, instance, **kwargs):
     """
     Após deletar um contrato, devolver o valor à linha orçamentária
     """
-    if instance.budget_line:
-        instance.budget_line.update_available_amount()
-        if instance.budget_line.budget:
-            instance.budget_line.budget.update_calculated_amounts()
+    record_deleted(instance)
@@ -0,0 +1,120 @@
+"""
+Testes para o dashboard principal (contract.views.dashboard_stats).
+
+Cobre:
+- Métricas de contratos por agregação condicional, com número fixo de consultas
+- Escopo de diretor (contratos dos fiscais da direção e orçamentos via CenterHierarchy)
+- Cache por escopo e cabeçalho Server-Timing
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from budget.models import Budget
+from budgetline.models import BudgetLine
+from center.models import CenterHierarchy, ManagementCenter
+from contract.models import Contract
+from employee.models import Employee
+from sector.models import Direction
+
+URL = '/api/v1/contract/dashboard/'
+
+
+class DashboardStatsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(email='admin@minerva.local', password='testpass123')
+        self.direction = Direction.objects.create(name='Diretoria A')
+        other_direction = Direction.objects.create(name='Diretoria B')
+
+        self.inspector = Employee.objects.create(
+            full_name='Fiscal A', email='fiscal.a@minerva.local', cpf='00000000000', direction=self.direction,
+        )
+        outsider = Employee.objects.create(
+            full_name='Fiscal B', email='fiscal.b@minerva.local', cpf='00000000001', direction=other_direction,
+        )
+
+        center = ManagementCenter.objects.create(name='MC Diretoria A')
+        CenterHierarchy.objects.create(management_center=center, direction=self.direction)
+        budget = Budget.objects.create(
+            year=2026, category='CAPEX', management_center=center,
+            total_amount=Decimal('50000.00'), available_amount=Decimal('50000.00'),
+        )
+        Budget.objects.create(
+            year=2026, category='CAPEX', management_center=ManagementCenter.objects.create(name='MC Outra'),
+            total_amount=Decimal('7000.00'), available_amount=Decimal('7000.00'),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.line = BudgetLine.objects.create(
+                budget=budget, expense_type='Base Principal', probable_procurement_type='FUNDO FIXO',
+                budgeted_amount=Decimal('20000.00'),
+            )
+
+        today = date.today()
+        with self.captureOnCommitCallbacks(execute=True):
+            self._contract(self.inspector, expiration_date=today + timedelta(days=10))
+            self._contract(self.inspector, expiration_date=today - timedelta(days=1))
+            self._contract(self.inspector, status='ENCERRADO')
+            self._contract(outsider)
+
+    def _contract(self, inspector, status='ATIVO', expiration_date=None):
+        return Contract.objects.create(
+            budget_line=self.line, main_inspector=inspector, substitute_inspector=inspector,
+            payment_nature='MENSAL', description='Contrato', original_value=Decimal('1000.00'),
+            start_date=date.today(), expiration_date=expiration_date, status=status,
+            created_by=self.admin, updated_by=self.admin,
+        )
+
+    def _get(self, user):
+        return self.client.get(URL, headers={'Authorization': f'Bearer {AccessToken.for_user(user)}'})
+
+    def test_admin_stats(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._get(self.admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(ctx.captured_queries), 16)
+
+        data = response.json()
+        self.assertEqual(data['contracts'], {
+            'total': 4, 'active': 3, 'closed': 1, 'expiring_30_days': 1, 'expired': 1,
+        })
+        self.assertEqual(data['budget']['total'], 57000.0)
+        self.assertEqual(data['admin_stats']['budget_total'], 57000.0)
+        self.assertEqual(data['admin_stats']['contracts_without_end_date'], 3)
+        self.assertEqual(data['admin_stats']['top_fiscais'][0]['full_name'], 'Fiscal A')
+
+    def test_director_scope(self):
+        director = User.objects.create_user(
+            email='diretor@minerva.local', password='testpass123',
+            employee=Employee.objects.create(
+                full_name='Diretor', email='diretor@minerva.local', cpf='00000000002', direction=self.direction,
+            ),
+        )
+        director.groups.add(Group.objects.get_or_create(name='DIRETOR')[0])
+
+        data = self._get(director).json()
+
+        self.assertEqual(data['scope_name'], 'DIRETORIA A')
+        self.assertEqual(data['contracts']['total'], 3)
+        self.assertEqual(data['budget']['total'], 50000.0)
+        self.assertEqual(data['extra_stats']['top_fiscais'][0]['contract_count'], 2)
+        self.assertNotIn('admin_stats', data)
+
+    def test_cached_per_scope_with_server_timing(self):
+        first = self._get(self.admin)
+        self.assertIn('cache;desc="miss"', first['Server-Timing'])
+        self.assertIn('contracts;dur=', first['Server-Timing'])
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = self._get(self.admin)
+        self.assertIn('cache;desc="hit"', second['Server-Timing'])
+        self.assertFalse(any('contract_contract' in q['sql'] for q in ctx.captured_queries))
+        self.assertEqual(second.json(), first.json())
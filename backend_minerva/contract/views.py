@@ -4,13 +4,16 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import api_view, permission_classes
-from django.utils import timezone
-from datetime import timedelta
-from django.db.models import Sum, Count, Q
+from django.conf import settings
+from django.core.cache import cache
 from accounts.permissions import IsCoordinatorOrAbove
+from core.counting import track_counts
+from core.pagination import CustomPageNumberPagination
+from core.server_timing import ServerTiming
 from .models import ContractInstallment, ContractAmendment, Contract
-from employee.utils.access_control import get_employee_queryset
+from employee.utils.access_control import filter_by_inspector_scope, get_employee_queryset
 from employee.models import Employee
+from .services.dashboard_stats import build_dashboard_stats, resolve_dashboard_scope
 from .serializers import (
     ContractInstallmentSerializer,
     ContractAmendmentSerializer,
@@ -22,6 +25,7 @@ from .utils.messages import (
     CONTRACT_AMENDMENTS_MESSAGES,
 )
 
+track_counts(Contract)
 
 
 @extend_schema(tags=['Contratos'])
@@ -29,12 +33,10 @@ class ContractListAPIView(generics.ListAPIView):
     queryset = Contract.objects.all()
     serializer_class = ContractSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CustomPageNumberPagination
 
     def get_queryset(self):
-        from django.db.models import Q
-        employee_qs = get_employee_queryset(self.request.user, Employee.objects.all())
-
-        queryset = (Contract.objects
+        queryset = filter_by_inspector_scope(self.request.user, Contract.objects
             .select_related(
                 'budget_line__budget__management_center',
                 'main_inspector__direction',
@@ -47,10 +49,6 @@ class ContractListAPIView(generics.ListAPIView):
                 'updated_by',
             )
             .prefetch_related('installments', 'amendments')
-            .filter(
-                Q(main_inspector__in=employee_qs) | Q(substitute_inspector__in=employee_qs)
-            )
-            .distinct()
         )
 
         status_filter = self.request.query_params.get('status', None)
@@ -97,8 +95,7 @@ class ContractCreateAPIView(generics.CreateAPIView):
 
     def get_queryset(self):
 
-        employee_qs = get_employee_queryset(self.request.user, Employee.objects.all())
-        return Contract.objects.filter(main_inspector__in=employee_qs) | Contract.objects.filter(substitute_inspector__in=employee_qs)
+        return filter_by_inspector_scope(self.request.user, Contract.objects.all())
 
 
 @extend_schema(tags=['Contratos'])
@@ -109,8 +106,7 @@ class ContractRetrieveAPIView(generics.RetrieveAPIView):
 
     def get_queryset(self):
 
-        employee_qs = get_employee_queryset(self.request.user, Employee.objects.all())
-        return Contract.objects.filter(main_inspector__in=employee_qs) | Contract.objects.filter(substitute_inspector__in=employee_qs)
+        return filter_by_inspector_scope(self.request.user, Contract.objects.all())
 
 
 @extend_schema(tags=['Contratos'])
@@ -289,206 +285,20 @@ def dashboard_stats(request):
     Retorna métricas consolidadas para o dashboard principal.
     Filtra automaticamente pelo escopo hierárquico do usuário.
     Usuários com acesso total recebem estatísticas executivas adicionais (admin_stats).
-    """
-    today = timezone.now().date()
-    user = request.user
-
-    # --- Scope determination ---
-    is_superuser = user.is_superuser
-    try:
-        user_group = user.groups.values_list('name', flat=True).first() if not is_superuser else 'PRESIDENTE'
-    except Exception:
-        user_group = None
-
-    full_access = is_superuser or user_group == 'PRESIDENTE'
-    scope_level = 'admin' if is_superuser else (user_group or 'FUNCIONARIO').lower()
-
-    emp = getattr(user, 'employee', None)
-    if full_access:
-        scope_name = 'Sistema'
-    elif user_group == 'DIRETOR' and emp and emp.direction:
-        scope_name = str(emp.direction)
-    elif user_group == 'GERENTE' and emp and emp.management:
-        scope_name = str(emp.management)
-    elif emp and emp.coordination:
-        scope_name = str(emp.coordination)
-    else:
-        scope_name = 'Sem escopo'
-
-    employee_qs = get_employee_queryset(user, Employee.objects.all())
-
-    base_qs = Contract.objects.filter(
-        Q(main_inspector__in=employee_qs) | Q(substitute_inspector__in=employee_qs)
-    ).distinct()
-
-    total = base_qs.count()
-    ativos = base_qs.filter(status='ATIVO').count()
-    encerrados = base_qs.filter(status='ENCERRADO').count()
-    expiring_30 = base_qs.filter(
-        status='ATIVO',
-        expiration_date__gte=today,
-        expiration_date__lte=today + timedelta(days=30),
-    ).count()
-    expired = base_qs.filter(
-        status='ATIVO',
-        expiration_date__lt=today,
-    ).count()
-
-    expiring_list = list(
-        base_qs.filter(
-            status='ATIVO',
-            expiration_date__gte=today,
-            expiration_date__lte=today + timedelta(days=30),
-        )
-        .select_related('main_inspector')
-        .order_by('expiration_date')
-        .values(
-            'protocol_number', 'description', 'expiration_date',
-            'current_value', 'main_inspector__full_name',
-        )[:10]
-    )
-
-    recent_list = list(
-        base_qs.filter(created_at__gte=today - timedelta(days=7))
-        .order_by('-created_at')
-        .values('protocol_number', 'description', 'original_value', 'created_at')[:5]
-    )
-
-    status_breakdown = [
-        {'name': 'Ativos', 'value': ativos},
-        {'name': 'Encerrados', 'value': encerrados},
-        {'name': 'Vencidos', 'value': expired},
-    ]
-
-    # Scoped employee count
-    total_employees = employee_qs.filter(status='ATIVO').count()
-
-    # Scoped budget total
-    from budget.models import Budget
-    if full_access:
-        budget_agg = Budget.objects.aggregate(total=Sum('total_amount'))
-    elif user_group == 'DIRETOR' and emp and emp.direction:
-        budget_agg = Budget.objects.filter(management_center__direction=emp.direction).aggregate(total=Sum('total_amount'))
-    elif user_group == 'GERENTE' and emp and emp.management:
-        budget_agg = Budget.objects.filter(management_center__management=emp.management).aggregate(total=Sum('total_amount'))
-    elif emp and emp.coordination:
-        budget_agg = Budget.objects.filter(management_center__coordination=emp.coordination).aggregate(total=Sum('total_amount'))
-    else:
-        budget_agg = {'total': 0}
 
-    # Scoped aids count
-    from aid.models import Assistance
-    if full_access:
-        total_aids = Assistance.objects.count()
+    A resposta fica em cache por escopo (CONTRACT_DASHBOARD_CACHE_TTL) e traz as
+    durações das etapas no cabeçalho Server-Timing.
+    """
+    timing = ServerTiming()
+    with timing('scope'):
+        scope = resolve_dashboard_scope(request.user)
+
+    response_data = cache.get(scope.cache_key)
+    if response_data is None:
+        timing.add('cache', desc='miss')
+        response_data = build_dashboard_stats(scope, timing)
+        cache.set(scope.cache_key, response_data, settings.CONTRACT_DASHBOARD_CACHE_TTL)
     else:
-        total_aids = Assistance.objects.filter(employee__in=employee_qs).count()
-
-    response_data = {
-        'scope_level': scope_level,
-        'full_access': full_access,
-        'scope_name': scope_name,
-        'contracts': {
-            'total': total,
-            'active': ativos,
-            'closed': encerrados,
-            'expiring_30_days': expiring_30,
-            'expired': expired,
-        },
-        'employees': {'active': total_employees},
-        'budget': {'total': float(budget_agg['total'] or 0)},
-        'aids': {'total': total_aids},
-        'expiring_contracts': expiring_list,
-        'recent_contracts': recent_list,
-        'status_breakdown': status_breakdown,
-    }
-
-    # --- Extra stats for DIRETOR and GERENTE (scoped top fiscais) ---
-    if not full_access and user_group in ('DIRETOR', 'GERENTE'):
-        from django.db.models import Count as DbCount
-        top_fiscais_scoped = list(
-            employee_qs.annotate(
-                contract_count=DbCount(
-                    'contracts_main_inspector',
-                    filter=Q(contracts_main_inspector__status='ATIVO'),
-                    distinct=True,
-                )
-            ).filter(contract_count__gt=0)
-            .order_by('-contract_count')[:5]
-            .values('full_name', 'position', 'contract_count')
-        )
-        response_data['extra_stats'] = {'top_fiscais': top_fiscais_scoped}
-
-    # --- Extra stats for full-access users (admin/presidente) ---
-    if full_access:
-        from django.db.models import Count as DbCount
-        from django.contrib.auth import get_user_model
-        UserModel = get_user_model()
-
-        users_total = UserModel.objects.filter(is_active=True).count()
-
-        # Top 10 fiscais by active contract count
-        top_fiscais = list(
-            Employee.objects.annotate(
-                contract_count=DbCount(
-                    'contracts_main_inspector',
-                    filter=Q(contracts_main_inspector__status='ATIVO'),
-                    distinct=True,
-                )
-            ).filter(contract_count__gt=0)
-            .order_by('-contract_count')[:10]
-            .values('full_name', 'position', 'contract_count')
-        )
-
-        # Top 10 contracts by current value (active)
-        top_contracts = list(
-            Contract.objects.filter(status='ATIVO')
-            .order_by('-current_value')[:10]
-            .values('protocol_number', 'description', 'current_value', 'main_inspector__full_name')
-        )
-
-        # Budget breakdown by category
-        budget_by_category = list(
-            Budget.objects.values('category').annotate(
-                total=Sum('total_amount'),
-                available=Sum('available_amount'),
-                count=DbCount('id'),
-            ).order_by('category')
-        )
-
-        budget_totals = Budget.objects.aggregate(
-            total=Sum('total_amount'),
-            available=Sum('available_amount'),
-        )
-
-        no_end_date = Contract.objects.filter(status='ATIVO', end_date__isnull=True).count()
-
-        from budgetline.models import BudgetLine
-        lines_agg = BudgetLine.objects.aggregate(
-            total=DbCount('id'),
-            active=DbCount('id', filter=Q(status='ATIVO')),
-        )
+        timing.add('cache', desc='hit')
 
-        response_data['admin_stats'] = {
-            'users_total': users_total,
-            'top_fiscais': top_fiscais,
-            'top_contracts_by_value': [
-                {**c, 'current_value': float(c['current_value'])}
-                for c in top_contracts
-            ],
-            'budget_by_category': [
-                {
-                    'category': b['category'],
-                    'total': float(b['total'] or 0),
-                    'available': float(b['available'] or 0),
-                    'count': b['count'],
-                }
-                for b in budget_by_category
-            ],
-            'budget_total': float(budget_totals['total'] or 0),
-            'budget_available': float(budget_totals['available'] or 0),
-            'contracts_without_end_date': no_end_date,
-            'lines_total': lines_agg['total'],
-            'lines_active': lines_agg['active'],
-        }
-
-    return Response(response_data)
+    return timing.apply(Response(response_data))
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+# Settings dependentes da interface (core/database.py: CONN_MAX_AGE padrão 0 no ASGI)
+os.environ.setdefault('SERVER_INTERFACE', 'asgi')
 
 application = get_asgi_application()
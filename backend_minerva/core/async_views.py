@@ -0,0 +1,52 @@
+"""
+APIView do DRF com handlers async.
+
+O DRF 3.16 só despacha handlers síncronos: com `async def post` o APIView devolve
+uma coroutine no lugar da Response. AsyncAPIView mantém o que as views do projeto
+esperam do DRF — autenticação (JWT com blacklist), permissões, throttles,
+negociação de conteúdo, formato de erro do exception handler e schema do
+drf-spectacular — e só troca o despacho:
+
+    initial()   autenticação/permissões/throttles tocam o ORM: sync_to_async
+    handler     aguardado no event loop (sob ASGI não prende thread esperando o LLM)
+
+Uso:
+    @extend_schema(tags=['IA'])
+    class AliceAgentChatView(AsyncAPIView):
+        permission_classes = [permissions.IsAuthenticated]
+
+        async def post(self, request):
+            ...
+"""
+import inspect
+
+from asgiref.sync import sync_to_async
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """APIView cujos handlers (get, post...) são `async def`."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if inspect.isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
@@ -0,0 +1,204 @@
+"""
+Backend de cache em duas camadas: LocMem do processo (L1) na frente do Redis (L2).
+
+O L2 é o cache compartilhado entre os workers do gunicorn e do Celery; o L1 guarda
+por poucos segundos (L1_TIMEOUT) o que o processo acabou de ler ou gravar, para
+que chaves quentes não custem uma ida ao Redis a cada uso. Escritas do próprio
+processo atualizam o L1 na hora; escritas de outros processos aparecem em até
+L1_TIMEOUT segundos.
+
+Chaves em que esse atraso é um problema de segurança — blacklist de JWT, escopo de
+acesso, versões de namespace (que invalidam o resto) — casam com os padrões de
+L1_EXCLUDE (fnmatch sobre a chave crua) e vão sempre ao Redis: um logout ou uma
+permissão revogada valem na próxima requisição de qualquer worker. Com o Redis
+fora do ar elas também ficam só no L1, como as demais.
+
+Operações atômicas (add, incr, decr) são sempre resolvidas no L2 — é nelas que se
+apoiam os locks contra stampede (core.caching) e as versões de namespace.
+
+Se o Redis estiver fora do ar, o backend registra um aviso, passa a usar só o L1
+(com a validade pedida) e tenta o Redis de novo após FAILURE_BACKOFF segundos —
+a aplicação continua funcionando como com o LocMem padrão do Django.
+
+Configuração (core/settings.py):
+    CACHES = {'default': {
+        'BACKEND': 'core.cache_backends.TieredCache',
+        'LOCATION': 'redis://localhost:6379/1',
+        'OPTIONS': {
+            'L1_TIMEOUT': 5, 'L1_MAX_ENTRIES': 5000, 'FAILURE_BACKOFF': 30,
+            'L1_EXCLUDE': ['jwt:blacklist:*', 'access_scope:*', '*:version'],
+        },
+    }}
+"""
+import logging
+import time
+from fnmatch import fnmatchcase
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TieredCache(BaseCache):
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        options = dict(params.get('OPTIONS') or {})
+        self._l1_timeout = options.pop('L1_TIMEOUT', 5)
+        l1_max_entries = options.pop('L1_MAX_ENTRIES', 5000)
+        self._failure_backoff = options.pop('FAILURE_BACKOFF', 30)
+        self._l1_exclude = tuple(options.pop('L1_EXCLUDE', ()))
+        self._down_until = 0.0
+
+        # Prefixo/versão/função de chave ficam nas camadas; a própria TieredCache repassa as chaves cruas
+        layer_params = {
+            key: value for key, value in params.items()
+            if key in ('KEY_PREFIX', 'VERSION', 'KEY_FUNCTION', 'TIMEOUT')
+        }
+        self._l1 = LocMemCache(
+            f'tiered-l1:{server}',
+            {**layer_params, 'OPTIONS': {'MAX_ENTRIES': l1_max_entries, 'CULL_FREQUENCY': 3}},
+        )
+        self._l2 = None
+        if server:
+            from django.core.cache.backends.redis import RedisCache
+
+            options.setdefault('socket_connect_timeout', 0.5)
+            options.setdefault('socket_timeout', 0.5)
+            self._l2 = RedisCache(server, {**layer_params, 'OPTIONS': options})
+
+    # ------------------------------------------------------------------
+    # L2 com recuo em caso de falha
+    # ------------------------------------------------------------------
+
+    def _l2_available(self) -> bool:
+        return self._l2 is not None and time.monotonic() >= self._down_until
+
+    def _l2_call(self, method, *args, **kwargs):
+        """Chama o Redis; devolve _MISSING (e recua por FAILURE_BACKOFF) se ele falhar."""
+        if not self._l2_available():
+            return _MISSING
+        try:
+            return getattr(self._l2, method)(*args, **kwargs)
+        except ValueError:
+            raise
+        except Exception as exc:
+            self._down_until = time.monotonic() + self._failure_backoff
+            logger.warning(
+                "Cache L2 (Redis) indisponível — usando só a memória do processo por %ss: %s",
+                self._failure_backoff, exc,
+            )
+            return _MISSING
+
+    def _skips_l1(self, key) -> bool:
+        """Chave de L1_EXCLUDE com o Redis no ar: lida e gravada só no L2."""
+        return self._l2_available() and any(fnmatchcase(key, pattern) for pattern in self._l1_exclude)
+
+    def _l1_timeout_for(self, timeout):
+        if not self._l2_available():
+            return timeout
+        timeout = self._l1.get_backend_timeout(timeout)
+        if timeout is None:
+            return self._l1_timeout
+        return max(min(timeout - time.time(), self._l1_timeout), 0)
+
+    # ------------------------------------------------------------------
+    # API do BaseCache
+    # ------------------------------------------------------------------
+
+    def get(self, key, default=None, version=None):
+        if self._skips_l1(key):
+            value = self._l2_call('get', key, _MISSING, version=version)
+            if value is not _MISSING:
+                return value
+            # Ausente no Redis ou Redis caiu agora: no segundo caso vale o que o L1 tiver
+            return default if self._l2_available() else self._l1.get(key, default, version=version)
+
+        value = self._l1.get(key, _MISSING, version=version)
+        if value is not _MISSING:
+            return value
+        value = self._l2_call('get', key, _MISSING, version=version)
+        if value is _MISSING:
+            return default
+        self._l1.set(key, value, self._l1_timeout, version=version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._l2_call('set', key, value, timeout, version=version)
+        if self._skips_l1(key):
+            return
+        self._l1.set(key, value, self._l1_timeout_for(timeout), version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self._l2_call('add', key, value, timeout, version=version)
+        if added is _MISSING:
+            return self._l1.add(key, value, timeout, version=version)
+        if added and not self._skips_l1(key):
+            self._l1.set(key, value, self._l1_timeout_for(timeout), version=version)
+        else:
+            self._l1.delete(key, version=version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        touched = self._l2_call('touch', key, timeout, version=version)
+        if touched is _MISSING:
+            return self._l1.touch(key, timeout, version=version)
+        self._l1.delete(key, version=version)
+        return touched
+
+    def delete(self, key, version=None):
+        deleted = self._l2_call('delete', key, version=version)
+        deleted_l1 = self._l1.delete(key, version=version)
+        return deleted_l1 if deleted is _MISSING else deleted
+
+    def incr(self, key, delta=1, version=None):
+        value = self._l2_call('incr', key, delta, version=version)
+        if value is _MISSING:
+            return self._l1.incr(key, delta, version=version)
+        if not self._skips_l1(key):
+            self._l1.set(key, value, self._l1_timeout, version=version)
+        return value
+
+    def has_key(self, key, version=None):
+        return self.get(key, _MISSING, version=version) is not _MISSING
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        bypass = [key for key in keys if self._skips_l1(key)]
+        found = self._l1.get_many([key for key in keys if key not in bypass], version=version)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            from_l2 = self._l2_call('get_many', missing, version=version)
+            if from_l2 is _MISSING:
+                found.update(self._l1.get_many(bypass, version=version))
+            elif from_l2:
+                self._l1.set_many(
+                    {key: value for key, value in from_l2.items() if key not in bypass},
+                    self._l1_timeout, version=version,
+                )
+                found.update(from_l2)
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        self._l2_call('set_many', data, timeout, version=version)
+        self._l1.set_many(
+            {key: value for key, value in data.items() if not self._skips_l1(key)},
+            self._l1_timeout_for(timeout), version=version,
+        )
+        return []
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self._l2_call('delete_many', keys, version=version)
+        self._l1.delete_many(keys, version=version)
+
+    def clear(self):
+        self._l2_call('clear')
+        self._l1.clear()
+
+    def close(self, **kwargs):
+        if self._l2 is not None:
+            self._l2.close(**kwargs)
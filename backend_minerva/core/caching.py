@@ -0,0 +1,185 @@
+"""
+Cache-aside com chaves versionadas por namespace e proteção contra stampede.
+
+Chaves: `<namespace>:v<versão>:<partes...>`. Invalidar um namespace é incrementar
+a versão (`bump_namespace`) — as entradas antigas deixam de ser lidas e expiram
+pelo TTL, sem varrer chaves no Redis.
+
+Stampede: numa falta, só quem obtém o lock (`cache.add`, atômico no Redis) monta o
+valor; os demais aguardam até CACHE_STAMPEDE_WAIT segundos pelo resultado e só
+então montam por conta própria.
+
+Uso:
+    payload = get_or_compute(make_key('budget_form', 'metadata'), build, timeout=300)
+
+    @cached_query('employees', models=[Employee], timeout=120)
+    def active_employee_count(direction_id): ...
+
+    @api_view(['GET'])
+    @cached_view('budget_form', models=[ManagementCenter])
+    def budget_form_metadata(request): ...
+
+Os decoradores invalidam o namespace na hora e no commit de qualquer escrita
+(post_save, post_delete, m2m_changed) nos modelos informados.
+"""
+import hashlib
+import logging
+import time
+from functools import wraps
+from typing import Any, Callable, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+logger = logging.getLogger(__name__)
+
+_VERSION_KEY = "{namespace}:version"
+_LOCK_KEY = "{key}:lock"
+_MISSING = object()
+
+# Namespaces já ligados aos sinais de cada modelo (evita receptores duplicados)
+_watched: set = set()
+
+
+def namespace_version(namespace: str) -> int:
+    key = _VERSION_KEY.format(namespace=namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, None)
+        version = cache.get(key) or 1
+    return version
+
+
+def _incr_version(namespace: str) -> None:
+    key = _VERSION_KEY.format(namespace=namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, None)
+
+
+def bump_namespace(namespace: str, immediate: bool = False) -> None:
+    """Nova versão do namespace no commit (e também agora, se `immediate`)."""
+    if immediate:
+        _incr_version(namespace)
+    transaction.on_commit(lambda: _incr_version(namespace))
+
+
+def make_key(namespace: str, *parts: Any) -> str:
+    return ':'.join([namespace, f'v{namespace_version(namespace)}', *(str(part) for part in parts)])
+
+
+def _digest(*parts: Any) -> str:
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def get_or_compute(key: str, compute: Callable[[], Any], timeout: Optional[int] = None) -> Any:
+    """Lê `key`; numa falta, monta com `compute` sob lock para um único worker recalcular."""
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    timeout = timeout if timeout is not None else getattr(settings, 'CACHE_DEFAULT_TTL', 300)
+    lock_key = _LOCK_KEY.format(key=key)
+    if cache.add(lock_key, 1, getattr(settings, 'CACHE_STAMPEDE_LOCK_TIMEOUT', 30)):
+        try:
+            value = compute()
+            cache.set(key, value, timeout)
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    deadline = time.monotonic() + getattr(settings, 'CACHE_STAMPEDE_WAIT', 5)
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+    logger.debug("Cache %s: lock ocupado além da espera, montando sem aguardar", key)
+    value = compute()
+    cache.set(key, value, timeout)
+    return value
+
+
+def watch_models(namespace: str, models: Iterable) -> None:
+    """Invalida `namespace` a cada escrita nos `models`."""
+    for model in models:
+        if (namespace, model) in _watched:
+            continue
+        _watched.add((namespace, model))
+
+        def receiver(sender, namespace=namespace, **kwargs):
+            if kwargs.get('action', 'post_').startswith('post_'):
+                # Agora (leituras na mesma transação) e no commit (leituras concorrentes)
+                bump_namespace(namespace, immediate=True)
+
+        uid = f'core.caching:{namespace}:{model._meta.label}'
+        post_save.connect(receiver, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(receiver, sender=model, weak=False, dispatch_uid=uid)
+        for field in model._meta.many_to_many:
+            m2m_changed.connect(receiver, sender=field.remote_field.through, weak=False, dispatch_uid=uid)
+
+
+def cached_query(namespace: str, models: Iterable = (), timeout: Optional[int] = None):
+    """Cache-aside de uma função pura dos argumentos (ex: agregações)."""
+    def decorator(func):
+        watch_models(namespace, models)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(namespace, func.__qualname__, _digest(args, sorted(kwargs.items())))
+            return get_or_compute(key, lambda: func(*args, **kwargs), timeout)
+
+        wrapper.invalidate = lambda: bump_namespace(namespace, immediate=True)
+        return wrapper
+    return decorator
+
+
+class _Uncacheable(Exception):
+    """Resposta que não vai para o cache (status diferente de 200)."""
+
+    def __init__(self, response):
+        super().__init__(response.status_code)
+        self.response = response
+
+
+def cached_view(namespace: str, models: Iterable = (), timeout: Optional[int] = None,
+                vary_on: Optional[Callable] = None):
+    """Cache-aside de uma view GET do DRF: guarda `response.data` das respostas 200.
+
+    A chave usa o caminho + query string e, se informado, `vary_on(request)` — ex:
+    o escopo de acesso do usuário. Sem `vary_on` a resposta é a mesma para todos.
+    Aplicar abaixo de `@api_view`/`@permission_classes`.
+    """
+    def decorator(view):
+        watch_models(namespace, models)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            from rest_framework.response import Response
+
+            if request.method != 'GET':
+                return view(request, *args, **kwargs)
+
+            variant = vary_on(request) if vary_on else None
+            key = make_key(namespace, view.__qualname__, _digest(request.get_full_path(), variant))
+            built = []
+
+            def build():
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    raise _Uncacheable(response)
+                built.append(response)
+                return response.data
+
+            try:
+                data = get_or_compute(key, build, timeout)
+            except _Uncacheable as exc:
+                return exc.response
+            return built[0] if built else Response(data)
+
+        return wrapper
+    return decorator
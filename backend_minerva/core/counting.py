@@ -0,0 +1,131 @@
+"""
+Contagens rápidas para as listagens paginadas.
+
+O COUNT(*) exato percorre o resultado inteiro; numa tabela grande ele custa mais
+que a própria página. Aqui o total sai, em ordem de preferência, de:
+
+    sem filtros      contador da tabela: `pg_class.reltuples` no PostgreSQL
+                     (atualizado pelo autovacuum/ANALYZE) ou, sem estatística
+                     e nos demais bancos, um contador no cache mantido pelos
+                     sinais de post_save/post_delete (ver `track_counts`)
+    com filtros      estimativa do planejador (EXPLAIN); se ela ficar abaixo de
+                     COUNT_EXACT_THRESHOLD o COUNT(*) é barato e é feito exato
+
+Fora do PostgreSQL só o contador da tabela é usado; filtros fazem COUNT(*) exato.
+
+Uso:
+    track_counts(Employee)                 # no import das views, como @cached_view
+    total, exact = fast_count(queryset)
+"""
+import json
+import logging
+from typing import Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save
+
+logger = logging.getLogger(__name__)
+
+_COUNTER_KEY = "counts:{label}"
+
+
+def _exact_threshold() -> int:
+    return getattr(settings, 'COUNT_EXACT_THRESHOLD', 10000)
+
+
+def _counter_key(model) -> str:
+    return _COUNTER_KEY.format(label=model._meta.label_lower)
+
+
+def estimated_count(queryset) -> int:
+    """Linhas previstas pelo planejador no PostgreSQL; COUNT(*) nos demais bancos."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    try:
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    except EmptyResultSet:
+        # `pk__in=[]` e afins: o Django nem monta o SQL, o resultado é vazio
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def _reltuples(model, using) -> int:
+    """Estimativa do catálogo; -1 se a tabela ainda não foi analisada."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+            [connections[using].ops.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    return row[0] if row and row[0] is not None else -1
+
+
+def table_count(model, using: str = 'default') -> Tuple[int, bool]:
+    """(total da tabela, exato?) sem COUNT(*) no caminho da requisição."""
+    if connections[using].vendor == 'postgresql':
+        estimate = _reltuples(model, using)
+        if estimate >= _exact_threshold():
+            return estimate, False
+
+    key = _counter_key(model)
+    total = cache.get(key)
+    if total is None:
+        total = model._default_manager.using(using).count()
+        cache.add(key, total, getattr(settings, 'COUNT_CACHE_TTL', 300))
+    return total, True
+
+
+def _is_unfiltered(queryset) -> bool:
+    query = queryset.query
+    return not query.where and not query.distinct and not query.is_sliced and not query.combinator
+
+
+def fast_count(queryset) -> Tuple[int, bool]:
+    """(total, exato?) do queryset pelo caminho mais barato que ainda seja correto."""
+    # .none() (usuário sem escopo): não há SQL para estimar
+    if queryset.query.is_empty():
+        return 0, True
+    if _is_unfiltered(queryset):
+        return table_count(queryset.model, queryset.db)
+
+    if connections[queryset.db].vendor == 'postgresql':
+        estimate = estimated_count(queryset)
+        if estimate >= _exact_threshold():
+            return estimate, False
+    return queryset.count(), True
+
+
+def _adjust(model, delta: int) -> None:
+    try:
+        cache.incr(_counter_key(model), delta)
+    except ValueError:
+        # Contador ainda não montado (ou expirado): a próxima leitura faz o COUNT(*)
+        pass
+
+
+def track_counts(*models) -> None:
+    """Mantém o contador de `table_count` em dia nas criações e exclusões.
+
+    Escritas em massa (bulk_create, QuerySet.delete/update) não disparam sinais;
+    o COUNT_CACHE_TTL limita quanto tempo o contador pode ficar defasado.
+    """
+    for model in models:
+        def on_save(sender, created, **kwargs):
+            if created:
+                transaction.on_commit(lambda: _adjust(sender, 1))
+
+        def on_delete(sender, **kwargs):
+            transaction.on_commit(lambda: _adjust(sender, -1))
+
+        uid = f'core.counting:{model._meta.label}'
+        post_save.connect(on_save, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(on_delete, sender=model, weak=False, dispatch_uid=uid)
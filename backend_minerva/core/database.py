@@ -0,0 +1,112 @@
+"""
+Gestão de conexões com o banco por tipo de processo (web, worker do Celery, beat).
+
+Sem configuração, o Django abre e fecha uma conexão por requisição — no Postgres
+isso custa TLS, autenticação e um processo novo no servidor a cada request.
+Dois modos, escolhidos por variável de ambiente (ver core/settings.py):
+
+    conexões persistentes   CONN_MAX_AGE > 0 + CONN_HEALTH_CHECKS: a conexão da
+                            thread é reaproveitada entre requisições/tarefas e
+                            testada antes do reuso depois de um erro; padrão no
+                            WSGI e nos processos do Celery
+    pool do psycopg 3       DATABASE_POOL=True (só Postgres; requer
+                            `psycopg[binary,pool]`, já no requirements.txt): cada
+                            processo mantém um pool; padrão no ASGI, onde views
+                            async e threads auxiliares (relatórios da Alice) não
+                            passam pelo fechamento de conexões do fim da requisição
+
+No ASGI (o Dockerfile sobe gunicorn com UvicornWorker) o padrão de CONN_MAX_AGE é
+0: o ORM das views async roda em threads do asgiref, e uma conexão persistente
+presa a cada uma dessas threads fica aberta sem ser fechada nem reaproveitada —
+a documentação do Django manda desligar a persistência no modo async. Quem
+reaproveita conexões no ASGI é o pool, ligado por padrão (DATABASE_POOL=False volta
+a abrir uma conexão por requisição).
+
+O tamanho do pool é por processo: gunicorn com 4 workers e max 10 pode abrir 40
+conexões; some web + workers do Celery (× concurrency) + beat e mantenha abaixo do
+max_connections do Postgres.
+"""
+import sys
+from typing import Any, Dict, Optional, Sequence
+
+ROLE_WEB = 'web'
+ROLE_WORKER = 'worker'
+ROLE_BEAT = 'beat'
+
+INTERFACE_WSGI = 'wsgi'
+INTERFACE_ASGI = 'asgi'
+
+# CONN_MAX_AGE padrão (segundos) por interface do servidor
+DEFAULT_CONN_MAX_AGE = {
+    INTERFACE_WSGI: 60,
+    INTERFACE_ASGI: 0,
+}
+
+# DATABASE_POOL padrão por interface do servidor (só tem efeito no Postgres)
+DEFAULT_DATABASE_POOL = {
+    INTERFACE_WSGI: False,
+    INTERFACE_ASGI: True,
+}
+
+_ASGI_SERVERS = ('uvicorn', 'daphne', 'hypercorn')
+
+# (min_size, max_size) padrão do pool por tipo de processo
+DEFAULT_POOL_SIZES = {
+    ROLE_WEB: (2, 10),
+    ROLE_WORKER: (1, 4),
+    ROLE_BEAT: (1, 2),
+}
+
+
+def detect_process_role(argv: Optional[Sequence[str]] = None) -> str:
+    """web, worker ou beat, a partir da linha de comando (`celery -A core worker|beat`)."""
+    argv = list(sys.argv if argv is None else argv)
+    # `celery ...` ou `python -m celery ...` (argv[0] = .../celery/__main__.py)
+    if not argv or 'celery' not in argv[0]:
+        return ROLE_WEB
+    if 'beat' in argv:
+        return ROLE_BEAT
+    return ROLE_WORKER
+
+
+def detect_server_interface(argv: Optional[Sequence[str]] = None) -> str:
+    """asgi quando a linha de comando sobe um servidor ASGI (core.asgi, uvicorn...), senão wsgi.
+
+    core/asgi.py também define SERVER_INTERFACE=asgi antes de carregar os settings.
+    """
+    argv = list(sys.argv if argv is None else argv)
+    command = ' '.join(argv).lower()
+    if 'asgi' in command or any(server in command for server in _ASGI_SERVERS):
+        return INTERFACE_ASGI
+    return INTERFACE_WSGI
+
+
+def connection_settings(
+    engine: str,
+    role: str,
+    *,
+    conn_max_age: int,
+    health_checks: bool,
+    pool: bool,
+    pool_sizes: Dict[str, tuple],
+    pool_timeout: float,
+) -> Dict[str, Any]:
+    """Chaves CONN_MAX_AGE / CONN_HEALTH_CHECKS / OPTIONS de DATABASES['default']."""
+    if not (pool and 'postgresql' in engine):
+        return {'CONN_MAX_AGE': conn_max_age, 'CONN_HEALTH_CHECKS': health_checks, 'OPTIONS': {}}
+
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        from django.core.exceptions import ImproperlyConfigured
+        raise ImproperlyConfigured(
+            'DATABASE_POOL=True requer psycopg 3 com pool: pip install "psycopg[binary,pool]"'
+        )
+
+    min_size, max_size = pool_sizes[role]
+    # O Django recusa CONN_MAX_AGE > 0 junto com o pool: quem reaproveita é o pool
+    return {
+        'CONN_MAX_AGE': 0,
+        'CONN_HEALTH_CHECKS': False,
+        'OPTIONS': {'pool': {'min_size': min_size, 'max_size': max_size, 'timeout': pool_timeout}},
+    }
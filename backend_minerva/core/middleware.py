@@ -1,132 +1,137 @@
-from django.http import JsonResponse
+import json
+import logging
+import re
+
+from django.http import HttpResponse
 from django.contrib.auth.models import AnonymousUser
-from django.urls import resolve
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from accounts.models import BlacklistedToken
-import json
+from accounts.authentication import BlacklistJWTAuthentication, TokenBlacklisted
+
+logger = logging.getLogger(__name__)
+
+# Prefixos liberados sem token. Compilados uma vez numa única regex ancorada no
+# início do caminho, em vez de recriar a lista e percorrê-la a cada requisição.
+PUBLIC_PATH_PREFIXES = (
+    '/api/v1/accounts/login/',
+    '/api/v1/accounts/register/',
+    '/api/v1/accounts/token/',
+    '/api/v1/accounts/token/refresh/',
+    '/api/v1/accounts/token/verify/',
+    '/api/v1/accounts/password-reset/',
+    '/api/v1/accounts/password-reset-confirm/',
+    '/admin/',
+    '/static/',
+    '/media/',
+)
+
+
+def compile_prefixes(prefixes):
+    """Regex que casa qualquer um dos prefixos (os mais longos primeiro)."""
+    ordered = sorted(prefixes, key=len, reverse=True)
+    return re.compile('|'.join(re.escape(prefix) for prefix in ordered))
 
 
-class APIAuthenticationMiddleware:
+def _json_error(error, detail, status):
+    return status, json.dumps({'error': error, 'detail': detail, 'redirect': '/login'}).encode()
+
+
+# Corpos de erro fixos serializados uma vez; só "Token inválido" varia com a exceção
+_TOKEN_REQUIRED = _json_error(
+    'Token de autenticação necessário', 'Você precisa fazer login para acessar este recurso', 401,
+)
+_NOT_AUTHENTICATED = _json_error('Usuário não autenticado', 'Token inválido ou expirado', 401)
+_TOKEN_BLACKLISTED = _json_error('Token invalidado', 'Este token foi invalidado. Faça login novamente.', 401)
+_AUTH_ERROR = _json_error('Erro de autenticação', 'Erro interno no servidor', 500)
+
+
+def _error_response(prebuilt):
+    status, body = prebuilt
+    return HttpResponse(body, status=status, content_type='application/json')
+
+
+class APIAuthenticationMiddleware(MiddlewareMixin):
     """
     Middleware para proteger todas as rotas da API
     Redireciona para login se não autenticado
+
+    MiddlewareMixin torna os middlewares deste módulo compatíveis com ASGI:
+    sem eles síncronos na cadeia, views async (agente Alice) rodam no event loop.
     """
 
     def __init__(self, get_response):
-        self.get_response = get_response
-        self.jwt_authenticator = JWTAuthentication()
-
-    def __call__(self, request):
-
-        public_endpoints = [
-            '/api/v1/accounts/login/',
-            '/api/v1/accounts/register/',
-            '/api/v1/accounts/token/',
-            '/api/v1/accounts/token/refresh/',
-            '/api/v1/accounts/token/verify/',
-            '/api/v1/accounts/password-reset/',
-            '/api/v1/accounts/password-reset-confirm/',
-            '/admin/',
-            '/static/',
-            '/media/',
-        ]
-
-
-        if request.path.startswith('/api/'):
-
-            is_public = any(request.path.startswith(endpoint) for endpoint in public_endpoints)
-
-            if not is_public:
-
-                try:
-                    if not request.META.get('HTTP_AUTHORIZATION'):
-                        cookie_token = request.COOKIES.get('access') or request.COOKIES.get('access_token')
-                        if cookie_token:
-                            request.META['HTTP_AUTHORIZATION'] = f'Bearer {cookie_token}'
-
-                    user_auth_tuple = self.jwt_authenticator.authenticate(request)
-                    if user_auth_tuple is None:
-
-                        return JsonResponse({
-                            'error': 'Token de autenticação necessário',
-                            'detail': 'Você precisa fazer login para acessar este recurso',
-                            'redirect': '/login'
-                        }, status=401)
-
-                    user, token = user_auth_tuple
-                    if isinstance(user, AnonymousUser) or not user.is_authenticated:
-                        return JsonResponse({
-                            'error': 'Usuário não autenticado',
-                            'detail': 'Token inválido ou expirado',
-                            'redirect': '/login'
-                        }, status=401)
-
-
-                    if hasattr(token, 'token'):
-                        token_string = str(token.token)
-                        if BlacklistedToken.is_blacklisted(token_string):
-                            return JsonResponse({
-                                'error': 'Token invalidado',
-                                'detail': 'Este token foi invalidado. Faça login novamente.',
-                                'redirect': '/login'
-                            }, status=401)
-
-
-                    request.user = user
-
-                except (InvalidToken, TokenError) as e:
-                    return JsonResponse({
-                        'error': 'Token inválido',
-                        'detail': str(e),
-                        'redirect': '/login'
-                    }, status=401)
-                except Exception as e:
-                    import logging
-                    logger = logging.getLogger(__name__)
-                    logger.error(f"Erro no middleware de autenticação: {type(e).__name__}: {str(e)}", exc_info=True)
-                    return JsonResponse({
-                        'error': 'Erro de autenticação',
-                        'detail': 'Erro interno no servidor',
-                        'redirect': '/login'
-                    }, status=500)
-
-        response = self.get_response(request)
-        return response
-
-
-class HierarchicalPermissionMiddleware:
+        super().__init__(get_response)
+        # Mesma classe do DRF: o resultado fica na requisição e o DRF não autentica de novo
+        self.jwt_authenticator = BlacklistJWTAuthentication()
+        self.public_paths = compile_prefixes(PUBLIC_PATH_PREFIXES)
+
+    def process_request(self, request):
+        path = request.path
+        if not path.startswith('/api/') or self.public_paths.match(path):
+            return None
+
+        try:
+            if 'HTTP_AUTHORIZATION' not in request.META:
+                cookie_token = request.COOKIES.get('access') or request.COOKIES.get('access_token')
+                if cookie_token:
+                    request.META['HTTP_AUTHORIZATION'] = f'Bearer {cookie_token}'
+
+            user_auth_tuple = self.jwt_authenticator.authenticate(request)
+            if user_auth_tuple is None:
+                return _error_response(_TOKEN_REQUIRED)
+
+            user, token = user_auth_tuple
+            if isinstance(user, AnonymousUser) or not user.is_authenticated:
+                return _error_response(_NOT_AUTHENTICATED)
+
+            request.user = user
+
+        except TokenBlacklisted:
+            return _error_response(_TOKEN_BLACKLISTED)
+        except (InvalidToken, TokenError) as e:
+            return _error_response(_json_error('Token inválido', str(e), 401))
+        except Exception as e:
+            logger.error(f"Erro no middleware de autenticação: {type(e).__name__}: {str(e)}", exc_info=True)
+            return _error_response(_AUTH_ERROR)
+
+        return None
+
+
+class HierarchicalPermissionMiddleware(MiddlewareMixin):
     """
     Middleware para injetar filtros hierárquicos automaticamente em requisições da API
+
+    O filtro é sem estado, então uma instância serve todas as requisições; o escopo
+    de acesso do usuário só é resolvido (e memorizado) se alguém ler
+    `request.access_scope`.
     """
 
     def __init__(self, get_response):
-        self.get_response = get_response
-
-    def __call__(self, request):
+        super().__init__(get_response)
+        from accounts.mixins import HierarchicalFilterMixin
+        self.hierarchical_filter = HierarchicalFilterMixin()
 
-        if (request.path.startswith('/api/') and
-            hasattr(request, 'user') and
-            request.user.is_authenticated):
+    def process_request(self, request):
+        if not request.path.startswith('/api/'):
+            return None
 
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            from access_control.services import PermissionService
+            request.hierarchical_filter = self.hierarchical_filter
+            request.access_scope = SimpleLazyObject(lambda: PermissionService.context(user))
 
-            from accounts.mixins import HierarchicalFilterMixin
-            request.hierarchical_filter = HierarchicalFilterMixin()
+        return None
 
-        response = self.get_response(request)
-        return response
 
-
-class AdminAuthRedirectMiddleware:
+class AdminAuthRedirectMiddleware(MiddlewareMixin):
     """
     Middleware específico para o Django Admin
     Garante que usuários não autenticados sejam redirecionados para login
     """
 
-    def __init__(self, get_response):
-        self.get_response = get_response
-
-    def __call__(self, request):
+    def process_request(self, request):
 
         if request.path.startswith('/admin/') and not request.path.startswith('/admin/login/'):
 
@@ -136,5 +141,4 @@ class AdminAuthRedirectMiddleware:
                 login_url = reverse('admin:login')
                 return redirect(f"{login_url}?next={request.path}")
 
-        response = self.get_response(request)
-        return response
+        return None
@@ -1,10 +1,284 @@
-from rest_framework.pagination import PageNumberPagination
+"""
+Paginação das listagens.
+
+CustomPageNumberPagination é a paginação por número de página (LIMIT/OFFSET +
+COUNT(*)). Nas tabelas grandes o OFFSET lê e descarta todas as linhas anteriores
+e o COUNT percorre o resultado inteiro a cada página; para esses casos há o modo
+cursor (keyset), ativado pelo cliente com `?pagination=cursor` (ou ao seguir um
+link `next` que já traz `?cursor=`):
+
+    GET /api/v1/contract/contracts/?pagination=cursor&page_size=50
+    -> {"next": ".../?cursor=<opaco>&...", "previous": null, "results": [...]}
+
+A página seguinte é `WHERE (ordem) > (valores da última linha) LIMIT n` — custo
+constante com índice em (created_at, id), seja qual for a profundidade. A ordem
+é a de `?ordering=` quando o campo é aceito (não nulo; ver `keyset_ordering_fields`
+na view), senão `keyset_ordering` da view, senão `-created_at`; a pk é sempre o
+desempate. O cursor é assinado: não pode ser forjado nem reaproveitado em outra
+ordenação. `?with_total=true` inclui `count` (core.counting: estimado nas tabelas grandes).
+
+No modo por página o `count` também vem de core.counting (CountingPaginator):
+exato quando o resultado é pequeno, estimado acima de COUNT_EXACT_THRESHOLD.
+"""
+import datetime
+import json
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from core.counting import fast_count
+
+_CURSOR_SALT = 'core.pagination.keyset'
+_TRUE_VALUES = ('1', 'true', 'yes', 'sim')
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder corta datetimes em milissegundos; o cursor precisa do valor exato."""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPagination(BasePagination):
+    """Paginação por cursor (keyset) sobre a ordenação da listagem + pk."""
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    total_query_param = 'with_total'
+    ordering_query_param = 'ordering'
+    default_ordering = ('-created_at',)
+
+    @classmethod
+    def requested(cls, request) -> bool:
+        params = request.query_params
+        return cls.cursor_query_param in params or params.get(cls.mode_query_param) == 'cursor'
+
+    # ------------------------------------------------------------------
+    # Ordenação
+    # ------------------------------------------------------------------
+
+    def _keyset_field(self, model, name, allowed):
+        field_name = name.lstrip('-')
+        if field_name == 'pk':
+            return model._meta.pk
+        if allowed is not None and field_name not in allowed:
+            return None
+        try:
+            field = model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            return None
+        # Valores nulos não têm posição definida na comparação de tuplas
+        if not field.concrete or field.many_to_many or field.null:
+            return None
+        return field
+
+    def _resolve(self, model, names, allowed):
+        fields = [self._keyset_field(model, name, allowed) for name in names]
+        if not names or any(field is None for field in fields):
+            return None
+        return [(field, name.startswith('-')) for field, name in zip(fields, names)]
+
+    def get_ordering(self, request, queryset, view):
+        """[(campo, descendente)] terminando na pk."""
+        model = queryset.model
+        requested = request.query_params.get(self.ordering_query_param, '')
+        ordering = (
+            self._resolve(model, [name.strip() for name in requested.split(',') if name.strip()],
+                          getattr(view, 'keyset_ordering_fields', None))
+            or self._resolve(model, list(getattr(view, 'keyset_ordering', None) or self.default_ordering), None)
+            or []
+        )
+
+        pk = model._meta.pk
+        if not any(field == pk for field, _ in ordering):
+            ordering.append((pk, ordering[-1][1] if ordering else True))
+        return ordering
+
+    # ------------------------------------------------------------------
+    # Cursor
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _ordering_signature(ordering):
+        return [('-' if descending else '') + field.attname for field, descending in ordering]
+
+    def encode_cursor(self, ordering, instance):
+        values = [getattr(instance, field.attname) for field, _ in ordering]
+        payload = {
+            'o': self._ordering_signature(ordering),
+            'v': json.loads(json.dumps(values, cls=_CursorEncoder)),
+        }
+        return signing.dumps(payload, salt=_CURSOR_SALT, compress=True)
+
+    def decode_cursor(self, ordering, cursor):
+        try:
+            payload = signing.loads(cursor, salt=_CURSOR_SALT)
+            if payload['o'] != self._ordering_signature(ordering) or len(payload['v']) != len(ordering):
+                raise ValueError
+            return [field.to_python(value) for (field, _), value in zip(ordering, payload['v'])]
+        except Exception:
+            raise NotFound('Cursor inválido')
+
+    @staticmethod
+    def _after(ordering, values):
+        """(a, b, pk) > (va, vb, vpk) respeitando a direção de cada coluna."""
+        condition = Q()
+        for position in range(len(ordering)):
+            clause = Q()
+            for (field, _), value in zip(ordering[:position], values[:position]):
+                clause &= Q(**{field.attname: value})
+            field, descending = ordering[position]
+            lookup = 'lt' if descending else 'gt'
+            clause &= Q(**{f'{field.attname}__{lookup}': values[position]})
+            condition |= clause
+        return condition
+
+    # ------------------------------------------------------------------
+    # API do DRF
+    # ------------------------------------------------------------------
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        ordering = self.get_ordering(request, queryset, view)
+
+        self.total = None
+        if request.query_params.get(self.total_query_param, '').lower() in _TRUE_VALUES:
+            self.total, _ = fast_count(queryset)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self._after(ordering, self.decode_cursor(ordering, cursor)))
+
+        queryset = queryset.order_by(*[
+            ('-' if descending else '') + field.attname for field, descending in ordering
+        ])
+        # Uma linha a mais só para saber se existe próxima página
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        self.next_cursor = self.encode_cursor(ordering, self.page[-1]) if self.has_next else None
+        return self.page
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.mode_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        body = {'next': self.get_next_link(), 'previous': None, 'results': data}
+        if self.total is not None:
+            body = {'count': self.total, **body}
+        return Response(body)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'description': f'Estimado; só com ?{self.total_query_param}=true'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class _EstimatedPage(Page):
+    """Página cujo `has_next` vem da linha a mais buscada, não do total estimado."""
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class CountingPaginator(Paginator):
+    """Paginator cujo total vem de core.counting.fast_count.
+
+    Com total estimado as páginas não são limitadas por ele: cada página busca uma
+    linha a mais e o `next` depende dela, não de `num_pages`, então a última página
+    real continua acessível mesmo que a estimativa fique abaixo.
+    """
+
+    @cached_property
+    def _count(self):
+        return fast_count(self.object_list)
+
+    @property
+    def count(self):
+        return self._count[0]
+
+    @property
+    def count_is_exact(self):
+        return self._count[1]
+
+    def validate_number(self, number):
+        if self.count_is_exact:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Número de página inválido')
+        if number < 1:
+            raise EmptyPage('Número de página menor que 1')
+        return number
+
+    def page(self, number):
+        if self.count_is_exact:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('Página sem resultados')
+        return _EstimatedPage(rows[:self.per_page], number, self, has_next=len(rows) > self.per_page)
 
 
 class CustomPageNumberPagination(PageNumberPagination):
     """
-    Paginação customizada que permite ao cliente especificar o page_size
+    Paginação customizada que permite ao cliente especificar o page_size.
+    Com `?pagination=cursor` ou `?cursor=` passa para o modo keyset (KeysetPagination).
     """
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
+    django_paginator_class = CountingPaginator
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self._keyset = None
+        if self.keyset_class.requested(request):
+            self._keyset = self.keyset_class()
+            self._keyset.page_size = self.page_size
+            self._keyset.max_page_size = self.max_page_size
+            return self._keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if getattr(self, '_keyset', None) is not None:
+            return self._keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,250 @@
+"""
+Busca textual das listagens: documento desnormalizado por registro + índice trigram.
+
+Antes cada listagem fazia `icontains` em várias colunas (inclusive de tabelas
+relacionadas) — LIKE '%termo%' com curinga à esquerda, varredura sequencial.
+Agora cada modelo registrado guarda em `search_document` o texto pesquisável já
+normalizado (minúsculas, sem acentos: "João" e "joao" casam) e a busca é um
+`search_document LIKE '%palavra%'` por palavra. No PostgreSQL a coluna tem índice
+GIN `gin_trgm_ops` (extensão pg_trgm, criado nas migrações) que atende esse LIKE
+sem varrer a tabela, e os resultados vêm ordenados por `word_similarity`. Nos
+demais bancos o filtro é o mesmo, sem ranking.
+
+O documento é montado no save do próprio registro e refeito nos dependentes
+quando um campo relacionado muda (ex: renomear uma Direção atualiza os
+colaboradores dela). Escritas em massa (QuerySet.update, bulk_create) não
+disparam sinais — depois delas: `python manage.py rebuild_search_documents`.
+
+Uso:
+    register(Employee, ('full_name', 'cpf', 'direction__name'))   # em models.py
+
+    class EmployeeListView(generics.ListAPIView):
+        filter_backends = [DjangoFilterBackend, DocumentSearchFilter, filters.OrderingFilter]
+
+    search_queryset(User.objects.all(), q, fields=('email',))      # fora das views genéricas
+"""
+import unicodedata
+from functools import reduce
+from operator import and_, or_
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from django.db import connections
+from django.db.models import F, FloatField, Func, Q, Value
+from django.db.models.signals import post_save, pre_save
+from rest_framework.filters import SearchFilter
+
+DOCUMENT_FIELD = 'search_document'
+_BATCH_SIZE = 500
+
+# modelo -> caminhos dos campos que compõem o documento
+_registry: Dict[type, Tuple[str, ...]] = {}
+
+
+def normalize(text) -> str:
+    """Minúsculas, sem acentos e com espaços colapsados."""
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.casefold().split())
+
+
+def _resolve(instance, path: str):
+    value = instance
+    for part in path.split('__'):
+        value = getattr(value, part, None)
+        if value is None:
+            return None
+    return value
+
+
+def build_document(instance, paths: Sequence[str]) -> str:
+    """Texto pesquisável do registro (aceita modelos históricos das migrações)."""
+    values = (_resolve(instance, path) for path in paths)
+    return ' '.join(normalize(value) for value in values if value not in (None, ''))
+
+
+def _relations(paths: Sequence[str]) -> List[str]:
+    """Prefixos de relação usados nos caminhos (para o select_related)."""
+    prefixes = set()
+    for path in paths:
+        parts = path.split('__')[:-1]
+        prefixes.update('__'.join(parts[:size]) for size in range(1, len(parts) + 1))
+    return sorted(prefixes)
+
+
+def rebuild_documents(model, paths: Sequence[str], queryset=None) -> int:
+    """Recalcula o documento dos registros (todos, ou do `queryset`); devolve quantos mudaram."""
+    queryset = model._base_manager.all() if queryset is None else queryset
+    queryset = queryset.select_related(*_relations(paths)).order_by('pk')
+    changed, batch = 0, []
+    for instance in queryset.iterator(chunk_size=_BATCH_SIZE):
+        document = build_document(instance, paths)
+        if getattr(instance, DOCUMENT_FIELD) != document:
+            setattr(instance, DOCUMENT_FIELD, document)
+            batch.append(instance)
+        if len(batch) >= _BATCH_SIZE:
+            changed += len(batch)
+            model._base_manager.bulk_update(batch, [DOCUMENT_FIELD])
+            batch = []
+    if batch:
+        changed += len(batch)
+        model._base_manager.bulk_update(batch, [DOCUMENT_FIELD])
+    return changed
+
+
+# ----------------------------------------------------------------------
+# Manutenção por sinais
+# ----------------------------------------------------------------------
+
+def _hops(model, paths: Sequence[str]):
+    """[(prefixo, modelo relacionado, campos lidos nele)] de cada relação dos caminhos."""
+    hops: Dict[Tuple[str, type], dict] = {}
+    for path in paths:
+        parts = path.split('__')
+        current = model
+        for depth, part in enumerate(parts[:-1]):
+            # remote_field.model: registrado no import de models.py, antes do registry ficar pronto
+            current = current._meta.get_field(part).remote_field.model
+            next_field = current._meta.get_field(parts[depth + 1])
+            key = ('__'.join(parts[:depth + 1]), current)
+            hops.setdefault(key, {})[next_field.name] = next_field
+    return [(prefix, related, tuple(fields.values())) for (prefix, related), fields in hops.items()]
+
+
+def register(model, paths: Iterable[str]) -> None:
+    """Mantém `model.search_document` a partir dos `paths` (campos locais ou `fk__campo`)."""
+    paths = tuple(paths)
+    _registry[model] = paths
+    local_fields = {path.split('__')[0] for path in paths}
+
+    def fill(sender, instance, raw=False, update_fields=None, **kwargs):
+        if not raw and update_fields is None:
+            setattr(instance, DOCUMENT_FIELD, build_document(instance, paths))
+
+    def refresh_partial(sender, instance, raw=False, update_fields=None, **kwargs):
+        # save(update_fields=[...]) não grava a coluna preenchida no pre_save
+        if raw or update_fields is None or DOCUMENT_FIELD in update_fields:
+            return
+        if local_fields & set(update_fields):
+            document = build_document(instance, paths)
+            sender._base_manager.filter(pk=instance.pk).update(**{DOCUMENT_FIELD: document})
+            setattr(instance, DOCUMENT_FIELD, document)
+
+    uid = f'core.search:{model._meta.label}'
+    pre_save.connect(fill, sender=model, weak=False, dispatch_uid=uid)
+    post_save.connect(refresh_partial, sender=model, weak=False, dispatch_uid=uid)
+
+    for prefix, related, fields in _hops(model, paths):
+        _watch_related(model, paths, prefix, related, fields)
+
+
+def _watch_related(model, paths, prefix, related, fields) -> None:
+    """Refaz os documentos de `model` que leem `fields` de um `related` alterado."""
+    uid = f'core.search:{model._meta.label}:{prefix}'
+    names = {field.name for field in fields}
+    attnames = tuple(field.attname for field in fields)
+
+    def snapshot(sender, instance, raw=False, update_fields=None, **kwargs):
+        if raw or instance.pk is None:
+            return
+        if update_fields is not None and not names & set(update_fields):
+            return
+        previous = sender._base_manager.filter(pk=instance.pk).values_list(*attnames).first()
+        instance.__dict__.setdefault('_search_snapshots', {})[uid] = previous
+
+    def refresh_dependents(sender, instance, created=False, raw=False, **kwargs):
+        previous = instance.__dict__.get('_search_snapshots', {}).pop(uid, None)
+        if raw or created or previous is None:
+            return
+        if tuple(getattr(instance, attname) for attname in attnames) != tuple(previous):
+            rebuild_documents(model, paths, model._base_manager.filter(**{prefix: instance.pk}))
+
+    pre_save.connect(snapshot, sender=related, weak=False, dispatch_uid=uid)
+    post_save.connect(refresh_dependents, sender=related, weak=False, dispatch_uid=uid)
+
+
+def registered_models() -> Dict[type, Tuple[str, ...]]:
+    return dict(_registry)
+
+
+# ----------------------------------------------------------------------
+# Consulta
+# ----------------------------------------------------------------------
+
+class WordSimilarity(Func):
+    """pg_trgm: quanto o termo se parece com alguma palavra do documento (0..1)."""
+    function = 'word_similarity'
+    output_field = FloatField()
+
+
+def search_queryset(queryset, term: str, fields: Sequence[str] = ()):
+    """Filtra `queryset` pelas palavras de `term`.
+
+    Modelos registrados usam o documento (e o ranking no PostgreSQL); os demais
+    fazem `icontains` em `fields`, como o SearchFilter do DRF.
+    """
+    words = normalize(term).split()
+    if not words:
+        return queryset
+
+    if queryset.model not in _registry:
+        if not fields:
+            return queryset
+        raw_words = term.split()
+        return queryset.filter(reduce(and_, (
+            reduce(or_, (Q(**{f'{field}__icontains': word}) for field in fields)) for word in raw_words
+        )))
+
+    for word in words:
+        queryset = queryset.filter(**{f'{DOCUMENT_FIELD}__contains': word})
+    if connections[queryset.db].vendor == 'postgresql':
+        queryset = queryset.annotate(
+            search_rank=WordSimilarity(Value(' '.join(words)), F(DOCUMENT_FIELD)),
+        ).order_by('-search_rank', '-pk')
+    return queryset
+
+
+class DocumentSearchFilter(SearchFilter):
+    """SearchFilter do DRF que usa o documento de busca quando o modelo está registrado.
+
+    Para modelos não registrados vale o comportamento padrão (`search_fields` da view).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if queryset.model not in _registry:
+            return super().filter_queryset(request, queryset, view)
+        return search_queryset(queryset, request.query_params.get(self.search_param, ''))
+
+
+# ----------------------------------------------------------------------
+# Migrações
+# ----------------------------------------------------------------------
+
+def backfill_operation(app_label: str, model_name: str, paths: Sequence[str]):
+    """RunPython que preenche o documento dos registros já existentes."""
+    from django.db import migrations
+
+    def forwards(apps, schema_editor):
+        model = apps.get_model(app_label, model_name)
+        rebuild_documents(model, paths, model._base_manager.using(schema_editor.connection.alias))
+
+    return migrations.RunPython(forwards, migrations.RunPython.noop)
+
+
+def trigram_index_operation(table: str):
+    """RunPython do índice GIN trigram da coluna (só PostgreSQL; cria a extensão pg_trgm)."""
+    from django.db import migrations
+
+    index = f'{table}_search_trgm'
+
+    def forwards(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {index} ON {table} USING GIN ({DOCUMENT_FIELD} gin_trgm_ops)'
+            )
+
+    def backwards(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(f'DROP INDEX IF EXISTS {index}')
+
+    return migrations.RunPython(forwards, backwards)
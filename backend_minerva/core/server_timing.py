@@ -0,0 +1,50 @@
+"""
+Cabeçalho Server-Timing (https://www.w3.org/TR/server-timing/).
+
+Mede etapas de uma view e publica as durações no cabeçalho da resposta; o
+navegador mostra os valores na aba Network (Timing) do DevTools.
+
+Uso:
+    timing = ServerTiming()
+    with timing('contracts'):
+        ...
+    timing.add('cache', desc='hit')
+    return timing.apply(Response(data))
+"""
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+
+class ServerTiming:
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self._metrics: List[Tuple[str, Optional[float], Optional[str]]] = []
+
+    @contextmanager
+    def __call__(self, name: str, desc: Optional[str] = None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - started) * 1000, desc)
+
+    def add(self, name: str, duration_ms: Optional[float] = None, desc: Optional[str] = None) -> None:
+        self._metrics.append((name, duration_ms, desc))
+
+    def header(self) -> str:
+        metrics = self._metrics + [('total', (time.perf_counter() - self._started) * 1000, None)]
+        parts = []
+        for name, duration_ms, desc in metrics:
+            part = name
+            if desc:
+                part += f';desc="{desc}"'
+            if duration_ms is not None:
+                part += f';dur={duration_ms:.1f}'
+            parts.append(part)
+        return ', '.join(parts)
+
+    def apply(self, response):
+        response['Server-Timing'] = self.header()
+        return response
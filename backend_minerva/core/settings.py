@@ -1,8 +1,14 @@
 import os
+import re
 from pathlib import Path
 from datetime import timedelta
 from decouple import config, Csv
 
+from core.database import (
+    DEFAULT_CONN_MAX_AGE, DEFAULT_DATABASE_POOL, DEFAULT_POOL_SIZES, connection_settings, detect_process_role,
+    detect_server_interface,
+)
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
@@ -113,6 +119,28 @@ DATABASES = {
     }
 }
 
+# Conexões por tipo de processo (core/database.py): persistentes com health check
+# no WSGI e no Celery, pool do psycopg 3 no ASGI com Postgres (DATABASE_POOL)
+PROCESS_ROLE = config('PROCESS_ROLE', default=detect_process_role())
+SERVER_INTERFACE = config('SERVER_INTERFACE', default=detect_server_interface())
+DATABASES['default'].update(connection_settings(
+    DATABASES['default']['ENGINE'],
+    PROCESS_ROLE,
+    conn_max_age=config(
+        'DATABASE_CONN_MAX_AGE', default=DEFAULT_CONN_MAX_AGE.get(SERVER_INTERFACE, 0), cast=int
+    ),
+    health_checks=config('DATABASE_CONN_HEALTH_CHECKS', default=True, cast=bool),
+    pool=config('DATABASE_POOL', default=DEFAULT_DATABASE_POOL.get(SERVER_INTERFACE, False), cast=bool),
+    pool_sizes={
+        role: (
+            config(f'DATABASE_POOL_{role.upper()}_MIN', default=min_size, cast=int),
+            config(f'DATABASE_POOL_{role.upper()}_MAX', default=max_size, cast=int),
+        )
+        for role, (min_size, max_size) in DEFAULT_POOL_SIZES.items()
+    },
+    pool_timeout=config('DATABASE_POOL_TIMEOUT', default=10, cast=float),
+))
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -205,6 +233,34 @@ FRONTEND_URL = config('FRONTEND_URL', default='http://localhost:3000')
 
 REDIS_URL = config('REDIS_URL', default='redis://localhost:6379/0')
 
+# Cache compartilhado: Redis (L2, banco 1 do mesmo servidor por padrão — o banco 0
+# é do broker do Celery) com a memória do processo (L1) na frente; ver
+# core/cache_backends.py. CACHE_REDIS_URL vazio = só memória do processo.
+CACHE_REDIS_URL = config('CACHE_REDIS_URL', default=re.sub(r'/\d*$', '', REDIS_URL) + '/1')
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache_backends.TieredCache',
+        'LOCATION': CACHE_REDIS_URL,
+        'KEY_PREFIX': 'minerva',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'L1_TIMEOUT': config('CACHE_L1_TIMEOUT', default=5, cast=int),
+            'L1_MAX_ENTRIES': config('CACHE_L1_MAX_ENTRIES', default=5000, cast=int),
+            'FAILURE_BACKOFF': 30,
+            # Sempre do Redis: logout, permissão revogada e invalidações valem na hora em todos os workers
+            'L1_EXCLUDE': ['jwt:blacklist:*', 'access_scope:*', '*:version'],
+        },
+    },
+}
+# core.caching: validade padrão, duração do lock anti-stampede e espera dos demais workers
+CACHE_DEFAULT_TTL = config('CACHE_DEFAULT_TTL', default=300, cast=int)
+CACHE_STAMPEDE_LOCK_TIMEOUT = 30
+CACHE_STAMPEDE_WAIT = 5
+
+# Contagens das listagens (core/counting.py): acima do limite o total é estimado
+COUNT_EXACT_THRESHOLD = config('COUNT_EXACT_THRESHOLD', default=10000, cast=int)
+COUNT_CACHE_TTL = config('COUNT_CACHE_TTL', default=300, cast=int)
+
 CELERY_BROKER_URL = REDIS_URL
 CELERY_RESULT_BACKEND = 'django-db'
 CELERY_CACHE_BACKEND = 'default'
@@ -226,8 +282,34 @@ CELERY_BEAT_SCHEDULE = {
         'schedule': 3600,
         'options': {'expires': 1800},
     },
+    'check-budget-balance-drift-daily': {
+        'task': 'budget.check_balance_drift',
+        'schedule': 86400,
+        'options': {'expires': 3600},
+    },
+    'refresh-dashboard-reporting': {
+        'task': 'dashboard.refresh_reporting',
+        'schedule': config('DASHBOARD_REPORTING_REFRESH_SECONDS', default=60, cast=int),
+        'options': {'expires': 60},
+    },
 }
 
+# Saldos de orçamentos/linhas: 'recompute' (recálculo agregado no commit) ou
+# 'delta' (incrementos F() na própria escrita; custo independente do histórico)
+BUDGET_BALANCE_MODE = config('BUDGET_BALANCE_MODE', default='recompute')
+# Tarefa diária budget.check_balance_drift: corrige automaticamente o que divergir
+BUDGET_BALANCE_DRIFT_REPAIR = config('BUDGET_BALANCE_DRIFT_REPAIR', default=False, cast=bool)
+
+# Dashboard executivo: validade (segundos) dos agregados em cache; cada atualização
+# das tabelas de resumo (tarefa dashboard.refresh_reporting) invalida antes disso
+DASHBOARD_CACHE_TTL = config('DASHBOARD_CACHE_TTL', default=300, cast=int)
+# Dashboard principal (contract.views.dashboard_stats): cache por escopo, em segundos
+CONTRACT_DASHBOARD_CACHE_TTL = config('CONTRACT_DASHBOARD_CACHE_TTL', default=60, cast=int)
+
+# Escopo de acesso materializado por usuário (access_control.services.access_scope);
+# sinais de vínculos, grupos e unidades invalidam antes do prazo
+ACCESS_SCOPE_CACHE_TTL = config('ACCESS_SCOPE_CACHE_TTL', default=3600, cast=int)
+
 
 GEMINI_API_KEY = config('GEMINI_API_KEY', default=None)
 
@@ -249,6 +331,33 @@ ALICE_REDIS_MEMORY_TTL = config('ALICE_REDIS_MEMORY_TTL', default=86400, cast=in
 ALICE_MEMORY_WINDOW = config('ALICE_MEMORY_WINDOW', default=20, cast=int)  # last N messages in Redis
 ALICE_CONFIDENCE_THRESHOLD = config('ALICE_CONFIDENCE_THRESHOLD', default=0.70, cast=float)
 
+# Alice embedding cache (memo por requisição + LRU do processo + Redis opcional)
+ALICE_EMBEDDING_CACHE_SIZE = config('ALICE_EMBEDDING_CACHE_SIZE', default=2048, cast=int)
+ALICE_EMBEDDING_CACHE_TTL = config('ALICE_EMBEDDING_CACHE_TTL', default=86400, cast=int)
+ALICE_EMBEDDING_CACHE_REDIS = config('ALICE_EMBEDDING_CACHE_REDIS', default=True, cast=bool)
+
+# Índice vetorial NumPy em memória (fallback sem pgvector): recarga completa a cada N segundos
+ALICE_VECTOR_INDEX_TTL = config('ALICE_VECTOR_INDEX_TTL', default=300, cast=int)
+
+# Capacidades do banco (pgvector, content_tsv): segundos até repetir um probe que falhou
+ALICE_CAPABILITY_RETRY_SECONDS = config('ALICE_CAPABILITY_RETRY_SECONDS', default=30, cast=int)
+
+# Schema pré-renderizado do prompt SQL (invalidado por signal; TTL como rede de segurança)
+ALICE_SCHEMA_CONTEXT_TTL = config('ALICE_SCHEMA_CONTEXT_TTL', default=3600, cast=int)
+
+# Cache semântico de respostas da Alice (por escopo de permissão; invalidado por escritas nas tabelas lidas)
+ALICE_ANSWER_CACHE_ENABLED = config('ALICE_ANSWER_CACHE_ENABLED', default=True, cast=bool)
+ALICE_ANSWER_CACHE_TTL = config('ALICE_ANSWER_CACHE_TTL', default=600, cast=int)
+ALICE_ANSWER_CACHE_THRESHOLD = config('ALICE_ANSWER_CACHE_THRESHOLD', default=0.95, cast=float)
+ALICE_ANSWER_CACHE_MAX_ENTRIES = config('ALICE_ANSWER_CACHE_MAX_ENTRIES', default=200, cast=int)
+# Reexecuta o SQL guardado num hit (barato) para devolver dados atuais
+ALICE_ANSWER_CACHE_RERUN_SQL = config('ALICE_ANSWER_CACHE_RERUN_SQL', default=True, cast=bool)
+
+# Agente de relatórios: banco e documentos em paralelo, cada fonte com seu prazo (segundos)
+ALICE_REPORT_DATABASE_TIMEOUT = config('ALICE_REPORT_DATABASE_TIMEOUT', default=40.0, cast=float)
+ALICE_REPORT_DOCUMENT_TIMEOUT = config('ALICE_REPORT_DOCUMENT_TIMEOUT', default=25.0, cast=float)
+ALICE_REPORT_MAX_WORKERS = config('ALICE_REPORT_MAX_WORKERS', default=8, cast=int)
+
 
 REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": (
@@ -257,11 +366,11 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 10,
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
-        "rest_framework.filters.SearchFilter",
+        "core.search.DocumentSearchFilter",
         "rest_framework.filters.OrderingFilter",
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.BlacklistJWTAuthentication',
     ),
     'DEFAULT_RENDERER_CLASSES': (
         'rest_framework.renderers.JSONRenderer',
@@ -342,6 +451,9 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
     'UPDATE_LAST_LOGIN': True,
 }
+# Validade (segundos) da resposta "token não está na blacklist" em cache; o logout
+# grava a invalidação no cache na hora (accounts.services.token_blacklist)
+JWT_BLACKLIST_CACHE_TTL = config('JWT_BLACKLIST_CACHE_TTL', default=60, cast=int)
 
 # ── Sentry ────────────────────────────────────────────────────────────────────
 _sentry_dsn = config('SENTRY_DSN', default=None)
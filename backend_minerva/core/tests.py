@@ -0,0 +1,354 @@
+"""
+Testes do cache em camadas (core.cache_backends), dos helpers de core.caching,
+da configuração de conexões (core.database), da paginação (core.pagination),
+das contagens (core.counting) e da busca (core.search).
+
+O L2 é simulado por um LocMem separado (o mesmo papel do Redis compartilhado).
+"""
+from pathlib import Path
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase
+
+from core.cache_backends import TieredCache
+from core.caching import bump_namespace, cached_query, get_or_compute, make_key
+from core.counting import estimated_count, fast_count, track_counts
+from core.database import (
+    DEFAULT_CONN_MAX_AGE, DEFAULT_DATABASE_POOL, DEFAULT_POOL_SIZES, connection_settings, detect_process_role,
+    detect_server_interface,
+)
+from core.search import normalize, search_queryset
+
+
+def _tiered(l2, worker):
+    # O L1 é por processo (LocMem nomeado pelo LOCATION): um LOCATION por "worker"
+    tiered = TieredCache(f'redis://{worker}', {'OPTIONS': {
+        'L1_TIMEOUT': 60, 'L1_EXCLUDE': ['jwt:blacklist:*', '*:version'],
+    }})
+    tiered._l1.clear()
+    tiered._l2 = l2
+    return tiered
+
+
+class TieredCacheTests(TestCase):
+
+    def setUp(self):
+        self.l2 = LocMemCache('tiered-test-l2', {})
+        self.l2.clear()
+        self.worker_a = _tiered(self.l2, 'worker-a')
+        self.worker_b = _tiered(self.l2, 'worker-b')
+
+    def test_l1_serves_repeated_reads(self):
+        self.worker_a.set('key', 1)
+        self.l2.delete('key')
+        self.assertEqual(self.worker_a.get('key'), 1)
+        self.assertIsNone(self.worker_b.get('key'))
+
+    def test_atomic_operations_go_through_l2(self):
+        self.assertTrue(self.worker_a.add('lock', 1))
+        self.assertFalse(self.worker_b.add('lock', 1))
+
+        self.worker_a.set('counter', 1)
+        self.assertEqual(self.worker_b.incr('counter'), 2)
+        self.assertEqual(self.l2.get('counter'), 2)
+
+    def test_falls_back_to_l1_when_l2_fails(self):
+        class Broken:
+            def __getattr__(self, name):
+                def fail(*args, **kwargs):
+                    raise ConnectionError('down')
+                return fail
+
+        tiered = _tiered(Broken(), 'worker-broken')
+        tiered.set('key', 'value', 300)
+        self.assertEqual(tiered.get('key'), 'value')
+        self.assertTrue(tiered.add('lock', 1))
+        self.assertFalse(tiered.add('lock', 1))
+        tiered.set('jwt:blacklist:abc', True, 300)
+        self.assertTrue(tiered.get('jwt:blacklist:abc'))
+
+    def test_excluded_keys_skip_l1(self):
+        # Worker B leu "não bloqueado" e o contador de versão; worker A muda os dois
+        self.worker_a.set('jwt:blacklist:abc', False)
+        self.worker_a.set('namespace:version', 1)
+        self.assertFalse(self.worker_b.get('jwt:blacklist:abc'))
+        self.assertEqual(self.worker_b.get_many(['namespace:version']), {'namespace:version': 1})
+
+        self.worker_a.set('jwt:blacklist:abc', True)
+        self.worker_a.incr('namespace:version')
+
+        self.assertTrue(self.worker_b.get('jwt:blacklist:abc'))
+        self.assertEqual(self.worker_b.get('namespace:version'), 2)
+        self.assertEqual(self.worker_b._l1.get_many(['jwt:blacklist:abc', 'namespace:version']), {})
+
+        # Apagada no L2, some para todos (sem cópia no L1 de quem gravou)
+        self.l2.delete('jwt:blacklist:abc')
+        self.assertIsNone(self.worker_a.get('jwt:blacklist:abc'))
+
+
+class CachingHelpersTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bump_namespace_changes_keys(self):
+        key = make_key('tests', 'a')
+        bump_namespace('tests', immediate=True)
+        self.assertNotEqual(make_key('tests', 'a'), key)
+
+    def test_get_or_compute_waits_for_lock_holder(self):
+        key = make_key('tests', 'locked')
+        cache.add(f'{key}:lock', 1, 30)
+        cache.set(key, 'from-holder')
+
+        self.assertEqual(get_or_compute(key, lambda: 'recomputed'), 'from-holder')
+
+    def test_cached_query_invalidated_by_model_writes(self):
+        calls = []
+
+        @cached_query('tests_groups', models=[Group])
+        def group_count():
+            calls.append(1)
+            return Group.objects.count()
+
+        self.assertEqual(group_count(), 0)
+        self.assertEqual(group_count(), 0)
+        self.assertEqual(len(calls), 1)
+
+        Group.objects.create(name='NOVO')
+        self.assertEqual(group_count(), 1)
+        self.assertEqual(len(calls), 2)
+
+
+class DatabaseConnectionSettingsTests(TestCase):
+
+    def test_detect_process_role(self):
+        self.assertEqual(detect_process_role(['gunicorn', 'core.asgi:application']), 'web')
+        self.assertEqual(detect_process_role(['/usr/bin/celery', '-A', 'core', 'worker']), 'worker')
+        self.assertEqual(detect_process_role(['/usr/bin/celery', '-A', 'core', 'beat']), 'beat')
+
+    def test_no_persistent_connections_by_default_under_asgi(self):
+        gunicorn = ['gunicorn', 'core.asgi:application', '--worker-class', 'uvicorn.workers.UvicornWorker']
+        self.assertEqual(detect_server_interface(gunicorn), 'asgi')
+        self.assertEqual(detect_server_interface(['uvicorn', 'core.asgi:application']), 'asgi')
+        self.assertEqual(detect_server_interface(['gunicorn', 'core.wsgi:application']), 'wsgi')
+        self.assertEqual(detect_server_interface(['/usr/bin/celery', '-A', 'core', 'worker']), 'wsgi')
+        self.assertEqual(DEFAULT_CONN_MAX_AGE['asgi'], 0)
+        self.assertGreater(DEFAULT_CONN_MAX_AGE['wsgi'], 0)
+
+    def test_pool_by_default_under_asgi(self):
+        # Sem persistência no ASGI quem reaproveita conexões é o pool
+        self.assertTrue(DEFAULT_DATABASE_POOL['asgi'])
+        self.assertFalse(DEFAULT_DATABASE_POOL['wsgi'])
+        requirements = (Path(__file__).resolve().parent.parent / 'requirements.txt').read_text()
+        self.assertRegex(requirements, r'(?m)^psycopg\[[^]]*pool[^]]*\]')
+
+    def test_persistent_connections_without_pool(self):
+        params = connection_settings(
+            'django.db.backends.postgresql', 'web', conn_max_age=60, health_checks=True,
+            pool=False, pool_sizes=DEFAULT_POOL_SIZES, pool_timeout=10,
+        )
+        self.assertEqual(params, {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True, 'OPTIONS': {}})
+
+        # SQLite ignora o pool
+        params = connection_settings(
+            'django.db.backends.sqlite3', 'web', conn_max_age=60, health_checks=True,
+            pool=True, pool_sizes=DEFAULT_POOL_SIZES, pool_timeout=10,
+        )
+        self.assertNotIn('pool', params['OPTIONS'])
+
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        from django.utils import timezone
+        from employee.models import Employee
+
+        self.Employee = Employee
+        cache.clear()
+        Employee.objects.bulk_create([
+            Employee(full_name=f'Colaborador {i:02d}', email=f'c{i}@example.com', cpf=f'{i:011d}')
+            for i in range(25)
+        ])
+        # Metade com o mesmo created_at: o desempate pela pk precisa manter a ordem estável
+        now = timezone.now()
+        Employee.objects.filter(pk__in=Employee.objects.order_by('pk').values('pk')[:12]).update(created_at=now)
+
+    def _page(self, query):
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+
+        from core.pagination import CustomPageNumberPagination
+
+        paginator = CustomPageNumberPagination()
+        request = Request(APIRequestFactory().get('/api/v1/employee/', query))
+        rows = paginator.paginate_queryset(self.Employee.objects.all(), request)
+        return rows, paginator.get_paginated_response([row.pk for row in rows]).data
+
+    def _walk(self, query):
+        from urllib.parse import parse_qs, urlparse
+
+        seen, pages = [], 0
+        while True:
+            rows, data = self._page(query)
+            seen.extend(row.pk for row in rows)
+            pages += 1
+            if not data['next']:
+                return seen, pages
+            query = {key: values[0] for key, values in parse_qs(urlparse(data['next']).query).items()}
+
+    def test_cursor_mode_walks_every_row_once_in_order(self):
+        seen, pages = self._walk({'pagination': 'cursor', 'page_size': 10})
+        expected = list(self.Employee.objects.order_by('-created_at', '-pk').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+        self.assertEqual(pages, 3)
+
+    def test_requested_ordering_is_used_with_pk_tiebreaker(self):
+        seen, _ = self._walk({'pagination': 'cursor', 'page_size': 7, 'ordering': 'full_name'})
+        expected = list(self.Employee.objects.order_by('full_name', 'pk').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_nullable_ordering_falls_back_to_default(self):
+        seen, _ = self._walk({'pagination': 'cursor', 'ordering': 'birth_date'})
+        expected = list(self.Employee.objects.order_by('-created_at', '-pk').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_cursor_mode_skips_count_and_total_is_opt_in(self):
+        with self.assertNumQueries(1):
+            _, data = self._page({'pagination': 'cursor'})
+        self.assertNotIn('count', data)
+        self.assertIsNone(data['previous'])
+
+        _, data = self._page({'pagination': 'cursor', 'with_total': 'true'})
+        self.assertEqual(data['count'], 25)
+
+    def test_tampered_or_foreign_cursor_is_rejected(self):
+        from rest_framework.exceptions import NotFound
+
+        _, data = self._page({'pagination': 'cursor'})
+        cursor = data['next'].split('cursor=')[1]
+        with self.assertRaises(NotFound):
+            self._page({'cursor': cursor[:-2] + 'xx'})
+        # Cursor gerado para outra ordenação
+        with self.assertRaises(NotFound):
+            self._page({'cursor': cursor, 'ordering': 'full_name'})
+
+    def test_page_number_mode_is_unchanged(self):
+        rows, data = self._page({'page': 2})
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(data['count'], 25)
+
+
+class FastCountTests(TestCase):
+
+    def setUp(self):
+        from employee.models import Employee
+
+        self.Employee = Employee
+        cache.clear()
+        track_counts(Employee)
+        for i in range(3):
+            Employee.objects.create(full_name=f'Colaborador {i}', email=f'c{i}@example.com', cpf=f'{i:011d}')
+
+    def test_unfiltered_total_comes_from_cached_counter(self):
+        self.assertEqual(fast_count(self.Employee.objects.all()), (3, True))
+        with self.assertNumQueries(0):
+            self.assertEqual(fast_count(self.Employee.objects.select_related('direction')), (3, True))
+
+    def test_counter_follows_creates_and_deletes_on_commit(self):
+        fast_count(self.Employee.objects.all())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.Employee.objects.create(full_name='Novo', email='novo@example.com', cpf='99999999999')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.Employee.objects.get(email='c0@example.com').delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(fast_count(self.Employee.objects.all()), (3, True))
+
+    def test_filtered_queryset_is_counted_exactly(self):
+        queryset = self.Employee.objects.filter(full_name__endswith='1')
+        with self.assertNumQueries(1):
+            self.assertEqual(fast_count(queryset), (1, True))
+
+    def test_estimated_total_does_not_cap_pages(self):
+        from unittest import mock
+
+        from core.pagination import CountingPaginator
+
+        queryset = self.Employee.objects.order_by('pk')
+        with mock.patch('core.pagination.fast_count', return_value=(1, False)):
+            paginator = CountingPaginator(queryset, 2)
+            page = paginator.page(2)
+        self.assertEqual([row.email for row in page], ['c2@example.com'])
+
+    def test_estimated_total_does_not_hide_next_page(self):
+        from unittest import mock
+
+        from core.pagination import CountingPaginator
+
+        queryset = self.Employee.objects.order_by('pk')
+        with mock.patch('core.pagination.fast_count', return_value=(1, False)):
+            paginator = CountingPaginator(queryset, 1)
+            first, last = paginator.page(1), paginator.page(3)
+        self.assertTrue(first.has_next())
+        self.assertEqual(first.next_page_number(), 2)
+        self.assertFalse(last.has_next())
+
+    def test_empty_querysets_on_postgresql_branch(self):
+        from unittest import mock
+
+        pg = mock.MagicMock(vendor='postgresql')
+        with mock.patch('core.counting.connections', {'default': pg}):
+            self.assertEqual(fast_count(self.Employee.objects.none()), (0, True))
+            self.assertEqual(fast_count(self.Employee.objects.filter(full_name__endswith='x').none()), (0, True))
+            self.assertEqual(estimated_count(self.Employee.objects.filter(pk__in=[])), 0)
+        # Nenhuma consulta chegou a ser montada para o EXPLAIN
+        pg.cursor.assert_not_called()
+
+
+class DocumentSearchTests(TestCase):
+
+    def setUp(self):
+        from employee.models import Employee
+        from sector.models import Direction
+
+        self.Employee = Employee
+        self.direction = Direction.objects.create(name='Diretoria de Operações')
+        self.joao = Employee.objects.create(
+            full_name='João Araújo', email='joao@example.com', cpf='12345678900', direction=self.direction,
+        )
+        self.maria = Employee.objects.create(full_name='Maria Souza', email='maria@example.com', cpf='98765432100')
+
+    def _search(self, term):
+        return set(search_queryset(self.Employee.objects.all(), term).values_list('email', flat=True))
+
+    def test_document_is_normalized_on_save(self):
+        self.joao.refresh_from_db()
+        self.assertIn('joao araujo', self.joao.search_document)
+        self.assertIn('diretoria de operacoes', self.joao.search_document)
+        self.assertEqual(normalize('  ÁGUA   Viva '), 'agua viva')
+
+    def test_search_is_accent_and_case_insensitive_and_matches_every_word(self):
+        self.assertEqual(self._search('JOAO'), {'joao@example.com'})
+        self.assertEqual(self._search('araujo operações'), {'joao@example.com'})
+        self.assertEqual(self._search('souza operacoes'), set())
+        self.assertEqual(self._search('   '), {'joao@example.com', 'maria@example.com'})
+
+    def test_related_rename_refreshes_dependent_documents(self):
+        self.direction.name = 'Diretoria Financeira'
+        self.direction.save()
+        self.assertEqual(self._search('financeira'), {'joao@example.com'})
+        self.assertEqual(self._search('operacoes'), set())
+
+    def test_partial_save_refreshes_document(self):
+        self.maria.full_name = 'Maria Conceição'
+        self.maria.save(update_fields=['full_name'])
+        self.assertEqual(self._search('conceicao'), {'maria@example.com'})
+
+    def test_unregistered_model_falls_back_to_icontains(self):
+        from accounts.models import User
+
+        User.objects.create_user(email='alvo@example.com', password='x')
+        found = search_queryset(User.objects.all(), 'ALVO', fields=('email',))
+        self.assertEqual(list(found.values_list('email', flat=True)), ['alvo@example.com'])
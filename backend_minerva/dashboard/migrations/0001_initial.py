@@ -0,0 +1,88 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:40
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('employee', '0002_alter_employee_created_by_alter_employee_updated_by'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportingRefresh',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('section', models.CharField(max_length=30, unique=True, verbose_name='Seção')),
+                ('refreshed_at', models.DateTimeField(verbose_name='Atualizado em')),
+                ('stale_since', models.DateTimeField(blank=True, null=True, verbose_name='Desatualizado desde')),
+                ('duration_ms', models.PositiveIntegerField(default=0, verbose_name='Duração (ms)')),
+            ],
+            options={
+                'verbose_name': 'Atualização de Relatório',
+                'verbose_name_plural': 'Atualizações de Relatórios',
+            },
+        ),
+        migrations.CreateModel(
+            name='BudgetSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField(verbose_name='Ano')),
+                ('level', models.CharField(choices=[('geral', 'Geral'), ('direction', 'Direção'), ('management', 'Gerência'), ('coordination', 'Coordenação')], max_length=20, verbose_name='Nível')),
+                ('scope_id', models.PositiveIntegerField(verbose_name='Escopo')),
+                ('category', models.CharField(max_length=20, verbose_name='Categoria')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15, verbose_name='Valor Total')),
+                ('available_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15, verbose_name='Valor Disponível')),
+                ('used_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15, verbose_name='Valor Utilizado')),
+            ],
+            options={
+                'verbose_name': 'Resumo de Orçamentos',
+                'verbose_name_plural': 'Resumos de Orçamentos',
+                'unique_together': {('year', 'level', 'scope_id', 'category')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ContractSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.CharField(choices=[('geral', 'Geral'), ('direction', 'Direção'), ('management', 'Gerência'), ('coordination', 'Coordenação')], max_length=20, verbose_name='Nível')),
+                ('scope_id', models.PositiveIntegerField(verbose_name='Escopo')),
+                ('year', models.PositiveIntegerField(verbose_name='Ano de Início')),
+                ('status', models.CharField(max_length=30, verbose_name='Status')),
+                ('contract_count', models.PositiveIntegerField(default=0, verbose_name='Contratos')),
+                ('total_value', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15, verbose_name='Valor Total')),
+                ('expiring_30', models.PositiveIntegerField(default=0, verbose_name='Vencendo em 30 dias')),
+                ('expired', models.PositiveIntegerField(default=0, verbose_name='Vencidos')),
+            ],
+            options={
+                'verbose_name': 'Resumo de Contratos',
+                'verbose_name_plural': 'Resumos de Contratos',
+                'unique_together': {('level', 'scope_id', 'year', 'status')},
+            },
+        ),
+        migrations.CreateModel(
+            name='InspectorSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.CharField(choices=[('geral', 'Geral'), ('direction', 'Direção'), ('management', 'Gerência'), ('coordination', 'Coordenação')], max_length=20, verbose_name='Nível')),
+                ('scope_id', models.PositiveIntegerField(verbose_name='Escopo')),
+                ('full_name', models.CharField(max_length=255, verbose_name='Nome')),
+                ('position', models.CharField(blank=True, max_length=200, null=True, verbose_name='Cargo')),
+                ('total_contracts', models.PositiveIntegerField(default=0, verbose_name='Contratos')),
+                ('active_contracts', models.PositiveIntegerField(default=0, verbose_name='Contratos Ativos')),
+                ('total_value', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15, verbose_name='Valor Total')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='employee.employee', verbose_name='Fiscal')),
+            ],
+            options={
+                'verbose_name': 'Resumo de Fiscal',
+                'verbose_name_plural': 'Resumos de Fiscais',
+                'indexes': [models.Index(fields=['level', 'scope_id', '-active_contracts'], name='dash_inspector_rank_idx')],
+                'unique_together': {('level', 'scope_id', 'employee')},
+            },
+        ),
+    ]
@@ -0,0 +1,88 @@
+from decimal import Decimal
+
+from django.db import models
+
+
+SCOPE_LEVELS = [
+    ('geral', 'Geral'),
+    ('direction', 'Direção'),
+    ('management', 'Gerência'),
+    ('coordination', 'Coordenação'),
+]
+
+
+class ReportingRefresh(models.Model):
+    """
+    Estado de cada seção das tabelas de resumo ('budgets:<ano>' ou 'contracts').
+    `stale_since` é preenchido no commit de escritas que alteram a seção e limpo
+    pela atualização seguinte (dashboard.refresh_reporting).
+    """
+    section = models.CharField(max_length=30, unique=True, verbose_name='Seção')
+    refreshed_at = models.DateTimeField(verbose_name='Atualizado em')
+    stale_since = models.DateTimeField(null=True, blank=True, verbose_name='Desatualizado desde')
+    duration_ms = models.PositiveIntegerField(default=0, verbose_name='Duração (ms)')
+
+    class Meta:
+        verbose_name = 'Atualização de Relatório'
+        verbose_name_plural = 'Atualizações de Relatórios'
+
+    def __str__(self):
+        return f"{self.section} ({self.refreshed_at:%d/%m/%Y %H:%M})"
+
+
+class BudgetSummary(models.Model):
+    """Orçamentos ativos por ano × escopo × categoria."""
+    year = models.PositiveIntegerField(verbose_name='Ano')
+    level = models.CharField(max_length=20, choices=SCOPE_LEVELS, verbose_name='Nível')
+    scope_id = models.PositiveIntegerField(verbose_name='Escopo')
+    category = models.CharField(max_length=20, verbose_name='Categoria')
+    total_amount = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'), verbose_name='Valor Total')
+    available_amount = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'), verbose_name='Valor Disponível')
+    used_amount = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'), verbose_name='Valor Utilizado')
+
+    class Meta:
+        verbose_name = 'Resumo de Orçamentos'
+        verbose_name_plural = 'Resumos de Orçamentos'
+        unique_together = [('year', 'level', 'scope_id', 'category')]
+
+
+class ContractSummary(models.Model):
+    """Contratos por escopo (hierarquia do fiscal principal) × ano de início × status."""
+    level = models.CharField(max_length=20, choices=SCOPE_LEVELS, verbose_name='Nível')
+    scope_id = models.PositiveIntegerField(verbose_name='Escopo')
+    year = models.PositiveIntegerField(verbose_name='Ano de Início')
+    status = models.CharField(max_length=30, verbose_name='Status')
+    contract_count = models.PositiveIntegerField(default=0, verbose_name='Contratos')
+    total_value = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'), verbose_name='Valor Total')
+    expiring_30 = models.PositiveIntegerField(default=0, verbose_name='Vencendo em 30 dias')
+    expired = models.PositiveIntegerField(default=0, verbose_name='Vencidos')
+
+    class Meta:
+        verbose_name = 'Resumo de Contratos'
+        verbose_name_plural = 'Resumos de Contratos'
+        unique_together = [('level', 'scope_id', 'year', 'status')]
+
+
+class InspectorSummary(models.Model):
+    """Contratos por fiscal principal em cada escopo (rankings de fiscais)."""
+    level = models.CharField(max_length=20, choices=SCOPE_LEVELS, verbose_name='Nível')
+    scope_id = models.PositiveIntegerField(verbose_name='Escopo')
+    employee = models.ForeignKey(
+        'employee.Employee',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Fiscal',
+    )
+    full_name = models.CharField(max_length=255, verbose_name='Nome')
+    position = models.CharField(max_length=200, null=True, blank=True, verbose_name='Cargo')
+    total_contracts = models.PositiveIntegerField(default=0, verbose_name='Contratos')
+    active_contracts = models.PositiveIntegerField(default=0, verbose_name='Contratos Ativos')
+    total_value = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'), verbose_name='Valor Total')
+
+    class Meta:
+        verbose_name = 'Resumo de Fiscal'
+        verbose_name_plural = 'Resumos de Fiscais'
+        unique_together = [('level', 'scope_id', 'employee')]
+        indexes = [
+            models.Index(fields=['level', 'scope_id', '-active_contracts'], name='dash_inspector_rank_idx'),
+        ]
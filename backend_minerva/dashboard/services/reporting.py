@@ -0,0 +1,357 @@
+"""
+Camada de relatórios do dashboard: tabelas de resumo atualizadas pelo Celery.
+
+Os endpoints do dashboard leem BudgetSummary / ContractSummary / InspectorSummary
+(poucas linhas por escopo) em vez de agregar orçamentos e contratos a cada
+acesso, sem disputar as tabelas transacionais com as escritas.
+
+Seções (ReportingRefresh), atualizadas de forma independente:
+
+    budgets:<ano>  orçamentos ativos do ano por escopo × categoria (um CTE com os
+                   pares distintos (nível, escopo, orçamento) via CenterHierarchy)
+    contracts      contratos por escopo × ano de início × status, vencimentos e
+                   ranking de fiscais (agrupados pela hierarquia do fiscal principal)
+
+Escritas marcam as seções afetadas como desatualizadas no commit (`mark_stale`,
+chamado por dashboard/signals.py); a tarefa dashboard.refresh_reporting recalcula
+só as seções marcadas — e todas na virada do dia, já que os vencimentos dependem
+da data. Uma seção nunca calculada é calculada na primeira leitura.
+
+Uso:
+    refresh_reporting()            # seções desatualizadas
+    load_rollup(2026).refreshed_at
+"""
+import logging
+import time
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+from asgiref.local import Local
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractYear
+from django.utils import timezone
+
+from .rollup import GERAL, LEVELS, ZERO, DashboardRollup, Scope, invalidate_dashboard
+
+logger = logging.getLogger(__name__)
+
+SECTION_CONTRACTS = 'contracts'
+_BUDGETS_PREFIX = 'budgets:'
+
+EXPIRING_DAYS = 30
+
+# Marcações pendentes até o commit (mesmo escopo das conexões do Django)
+_pending = Local()
+
+
+def budget_section(year: int) -> str:
+    return f'{_BUDGETS_PREFIX}{year}'
+
+
+def _money(value: Any) -> Decimal:
+    return Decimal(str(value)) if value is not None else ZERO
+
+
+def _scopes(row: Dict[str, Any], prefix: str) -> List[Scope]:
+    return [GERAL] + [
+        (level, row[f'{prefix}{level}_id'])
+        for level in LEVELS if row[f'{prefix}{level}_id'] is not None
+    ]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Consultas de origem (tabelas transacionais)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _budget_rollup_sql() -> str:
+    from budget.models import Budget
+    from center.models import CenterHierarchy
+
+    budget = Budget._meta.db_table
+    hierarchy = CenterHierarchy._meta.db_table
+    branches = [
+        f"""
+        SELECT DISTINCT '{level}' AS level, h.{level}_id AS scope_id, b.id AS budget_id
+          FROM {hierarchy} h
+          JOIN {budget} b ON b.management_center_id = h.management_center_id
+         WHERE b.year = %s AND b.status = 'ATIVO' AND h.{level}_id IS NOT NULL
+        """
+        for level in LEVELS
+    ]
+    branches.append(f"""
+        SELECT 'geral' AS level, 0 AS scope_id, b.id AS budget_id
+          FROM {budget} b
+         WHERE b.year = %s AND b.status = 'ATIVO'
+    """)
+    # Pares distintos por nível: um centro gestor associado a duas coordenações da
+    # mesma direção não conta o orçamento duas vezes na direção. O saldo é gravado com
+    # sinal (budget.services.balances); o resumo soma o saldo exibido, com piso em zero
+    return f"""
+        WITH scoped AS ({' UNION ALL '.join(branches)})
+        SELECT s.level, s.scope_id, b.category,
+               SUM(b.total_amount),
+               SUM(CASE WHEN b.available_amount > 0 THEN b.available_amount ELSE 0 END),
+               SUM(b.cached_used_amount)
+          FROM scoped s
+          JOIN {budget} b ON b.id = s.budget_id
+         GROUP BY s.level, s.scope_id, b.category
+    """
+
+
+def _budget_summaries(year: int) -> list:
+    from dashboard.models import BudgetSummary
+
+    with connection.cursor() as cursor:
+        cursor.execute(_budget_rollup_sql(), [year] * (len(LEVELS) + 1))
+        return [
+            BudgetSummary(
+                year=year, level=level, scope_id=scope_id, category=category,
+                total_amount=_money(total), available_amount=_money(available), used_amount=_money(used),
+            )
+            for level, scope_id, category, total, available, used in cursor.fetchall()
+        ]
+
+
+def _contract_summaries(today) -> list:
+    from contract.models import Contract
+    from dashboard.models import ContractSummary
+
+    active = Q(status='ATIVO')
+    grouped = Contract.objects.order_by().values(
+        'main_inspector__direction_id', 'main_inspector__management_id', 'main_inspector__coordination_id',
+        'status', year=ExtractYear('start_date'),
+    ).annotate(
+        count=Count('id'),
+        value=Sum('original_value'),
+        expiring_30=Count('id', filter=active & Q(
+            expiration_date__gte=today, expiration_date__lte=today + timedelta(days=EXPIRING_DAYS),
+        )),
+        expired=Count('id', filter=active & Q(expiration_date__lt=today)),
+    )
+
+    rows: Dict[tuple, Dict[str, Any]] = defaultdict(
+        lambda: {'count': 0, 'value': ZERO, 'expiring_30': 0, 'expired': 0}
+    )
+    for row in grouped:
+        for level, scope_id in _scopes(row, 'main_inspector__'):
+            totals = rows[(level, scope_id, row['year'], row['status'])]
+            totals['count'] += row['count']
+            totals['value'] += _money(row['value'])
+            totals['expiring_30'] += row['expiring_30']
+            totals['expired'] += row['expired']
+
+    return [
+        ContractSummary(
+            level=level, scope_id=scope_id, year=year, status=status,
+            contract_count=totals['count'], total_value=totals['value'],
+            expiring_30=totals['expiring_30'], expired=totals['expired'],
+        )
+        for (level, scope_id, year, status), totals in rows.items()
+    ]
+
+
+def _inspector_summaries() -> list:
+    from contract.models import Contract
+    from dashboard.models import InspectorSummary
+
+    grouped = Contract.objects.order_by().values(
+        'main_inspector_id', 'main_inspector__full_name', 'main_inspector__position',
+        'main_inspector__direction_id', 'main_inspector__management_id', 'main_inspector__coordination_id',
+    ).annotate(
+        total=Count('id'),
+        active=Count('id', filter=Q(status='ATIVO')),
+        value=Sum('original_value'),
+    )
+    return [
+        InspectorSummary(
+            level=level, scope_id=scope_id, employee_id=row['main_inspector_id'],
+            full_name=row['main_inspector__full_name'], position=row['main_inspector__position'],
+            total_contracts=row['total'], active_contracts=row['active'], total_value=_money(row['value']),
+        )
+        for row in grouped
+        for level, scope_id in _scopes(row, 'main_inspector__')
+    ]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Atualização
+# ─────────────────────────────────────────────────────────────────────────────
+
+def refresh_section(section: str) -> None:
+    """Recalcula uma seção numa transação (leitores veem a versão anterior até o commit)."""
+    from dashboard.models import BudgetSummary, ContractSummary, InspectorSummary, ReportingRefresh
+
+    started = timezone.now()
+    clock = time.monotonic()
+    with transaction.atomic():
+        if section == SECTION_CONTRACTS:
+            contracts = _contract_summaries(timezone.localdate())
+            inspectors = _inspector_summaries()
+            ContractSummary.objects.all().delete()
+            InspectorSummary.objects.all().delete()
+            ContractSummary.objects.bulk_create(contracts)
+            InspectorSummary.objects.bulk_create(inspectors)
+        elif section.startswith(_BUDGETS_PREFIX):
+            year = int(section[len(_BUDGETS_PREFIX):])
+            budgets = _budget_summaries(year)
+            BudgetSummary.objects.filter(year=year).delete()
+            BudgetSummary.objects.bulk_create(budgets)
+        else:
+            raise ValueError(f"Seção de relatório desconhecida: {section}")
+
+        duration_ms = int((time.monotonic() - clock) * 1000)
+        ReportingRefresh.objects.update_or_create(
+            section=section, defaults={'refreshed_at': started, 'duration_ms': duration_ms},
+        )
+        # Escritas commitadas depois do início continuam marcadas para a próxima rodada
+        ReportingRefresh.objects.filter(section=section, stale_since__lte=started).update(stale_since=None)
+
+    logger.debug(f"Resumo do dashboard '{section}' atualizado em {duration_ms} ms")
+
+
+def stale_sections() -> List[str]:
+    """Seções marcadas como desatualizadas; na virada do dia, todas."""
+    from dashboard.models import ReportingRefresh
+
+    contracts = ReportingRefresh.objects.filter(section=SECTION_CONTRACTS).first()
+    if contracts and timezone.localdate(contracts.refreshed_at) < timezone.localdate():
+        # Vencimentos dependem da data; a reconstrução diária completa também cobre
+        # escritas que não passam pelos signals
+        return sorted(ReportingRefresh.objects.values_list('section', flat=True))
+    return sorted(
+        ReportingRefresh.objects.filter(stale_since__isnull=False).values_list('section', flat=True)
+    )
+
+
+def refresh_reporting(sections: Optional[Iterable[str]] = None) -> List[str]:
+    """Atualiza as seções informadas (padrão: as desatualizadas) e invalida o cache."""
+    sections = stale_sections() if sections is None else list(sections)
+    for section in sections:
+        refresh_section(section)
+    if sections:
+        invalidate_dashboard()
+    return sections
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Marcação de seções desatualizadas
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _marks() -> Dict[str, Any]:
+    marks = getattr(_pending, 'marks', None)
+    if marks is None:
+        marks = {'years': set(), 'budget_ids': set(), 'contracts': False, 'everything': False}
+        _pending.marks = marks
+    return marks
+
+
+def mark_stale(
+    years: Iterable[Optional[int]] = (),
+    budget_ids: Iterable[Optional[int]] = (),
+    contracts: bool = False,
+    everything: bool = False,
+) -> None:
+    """Marca seções como desatualizadas no commit da transação corrente."""
+    marks = _marks()
+    marks['years'].update(year for year in years if year is not None)
+    marks['budget_ids'].update(pk for pk in budget_ids if pk is not None)
+    marks['contracts'] = marks['contracts'] or contracts
+    marks['everything'] = marks['everything'] or everything
+    # Registrado a cada marcação, como em budget/services/balances.py: as execuções
+    # extras encontram as pendências vazias
+    transaction.on_commit(flush_stale_marks, robust=True)
+
+
+def flush_stale_marks() -> None:
+    from budget.models import Budget
+    from dashboard.models import ReportingRefresh
+
+    marks = getattr(_pending, 'marks', None)
+    _pending.marks = None
+    if not marks:
+        return
+
+    stale = ReportingRefresh.objects.filter(stale_since__isnull=True)
+    if not marks['everything']:
+        years = set(marks['years'])
+        if marks['budget_ids']:
+            years.update(Budget.objects.filter(pk__in=marks['budget_ids']).values_list('year', flat=True))
+        sections = [budget_section(year) for year in years]
+        if marks['contracts']:
+            sections.append(SECTION_CONTRACTS)
+        if not sections:
+            return
+        stale = stale.filter(section__in=sections)
+    stale.update(stale_since=timezone.now())
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Leitura
+# ─────────────────────────────────────────────────────────────────────────────
+
+def load_rollup(year: int) -> DashboardRollup:
+    """Totais do ano a partir das tabelas de resumo (calcula seções ainda inexistentes)."""
+    from budget.models import Budget
+    from dashboard.models import BudgetSummary, ContractSummary, ReportingRefresh
+
+    sections = [budget_section(year), SECTION_CONTRACTS]
+    refreshed = dict(
+        ReportingRefresh.objects.filter(section__in=sections).values_list('section', 'refreshed_at')
+    )
+    for section in sections:
+        if section in refreshed:
+            continue
+        if section != SECTION_CONTRACTS and not Budget.objects.filter(year=year).exists():
+            continue  # sem orçamentos no ano: nada a guardar
+        refresh_section(section)
+        refreshed[section] = ReportingRefresh.objects.get(section=section).refreshed_at
+
+    budget_rows: Dict[Scope, Dict[str, Dict[str, Decimal]]] = defaultdict(dict)
+    for row in BudgetSummary.objects.filter(year=year):
+        budget_rows[(row.level, row.scope_id)][row.category] = {
+            'total': row.total_amount,
+            'disponivel': row.available_amount,
+            'utilizado': row.used_amount,
+        }
+
+    contract_rows: Dict[Scope, Dict[str, Dict[str, Any]]] = defaultdict(dict)
+    grouped = ContractSummary.objects.order_by().values('level', 'scope_id', 'status').annotate(
+        count=Sum('contract_count'), value=Sum('total_value'),
+        expiring=Sum('expiring_30'), overdue=Sum('expired'),
+    )
+    for row in grouped:
+        contract_rows[(row['level'], row['scope_id'])][row['status']] = {
+            'count': row['count'],
+            'value': _money(row['value']),
+            'expiring_30': row['expiring'],
+            'expired': row['overdue'],
+        }
+
+    return DashboardRollup(
+        year=year,
+        budget_rows=dict(budget_rows),
+        contract_rows=dict(contract_rows),
+        refreshed_at=min(refreshed.values()) if refreshed else timezone.now(),
+    )
+
+
+def top_inspectors(scope: Scope, order_by: Iterable[str], limit: int) -> List[Dict[str, Any]]:
+    """Ranking de fiscais principais do escopo, a partir de InspectorSummary."""
+    from dashboard.models import InspectorSummary
+
+    level, scope_id = scope
+    rows = InspectorSummary.objects.filter(level=level, scope_id=scope_id).order_by(*order_by)[:limit]
+    return [
+        {
+            'main_inspector__id': row.employee_id,
+            'main_inspector__full_name': row.full_name,
+            'main_inspector__position': row.position,
+            'total_contratos': row.total_contracts,
+            'contratos_ativos': row.active_contracts,
+            'valor_total': float(row.total_value),
+        }
+        for row in rows
+    ]
@@ -0,0 +1,107 @@
+"""
+Agregações do dashboard executivo (orçamento e contratos por hierarquia).
+
+Todos os totais de um ano — por direção, gerência, coordenação e geral, quebrados
+por categoria de orçamento e por status de contrato — vêm das tabelas de resumo
+(dashboard/services/reporting.py) como um `DashboardRollup`, independentemente do
+número de direções.
+
+O rollup fica no cache do Django por ano e as respostas que dependem de listas
+top-N por escopo (`cached_payload`) por ano + escopo, no namespace versionado
+"dashboard" de core.caching (com lock contra stampede). Cada atualização das
+tabelas de resumo incrementa a versão do namespace no commit.
+
+Uso:
+    rollup = get_rollup(2026)
+    rollup.budgets(('direction', 3))   # [{'category': 'CAPEX', 'total': ..., ...}]
+    rollup.contracts(GERAL)            # {'total': ..., 'ativos': ..., ...}
+    rollup.refreshed_at                # quando os resumos foram calculados
+"""
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from core.caching import bump_namespace, get_or_compute, make_key
+
+logger = logging.getLogger(__name__)
+
+CACHE_NAMESPACE = "dashboard"
+
+Scope = Tuple[str, int]
+GERAL: Scope = ('geral', 0)
+LEVELS = ('direction', 'management', 'coordination')
+
+ZERO = Decimal('0.00')
+
+_EMPTY_STATUS = {'count': 0, 'value': ZERO, 'expiring_30': 0, 'expired': 0}
+
+
+@dataclass
+class DashboardRollup:
+    """Totais de um ano por escopo: orçamentos por categoria e contratos por status."""
+    year: int
+    budget_rows: Dict[Scope, Dict[str, Dict[str, Decimal]]] = field(default_factory=dict)
+    contract_rows: Dict[Scope, Dict[str, Dict[str, Any]]] = field(default_factory=dict)
+    refreshed_at: Optional[datetime] = None
+
+    def budgets(self, scope: Scope) -> List[Dict[str, Any]]:
+        """Orçamentos do escopo por categoria (ordenados por categoria)."""
+        return [
+            {'category': category, **values}
+            for category, values in sorted(self.budget_rows.get(scope, {}).items())
+        ]
+
+    def budget_totals(self, scope: Scope) -> Dict[str, Decimal]:
+        totals = {'total': ZERO, 'disponivel': ZERO, 'utilizado': ZERO}
+        for values in self.budget_rows.get(scope, {}).values():
+            for name in totals:
+                totals[name] += values[name]
+        return totals
+
+    def contracts_by_status(self, scope: Scope, status: str) -> Dict[str, Any]:
+        return self.contract_rows.get(scope, {}).get(status, _EMPTY_STATUS)
+
+    def contracts(self, scope: Scope) -> Dict[str, Any]:
+        by_status = self.contract_rows.get(scope, {})
+        ativos = self.contracts_by_status(scope, 'ATIVO')
+        return {
+            'total': sum(values['count'] for values in by_status.values()),
+            'ativos': ativos['count'],
+            'encerrados': self.contracts_by_status(scope, 'ENCERRADO')['count'],
+            'valor_total': sum((values['value'] for values in by_status.values()), ZERO),
+            'valor_ativos': ativos['value'],
+            'vencendo_30': ativos['expiring_30'],
+            'vencidos': ativos['expired'],
+        }
+
+    @property
+    def atualizado_em(self) -> Optional[str]:
+        return self.refreshed_at.isoformat() if self.refreshed_at else None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Cache versionado
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _ttl() -> int:
+    return getattr(settings, 'DASHBOARD_CACHE_TTL', 300)
+
+
+def get_rollup(year: int) -> DashboardRollup:
+    from .reporting import load_rollup
+
+    return get_or_compute(make_key(CACHE_NAMESPACE, 'rollup', year), lambda: load_rollup(year), _ttl())
+
+
+def cached_payload(name: str, year: int, scope: Scope, builder: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """Resposta de um endpoint para (ano, escopo), montada por `builder` na primeira chamada."""
+    return get_or_compute(make_key(CACHE_NAMESPACE, name, year, *scope), builder, _ttl())
+
+
+def invalidate_dashboard() -> None:
+    """Nova versão do cache após o commit (as entradas antigas expiram pelo TTL)."""
+    bump_namespace(CACHE_NAMESPACE)
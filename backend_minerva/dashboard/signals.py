@@ -0,0 +1,49 @@
+"""
+Marcação das tabelas de resumo do dashboard como desatualizadas
+
+Cada escrita marca só as seções que pode alterar (ver dashboard/services/reporting.py);
+a marcação é gravada no commit e a tarefa dashboard.refresh_reporting recalcula.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from aid.models import Assistance
+from budget.models import Budget, BudgetMovement
+from budgetline.models import BudgetLine
+from center.models import CenterHierarchy
+from contract.models import Contract
+from employee.models import Employee
+from sector.models import Coordination, Direction, Management
+
+from .services.reporting import mark_stale
+
+
+@receiver([post_save, post_delete], sender=Budget)
+def budget_changed(sender, instance, **kwargs):
+    # O ano ou o status do orçamento podem ter mudado: todas as seções
+    mark_stale(everything=True)
+
+
+@receiver([post_save, post_delete], sender=BudgetLine)
+@receiver([post_save, post_delete], sender=Assistance)
+def budget_balance_changed(sender, instance, **kwargs):
+    mark_stale(budget_ids=[instance.budget_id])
+
+
+@receiver([post_save, post_delete], sender=BudgetMovement)
+def budget_movement_changed(sender, instance, **kwargs):
+    mark_stale(budget_ids=[instance.source_id, instance.destination_id])
+
+
+@receiver([post_save, post_delete], sender=Contract)
+@receiver([post_save, post_delete], sender=Employee)
+def contracts_changed(sender, instance, **kwargs):
+    mark_stale(contracts=True)
+
+
+@receiver([post_save, post_delete], sender=CenterHierarchy)
+@receiver([post_save, post_delete], sender=Direction)
+@receiver([post_save, post_delete], sender=Management)
+@receiver([post_save, post_delete], sender=Coordination)
+def hierarchy_changed(sender, instance, **kwargs):
+    mark_stale(everything=True)
@@ -0,0 +1,33 @@
+import logging
+
+from celery import shared_task
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+_LOCK_KEY = 'dashboard:refresh-reporting-lock'
+_LOCK_SECONDS = 600
+
+
+@shared_task(name='dashboard.refresh_reporting')
+def refresh_reporting():
+    """Atualiza as tabelas de resumo do dashboard marcadas como desatualizadas.
+
+    Agendada em intervalos curtos (DASHBOARD_REPORTING_REFRESH_SECONDS); cada
+    execução recalcula só as seções afetadas por escritas desde a anterior e, na
+    virada do dia, todas. Execuções sobrepostas são descartadas.
+    """
+    from .services.reporting import refresh_reporting as refresh
+
+    if not cache.add(_LOCK_KEY, 1, _LOCK_SECONDS):
+        logger.info("refresh_reporting: atualização anterior ainda em andamento.")
+        return {'sections': [], 'skipped': True}
+
+    try:
+        sections = refresh()
+    finally:
+        cache.delete(_LOCK_KEY)
+
+    if sections:
+        logger.info("refresh_reporting: %d seções atualizadas (%s).", len(sections), ', '.join(sections))
+    return {'sections': sections, 'skipped': False}
@@ -0,0 +1,164 @@
+"""
+Testes para as agregações do dashboard (dashboard/services/).
+
+Cobre:
+- Totais por direção/gerência/coordenação e geral, sem contar em dobro um centro
+  gestor associado a mais de uma coordenação da mesma direção
+- Número de consultas constante, independente da quantidade de direções
+- Tabelas de resumo: escritas marcam só as seções afetadas, respostas continuam
+  servidas do resumo (com data de atualização) até a tarefa de atualização rodar
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from budget.models import Budget
+from budgetline.models import BudgetLine
+from center.models import CenterHierarchy, ManagementCenter
+from contract.models import Contract
+from dashboard.models import ReportingRefresh
+from dashboard.services.reporting import budget_section, refresh_reporting, stale_sections
+from dashboard.services.rollup import GERAL, get_rollup
+from dashboard.tasks import refresh_reporting as refresh_reporting_task
+from employee.models import Employee
+from sector.models import Coordination, Direction, Management
+
+
+class DashboardTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_superuser(email='dash@minerva.local', password='testpass123')
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+
+        self.direction = Direction.objects.create(name='Diretoria A')
+        self.management = Management.objects.create(direction=self.direction, name='Gerência A')
+        self.coord_1 = Coordination.objects.create(management=self.management, name='Coord 1')
+        self.coord_2 = Coordination.objects.create(management=self.management, name='Coord 2')
+
+        center = ManagementCenter.objects.create(name='MC Dashboard')
+        for coordination in (self.coord_1, self.coord_2):
+            CenterHierarchy.objects.create(
+                management_center=center, direction=self.direction,
+                management=self.management, coordination=coordination,
+            )
+        capex = Budget.objects.create(
+            year=2026, category='CAPEX', management_center=center,
+            total_amount=Decimal('1000.00'), available_amount=Decimal('1000.00'),
+        )
+        Budget.objects.create(
+            year=2026, category='OPEX', management_center=center,
+            total_amount=Decimal('500.00'), available_amount=Decimal('500.00'),
+        )
+        Budget.objects.create(
+            year=2025, category='OPEX', management_center=center,
+            total_amount=Decimal('9999.00'), available_amount=Decimal('9999.00'),
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.line = BudgetLine.objects.create(
+                budget=capex, expense_type='Base Principal', probable_procurement_type='FUNDO FIXO',
+                budgeted_amount=Decimal('800.00'),
+            )
+
+        self.inspector = Employee.objects.create(
+            full_name='Fiscal A', email='fiscal.a@minerva.local', cpf='00000000000',
+            direction=self.direction, management=self.management, coordination=self.coord_1,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self._contract('300.00', expiration_date=date.today() + timedelta(days=10))
+            self._contract('200.00', status='ENCERRADO')
+
+    def _contract(self, value, status='ATIVO', expiration_date=None):
+        return Contract.objects.create(
+            budget_line=self.line, main_inspector=self.inspector, substitute_inspector=self.inspector,
+            payment_nature='MENSAL', description='Contrato', original_value=Decimal(value),
+            start_date=date.today(), expiration_date=expiration_date, status=status,
+            created_by=self.user, updated_by=self.user,
+        )
+
+    def test_rollup_scopes(self):
+        rollup = get_rollup(2026)
+
+        for scope in (('direction', self.direction.id), ('management', self.management.id), GERAL):
+            self.assertEqual(rollup.budget_totals(scope)['total'], Decimal('1500.00'))
+        self.assertEqual(rollup.budget_totals(('coordination', self.coord_2.id))['total'], Decimal('1500.00'))
+        self.assertEqual(
+            [item['category'] for item in rollup.budgets(('direction', self.direction.id))], ['CAPEX', 'OPEX'],
+        )
+
+        contracts = rollup.contracts(('coordination', self.coord_1.id))
+        self.assertEqual((contracts['total'], contracts['ativos'], contracts['encerrados']), (2, 1, 1))
+        self.assertEqual(contracts['valor_ativos'], Decimal('300.00'))
+        self.assertEqual((contracts['vencendo_30'], contracts['vencidos']), (1, 0))
+        self.assertEqual(rollup.contracts(('coordination', self.coord_2.id))['total'], 0)
+
+    def test_direcoes_query_count_independent_of_directions(self):
+        def count_queries():
+            cache.clear()
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get('/api/v1/dashboard/orcamento/direcoes/?ano=2026', headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            return len(ctx.captured_queries), response.json()
+
+        get_rollup(2026)  # resumos calculados
+        baseline, data = count_queries()
+        self.assertEqual(data['direcoes'][0]['total_orcamento'], 1500.0)
+        self.assertEqual(data['geral']['total_contratos'], 2)
+
+        for i in range(5):
+            Direction.objects.create(name=f'Diretoria extra {i}')
+        self.assertEqual(count_queries()[0], baseline)
+
+    def test_resumo_served_from_summary_until_refresh(self):
+        url = f'/api/v1/dashboard/orcamento/resumo/?ano=2026&direcao_id={self.direction.id}'
+        first = self.client.get(url, headers=self.headers).json()
+        self.assertEqual(first['contratos']['total'], 2)
+        self.assertEqual(first['top_fiscais'][0]['main_inspector__full_name'], 'Fiscal A')
+        self.assertIsNotNone(first['atualizado_em'])
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url, headers=self.headers)
+        self.assertFalse(any('contract_contract' in q['sql'] for q in ctx.captured_queries))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._contract('50.00')
+        self.assertEqual(stale_sections(), ['contracts'])
+        self.assertEqual(self.client.get(url, headers=self.headers).json()['contratos']['total'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(refresh_reporting_task(), {'sections': ['contracts'], 'skipped': False})
+
+        second = self.client.get(url, headers=self.headers).json()
+        self.assertEqual(second['contratos']['total'], 3)
+        self.assertEqual(second['contratos']['valor_total'], 550.0)
+        self.assertEqual(stale_sections(), [])
+
+    def test_writes_mark_only_affected_sections(self):
+        get_rollup(2026)
+        get_rollup(2025)
+        self.assertEqual(
+            set(ReportingRefresh.objects.values_list('section', flat=True)),
+            {'budgets:2025', 'budgets:2026', 'contracts'},
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.line.budgeted_amount = Decimal('900.00')
+            self.line.save()
+        self.assertEqual(stale_sections(), [budget_section(2026)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh_reporting()
+        capex = get_rollup(2026).budgets(GERAL)[0]
+        self.assertEqual((capex['category'], capex['utilizado']), ('CAPEX', Decimal('900.00')))
+
+        # Mudança na hierarquia: todas as seções
+        with self.captureOnCommitCallbacks(execute=True):
+            Coordination.objects.create(management=self.management, name='Coord 3')
+        self.assertEqual(stale_sections(), ['budgets:2025', 'budgets:2026', 'contracts'])
@@ -1,14 +1,12 @@
-from django.db.models import Sum, Count, Q, DecimalField
-from django.db.models.functions import Coalesce
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from decimal import Decimal
 
 from sector.models import Direction, Management, Coordination
-from budget.models import Budget
 from contract.models import Contract
+from .services.reporting import top_inspectors
+from .services.rollup import GERAL, cached_payload, get_rollup
 
 
 def _is_admin(user):
@@ -37,51 +35,29 @@ def orcamento_direcoes(request):
     except (TypeError, ValueError):
         return Response({'detail': 'Ano inválido.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    directions = Direction.objects.filter(is_active=True).order_by('name')
+    rollup = get_rollup(ano)
     result = []
 
-    for direction in directions:
-        budgets = Budget.objects.filter(
-            management_center__hierarchy_associations__direction=direction,
-            year=ano,
-            status='ATIVO',
-        ).distinct()
-
-        budget_agg = budgets.aggregate(
-            total=Coalesce(Sum('total_amount'), Decimal('0.00'), output_field=DecimalField()),
-            disponivel=Coalesce(Sum('available_amount'), Decimal('0.00'), output_field=DecimalField()),
-        )
-
-        contracts = Contract.objects.filter(
-            main_inspector__direction=direction,
-        )
-        contract_agg = contracts.aggregate(
-            total=Count('id'),
-            ativos=Count('id', filter=Q(status='ATIVO')),
-        )
-
+    for direction in Direction.objects.filter(is_active=True).order_by('name').only('id', 'name'):
+        scope = ('direction', direction.id)
+        budget_totals = rollup.budget_totals(scope)
+        contract_totals = rollup.contracts(scope)
         result.append({
             'id': direction.id,
             'name': direction.name,
-            'total_orcamento': float(budget_agg['total']),
-            'disponivel_orcamento': float(budget_agg['disponivel']),
-            'total_contratos': contract_agg['total'],
-            'contratos_ativos': contract_agg['ativos'],
+            'total_orcamento': float(budget_totals['total']),
+            'disponivel_orcamento': float(budget_totals['disponivel']),
+            'total_contratos': contract_totals['total'],
+            'contratos_ativos': contract_totals['ativos'],
         })
 
     # Geral = soma de tudo
-    total_budgets = Budget.objects.filter(year=ano, status='ATIVO')
-    total_agg = total_budgets.aggregate(
-        total=Coalesce(Sum('total_amount'), Decimal('0.00'), output_field=DecimalField()),
-        disponivel=Coalesce(Sum('available_amount'), Decimal('0.00'), output_field=DecimalField()),
-    )
-    total_contracts = Contract.objects.aggregate(
-        total=Count('id'),
-        ativos=Count('id', filter=Q(status='ATIVO')),
-    )
+    total_agg = rollup.budget_totals(GERAL)
+    total_contracts = rollup.contracts(GERAL)
 
     return Response({
         'ano': ano,
+        'atualizado_em': rollup.atualizado_em,
         'geral': {
             'total_orcamento': float(total_agg['total']),
             'disponivel_orcamento': float(total_agg['disponivel']),
@@ -92,6 +68,24 @@ def orcamento_direcoes(request):
     })
 
 
+def _budget_categories(rollup, scope):
+    return [
+        {
+            'category': item['category'],
+            'total': float(item['total']),
+            'disponivel': float(item['disponivel']),
+            'utilizado': float(item['utilizado']),
+        }
+        for item in rollup.budgets(scope)
+    ]
+
+
+def _scope_contracts(level, scope_id):
+    if level == 'geral':
+        return Contract.objects.all()
+    return Contract.objects.filter(**{f'main_inspector__{level}_id': scope_id})
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def orcamento_resumo(request):
@@ -115,59 +109,31 @@ def orcamento_resumo(request):
         return Response({'detail': 'Parâmetros inválidos.'}, status=status.HTTP_400_BAD_REQUEST)
 
     if direcao_id == 0:
-        budgets = Budget.objects.filter(year=ano, status='ATIVO')
-        contracts = Contract.objects.all()
+        scope = GERAL
         scope_name = 'GERAL'
     else:
         try:
             direction = Direction.objects.get(pk=direcao_id, is_active=True)
         except Direction.DoesNotExist:
             return Response({'detail': 'Direção não encontrada.'}, status=status.HTTP_404_NOT_FOUND)
-
-        budgets = Budget.objects.filter(
-            management_center__hierarchy_associations__direction=direction,
-            year=ano,
-            status='ATIVO',
-        ).distinct()
-        contracts = Contract.objects.filter(main_inspector__direction=direction)
+        scope = ('direction', direction.id)
         scope_name = direction.name
 
+    return Response(cached_payload('resumo', ano, scope, lambda: _resumo_payload(scope, scope_name, ano)))
+
+
+def _resumo_payload(scope, scope_name, ano):
+    rollup = get_rollup(ano)
+    contracts = _scope_contracts(*scope)
+
     # Por categoria
-    por_categoria = list(
-        budgets.values('category').annotate(
-            total=Coalesce(Sum('total_amount'), Decimal('0.00'), output_field=DecimalField()),
-            disponivel=Coalesce(Sum('available_amount'), Decimal('0.00'), output_field=DecimalField()),
-            utilizado=Coalesce(Sum('cached_used_amount'), Decimal('0.00'), output_field=DecimalField()),
-        ).order_by('category')
-    )
-    for item in por_categoria:
-        item['total'] = float(item['total'])
-        item['disponivel'] = float(item['disponivel'])
-        item['utilizado'] = float(item['utilizado'])
+    por_categoria = _budget_categories(rollup, scope)
 
     # Contratos por status
-    contract_stats = contracts.aggregate(
-        total=Count('id'),
-        ativos=Count('id', filter=Q(status='ATIVO')),
-        encerrados=Count('id', filter=Q(status='ENCERRADO')),
-        valor_total=Coalesce(Sum('original_value'), Decimal('0.00'), output_field=DecimalField()),
-        valor_ativos=Coalesce(Sum('original_value', filter=Q(status='ATIVO')), Decimal('0.00'), output_field=DecimalField()),
-    )
+    contract_stats = rollup.contracts(scope)
 
     # Top 5 fiscais
-    top_fiscais = list(
-        contracts.values(
-            'main_inspector__id',
-            'main_inspector__full_name',
-            'main_inspector__position',
-        ).annotate(
-            total_contratos=Count('id'),
-            contratos_ativos=Count('id', filter=Q(status='ATIVO')),
-            valor_total=Coalesce(Sum('original_value'), Decimal('0.00'), output_field=DecimalField()),
-        ).order_by('-contratos_ativos', '-valor_total')[:5]
-    )
-    for f in top_fiscais:
-        f['valor_total'] = float(f['valor_total'])
+    top_fiscais = top_inspectors(scope, ('-active_contracts', '-total_value'), 5)
 
     # Top 10 contratos por valor
     top_contratos = list(
@@ -181,9 +147,10 @@ def orcamento_resumo(request):
         c['original_value'] = float(c['original_value'])
         c['current_value'] = float(c['current_value'])
 
-    return Response({
+    return {
         'scope_name': scope_name,
         'ano': ano,
+        'atualizado_em': rollup.atualizado_em,
         'por_categoria': por_categoria,
         'contratos': {
             'total': contract_stats['total'],
@@ -191,10 +158,12 @@ def orcamento_resumo(request):
             'encerrados': contract_stats['encerrados'],
             'valor_total': float(contract_stats['valor_total']),
             'valor_ativos': float(contract_stats['valor_ativos']),
+            'vencendo_30': contract_stats['vencendo_30'],
+            'vencidos': contract_stats['vencidos'],
         },
         'top_fiscais': top_fiscais,
         'top_contratos': top_contratos,
-    })
+    }
 
 
 @api_view(['GET'])
@@ -225,60 +194,37 @@ def orcamento_graficos(request):
         return Response({'detail': 'Parâmetros inválidos.'}, status=status.HTTP_400_BAD_REQUEST)
 
     if coordination_id > 0:
-        try:
-            coordination = Coordination.objects.get(pk=coordination_id, is_active=True)
-        except Coordination.DoesNotExist:
+        if not Coordination.objects.filter(pk=coordination_id, is_active=True).exists():
             return Response({'detail': 'Coordenação não encontrada.'}, status=status.HTTP_404_NOT_FOUND)
-        budgets = Budget.objects.filter(
-            management_center__hierarchy_associations__coordination=coordination,
-            year=ano,
-            status='ATIVO',
-        ).distinct()
-        contracts = Contract.objects.filter(main_inspector__coordination=coordination)
+        scope = ('coordination', coordination_id)
     elif management_id > 0:
-        try:
-            management = Management.objects.get(pk=management_id, is_active=True)
-        except Management.DoesNotExist:
+        if not Management.objects.filter(pk=management_id, is_active=True).exists():
             return Response({'detail': 'Gerência não encontrada.'}, status=status.HTTP_404_NOT_FOUND)
-        budgets = Budget.objects.filter(
-            management_center__hierarchy_associations__management=management,
-            year=ano,
-            status='ATIVO',
-        ).distinct()
-        contracts = Contract.objects.filter(main_inspector__management=management)
+        scope = ('management', management_id)
     elif direcao_id == 0:
-        budgets = Budget.objects.filter(year=ano, status='ATIVO')
-        contracts = Contract.objects.all()
+        scope = GERAL
     else:
-        try:
-            direction = Direction.objects.get(pk=direcao_id, is_active=True)
-        except Direction.DoesNotExist:
+        if not Direction.objects.filter(pk=direcao_id, is_active=True).exists():
             return Response({'detail': 'Direção não encontrada.'}, status=status.HTTP_404_NOT_FOUND)
+        scope = ('direction', direcao_id)
+
+    return Response(cached_payload('graficos', ano, scope, lambda: _graficos_payload(scope, ano)))
+
 
-        budgets = Budget.objects.filter(
-            management_center__hierarchy_associations__direction=direction,
-            year=ano,
-            status='ATIVO',
-        ).distinct()
-        contracts = Contract.objects.filter(main_inspector__direction=direction)
+def _graficos_payload(scope, ano):
+    rollup = get_rollup(ano)
+    contracts = _scope_contracts(*scope)
 
     # Doughnut: orçamento por categoria
-    por_categoria = list(
-        budgets.values('category').annotate(
-            value=Coalesce(Sum('total_amount'), Decimal('0.00'), output_field=DecimalField()),
-        ).order_by('category')
-    )
-    for item in por_categoria:
-        item['name'] = item.pop('category')
-        item['value'] = float(item['value'])
+    por_categoria = [
+        {'name': item['category'], 'value': float(item['total'])}
+        for item in rollup.budgets(scope)
+    ]
 
     # Pie: contratos por status
     por_status = []
     for s, label in [('ATIVO', 'Ativos'), ('ENCERRADO', 'Encerrados')]:
-        agg = contracts.filter(status=s).aggregate(
-            count=Count('id'),
-            value=Coalesce(Sum('original_value'), Decimal('0.00'), output_field=DecimalField()),
-        )
+        agg = rollup.contracts_by_status(scope, s)
         por_status.append({
             'name': label,
             'status': s,
@@ -287,17 +233,7 @@ def orcamento_graficos(request):
         })
 
     # Bar: distribuição financeira por categoria (total vs disponível)
-    dist_financeira = list(
-        budgets.values('category').annotate(
-            total=Coalesce(Sum('total_amount'), Decimal('0.00'), output_field=DecimalField()),
-            disponivel=Coalesce(Sum('available_amount'), Decimal('0.00'), output_field=DecimalField()),
-            utilizado=Coalesce(Sum('cached_used_amount'), Decimal('0.00'), output_field=DecimalField()),
-        ).order_by('category')
-    )
-    for item in dist_financeira:
-        item['total'] = float(item['total'])
-        item['disponivel'] = float(item['disponivel'])
-        item['utilizado'] = float(item['utilizado'])
+    dist_financeira = _budget_categories(rollup, scope)
 
     # Bar: top 10 contratos
     top_contratos = list(
@@ -310,21 +246,20 @@ def orcamento_graficos(request):
         c['name'] = c['protocol_number']
 
     # Bar: ranking fiscais (top 10)
-    ranking_fiscais = list(
-        contracts.values(
-            'main_inspector__full_name',
-        ).annotate(
-            contratos_ativos=Count('id', filter=Q(status='ATIVO')),
-            total_contratos=Count('id'),
-        ).order_by('-contratos_ativos', '-total_contratos')[:10]
-    )
-    for f in ranking_fiscais:
-        f['name'] = f.pop('main_inspector__full_name') or 'N/A'
-
-    return Response({
+    ranking_fiscais = [
+        {
+            'name': f['main_inspector__full_name'] or 'N/A',
+            'contratos_ativos': f['contratos_ativos'],
+            'total_contratos': f['total_contratos'],
+        }
+        for f in top_inspectors(scope, ('-active_contracts', '-total_contracts'), 10)
+    ]
+
+    return {
+        'atualizado_em': rollup.atualizado_em,
         'por_categoria': por_categoria,
         'por_status_contrato': por_status,
         'distribuicao_financeira': dist_financeira,
         'top_contratos': top_contratos,
         'ranking_fiscais': ranking_fiscais,
-    })
+    }
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:14
+
+from django.db import migrations, models
+
+from core.search import backfill_operation, trigram_index_operation
+
+# Caminhos registrados em models.py na data desta migração
+SEARCH_PATHS = ('full_name', 'cpf', 'email', 'employee_id', 'direction__name', 'management__name', 'coordination__name')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0002_alter_employee_created_by_alter_employee_updated_by'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Documento de busca'),
+        ),
+        backfill_operation('employee', 'employee', SEARCH_PATHS),
+        trigram_index_operation('employee_employee'),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from core.search import register as register_search
 from sector.models import Direction, Management, Coordination
 from accounts.models import User
 
@@ -37,6 +38,7 @@ class Employee(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='employees_created', verbose_name='Criado por', null=True, blank=True)
     updated_by = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='employees_updated', verbose_name='Atualizado por', null=True, blank=True)
+    search_document = models.TextField(default='', blank=True, editable=False, verbose_name='Documento de busca')
 
     def __str__(self):
         return self.full_name + " - " + self.cpf
@@ -52,3 +54,7 @@ class Employee(models.Model):
             models.Index(fields=['management'], name='employee_management_idx'),
             models.Index(fields=['coordination'], name='employee_coordination_idx'),
         ]
+
+
+# Texto pesquisável das listagens (core.search)
+register_search(Employee, ('full_name', 'cpf', 'email', 'employee_id', 'direction__name', 'management__name', 'coordination__name'))
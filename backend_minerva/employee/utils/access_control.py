@@ -1,22 +1,77 @@
-def get_employee_queryset(user, queryset):
+SCOPE_ALL = 'all'
+SCOPE_NONE = 'none'
+
+
+def resolve_employee_scope(user, group_names):
+    """
+    Escopo hierárquico do usuário sobre funcionários: (SCOPE_ALL, None),
+    (SCOPE_NONE, None) ou (campo, valor) — ex: ('direction', 3).
+    """
     if user.is_superuser:
-        return queryset
+        return SCOPE_ALL, None
 
     employee = getattr(user, 'employee', None)
 
     if employee is None:
-        return queryset.none()
+        return SCOPE_NONE, None
+
+    groups = set(group_names)
+
+    if 'PRESIDENTE' in groups:
+        return SCOPE_ALL, None
+
+    if 'DIRETOR' in groups:
+        return 'direction', employee.direction_id
+
+    if 'GERENTE' in groups:
+        return 'management', employee.management_id
+
+    if 'COORDENADOR' in groups:
+        return 'coordination', employee.coordination_id
+
+    return SCOPE_NONE, None
+
 
-    if user.groups.filter(name='PRESIDENTE').exists():
+def get_employee_scope(user):
+    """Escopo sobre funcionários, lido do escopo de acesso em cache do usuário."""
+    from access_control.services.access_scope import get_access_scope
+
+    if user.is_superuser:
+        return SCOPE_ALL, None
+    return get_access_scope(user).employee_scope
+
+
+def filter_by_employee_scope(queryset, scope):
+    field, value = scope
+    if field == SCOPE_ALL:
         return queryset
+    if field == SCOPE_NONE:
+        return queryset.none()
+    return queryset.filter(**{field: value})
 
-    if user.groups.filter(name='DIRETOR').exists():
-        return queryset.filter(direction=employee.direction)
 
-    if user.groups.filter(name='GERENTE').exists():
-        return queryset.filter(management=employee.management)
+def get_employee_queryset(user, queryset):
+    return filter_by_employee_scope(queryset, get_employee_scope(user))
 
-    if user.groups.filter(name='COORDENADOR').exists():
-        return queryset.filter(coordination=employee.coordination)
 
-    return queryset.none()
+def filter_by_inspector_scope(user, queryset, fields=('main_inspector', 'substitute_inspector')):
+    """
+    Restringe `queryset` aos registros cujos fiscais (`fields`) estão no escopo do
+    usuário. Cada campo vira um `<campo>_id IN (subconsulta indexada)` — sem JOIN,
+    portanto sem linhas duplicadas e sem DISTINCT.
+    """
+    from django.db.models import Q
+
+    from employee.models import Employee
+
+    scope = get_employee_scope(user)
+    if scope[0] == SCOPE_ALL:
+        return queryset
+    if scope[0] == SCOPE_NONE:
+        return queryset.none()
+
+    employees = filter_by_employee_scope(Employee.objects.all(), scope).values('pk')
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}_id__in': employees})
+    return queryset.filter(condition)
@@ -3,12 +3,15 @@ from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from accounts.permissions import IsManagerOrAbove
+from core.counting import track_counts
 from core.pagination import CustomPageNumberPagination
 from .models import Employee
 from .utils.access_control import get_employee_queryset
 from .serializers import EmployeeSerializer, EmployeeWriteSerializer
 from .utils.messages import EMPLOYEE_MESSAGES
 
+track_counts(Employee)
+
 @extend_schema(tags=['Colaboradores'])
 class EmployeeListView(generics.ListAPIView):
     queryset = Employee.objects.all()
@@ -17,10 +20,6 @@ class EmployeeListView(generics.ListAPIView):
     pagination_class = CustomPageNumberPagination
 
     def get_queryset(self):
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.info(f"Usuario fazendo requisicao: {self.request.user.email}")
-
         queryset = Employee.objects.select_related('direction', 'management', 'coordination').all()
 
 
@@ -37,21 +36,7 @@ class EmployeeListView(generics.ListAPIView):
         if status_filter and status_filter.upper() != 'ALL' and status_filter.strip() != '':
             queryset = queryset.filter(status=status_filter)
 
-
-        search = self.request.query_params.get('search', None)
-        if search:
-            from django.db.models import Q
-            queryset = queryset.filter(
-                Q(full_name__icontains=search) |
-                Q(cpf__icontains=search) |
-                Q(email__icontains=search) |
-                Q(employee_id__icontains=search) |
-                Q(direction__name__icontains=search) |
-                Q(management__name__icontains=search) |
-                Q(coordination__name__icontains=search)
-            )
-
-        logger.info(f"Total employees retornados: {queryset.count()}")
+        # ?search= fica com o DocumentSearchFilter (core.search)
         return queryset
 
 
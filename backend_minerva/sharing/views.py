@@ -7,6 +7,8 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from core.search import search_queryset
+
 from .models import ResourceShare, ShareNotification
 from .serializers import ResourceShareCreateSerializer, ResourceShareListSerializer, ShareNotificationSerializer
 from .services import get_resource_name, resolve_invited_user, send_share_email, create_share_notification
@@ -187,10 +189,10 @@ class UserSearchView(APIView):
 
         from django.contrib.auth import get_user_model
         UserModel = get_user_model()
-        users = UserModel.objects.filter(
-            Q(email__icontains=q) | Q(employee__employee_id__icontains=q),
-            is_active=True,
-        ).exclude(pk=request.user.pk).select_related('employee').distinct()[:10]
+        users = search_queryset(
+            UserModel.objects.filter(is_active=True).exclude(pk=request.user.pk).select_related('employee'),
+            q, fields=('email', 'employee__employee_id'),
+        )[:10]
 
         results = []
         for u in users:
@@ -221,24 +223,17 @@ class ResourceSearchView(APIView):
         results = []
         if resource_type == 'BUDGET':
             from budget.models import Budget
-            qs = Budget.objects.filter(
-                Q(category__icontains=q) | Q(year__icontains=q) |
-                Q(management_center__name__icontains=q)
-            )[:10]
+            qs = search_queryset(Budget.objects.select_related('management_center'), q)[:10]
             results = [{'id': b.id, 'name': str(b)} for b in qs]
 
         elif resource_type == 'BUDGET_LINE':
             from budgetline.models import BudgetLine
-            qs = BudgetLine.objects.filter(
-                Q(summary_description__icontains=q) | Q(budget__category__icontains=q)
-            ).select_related('budget')[:10]
+            qs = search_queryset(BudgetLine.objects.select_related('budget'), q)[:10]
             results = [{'id': bl.id, 'name': bl.summary_description or str(bl)} for bl in qs]
 
         elif resource_type == 'CONTRACT':
             from contract.models import Contract
-            qs = Contract.objects.filter(
-                Q(protocol_number__icontains=q) | Q(description__icontains=q)
-            )[:10]
+            qs = search_queryset(Contract.objects.all(), q)[:10]
             results = [{'id': c.id, 'name': f"{c.protocol_number} — {c.description[:60]}"} for c in qs]
 
         return Response({'results': results})